@@ -957,9 +957,9 @@ class FileListItem {
                 <div class="file-thumbnail enhanced ${supportsAnimation ? 'supports-animation' : ''}"
                      title="Click to enlarge"
                      data-file-id="${this.file.id}"
-                     data-static-url="${CONFIG.API_BASE_URL}/files/${this.file.id}/thumbnail"
+                     data-static-url="${CONFIG.API_BASE_URL}/files/${this.file.id}/thumbnail?size=256"
                      ${supportsAnimation ? `data-animated-url="${CONFIG.API_BASE_URL}/files/${this.file.id}/thumbnail/animated"` : ''}>
-                    <img src="${CONFIG.API_BASE_URL}/files/${this.file.id}/thumbnail"
+                    <img src="${CONFIG.API_BASE_URL}/files/${this.file.id}/thumbnail?size=256"
                          alt="Thumbnail for ${escapeHtml(this.file.filename)}"
                          class="thumbnail-image"
                          onerror="this.src='assets/placeholder-thumbnail.svg'; this.onerror=null; this.classList.add('placeholder-image');"
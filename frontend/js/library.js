@@ -205,7 +205,8 @@ class LibraryManager {
             // Build query parameters
             const params = new URLSearchParams({
                 page: this.currentPage,
-                limit: this.pageSize
+                limit: this.pageSize,
+                include: 'sources'  // Cards show the source icon
             });
 
             // Add filters
@@ -277,6 +278,19 @@ class LibraryManager {
         this.setupAnimatedThumbnails();
     }
 
+    /**
+     * Get thumbnail URL for a library file
+     * @param {Object} file - Library file
+     * @param {number} [size] - Edge length; selects a downscaled PNG/WebP derivative
+     */
+    getThumbnailUrl(file, size) {
+        if (!file.has_thumbnail) return null;
+        const query = size ? `?size=${size}` : '';
+        // Content-addressed URL is cached immutably by the browser
+        if (file.thumbnail_hash) return `${CONFIG.API_BASE_URL}/library/thumbnails/${file.thumbnail_hash}${query}`;
+        return `${CONFIG.API_BASE_URL}/library/files/${file.checksum}/thumbnail${query}`;
+    }
+
     /**
      * Create file card HTML
      */
@@ -284,7 +298,7 @@ class LibraryManager {
         const sourceIcon = this.getSourceIcon(file.sources);
         const statusBadge = this.getStatusBadge(file.status);
         const duplicateBadge = this.getDuplicateBadge(file);
-        const thumbnailUrl = file.has_thumbnail ? `${CONFIG.API_BASE_URL}/library/files/${file.checksum}/thumbnail` : null;
+        const thumbnailUrl = this.getThumbnailUrl(file, 256);
 
         // Check if file supports animated preview (STL or 3MF) and has a thumbnail
         const supportsAnimation = file.has_thumbnail && file.file_type && ['stl', '3mf'].includes(file.file_type.toLowerCase());
@@ -299,7 +313,7 @@ class LibraryManager {
         return `
             <div class="library-file-card ${file.is_duplicate ? 'is-duplicate' : ''}" data-checksum="${sanitizeAttribute(file.checksum)}">
                 <div class="file-card-thumbnail ${supportsAnimation ? 'supports-animation' : ''}"
-                     ${supportsAnimation ? `data-static-url="${CONFIG.API_BASE_URL}/library/files/${file.checksum}/thumbnail" data-animated-url="${CONFIG.API_BASE_URL}/library/files/${file.checksum}/thumbnail/animated"` : ''}>
+                     ${supportsAnimation ? `data-static-url="${thumbnailUrl}" data-animated-url="${CONFIG.API_BASE_URL}/library/files/${file.checksum}/thumbnail/animated"` : ''}>
                     ${thumbnailUrl
                         ? `<img src="${sanitizeUrl(thumbnailUrl)}" alt="${sanitizeAttribute(file.filename)}" loading="lazy" class="thumbnail-image">`
                         : `<div class="thumbnail-placeholder">${this.getFileTypeIcon(file.file_type)}</div>`
@@ -717,7 +731,7 @@ class LibraryManager {
      * Render file detail view
      */
     renderFileDetail(file) {
-        const thumbnailUrl = file.has_thumbnail ? `${CONFIG.API_BASE_URL}/library/files/${file.checksum}/thumbnail` : null;
+        const thumbnailUrl = this.getThumbnailUrl(file);
 
         return `
             <div class="file-detail-container">
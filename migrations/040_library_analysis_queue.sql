@@ -0,0 +1,14 @@
+-- Migration: 040_library_analysis_queue.sql
+-- Description: Persist the library metadata-extraction queue so pending and
+--              in-flight analyses resume after a restart.
+-- Date: 2026-10-18
+
+CREATE TABLE IF NOT EXISTS library_analysis_queue (
+    checksum TEXT PRIMARY KEY NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 1,
+    status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running')),
+    enqueued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    started_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_library_analysis_queue_order ON library_analysis_queue(priority, enqueued_at);
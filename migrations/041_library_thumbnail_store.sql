@@ -0,0 +1,10 @@
+-- Migration: 041_library_thumbnail_store.sql
+-- Description: Library thumbnails move out of library_files.thumbnail_data
+--              (base64 text) into a content-addressed on-disk store. Rows
+--              keep only the SHA-256 of the image bytes. Existing rows are
+--              moved to the store by LibraryService on startup.
+-- Date: 2026-10-18
+
+ALTER TABLE library_files ADD COLUMN thumbnail_hash TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_library_files_thumbnail_hash ON library_files(thumbnail_hash);
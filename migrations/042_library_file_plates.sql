@@ -0,0 +1,29 @@
+-- Migration: 042_library_file_plates.sql
+-- Description: Per-plate metadata for multi-plate 3MF projects. One row per
+--              plate with its print time, filament usage, object count and
+--              thumbnail, so library queries can filter and sort by plate.
+--              library_files.plate_count is denormalized for list sorting.
+-- Date: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS library_file_plates (
+    file_checksum TEXT NOT NULL,
+    plate_index INTEGER NOT NULL,
+    name TEXT,
+    object_count INTEGER,
+    estimated_time INTEGER,      -- seconds
+    filament_weight REAL,        -- grams
+    filament_length REAL,        -- meters
+    filaments TEXT,              -- JSON array: [{"type", "color", "used_g", "used_m"}]
+    layer_height REAL,
+    support_used BOOLEAN,
+    has_gcode BOOLEAN DEFAULT 0,
+    thumbnail_hash TEXT,
+    PRIMARY KEY (file_checksum, plate_index),
+    FOREIGN KEY (file_checksum) REFERENCES library_files(checksum) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_library_file_plates_time ON library_file_plates(estimated_time);
+CREATE INDEX IF NOT EXISTS idx_library_file_plates_weight ON library_file_plates(filament_weight);
+CREATE INDEX IF NOT EXISTS idx_library_file_plates_thumbnail ON library_file_plates(thumbnail_hash);
+
+ALTER TABLE library_files ADD COLUMN plate_count INTEGER;
@@ -0,0 +1,23 @@
+-- Migration: 043_library_file_layer_stats.sql
+-- Description: Per-layer statistics computed from a G-code file's toolpath
+--              (print time, filament, travel), so cost and ETA no longer
+--              depend on slicer comments. One row per file: totals as
+--              columns, the per-layer table as a packed float32 blob
+--              (z, extrusion_length, print_distance, travel_distance, time,
+--              filament_weight per layer).
+-- Date: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS library_file_layer_stats (
+    file_checksum TEXT PRIMARY KEY,
+    layer_count INTEGER NOT NULL,
+    estimated_time INTEGER,      -- seconds
+    filament_length REAL,        -- meters
+    filament_weight REAL,        -- grams
+    travel_distance REAL,        -- meters
+    model_version INTEGER NOT NULL,
+    layers BLOB,
+    analyzed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (file_checksum) REFERENCES library_files(checksum) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_library_file_layer_stats_time ON library_file_layer_stats(estimated_time);
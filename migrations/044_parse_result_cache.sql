@@ -0,0 +1,19 @@
+-- Migration: 044_parse_result_cache.sql
+-- Description: Persistent cache of file parser output, keyed by content
+--              checksum, parser name and parser version. Reprocessing a file,
+--              or the same content arriving from another source, reuses the
+--              stored result; bumping a parser version invalidates only that
+--              parser's entries. Results are zlib-compressed JSON.
+-- Date: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS parse_result_cache (
+    checksum TEXT NOT NULL,
+    parser_name TEXT NOT NULL,
+    parser_version TEXT NOT NULL,
+    result BLOB NOT NULL,
+    result_size INTEGER,           -- uncompressed bytes
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (checksum, parser_name, parser_version)
+);
+
+CREATE INDEX IF NOT EXISTS idx_parse_result_cache_parser ON parse_result_cache(parser_name, parser_version);
@@ -0,0 +1,13 @@
+-- Migration: 045_timelapse_folder_state.sql
+-- Description: Scan state of timelapse source folders. The folder monitor
+--              compares a folder's directory mtime with the stored one and
+--              only recounts images and queries timelapses when it changed,
+--              so finished folders cost one stat per scan.
+-- Date: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS timelapse_folder_state (
+    source_folder TEXT PRIMARY KEY,
+    dir_mtime_ns INTEGER,          -- NULL forces a recount on the next scan
+    image_count INTEGER NOT NULL DEFAULT 0,
+    last_scanned_at TIMESTAMP
+);
@@ -0,0 +1,8 @@
+-- Migration: 046_files_thumbnail_hash.sql
+-- Description: Printer-file thumbnails are also put into the content-addressed
+--              thumbnail store when they are extracted. The row keeps the
+--              SHA-256 of the image so sized requests can pick a derivative
+--              without hashing or decoding the inline thumbnail again.
+-- Date: 2026-10-19
+
+ALTER TABLE files ADD COLUMN thumbnail_hash TEXT;
@@ -1,9 +1,11 @@
 """Gcode metadata extraction (print time + filament), slicer-agnostic.
 
-Shared by SlicingQueue (app) and vendored into the slicer-service image.
+Shared by SlicingQueue and BambuParser (app) and vendored into the
+slicer-service image. Comments are tokenized once by scan_comment_metadata();
+callers look keys up in the resulting dict.
 """
 import re
-from typing import Optional
+from typing import Dict, Optional
 import structlog
 
 logger = structlog.get_logger()
@@ -15,28 +17,72 @@ class GCodeMetadata:
         self.filament_used: Optional[float] = None  # grams
 
 
-# Order matters: most specific / most correct first.
-TIME_PATTERNS = [
-    # OrcaSlicer/BambuStudio total (must match on same line): "; total estimated time: 40m 39s"
-    (r';\s*total estimated time:\s*(.+?)$', 'human'),
-    # OrcaSlicer model printing (if no total estimated): "; model printing time: 33m 52s"
-    (r';\s*model printing time:\s*(.+?)$', 'human'),
+# Comment lines whose key is a leading phrase rather than "key = value"
+PREFIX_KEYS = ('generated by',)
+
+# Order matters: most specific / most correct first. Keys are looked up in
+# the output of scan_comment_metadata().
+TIME_KEYS = [
+    # OrcaSlicer/BambuStudio total: "; model printing time: 33m 52s; total estimated time: 40m 39s"
+    ('total estimated time', 'human'),
+    # OrcaSlicer model printing (if no total estimated)
+    ('model printing time', 'human'),
     # PrusaSlicer/OrcaSlicer: "; estimated printing time (normal mode) = 1h 30m 15s"
-    # NB: must not match "estimated first layer printing time"
-    (r';\s*estimated printing time.*?=\s*(.+?)$', 'human'),
-    (r';\s*TIME:\s*(\d+)', 'seconds'),
-    (r';\s*total estimated time.*?=\s*(\d+)', 'seconds'),
-    (r';\s*print_time\s*=\s*(\d+)', 'seconds'),
+    # NB: "estimated first layer printing time" is a different key
+    ('estimated printing time', 'human'),
+    ('time', 'seconds'),
+    ('total estimated time', 'seconds'),
+    ('print_time', 'seconds'),
 ]
 
-FILAMENT_PATTERNS = [
-    (r';\s*(?:total\s+)?filament used \[g\]\s*=\s*([\d.]+)', 'grams'),
-    (r';\s*filament used \[mm\]\s*=\s*([\d.]+)', 'mm'),
-    (r';\s*Filament used:\s*([\d.]+)\s*m(?:m)?', 'cura'),
-    (r';\s*filament_used\s*=\s*([\d.]+)', 'grams'),
-    (r';\s*filament weight\s*=\s*([\d.]+)', 'grams'),
+FILAMENT_KEYS = [
+    ('filament used [g]', 'grams'),
+    ('total filament used [g]', 'grams'),
+    ('filament used [mm]', 'mm'),
+    ('filament used', 'cura'),  # "; Filament used: 1.2m"
+    ('filament_used', 'grams'),
+    ('filament weight', 'grams'),
 ]
 
+_NUMBER = re.compile(r'[\d.]+')
+_SECONDS = re.compile(r'\d+')
+_CURA_METERS = re.compile(r'([\d.]+)\s*m')
+# "; key = value" / ";key: value" comments; the key stops at the first separator
+_COMMENT_PAIR = re.compile(r';[ \t]*([^\n=:;]*[^\s=:;])[ \t]*[=:][ \t]*([^\n]*)')
+
+
+def scan_comment_metadata(text: str, prefix_keys=PREFIX_KEYS) -> Dict[str, str]:
+    """
+    Tokenize slicer comments into a ``{key: value}`` dict in one pass.
+
+    Every ``key = value`` / ``key: value`` comment is collected with a single
+    regex scan (BambuStudio puts several pairs on one line, separated by
+    ``"; "``). Keys are lower-cased; the first occurrence of a key wins. A
+    key with a trailing qualifier such as ``estimated printing time (normal
+    mode)`` is also stored under its base name, ``estimated printing time``.
+    ``prefix_keys`` name comments that are a leading phrase rather than a
+    pair (``; generated by PrusaSlicer ...``).
+    """
+    pairs: Dict[str, str] = {}
+    for prefix in prefix_keys:
+        m = re.search(rf';[ \t]*{re.escape(prefix)}[ \t]+([^\n]*)', text, re.I)
+        if m:
+            pairs[prefix] = m.group(1).strip()
+
+    for key, value in _COMMENT_PAIR.findall(text):
+        key = key.lower()
+        if key in pairs or key.startswith(prefix_keys):
+            continue
+        if '; ' in value:
+            value, _, rest = value.partition('; ')
+            for extra_key, extra_value in scan_comment_metadata('; ' + rest, ()).items():
+                pairs.setdefault(extra_key, extra_value)
+        value = value.rstrip()
+        pairs[key] = value
+        if key[-1] == ')':
+            pairs.setdefault(key.split(' (', 1)[0], value)
+    return pairs
+
 
 def _parse_human_time(time_str: str) -> Optional[int]:
     if not time_str:
@@ -48,34 +94,41 @@ def _parse_human_time(time_str: str) -> Optional[int]:
     return total or None
 
 
+def _parse_time(value: str, fmt: str) -> Optional[int]:
+    if fmt == 'human':
+        return _parse_human_time(value)
+    m = _SECONDS.match(value)
+    return int(m.group(0)) if m else None
+
+
+def _parse_filament(value: str, fmt: str) -> Optional[float]:
+    m = (_CURA_METERS if fmt == 'cura' else _NUMBER).match(value)
+    if not m:
+        return None
+    try:
+        v = float(m.group(1) if fmt == 'cura' else m.group(0))
+    except ValueError:
+        return None
+    if fmt == 'mm':
+        return (v / 1000.0) * 2.98
+    if fmt == 'cura':
+        return v * 2.98 if v < 100 else (v / 1000.0) * 2.98
+    return v
+
+
 def parse_metadata_from_text(text: str) -> GCodeMetadata:
     md = GCodeMetadata()
-    lines = text.splitlines()
-    for pattern, fmt in TIME_PATTERNS:
-        if md.estimated_print_time is not None:
+    pairs = scan_comment_metadata(text)
+    for key, fmt in TIME_KEYS:
+        val = _parse_time(pairs[key], fmt) if key in pairs else None
+        if val:
+            md.estimated_print_time = val
             break
-        for line in lines:
-            m = re.search(pattern, line, re.IGNORECASE)
-            if m:
-                val = int(m.group(1)) if fmt == 'seconds' else _parse_human_time(m.group(1))
-                if val:
-                    md.estimated_print_time = val
-                    break
-    for pattern, fmt in FILAMENT_PATTERNS:
-        if md.filament_used is not None:
+    for key, fmt in FILAMENT_KEYS:
+        val = _parse_filament(pairs[key], fmt) if key in pairs else None
+        if val is not None:
+            md.filament_used = val
             break
-        for line in lines:
-            m = re.search(pattern, line, re.IGNORECASE)
-            if m:
-                v = float(m.group(1))
-                if fmt == 'grams':
-                    md.filament_used = v
-                elif fmt == 'mm':
-                    md.filament_used = (v / 1000.0) * 2.98
-                elif fmt == 'cura':
-                    md.filament_used = v * 2.98 if v < 100 else (v / 1000.0) * 2.98
-                if md.filament_used is not None:
-                    break
     return md
 
 
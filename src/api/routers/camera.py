@@ -15,10 +15,17 @@ import aiofiles.os
 from src.models.snapshot import Snapshot, SnapshotCreate, SnapshotResponse, CameraStatus, CameraTrigger
 from src.services.printer_service import PrinterService
 from src.services.camera_snapshot_service import CameraSnapshotService
+from src.services.camera_stream_proxy import CameraStreamProxy
 from src.services.external_camera_service import mask_url_credentials, detect_url_type, is_ffmpeg_available
 from src.database.database import Database
 from src.database.repositories import SnapshotRepository
-from src.utils.dependencies import get_printer_service, get_camera_snapshot_service, get_database, get_snapshot_repository
+from src.utils.dependencies import (
+    get_printer_service,
+    get_camera_snapshot_service,
+    get_camera_stream_proxy,
+    get_database,
+    get_snapshot_repository
+)
 from src.utils.errors import (
     PrinterNotFoundError,
     ServiceUnavailableError,
@@ -222,12 +229,17 @@ async def get_camera_status(
             # Camera is available for snapshots even without live streaming
             is_available = True
             try:
-                # Try to get live stream URL (will be None for Bambu Lab A1/P1)
+                # Try to get live stream URL (None for Bambu Lab A1/P1, which stream via camera_frames)
                 live_stream_url = await printer_driver.get_camera_stream_url()
 
-                if live_stream_url:
-                    # Live stream available (e.g., future X1 series with RTSP)
+                if live_stream_url and live_stream_url.startswith(('http://', 'https://')):
+                    # MJPEG stream, served through the stream proxy
+                    stream_url = f"/api/v1/printers/{printer_id}/camera/stream"
+                elif live_stream_url:
                     stream_url = live_stream_url
+                elif hasattr(printer_driver, 'camera_frames'):
+                    # Live frames from the camera protocol (Bambu Lab A1/P1), also proxied
+                    stream_url = f"/api/v1/printers/{printer_id}/camera/stream"
                 else:
                     # Fall back to preview endpoint for snapshot-based preview
                     stream_url = f"/api/v1/printers/{printer_id}/camera/preview"
@@ -302,12 +314,31 @@ async def get_camera_status(
     )
 
 
+def _check_viewer_capacity(stream_proxy: CameraStreamProxy, printer_id: str) -> None:
+    """Reject a stream viewer beyond the per-printer limit."""
+    if not stream_proxy.has_capacity(printer_id):
+        raise ServiceUnavailableError(
+            "camera_stream",
+            f"Viewer limit of {stream_proxy.max_viewers} reached for this printer",
+            details={"max_viewers": stream_proxy.max_viewers}
+        )
+
+
 @router.get("/{printer_id}/camera/stream")
 async def get_camera_stream(
     printer_id: UUID,
-    printer_service: PrinterService = Depends(get_printer_service)
+    printer_service: PrinterService = Depends(get_printer_service),
+    stream_proxy: CameraStreamProxy = Depends(get_camera_stream_proxy)
 ):
-    """Proxy camera stream from printer."""
+    """
+    Proxy camera stream from printer.
+
+    MJPEG streams are served through Printernizer: all viewers of a printer
+    share one connection to it, and the stream works behind Home Assistant
+    ingress. At most MAX_VIEWERS_PER_PRINTER viewers are served per printer.
+    Stream URLs that are not MJPEG, and local polling endpoints, are
+    redirected to.
+    """
     printer_id_str = str(printer_id)
     printer_driver = await printer_service.get_printer_driver(printer_id_str)
 
@@ -321,14 +352,43 @@ async def get_camera_stream(
         )
 
     stream_url = await printer_driver.get_camera_stream_url()
+    if not stream_url and hasattr(printer_driver, 'camera_frames'):
+        # Printer delivers frames itself (Bambu Lab camera protocol)
+        _check_viewer_capacity(stream_proxy, printer_id_str)
+        return StreamingResponse(
+            stream_proxy.stream(printer_id_str, source=printer_driver.camera_frames),
+            media_type=stream_proxy.media_type,
+            headers={
+                "Cache-Control": "no-cache, no-store",
+                "X-Accel-Buffering": "no"
+            }
+        )
+
     if not stream_url:
         raise ServiceUnavailableError("camera_stream", "Camera stream not available")
 
-    # Return redirect to actual stream URL for now
-    # In production, this might proxy the stream directly
-    return Response(
-        status_code=302,
-        headers={"Location": stream_url}
+    if not stream_url.startswith(('http://', 'https://')):
+        # Local polling endpoint (e.g. Prusa preview)
+        return Response(
+            status_code=302,
+            headers={"Location": stream_url}
+        )
+
+    if stream_proxy.get_viewer_count(printer_id_str) == 0 and not await stream_proxy.is_mjpeg(stream_url):
+        # Not MJPEG (e.g. HLS or plain video), which the proxy cannot split into frames
+        return Response(
+            status_code=302,
+            headers={"Location": stream_url}
+        )
+
+    _check_viewer_capacity(stream_proxy, printer_id_str)
+    return StreamingResponse(
+        stream_proxy.stream(printer_id_str, stream_url),
+        media_type=stream_proxy.media_type,
+        headers={
+            "Cache-Control": "no-cache, no-store",
+            "X-Accel-Buffering": "no"
+        }
     )
 
 
@@ -182,7 +182,7 @@ async def system_info():
     """Report app/Python versions and availability of optional libraries.
 
     Useful for diagnosing why previews/features are missing on a given deployment
-    (e.g. matplotlib not importable -> no STL preview thumbnails).
+    (e.g. trimesh not importable -> no STL preview thumbnails).
     """
     import sys
     import platform
@@ -198,8 +198,7 @@ async def system_info():
             return {"available": False, "version": None, "error": f"{type(e).__name__}: {e}"}
 
     libraries = {
-        "matplotlib": probe("matplotlib"),       # STL/3MF preview thumbnail rendering
-        "trimesh": probe("trimesh"),             # STL geometry / dimensions
+        "trimesh": probe("trimesh"),             # STL geometry / dimensions, mesh previews
         "numpy": probe("numpy"),
         "numpy-stl": probe("stl"),
         "scipy": probe("scipy"),
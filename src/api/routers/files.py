@@ -3,16 +3,18 @@
 from typing import Any, Dict, List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File as FastAPIFile, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File as FastAPIFile, Form, Request
 from fastapi.responses import Response, FileResponse as FastAPIFileResponse
 from pydantic import BaseModel
 import structlog
 import base64
 
 from src.models.file import File, FileStatus, FileSource, WatchFolderSettings, WatchFolderStatus, WatchFolderItem
+from src.services.analysis_executor import get_analysis_executor
 from src.services.file_service import FileService
 from src.services.config_service import ConfigService
 from src.services.printer_service import PrinterService
+from src.services.thumbnail_store import etag_matches
 from src.models.printer import PrinterType
 from src.utils.dependencies import get_file_service, get_config_service, get_printer_service
 from src.utils.errors import (
@@ -427,10 +429,19 @@ async def upload_files(
 
 @router.get("/{file_id}/thumbnail")
 async def get_file_thumbnail(
+    request: Request,
     file_id: str,
+    size: Optional[int] = Query(None, ge=1, le=1024, description="Requested edge length in pixels"),
     file_service: FileService = Depends(get_file_service)
 ):
-    """Get thumbnail image for a file."""
+    """
+    Get thumbnail image for a file.
+
+    With `size`, the smallest precomputed derivative (64, 128 or 256 px) at
+    least that large is served, as WebP when the `Accept` header allows it
+    and PNG otherwise, with a strong `ETag`; a matching `If-None-Match`
+    gets `304`.
+    """
     file_data = await file_service.get_file_by_id(file_id)
 
     if not file_data:
@@ -439,6 +450,27 @@ async def get_file_thumbnail(
     if not file_data.get('has_thumbnail') or not file_data.get('thumbnail_data'):
         raise PrinternizerFileNotFoundError(file_id, details={"reason": "no_thumbnail"})
 
+    if size is not None:
+        variant = file_service.thumbnail.get_thumbnail_variant(
+            file_data.get('thumbnail_hash'), size, request.headers.get("accept")
+        )
+        if variant:
+            path, media_type, entity_tag = variant
+            headers = {
+                "Cache-Control": "public, max-age=86400",
+                "ETag": f'"{entity_tag}"',
+                "Vary": "Accept"
+            }
+            if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+                return Response(status_code=304, headers=headers)
+            return FastAPIFileResponse(
+                path,
+                media_type=media_type,
+                headers=headers,
+                filename=f"thumbnail_{file_id}{path.suffix}",
+                content_disposition_type="inline"
+            )
+
     # Decode base64 thumbnail data
     try:
         thumbnail_data = base64.b64decode(file_data['thumbnail_data'])
@@ -509,13 +541,14 @@ async def get_file_animated_thumbnail(
                 reason="Failed to generate animated preview"
             )
 
-        # Return GIF response
+        # Return animation (GIF, or WebP if configured)
+        preview_service = file_service.thumbnail.preview_render_service
         return Response(
             content=gif_bytes,
-            media_type="image/gif",
+            media_type=preview_service.animation_media_type,
             headers={
                 "Cache-Control": "public, max-age=86400",  # Cache for 24 hours
-                "Content-Disposition": f"inline; filename=thumbnail_animated_{file_id}.gif"
+                "Content-Disposition": f"inline; filename=thumbnail_animated_{file_id}.{preview_service.animation_format}"
             }
         )
 
@@ -626,11 +659,11 @@ async def extract_file_thumbnail(
             reason="Thumbnail service not available"
         )
 
-    # Use the BambuParser to extract embedded thumbnails
+    # Use the BambuParser (in an analysis worker) to extract embedded thumbnails
     try:
         from src.services.bambu_parser import BambuParser
         parser = BambuParser()
-        parse_result = await parser.parse_file(file_path)
+        parse_result = await get_analysis_executor().parse_file(file_path)
 
         if not parse_result['success']:
             raise FileProcessingError(
@@ -838,7 +871,8 @@ async def analyze_gcode_file(
                 error=f"G-code analysis not supported for {file_ext} files. Supported: .gcode, .gco, .bgcode"
             )
 
-        parse_result = await parser.parse_file(file_path)
+        # Parsing holds the GIL, so it runs in an analysis worker process
+        parse_result = await get_analysis_executor().parse_file(file_path)
 
         if not parse_result['success']:
             raise FileProcessingError(
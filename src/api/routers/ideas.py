@@ -6,7 +6,7 @@ from pydantic import BaseModel, Field, HttpUrl
 from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
 
-from src.utils.dependencies import get_database, get_idea_service
+from src.utils.dependencies import get_database, get_idea_service, list_include
 from src.services.idea_service import IdeaService
 from src.services.url_parser_service import UrlParserService
 from src.models.idea import IdeaStatus, IdeaSourceType
@@ -163,9 +163,15 @@ async def list_ideas(
     source_type: Optional[str] = Query(None, pattern="^(manual|makerworld|printables)$"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    include: tuple = Depends(list_include('metadata', 'material_notes', 'customer_info')),
     idea_service: IdeaService = Depends(get_idea_service)
 ):
-    """List ideas with filtering and pagination."""
+    """
+    List ideas with filtering and pagination.
+
+    `metadata`, `material_notes` and `customer_info` are null in list items
+    unless named in `include`; `GET /ideas/{idea_id}` always returns them.
+    """
     filters = {}
     if status:
         filters['status'] = status
@@ -176,7 +182,7 @@ async def list_ideas(
     if source_type:
         filters['source_type'] = source_type
 
-    result = await idea_service.list_ideas(filters, page, page_size)
+    result = await idea_service.list_ideas(filters, page, page_size, include=include)
     return result
 
 
@@ -5,18 +5,21 @@ Provides REST API for library operations (list, get, reprocess, delete).
 
 from typing import Optional, Dict, Any, List
 from pathlib import Path
-from fastapi import APIRouter, HTTPException, Query, Path as PathParam, Depends
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Query, Path as PathParam, Depends, Request
+from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel, Field
 import structlog
 import asyncio
 
-from src.utils.dependencies import get_printer_service
+from src.utils.dependencies import get_printer_service, list_include
+from src.services.library_analysis_queue import AnalysisPriority
+from src.services.thumbnail_store import etag_matches
 
 from src.utils.errors import (
     LibraryItemNotFoundError,
     ServiceUnavailableError,
     FileProcessingError,
+    InvalidFileTypeError,
     ValidationError as PrinternizerValidationError,
     success_response
 )
@@ -43,6 +46,7 @@ class LibraryFileResponse(BaseModel):
     last_accessed: Optional[str] = None
     last_analyzed: Optional[str] = None
     has_thumbnail: bool = False
+    thumbnail_hash: Optional[str] = None
 
     # Enhanced metadata (optional)
     model_width: Optional[float] = None
@@ -82,6 +86,7 @@ class LibraryFileResponse(BaseModel):
     slicer_version: Optional[str] = None
     profile_name: Optional[str] = None
     bed_type: Optional[str] = None
+    plate_count: Optional[int] = None
 
     # Source information
     sources: Optional[str] = None  # JSON string
@@ -108,6 +113,7 @@ class LibraryStatsResponse(BaseModel):
     unique_file_types: int = 0
     avg_file_size: float = 0
     total_material_cost: float = 0
+    parse_cache: Optional[Dict[str, Any]] = None
 
 
 class ReprocessResponse(BaseModel):
@@ -117,6 +123,24 @@ class ReprocessResponse(BaseModel):
     message: str
 
 
+class AnalysisQueueResponse(BaseModel):
+    """Metadata extraction queue progress."""
+    workers: int
+    active_workers: int
+    pending: int
+    pending_by_priority: Dict[str, int]
+    running: int
+    running_files: List[str]
+    completed: int
+    failed: int
+    cancelled: int
+    total: int
+    percent_complete: float
+    avg_duration_seconds: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    started_at: Optional[str] = None
+
+
 class DeleteResponse(BaseModel):
     """Delete operation response."""
     success: bool
@@ -145,6 +169,49 @@ class LibraryMetadataResponse(BaseModel):
     last_analyzed: Optional[str] = None
 
 
+class LibraryPlateResponse(BaseModel):
+    """One plate of a multi-plate 3MF project."""
+    plate_index: int
+    name: Optional[str] = None
+    object_count: Optional[int] = None
+    estimated_time: Optional[int] = None
+    filament_weight: Optional[float] = None
+    filament_length: Optional[float] = None
+    filaments: List[Dict[str, Any]] = []
+    layer_height: Optional[float] = None
+    support_used: Optional[bool] = None
+    has_gcode: bool = False
+    thumbnail_hash: Optional[str] = None
+
+
+class LibraryPlatesResponse(BaseModel):
+    """Plates of a library file."""
+    plates: List[LibraryPlateResponse]
+    count: int
+
+
+class LibraryLayerResponse(BaseModel):
+    """Statistics of one layer of a G-code file."""
+    z: float
+    extrusion_length: float      # mm of filament
+    print_distance: float        # mm
+    travel_distance: float       # mm
+    time: float                  # seconds
+    filament_weight: float       # grams
+
+
+class LibraryLayerStatsResponse(BaseModel):
+    """Per-layer statistics of a G-code file, computed from its toolpath."""
+    layer_count: int
+    estimated_time: int          # seconds
+    filament_length: float       # meters
+    filament_weight: float       # grams
+    travel_distance: float       # meters
+    model_version: int
+    remaining_time: Optional[int] = None
+    layers: List[LibraryLayerResponse] = []
+
+
 class PrintfilesResponse(BaseModel):
     """Printfiles derived from a model, with slicing job enrichment."""
     printfiles: List[Dict[str, Any]]
@@ -175,8 +242,11 @@ async def list_library_files(
     tags: Optional[str] = Query(None, description="Filter by tag IDs (comma-separated)"),
     show_duplicates: Optional[bool] = Query(True, description="Show duplicate files (default: true)"),
     only_duplicates: Optional[bool] = Query(False, description="Show only duplicate files (default: false)"),
-    sort_by: Optional[str] = Query('created_at', description="Sort by field (created_at, filename, file_size, last_modified)"),
+    min_plates: Optional[int] = Query(None, ge=1, description="Only projects with at least this many plates"),
+    max_plate_time: Optional[int] = Query(None, ge=0, description="Only files with a plate printing within this many seconds"),
+    sort_by: Optional[str] = Query('created_at', description="Sort by field (created_at, filename, file_size, last_modified, plate_count)"),
     sort_order: Optional[str] = Query('desc', description="Sort order (asc, desc)"),
+    include: tuple = Depends(list_include('sources')),
     library_service = Depends(get_library_service)
 ):
     """
@@ -192,15 +262,21 @@ async def list_library_files(
     - `manufacturer`: Filter by printer manufacturer (bambu_lab, prusa_research)
     - `printer_model`: Filter by printer model (A1, P1P, Core One, MK4, etc.)
     - `tags`: Filter by tags (comma-separated tag IDs)
+    - `min_plates`: Only multi-plate projects with at least this many plates
+    - `max_plate_time`: Only files with a plate that prints within this many seconds
 
     **Pagination:**
     - `page`: Page number (starts at 1)
     - `limit`: Items per page (default 50, max 200)
 
     **Sorting:**
-    - `sort_by`: Sort by field (created_at, filename, file_size, last_modified) - default: created_at
+    - `sort_by`: Sort by field (created_at, filename, file_size, last_modified, plate_count) - default: created_at
     - `sort_order`: Sort order (asc, desc) - default: desc
 
+    **Fields:**
+    - `include`: Heavy fields left out of list items by default
+      (`sources`); the detail endpoint returns the full record
+
     **Returns:**
     - `files`: Array of file objects
     - `pagination`: Pagination metadata (page, limit, total_items, total_pages)
@@ -230,13 +306,17 @@ async def list_library_files(
         filters['show_duplicates'] = show_duplicates
     if only_duplicates is not None:
         filters['only_duplicates'] = only_duplicates
+    if min_plates is not None:
+        filters['min_plates'] = min_plates
+    if max_plate_time is not None:
+        filters['max_plate_time'] = max_plate_time
     if sort_by:
         filters['sort_by'] = sort_by
     if sort_order:
         filters['sort_order'] = sort_order
 
     # Get files from library service
-    files, pagination = await library_service.list_files(filters, page, limit)
+    files, pagination = await library_service.list_files(filters, page, limit, include=include)
 
     return {
         'files': files,
@@ -272,6 +352,56 @@ async def get_library_file(
     return file_record
 
 
+@router.get("/files/{checksum}/plates", response_model=LibraryPlatesResponse)
+async def get_library_file_plates(
+    checksum: str = PathParam(..., description="File checksum (SHA-256)"),
+    sort_by: str = Query('plate_index', description="Sort by field (plate_index, estimated_time, filament_weight, object_count)"),
+    sort_order: str = Query('asc', description="Sort order (asc, desc)"),
+    library_service = Depends(get_library_service)
+):
+    """
+    List the plates of a multi-plate 3MF project.
+
+    Each plate carries its own print time, filament usage, object count and
+    thumbnail (served from `/library/thumbnails/{thumbnail_hash}`).
+    Single-model files have no plates.
+
+    **Error Responses:**
+    - `404`: File not found in library
+    """
+    if not await library_service.get_file_by_checksum(checksum):
+        raise LibraryItemNotFoundError(checksum)
+    plates = await library_service.get_plates(checksum, sort_by, sort_order)
+    return LibraryPlatesResponse(plates=plates, count=len(plates))
+
+
+@router.get("/files/{checksum}/layers", response_model=LibraryLayerStatsResponse)
+async def get_library_file_layers(
+    checksum: str = PathParam(..., description="File checksum (SHA-256)"),
+    current_layer: Optional[int] = Query(None, ge=0, description="Layer being printed (0-based); adds remaining_time"),
+    include_layers: bool = Query(True, description="Include the per-layer rows"),
+    library_service = Depends(get_library_service)
+):
+    """
+    Per-layer statistics of a G-code file.
+
+    Print time, filament and travel are computed from the toolpath with an
+    acceleration-aware motion model, so they are available for files
+    without slicer estimates. With `current_layer`, `remaining_time` is the
+    estimated number of seconds left in the print.
+
+    **Error Responses:**
+    - `404`: File not found, or no layer statistics for it
+    """
+    stats = await library_service.get_layer_stats(checksum)
+    if stats is None:
+        raise LibraryItemNotFoundError(checksum)
+    body = stats.to_dict() if include_layers else stats.summary()
+    if current_layer is not None:
+        body['remaining_time'] = int(round(stats.remaining_time(current_layer)))
+    return body
+
+
 @router.get("/files/{checksum}/printfiles", response_model=PrintfilesResponse)
 async def get_model_printfiles(
     checksum: str,
@@ -461,6 +591,7 @@ async def get_library_statistics(
     - `unique_file_types`: Number of different file types
     - `avg_file_size`: Average file size (bytes)
     - `total_material_cost`: Sum of all material costs (EUR)
+    - `parse_cache`: Parse-result cache hit rate and stored entries per parser version
 
     **Use Cases:**
     - Dashboard widgets
@@ -480,7 +611,8 @@ async def get_library_statistics(
         error_files=stats.get('error_files', 0),
         unique_file_types=stats.get('unique_file_types', 0),
         avg_file_size=stats.get('avg_file_size', 0),
-        total_material_cost=stats.get('total_material_cost', 0)
+        total_material_cost=stats.get('total_material_cost', 0),
+        parse_cache=await library_service.get_parse_cache_stats()
     )
 
 
@@ -556,7 +688,7 @@ async def get_library_file_metadata(
     - **Cost analysis**: Material and energy costs
     - **Quality metrics**: Complexity score, difficulty level, success probability
     - **Compatibility**: Compatible printers, slicer information
-    - **Thumbnail**: Embedded thumbnail image data
+    - **Thumbnail**: Thumbnail size, format and content hash
 
     **Parameters:**
     - `checksum`: File checksum (SHA-256 hash)
@@ -719,7 +851,7 @@ async def get_library_file_metadata(
             'width': file_record.get('thumbnail_width'),
             'height': file_record.get('thumbnail_height'),
             'format': file_record.get('thumbnail_format', 'png'),
-            'data': file_record.get('thumbnail_data')  # Base64 encoded
+            'hash': file_record.get('thumbnail_hash')  # Served by /library/thumbnails/{hash}
         }
         response['thumbnail'] = thumbnail
 
@@ -738,7 +870,8 @@ async def get_library_file_animated_thumbnail(
     """
     Get animated GIF thumbnail for a library file (multi-angle preview).
 
-    Returns a rotating animated GIF showing the 3D model from multiple angles.
+    Returns a rotating animated GIF showing the 3D model from multiple angles,
+    or an animated WebP when the preview service is configured for it.
     Only supported for STL and 3MF files.
 
     **Parameters:**
@@ -746,7 +879,7 @@ async def get_library_file_animated_thumbnail(
 
     **Returns:**
     - GIF image data (binary)
-    - Content-Type: image/gif
+    - Content-Type: image/gif (image/webp for WebP animations)
 
     **Status Codes:**
     - `200`: Animated thumbnail returned successfully
@@ -799,13 +932,14 @@ async def get_library_file_animated_thumbnail(
                 reason="Failed to generate animated preview"
             )
 
-        # Return GIF response
+        # Return animation (GIF, or WebP if configured)
+        preview_service = library_service.preview_service
         return Response(
             content=gif_bytes,
-            media_type="image/gif",
+            media_type=preview_service.animation_media_type,
             headers={
                 "Cache-Control": "public, max-age=86400",  # Cache for 24 hours
-                "Content-Disposition": f"inline; filename=thumbnail_animated_{checksum[:16]}.gif"
+                "Content-Disposition": f"inline; filename=thumbnail_animated_{checksum[:16]}.{preview_service.animation_format}"
             }
         )
 
@@ -821,72 +955,164 @@ async def get_library_file_animated_thumbnail(
         )
 
 
+@router.get("/files/{checksum}/mesh")
+async def get_library_file_mesh(
+    checksum: str = PathParam(..., description="File checksum (SHA-256)"),
+    max_faces: int = Query(65536, ge=1024, le=1048576, description="Face budget of the decimated mesh"),
+    library_service = Depends(get_library_service)
+):
+    """
+    Get a decimated mesh of an STL or 3MF library file for 3D viewers.
+
+    The mesh is reduced by vertex clustering to at most `max_faces` faces
+    and shares the level-of-detail cache used by preview rendering.
+
+    **Returns:**
+    - Binary STL data
+    - Content-Type: model/stl
+
+    **Status Codes:**
+    - `200`: Mesh returned successfully
+    - `404`: File not found
+    - `400`: File type has no mesh
+    - `500`: Mesh could not be built
+    """
+    file_record = await library_service.get_file_by_checksum(checksum)
+    if not file_record or not file_record.get('library_path'):
+        raise LibraryItemNotFoundError(checksum)
+
+    file_type = file_record.get('file_type', '').lower().lstrip('.')
+    if file_type not in ['stl', '3mf']:
+        raise InvalidFileTypeError(file_record.get('filename') or checksum[:16], file_type, ['stl', '3mf'])
+
+    stl_bytes = await library_service.preview_service.get_mesh_lod(
+        str(library_service.library_path / file_record['library_path']),
+        file_type,
+        max_faces=max_faces
+    )
+    if not stl_bytes:
+        raise FileProcessingError(
+            file_id=checksum[:16],
+            operation="get_mesh",
+            reason="Failed to build mesh"
+        )
+
+    return Response(
+        content=stl_bytes,
+        media_type="model/stl",
+        headers={
+            "Cache-Control": "public, max-age=86400",
+            "Content-Disposition": f"inline; filename=mesh_{checksum[:16]}.stl"
+        }
+    )
+
+
 @router.get("/files/{checksum}/thumbnail")
 async def get_library_file_thumbnail(
+    request: Request,
     checksum: str = PathParam(..., description="File checksum (SHA-256)"),
+    size: Optional[int] = Query(None, ge=1, le=1024, description="Requested edge length in pixels"),
     library_service = Depends(get_library_service)
 ):
     """
     Get thumbnail image for a library file.
 
-    Returns the embedded or generated thumbnail as a PNG image.
+    Returns the embedded or generated thumbnail. The response carries a
+    strong `ETag`; clients revalidating with `If-None-Match` receive
+    `304 Not Modified`. Grids should prefer the immutable
+    `/library/thumbnails/{thumbnail_hash}` URL, which needs no database lookup.
 
     **Parameters:**
     - `checksum`: File checksum (SHA-256 hash)
+    - `size`: Optional edge length; serves the smallest precomputed
+      derivative (64, 128 or 256 px) at least this large, as WebP when the
+      `Accept` header allows it and PNG otherwise
 
     **Returns:**
-    - PNG image data (binary)
-    - Content-Type: image/png
+    - Image data (binary), original format or a PNG/WebP derivative
 
     **Status Codes:**
     - `200`: Thumbnail returned successfully
+    - `304`: Thumbnail unchanged since the client's cached copy
     - `404`: File not found or no thumbnail available
-    - `500`: Error retrieving thumbnail
     """
-    from fastapi.responses import Response
-    import base64
+    thumbnail = await library_service.get_thumbnail(checksum, size, request.headers.get("accept"))
+    if not thumbnail:
+        if not await library_service.get_file_by_checksum(checksum):
+            raise LibraryItemNotFoundError(checksum)
+        raise LibraryItemNotFoundError(checksum, details={"reason": "no_thumbnail"})
 
-    # Get file record
-    file_record = await library_service.get_file_by_checksum(checksum)
-    if not file_record:
-        raise LibraryItemNotFoundError(checksum)
+    path, media_type, entity_tag = thumbnail
+    return _thumbnail_response(
+        request, path, media_type, entity_tag,
+        cache_control="public, max-age=3600",
+        filename=f"{checksum[:16]}_thumbnail{path.suffix}",
+        vary_accept=size is not None
+    )
 
-    # Check if thumbnail exists
-    if not file_record.get('has_thumbnail') or not file_record.get('thumbnail_data'):
-        raise LibraryItemNotFoundError(checksum, details={"reason": "no_thumbnail"})
 
-    # Decode base64 thumbnail data
-    try:
-        thumbnail_base64 = file_record['thumbnail_data']
-        # Remove data URL prefix if present
-        if ',' in thumbnail_base64:
-            thumbnail_base64 = thumbnail_base64.split(',', 1)[1]
+@router.get("/thumbnails/{thumbnail_hash}")
+async def get_stored_thumbnail(
+    request: Request,
+    thumbnail_hash: str = PathParam(..., description="Thumbnail content hash (SHA-256)"),
+    size: Optional[int] = Query(None, ge=1, le=1024, description="Requested edge length in pixels"),
+    library_service = Depends(get_library_service)
+):
+    """
+    Get a stored thumbnail by content hash.
 
-        thumbnail_bytes = base64.b64decode(thumbnail_base64)
+    Thumbnails are content-addressed, so the response never changes for a
+    given hash and is served with immutable caching. Library list and detail
+    responses expose the hash as `thumbnail_hash`. `size` selects a
+    precomputed derivative exactly like the per-file thumbnail endpoint.
 
-        return Response(
-            content=thumbnail_bytes,
-            media_type="image/png",
-            headers={
-                "Cache-Control": "public, max-age=3600",
-                "Content-Disposition": f"inline; filename=\"{checksum[:16]}_thumbnail.png\""
-            }
-        )
-    except Exception as e:
-        logger.error("Failed to decode thumbnail data",
-                    checksum=checksum[:16],
-                    error=str(e))
-        raise FileProcessingError(
-            filename=checksum,
-            operation="decode_thumbnail",
-            reason="Failed to decode thumbnail data"
-        )
+    **Status Codes:**
+    - `200`: Thumbnail returned successfully
+    - `304`: Client already has this thumbnail
+    - `404`: No thumbnail stored under this hash
+    """
+    thumbnail = await library_service.get_stored_thumbnail(
+        thumbnail_hash, size, request.headers.get("accept")
+    )
+    if not thumbnail:
+        raise LibraryItemNotFoundError(thumbnail_hash, details={"reason": "no_thumbnail"})
+
+    path, media_type, entity_tag = thumbnail
+    return _thumbnail_response(
+        request, path, media_type, entity_tag,
+        cache_control="public, max-age=31536000, immutable",
+        filename=f"{thumbnail_hash[:16]}{path.suffix}",
+        vary_accept=size is not None
+    )
+
+
+def _thumbnail_response(request: Request, path: Path, media_type: str,
+                        entity_tag: str, cache_control: str, filename: str,
+                        vary_accept: bool = False):
+    """Serve a stored thumbnail with a strong ETag, answering 304 when it matches."""
+    etag = f'"{entity_tag}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if vary_accept:
+        # The derivative format depends on the Accept header
+        headers["Vary"] = "Accept"
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(
+        path,
+        media_type=media_type,
+        headers=headers,
+        filename=filename,
+        content_disposition_type="inline"
+    )
 
 
 @router.post("/reanalyze-all")
 async def bulk_reanalyze_library(
     file_type: Optional[str] = Query(None, description="Filter by file type (.3mf, .gcode)"),
     limit: Optional[int] = Query(None, ge=1, le=1000, description="Limit number of files to reanalyze"),
+    stale_only: bool = Query(False, description="Skip files whose cached parse result is current"),
     library_service = Depends(get_library_service)
 ):
     """
@@ -898,6 +1124,9 @@ async def bulk_reanalyze_library(
     **Parameters:**
     - `file_type`: Only reanalyze specific file types (e.g., ".3mf", ".gcode")
     - `limit`: Maximum number of files to process (default: all files)
+    - `stale_only`: Only files whose parser version changed since they were
+      last parsed (or that were never parsed); after an upgrade that touches
+      one file type, the others are skipped
 
     **Process:**
     1. Query library files matching criteria
@@ -906,8 +1135,9 @@ async def bulk_reanalyze_library(
 
     **Note:**
     - This operation runs asynchronously in the background
-    - Files are processed one at a time to avoid overloading the system
-    - Check individual file status to see when extraction completes
+    - Files are processed by a bounded worker pool at bulk priority, so uploads
+      and newly discovered files are analysed first
+    - Check `GET /library/analysis/queue` for progress and ETA
 
     **Returns:**
     - `success`: Whether operation started successfully
@@ -920,7 +1150,7 @@ async def bulk_reanalyze_library(
     POST /library/reanalyze-all?file_type=.3mf&limit=100
     ```
     """
-    logger.info("Starting bulk re-analysis", file_type=file_type, limit=limit)
+    logger.info("Starting bulk re-analysis", file_type=file_type, limit=limit, stale_only=stale_only)
 
     # Build filters for files to reanalyze
     filters = {}
@@ -935,14 +1165,16 @@ async def bulk_reanalyze_library(
     )
 
     files_to_process = []
-    file_types_set = set()
 
     # Filter to only files that can have metadata extracted
     for file in files:
         ft = file.get('file_type', '').lower()
         if ft in ['.3mf', '.gcode', '.bgcode']:
             files_to_process.append(file)
-            file_types_set.add(ft)
+
+    if stale_only:
+        files_to_process = await library_service.filter_stale_files(files_to_process)
+    file_types_set = {file.get('file_type', '').lower() for file in files_to_process}
 
     logger.info("Files found for re-analysis",
                total_files=len(files),
@@ -957,22 +1189,11 @@ async def bulk_reanalyze_library(
             'message': 'No files found matching criteria or no files support metadata extraction'
         })
 
-    # Schedule re-analysis for each file (fire and forget - don't await)
-    scheduled_count = 0
-    tasks = []
-    for file in files_to_process:
-        try:
-            # Create task without awaiting to schedule all files quickly
-            task = library_service.reprocess_file(file['checksum'])
-            tasks.append(task)
-        except Exception as e:
-            logger.warning("Failed to create reprocessing task",
-                         checksum=file['checksum'][:16],
-                         error=str(e))
-
-    # Await all scheduling tasks in parallel
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    scheduled_count = sum(1 for r in results if r is True)
+    # Queue re-analysis at bulk priority; the analysis queue bounds concurrency
+    scheduled_count = await library_service.reprocess_files(
+        [file['checksum'] for file in files_to_process],
+        priority=AnalysisPriority.BULK
+    )
 
     logger.info("Bulk re-analysis scheduled",
                files_scheduled=scheduled_count,
@@ -984,3 +1205,65 @@ async def bulk_reanalyze_library(
         'file_types_included': list(file_types_set),
         'message': f'Scheduled {scheduled_count} files for metadata re-extraction. Processing will happen in the background.'
     })
+
+
+@router.get("/analysis/queue", response_model=AnalysisQueueResponse)
+async def get_analysis_queue_progress(library_service = Depends(get_library_service)):
+    """
+    Get metadata extraction queue progress.
+
+    **Returns:**
+    - `pending` / `pending_by_priority`: Files waiting (interactive, new_file, bulk)
+    - `running` / `running_files`: Files currently being analysed
+    - `completed`, `failed`, `cancelled`: Counters since the queue was last idle
+    - `percent_complete`: Progress of the current batch
+    - `eta_seconds`: Estimated time until the queue is drained (null until one file finished)
+    """
+    return library_service.get_analysis_progress()
+
+
+@router.delete("/analysis/queue")
+async def cancel_analysis_queue(
+    priority: Optional[str] = Query(None, description="Only cancel pending work of this priority (interactive, new_file, bulk)"),
+    library_service = Depends(get_library_service)
+):
+    """
+    Cancel pending metadata extraction.
+
+    Files already being analysed are left to finish.
+
+    **Parameters:**
+    - `priority`: Only cancel this priority, e.g. `bulk` to abort a bulk re-analysis
+
+    **Returns:**
+    - `cancelled`: Number of cancelled files
+    """
+    prio = None
+    if priority:
+        try:
+            prio = AnalysisPriority[priority.upper()]
+        except KeyError:
+            raise PrinternizerValidationError(
+                field="priority",
+                error=f"Invalid priority '{priority}'. Must be one of: interactive, new_file, bulk"
+            )
+
+    cancelled = await library_service.cancel_analysis(priority=prio)
+    return success_response({'cancelled': cancelled})
+
+
+@router.delete("/analysis/queue/{checksum}")
+async def cancel_file_analysis(
+    checksum: str = PathParam(..., description="File checksum (SHA-256)"),
+    library_service = Depends(get_library_service)
+):
+    """
+    Cancel metadata extraction for one file (pending or running).
+
+    **Error Responses:**
+    - `404`: File is not queued for analysis
+    """
+    cancelled = await library_service.cancel_analysis(checksum=checksum)
+    if not cancelled:
+        raise LibraryItemNotFoundError(checksum, details={"reason": "not_queued"})
+    return success_response({'cancelled': cancelled, 'checksum': checksum})
@@ -13,7 +13,8 @@ from src.models.timelapse import (
     TimelapseStats,
     TimelapseLinkJob,
     TimelapseBulkDelete,
-    TimelapseBulkDeleteResult
+    TimelapseBulkDeleteResult,
+    TimelapseQueue
 )
 from src.services.timelapse_service import TimelapseService
 from src.utils.dependencies import get_timelapse_service
@@ -61,6 +62,19 @@ async def get_timelapse_stats(
     return TimelapseStats(**stats)
 
 
+@router.get("/queue", response_model=TimelapseQueue)
+async def get_timelapse_queue(
+    timelapse_service: TimelapseService = Depends(get_timelapse_service)
+):
+    """
+    Get the render queue.
+
+    Lists processing timelapses, then pending ones in the order they will be
+    rendered, with queue position and estimated seconds until each video is ready.
+    """
+    return await timelapse_service.get_queue()
+
+
 @router.get("/{timelapse_id}", response_model=dict)
 async def get_timelapse(
     timelapse_id: str,
@@ -1,26 +1,155 @@
-"""WebSocket endpoints for real-time updates."""
+"""WebSocket endpoints for real-time updates.
 
-from typing import Dict, Set
+Every client has its own bounded send queue drained by a writer task, so
+broadcasting only enqueues and a slow client never delays the others (or the
+service emitting the event). Messages with a topic, such as one printer's
+status, replace a still-queued message of the same topic instead of queueing
+behind it. A client whose queue overflows or whose send times out is
+disconnected.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set, Tuple
 import json
 import asyncio
 from uuid import UUID
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from prometheus_client import Counter, Gauge
 import structlog
 
+from src.constants import WebSocketConstants
 from src.services.event_service import EventService
 
 
 logger = structlog.get_logger()
 router = APIRouter()
 
+# Prometheus metrics - initialized once; gauges are read from the manager at scrape time
+try:
+    WEBSOCKET_CLIENTS = Gauge('printernizer_websocket_clients', 'Connected WebSocket clients')
+    WEBSOCKET_QUEUE_DEPTH = Gauge('printernizer_websocket_queue_depth',
+                                  'Messages queued for WebSocket clients', ['aggregate'])
+    WEBSOCKET_MESSAGES_COALESCED = Counter('printernizer_websocket_messages_coalesced_total',
+                                           'Queued WebSocket messages replaced by a newer one of the same topic')
+    WEBSOCKET_SLOW_DISCONNECTS = Counter('printernizer_websocket_slow_disconnects_total',
+                                         'WebSocket clients disconnected for falling behind', ['reason'])
+except ValueError:
+    # Metrics already registered (happens during reload)
+    from prometheus_client import REGISTRY
+    WEBSOCKET_CLIENTS = REGISTRY._names_to_collectors['printernizer_websocket_clients']
+    WEBSOCKET_QUEUE_DEPTH = REGISTRY._names_to_collectors['printernizer_websocket_queue_depth']
+    WEBSOCKET_MESSAGES_COALESCED = REGISTRY._names_to_collectors['printernizer_websocket_messages_coalesced_total']
+    WEBSOCKET_SLOW_DISCONNECTS = REGISTRY._names_to_collectors['printernizer_websocket_slow_disconnects_total']
+
+
+class ClientConnection:
+    """Send queue and writer task of one WebSocket client."""
+
+    def __init__(self, websocket: WebSocket, manager: 'ConnectionManager',
+                 max_queue: int = WebSocketConstants.SEND_QUEUE_MAX_MESSAGES,
+                 send_timeout: float = WebSocketConstants.SEND_TIMEOUT_SECONDS):
+        self.websocket = websocket
+        self.manager = manager
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+
+        # Entries are (topic, text); a topic entry's text lives in _latest so
+        # a newer message can replace it while it keeps its place in line
+        self._queue: Deque[Tuple[Optional[str], Optional[str]]] = deque()
+        self._latest: Dict[str, str] = {}
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self.closed = False
+
+        self.messages_sent = 0
+        self.messages_coalesced = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def start(self) -> None:
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def enqueue(self, text: str, topic: Optional[str] = None) -> None:
+        """Queue a message without waiting; disconnects the client if its queue is full."""
+        if self.closed:
+            return
+        if topic is not None and topic in self._latest:
+            self._latest[topic] = text
+            self.messages_coalesced += 1
+            WEBSOCKET_MESSAGES_COALESCED.inc()
+            return
+        if len(self._queue) >= self.max_queue:
+            self._fail("queue_overflow")
+            return
+        if topic is not None:
+            self._latest[topic] = text
+            self._queue.append((topic, None))
+        else:
+            self._queue.append((None, text))
+        self._ready.set()
+
+    async def _write_loop(self) -> None:
+        while not self.closed:
+            if not self._queue:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            topic, text = self._queue.popleft()
+            if topic is not None:
+                text = self._latest.pop(topic)
+            try:
+                await asyncio.wait_for(self.websocket.send_text(text), self.send_timeout)
+            except asyncio.TimeoutError:
+                self._fail("send_timeout")
+                return
+            except Exception:
+                # Connection already gone; the receive loop unregisters it
+                self._fail(None)
+                return
+            self.messages_sent += 1
+
+    def _fail(self, reason: Optional[str]) -> None:
+        """Stop sending to this client and close its connection."""
+        if self.closed:
+            return
+        if reason:
+            WEBSOCKET_SLOW_DISCONNECTS.labels(reason=reason).inc()
+            logger.warning("Disconnecting slow WebSocket client", reason=reason, queued=len(self._queue))
+        self.manager.disconnect(self.websocket)
+        if reason:
+            asyncio.create_task(self._close_connection())
+
+    async def _close_connection(self) -> None:
+        try:
+            await asyncio.wait_for(
+                self.websocket.close(code=WebSocketConstants.CLOSE_CODE_TOO_SLOW),
+                WebSocketConstants.CLOSE_TIMEOUT_SECONDS
+            )
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        """Drop queued messages and stop the writer task."""
+        self.closed = True
+        self._queue.clear()
+        self._latest.clear()
+        if self._writer and not self._writer.done() and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
 
 class ConnectionManager:
     """WebSocket connection manager."""
     
     def __init__(self):
-        self.active_connections: Set[WebSocket] = set()
+        self.clients: Dict[WebSocket, ClientConnection] = {}
         self.printer_subscriptions: Dict[str, Set[WebSocket]] = {}
+
+    @property
+    def active_connections(self) -> Set[WebSocket]:
+        return set(self.clients)
         
     async def connect(self, websocket: WebSocket):
         """Accept and register a new WebSocket connection.
@@ -29,8 +158,10 @@ class ConnectionManager:
             websocket: WebSocket connection to accept and register.
         """
         await websocket.accept()
-        self.active_connections.add(websocket)
-        logger.info("WebSocket client connected", total_connections=len(self.active_connections))
+        client = ClientConnection(websocket, self)
+        self.clients[websocket] = client
+        client.start()
+        logger.info("WebSocket client connected", total_connections=len(self.clients))
         
     def disconnect(self, websocket: WebSocket):
         """Unregister a WebSocket connection and clean up subscriptions.
@@ -38,48 +169,48 @@ class ConnectionManager:
         Args:
             websocket: WebSocket connection to disconnect and remove from all subscriptions.
         """
-        self.active_connections.discard(websocket)
+        client = self.clients.pop(websocket, None)
+        if client is None:
+            return
+        client.close()
         # Remove from printer subscriptions
         for printer_id, connections in self.printer_subscriptions.items():
             connections.discard(websocket)
-        logger.info("WebSocket client disconnected", total_connections=len(self.active_connections))
+        logger.info("WebSocket client disconnected", total_connections=len(self.clients))
+
+    def send(self, websocket: WebSocket, message: dict):
+        """Queue a message for one client."""
+        client = self.clients.get(websocket)
+        if client:
+            client.enqueue(json.dumps(message))
         
-    async def broadcast(self, message: dict):
-        """Broadcast message to all connected clients."""
-        if not self.active_connections:
+    async def broadcast(self, message: dict, topic: Optional[str] = None):
+        """Broadcast message to all connected clients.
+
+        Only queues the message; it never waits for a client.
+
+        Args:
+            message: Message to send.
+            topic: Messages of the same topic replace each other while still queued.
+        """
+        if not self.clients:
             return
             
         message_str = json.dumps(message)
-        disconnected = set()
-        
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message_str)
-            except:
-                disconnected.add(connection)
-                
-        # Clean up disconnected clients
-        for connection in disconnected:
-            self.disconnect(connection)
+        for client in list(self.clients.values()):
+            client.enqueue(message_str, topic)
             
-    async def send_to_printer_subscribers(self, printer_id: str, message: dict):
+    async def send_to_printer_subscribers(self, printer_id: str, message: dict, topic: Optional[str] = None):
         """Send message to clients subscribed to specific printer."""
         connections = self.printer_subscriptions.get(printer_id, set())
         if not connections:
             return
             
         message_str = json.dumps(message)
-        disconnected = set()
-        
-        for connection in connections:
-            try:
-                await connection.send_text(message_str)
-            except:
-                disconnected.add(connection)
-                
-        # Clean up disconnected clients
-        for connection in disconnected:
-            connections.discard(connection)
+        for connection in list(connections):
+            client = self.clients.get(connection)
+            if client:
+                client.enqueue(message_str, topic)
             
     def subscribe_to_printer(self, websocket: WebSocket, printer_id: str):
         """Subscribe websocket to printer updates."""
@@ -92,9 +223,24 @@ class ConnectionManager:
         if printer_id in self.printer_subscriptions:
             self.printer_subscriptions[printer_id].discard(websocket)
 
+    def get_stats(self) -> Dict[str, Any]:
+        """Connection and send queue statistics."""
+        depths = [client.queue_depth for client in self.clients.values()]
+        return {
+            'clients': len(self.clients),
+            'queued_messages': sum(depths),
+            'max_queue_depth': max(depths, default=0),
+            'messages_sent': sum(client.messages_sent for client in self.clients.values()),
+            'messages_coalesced': sum(client.messages_coalesced for client in self.clients.values())
+        }
+
 
 manager = ConnectionManager()
 
+WEBSOCKET_CLIENTS.set_function(lambda: len(manager.clients))
+WEBSOCKET_QUEUE_DEPTH.labels(aggregate='total').set_function(lambda: manager.get_stats()['queued_messages'])
+WEBSOCKET_QUEUE_DEPTH.labels(aggregate='max').set_function(lambda: manager.get_stats()['max_queue_depth'])
+
 
 @router.websocket("")
 async def websocket_endpoint(websocket: WebSocket):
@@ -125,18 +271,23 @@ async def _handle_websocket_connection(websocket: WebSocket, event_service: Even
                 message = json.loads(data)
                 await handle_client_message(websocket, message)
             except json.JSONDecodeError:
-                await websocket.send_text(json.dumps({
+                manager.send(websocket, {
                     "type": "error",
                     "message": "Invalid JSON format"
-                }))
+                })
             except Exception as e:
                 logger.error("Error handling WebSocket message", error=str(e))
-                await websocket.send_text(json.dumps({
+                manager.send(websocket, {
                     "type": "error", 
                     "message": "Internal server error"
-                }))
+                })
                 
     except WebSocketDisconnect:
+        pass
+    except RuntimeError:
+        # Closed by the server, e.g. after falling behind
+        pass
+    finally:
         manager.disconnect(websocket)
 
 
@@ -148,28 +299,28 @@ async def handle_client_message(websocket: WebSocket, message: dict):
         printer_id = message.get("printer_id")
         if printer_id:
             manager.subscribe_to_printer(websocket, printer_id)
-            await websocket.send_text(json.dumps({
+            manager.send(websocket, {
                 "type": "subscribed",
                 "printer_id": printer_id
-            }))
+            })
             
     elif message_type == "unsubscribe_printer":
         printer_id = message.get("printer_id")
         if printer_id:
             manager.unsubscribe_from_printer(websocket, printer_id)
-            await websocket.send_text(json.dumps({
+            manager.send(websocket, {
                 "type": "unsubscribed", 
                 "printer_id": printer_id
-            }))
+            })
             
     elif message_type == "ping":
-        await websocket.send_text(json.dumps({"type": "pong"}))
+        manager.send(websocket, {"type": "pong"})
         
     else:
-        await websocket.send_text(json.dumps({
+        manager.send(websocket, {
             "type": "error",
             "message": f"Unknown message type: {message_type}"
-        }))
+        })
 
 
 # Event handlers for broadcasting updates
@@ -179,7 +330,7 @@ async def broadcast_printer_status(printer_id: UUID, status_data: dict):
         "type": "printer_status",
         "printer_id": str(printer_id),
         "data": status_data
-    })
+    }, topic=f"printer_status:{printer_id}")
 
 
 async def broadcast_job_update(job_id: UUID, job_data: dict):
@@ -191,13 +342,13 @@ async def broadcast_job_update(job_id: UUID, job_data: dict):
     })
 
 
-async def broadcast_system_event(event_type: str, event_data: dict):
-    """Broadcast system event."""
+async def broadcast_system_event(event_type: str, event_data: dict, topic: Optional[str] = None):
+    """Broadcast system event; events sharing a topic replace each other while queued."""
     await manager.broadcast({
         "type": "system_event",
         "event_type": event_type,
         "data": event_data
-    })
+    }, topic=topic)
 
 
 # Make connection manager available for other modules
@@ -277,6 +277,27 @@ class ServerConstants:
     """Additional CORS origins for development"""
 
 
+class WebSocketConstants:
+    """
+    WebSocket fan-out configuration constants.
+
+    Each client has a bounded send queue drained by its own writer task, so a
+    slow client cannot delay messages to the others.
+    """
+
+    SEND_QUEUE_MAX_MESSAGES: int = 256
+    """Messages queued for one client before it is disconnected as too slow"""
+
+    SEND_TIMEOUT_SECONDS: float = 10.0
+    """Longest a single send may take before the client is disconnected"""
+
+    CLOSE_TIMEOUT_SECONDS: float = 2.0
+    """Time allowed for the close handshake with a disconnected slow client"""
+
+    CLOSE_CODE_TOO_SLOW: int = 1013
+    """Close code sent to clients that fall behind ("try again later")"""
+
+
 class TimelapseConstants:
     """
     Timelapse recording and processing configuration constants.
@@ -293,6 +314,36 @@ class TimelapseConstants:
     TIMELAPSE_CLEANUP_AGE_DAYS: int = 30
     """Age threshold for cleanup recommendations"""
 
+    TIMELAPSE_ETA_SAMPLE_SIZE: int = 20
+    """Recent completed renders used to estimate render time per image"""
+
+    TIMELAPSE_DEFAULT_SECONDS_PER_IMAGE: float = 0.5
+    """Render time per image assumed for queue ETAs until renders have completed"""
+
+    TIMELAPSE_FOLDER_MTIME_SETTLE_SECONDS: float = 2.0
+    """Source folders modified more recently than this are recounted on the next scan"""
+
+    TIMELAPSE_RENDER_TIMEOUT_SECONDS: int = 1800
+    """Longest a single timelapse render may run"""
+
+    TIMELAPSE_DEFLICKER_WINDOW: int = 15
+    """Frames averaged for the deflicker luminance target"""
+
+    TIMELAPSE_DEFLICKER_MAX_GAIN: float = 2.0
+    """Largest brightness correction the deflicker applies to a frame (and its inverse)"""
+
+    TIMELAPSE_DECODE_WORKERS: int = 4
+    """Upper bound on image decoder threads per render"""
+
+    TIMELAPSE_X264_PRESET: str = "medium"
+    """x264 speed/size preset of the built-in renderer"""
+
+    TIMELAPSE_X264_CRF: int = 23
+    """x264 constant rate factor (quality) of the built-in renderer"""
+
+    TIMELAPSE_FFMPEG_STDERR_LINES: int = 20
+    """Last ffmpeg error lines kept for the failure message"""
+
 
 class ThumbnailConstants:
     """
@@ -396,6 +447,25 @@ class CameraConstants:
     CAMERA_IDLE_TIMEOUT_SECONDS: int = 60
     """Close camera connection after this many seconds of inactivity"""
 
+    # Snapshot Prefetching
+    CAMERA_WATCH_WINDOW_SECONDS: int = 10
+    """A camera's request history is dropped this long after its last snapshot request"""
+
+    CAMERA_PREFETCH_RATE_SAMPLES: int = 4
+    """Recent requests per camera used to measure its request rate; prefetching needs at least two within one TTL"""
+
+    CAMERA_PREFETCH_TICK_SECONDS: float = 1.0
+    """How often the prefetcher checks watched cameras"""
+
+    CAMERA_PREFETCH_LEAD_SECONDS: float = 1.5
+    """Refresh watched frames this long before they expire from the snapshot cache"""
+
+    CAMERA_PREFETCH_BACKOFF_INITIAL_SECONDS: float = 2.0
+    """Delay before prefetching a camera again after a failed fetch; doubles per consecutive failure"""
+
+    CAMERA_PREFETCH_BACKOFF_MAX_SECONDS: float = 60.0
+    """Upper bound of the prefetch backoff"""
+
     # Resource Limits
     MAX_VIEWERS_PER_PRINTER: int = 5
     """Maximum concurrent stream viewers per printer"""
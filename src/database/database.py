@@ -74,13 +74,17 @@ import asyncio
 import aiosqlite
 import json
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable
 from datetime import datetime
 import structlog
 from contextlib import asynccontextmanager
 import time
 import sqlite3
 
+from src.database.repositories.base_repository import list_projection
+from src.database.repositories.file_repository import FileRepository
+from src.database.repositories.library_repository import LibraryRepository
+
 logger = structlog.get_logger()
 
 
@@ -588,9 +592,7 @@ class Database:
         Returns:
             True if successful, False otherwise
         """
-        # Convert tuple to list for internal method
-        param_list = list(params) if params else None
-        return await self._write(sql, param_list)
+        return await self._execute_write(sql, params)
 
     # ============================================================================
     # Connection Pool Management
@@ -1122,10 +1124,19 @@ class Database:
             return False
     
     async def list_files(self, printer_id: Optional[str] = None, status: Optional[str] = None,
-                        source: Optional[str] = None) -> List[Dict[str, Any]]:
-        """List files with optional filtering."""
+                        source: Optional[str] = None,
+                        include: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        List files with optional filtering.
+
+        Thumbnail data and metadata are left out unless named in ``include``
+        (see ``FileRepository.LIST_OPTIONAL_COLUMNS``).
+        """
         try:
-            query = "SELECT * FROM files"
+            columns = await list_projection(
+                self._connection, 'files', FileRepository.LIST_OPTIONAL_COLUMNS, include
+            )
+            query = f"SELECT {columns} FROM files"
             params = []
             conditions = []
 
@@ -1669,10 +1680,14 @@ class Database:
         )
 
     async def list_library_files(self, filters: Optional[Dict[str, Any]] = None,
-                                 page: int = 1, limit: int = 50) -> tuple:
+                                 page: int = 1, limit: int = 50,
+                                 include: Optional[Iterable[str]] = None) -> tuple:
         """
         List library files with filters and pagination.
 
+        Heavy columns are left out unless named in ``include`` (see
+        ``LibraryRepository.LIST_OPTIONAL_COLUMNS``).
+
         Returns:
             Tuple of (files_list, pagination_info)
         """
@@ -1769,11 +1784,15 @@ class Database:
                 sort_order = 'DESC'
 
             order_by = f"{db_field} {sort_order}"
+            columns = await list_projection(
+                self._connection, 'library_files', LibraryRepository.LIST_OPTIONAL_COLUMNS,
+                include, alias='lf'
+            )
 
             if needs_join:
                 # Query with JOIN (distinct to avoid duplicates)
                 query = f"""
-                    SELECT DISTINCT lf.* FROM library_files lf
+                    SELECT DISTINCT {columns} FROM library_files lf
                     INNER JOIN library_file_sources lfs ON lf.checksum = lfs.file_checksum
                     WHERE {where_clause}
                     ORDER BY {order_by}
@@ -1782,7 +1801,7 @@ class Database:
             else:
                 # Simple query without JOIN
                 query = f"""
-                    SELECT lf.* FROM library_files lf
+                    SELECT {columns} FROM library_files lf
                     WHERE {where_clause}
                     ORDER BY {order_by}
                     LIMIT ? OFFSET ?
@@ -54,13 +54,44 @@ See Also:
     - docs/technical-debt/COMPLETION-REPORT.md - Phase 1 repository extraction
     - src/services/ - Services that use these repositories
 """
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Tuple
 import aiosqlite
 import structlog
 
 logger = structlog.get_logger()
 
 
+async def list_projection(connection: aiosqlite.Connection, table: str,
+                          optional_columns: Iterable[str],
+                          include: Optional[Iterable[str]] = None,
+                          alias: Optional[str] = None) -> str:
+    """
+    Build the SELECT column list for a list query.
+
+    Lists render cards, so heavy columns (blobs, large text and JSON) are left
+    out unless the caller asks for them. Columns are read from the live schema
+    because migrations keep adding them.
+
+    Args:
+        connection: Active database connection
+        table: Table name
+        optional_columns: Columns only selected when named in ``include``
+        include: Optional columns to select anyway
+        alias: Table alias to prefix columns with
+
+    Returns:
+        Comma-separated column list (``*`` if the schema cannot be read)
+    """
+    cursor = await connection.execute(f"PRAGMA table_info({table})")
+    columns = [row[1] for row in await cursor.fetchall()]
+    prefix = f"{alias}." if alias else ""
+    if not columns:
+        return f"{prefix}*"
+
+    skipped = set(optional_columns) - set(include or ())
+    return ", ".join(f"{prefix}{column}" for column in columns if column not in skipped)
+
+
 class BaseRepository:
     """
     Base class for all repositories providing common database operations.
@@ -91,6 +122,9 @@ class BaseRepository:
         concurrent access.
     """
 
+    # Heavy columns left out of list queries unless requested via ``include``
+    LIST_OPTIONAL_COLUMNS: Tuple[str, ...] = ()
+
     def __init__(self, connection: aiosqlite.Connection):
         """
         Initialize the repository with a database connection.
@@ -291,3 +325,19 @@ class BaseRepository:
             logger.error("Error fetching multiple rows",
                         sql=sql[:100], error=str(e), exc_info=True)
             raise
+
+    async def _list_columns(self, table: str, include: Optional[Iterable[str]] = None,
+                            alias: Optional[str] = None) -> str:
+        """
+        Column list for a list query, without ``LIST_OPTIONAL_COLUMNS``.
+
+        Args:
+            table: Table name
+            include: Optional columns to select anyway
+            alias: Table alias to prefix columns with
+
+        Returns:
+            Comma-separated column list for the SELECT clause
+        """
+        return await list_projection(self.connection, table, self.LIST_OPTIONAL_COLUMNS,
+                                     include, alias)
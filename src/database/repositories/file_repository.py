@@ -146,7 +146,7 @@ See Also:
 import json
 import sqlite3
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 import structlog
 
 from .base_repository import BaseRepository
@@ -176,6 +176,8 @@ class FileRepository(BaseRepository):
         Use connection pooling for concurrent access.
     """
 
+    LIST_OPTIONAL_COLUMNS = ('thumbnail_data', 'metadata')
+
     async def create(self, file_data: Dict[str, Any]) -> bool:
         """Create a new file record or update if exists (preserving thumbnails).
 
@@ -313,23 +315,27 @@ class FileRepository(BaseRepository):
             return None
 
     async def list(self, printer_id: Optional[str] = None, status: Optional[str] = None,
-                   source: Optional[str] = None) -> List[Dict[str, Any]]:
+                   source: Optional[str] = None,
+                   include: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
         """List files with optional filtering.
 
         Args:
             printer_id: Filter by printer ID
             status: Filter by file status ('available', 'downloading', 'error', etc.)
             source: Filter by file source ('printer', 'local_watch')
+            include: Columns from ``LIST_OPTIONAL_COLUMNS`` to select anyway
 
         Returns:
             List of file dictionaries ordered by created_at DESC
 
         Notes:
             - Automatically deserializes JSON metadata fields
+            - Leaves out thumbnail data and metadata unless named in ``include``
             - Returns empty list on error
         """
         try:
-            query = "SELECT * FROM files"
+            columns = await self._list_columns('files', include)
+            query = f"SELECT {columns} FROM files"
             params = []
             conditions = []
 
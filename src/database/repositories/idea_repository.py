@@ -146,7 +146,7 @@ See Also:
 
 import sqlite3
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 import structlog
 
 from .base_repository import BaseRepository
@@ -176,6 +176,8 @@ class IdeaRepository(BaseRepository):
         Use connection pooling for concurrent access.
     """
 
+    LIST_OPTIONAL_COLUMNS = ('metadata', 'material_notes', 'customer_info')
+
     async def create(self, idea_data: Dict[str, Any]) -> bool:
         """Create a new idea record.
 
@@ -252,7 +254,8 @@ class IdeaRepository(BaseRepository):
 
     async def list(self, status: Optional[str] = None, is_business: Optional[bool] = None,
                    category: Optional[str] = None, source_type: Optional[str] = None,
-                   limit: Optional[int] = None, offset: Optional[int] = None) -> List[Dict[str, Any]]:
+                   limit: Optional[int] = None, offset: Optional[int] = None,
+                   include: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
         """List ideas with optional filtering and pagination.
 
         Args:
@@ -262,15 +265,19 @@ class IdeaRepository(BaseRepository):
             source_type: Filter by source type ('manual', 'trending', 'url', etc.)
             limit: Maximum number of results to return
             offset: Number of results to skip (for pagination)
+            include: Columns from ``LIST_OPTIONAL_COLUMNS`` to select anyway
 
         Returns:
             List of idea dictionaries ordered by priority DESC, created_at DESC
 
         Notes:
+            - Leaves out metadata, material notes and customer info unless
+              named in ``include``
             - Returns empty list on error
         """
         try:
-            query = "SELECT * FROM ideas"
+            columns = await self._list_columns('ideas', include)
+            query = f"SELECT {columns} FROM ideas"
             params = []
             conditions = []
 
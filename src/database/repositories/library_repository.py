@@ -147,8 +147,9 @@ See Also:
     - docs/technical-debt/COMPLETION-REPORT.md - Repository pattern
 """
 
+import json
 import sqlite3
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 import structlog
 
 from .base_repository import BaseRepository
@@ -179,6 +180,8 @@ class LibraryRepository(BaseRepository):
         Use connection pooling for concurrent access.
     """
 
+    LIST_OPTIONAL_COLUMNS = ('thumbnail_data', 'sources', 'search_index', 'metadata')
+
     async def create_file(self, file_data: Dict[str, Any]) -> bool:
         """Create a new library file record.
 
@@ -340,7 +343,8 @@ class LibraryRepository(BaseRepository):
             return False
 
     async def list_files(self, filters: Optional[Dict[str, Any]] = None,
-                        page: int = 1, limit: int = 50) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+                        page: int = 1, limit: int = 50,
+                        include: Optional[Iterable[str]] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
         """List library files with filters and pagination.
 
         Args:
@@ -355,10 +359,14 @@ class LibraryRepository(BaseRepository):
                 - printer_model: Filter by printer model (requires JOIN)
                 - show_duplicates: If False, hide duplicate files (default: True)
                 - only_duplicates: If True, show only duplicates
-                - sort_by: Field to sort by ('created_at', 'filename', 'file_size', 'last_modified')
+                - min_plates: Only multi-plate projects with at least this many plates
+                - max_plate_time: Only files with a plate that prints within this many seconds
+                - sort_by: Field to sort by ('created_at', 'filename', 'file_size',
+                  'last_modified', 'plate_count')
                 - sort_order: Sort direction ('asc' or 'desc', default: 'desc')
             page: Page number (1-indexed)
             limit: Items per page
+            include: Columns from ``LIST_OPTIONAL_COLUMNS`` to select anyway
 
         Returns:
             Tuple of (files_list, pagination_info)
@@ -368,6 +376,7 @@ class LibraryRepository(BaseRepository):
         Notes:
             - Automatically JOINs library_file_sources when filtering by manufacturer/printer_model
             - Uses DISTINCT when JOIN is required to avoid duplicates
+            - Leaves out ``LIST_OPTIONAL_COLUMNS`` unless named in ``include``
             - Returns empty list and default pagination on error
         """
         try:
@@ -419,6 +428,18 @@ class LibraryRepository(BaseRepository):
             if filters.get('only_duplicates') is True:
                 where_clauses.append("lf.is_duplicate = 1")
 
+            # Plate filters (multi-plate 3MF projects)
+            if filters.get('min_plates') is not None:
+                where_clauses.append("lf.plate_count >= ?")
+                params.append(filters['min_plates'])
+
+            if filters.get('max_plate_time') is not None:
+                where_clauses.append(
+                    "lf.checksum IN (SELECT file_checksum FROM library_file_plates "
+                    "WHERE estimated_time <= ?)"
+                )
+                params.append(filters['max_plate_time'])
+
             # Tag filters - check if filtering by tags
             needs_tag_join = bool(filters.get('tags'))
             if needs_tag_join:
@@ -467,7 +488,8 @@ class LibraryRepository(BaseRepository):
                 'created_at': 'lf.added_to_library',
                 'filename': 'lf.filename',
                 'file_size': 'lf.file_size',
-                'last_modified': 'lf.last_modified'
+                'last_modified': 'lf.last_modified',
+                'plate_count': 'lf.plate_count'
             }
 
             # Get the database column name (default to added_to_library if invalid)
@@ -478,11 +500,12 @@ class LibraryRepository(BaseRepository):
                 sort_order = 'DESC'
 
             order_by = f"{db_field} {sort_order}"
+            columns = await self._list_columns('library_files', include, alias='lf')
 
             if needs_join:
                 # Query with JOIN (distinct to avoid duplicates)
                 query = f"""
-                    SELECT DISTINCT lf.* FROM library_files lf
+                    SELECT DISTINCT {columns} FROM library_files lf
                     INNER JOIN library_file_sources lfs ON lf.checksum = lfs.file_checksum
                     WHERE {where_clause}
                     ORDER BY {order_by}
@@ -491,7 +514,7 @@ class LibraryRepository(BaseRepository):
             else:
                 # Simple query without JOIN
                 query = f"""
-                    SELECT lf.* FROM library_files lf
+                    SELECT {columns} FROM library_files lf
                     WHERE {where_clause}
                     ORDER BY {order_by}
                     LIMIT ? OFFSET ?
@@ -654,6 +677,252 @@ class LibraryRepository(BaseRepository):
                         error=str(e), exc_info=True)
             return False
 
+    async def get_thumbnail_info(self, checksum: str) -> Optional[Dict[str, Any]]:
+        """Get only the thumbnail columns of a library file.
+
+        Args:
+            checksum: File checksum
+
+        Returns:
+            Dictionary with has_thumbnail, thumbnail_hash and thumbnail_format,
+            or None if the file does not exist
+        """
+        try:
+            return await self._fetch_one(
+                "SELECT has_thumbnail, thumbnail_hash, thumbnail_format "
+                "FROM library_files WHERE checksum = ?",
+                (checksum,)
+            )
+        except Exception as e:
+            logger.error("Failed to get library thumbnail info", checksum=checksum,
+                        error=str(e), exc_info=True)
+            return None
+
+    async def count_thumbnail_references(self, thumbnail_hash: str) -> int:
+        """Count library files and plates referencing a stored thumbnail.
+
+        Args:
+            thumbnail_hash: Content hash of the stored thumbnail
+
+        Returns:
+            Number of referencing rows (0 on error)
+        """
+        try:
+            row = await self._fetch_one(
+                "SELECT (SELECT COUNT(*) FROM library_files WHERE thumbnail_hash = ?) "
+                "+ (SELECT COUNT(*) FROM library_file_plates WHERE thumbnail_hash = ?) AS refs",
+                (thumbnail_hash, thumbnail_hash)
+            )
+            return row['refs'] if row else 0
+        except Exception as e:
+            logger.error("Failed to count thumbnail references", error=str(e), exc_info=True)
+            return 0
+
+    async def count_content_references(self, content_checksum: str) -> int:
+        """Count library files holding a content, including duplicates of it.
+
+        Args:
+            content_checksum: Checksum of the file content
+
+        Returns:
+            Number of library files (0 on error)
+        """
+        try:
+            row = await self._fetch_one(
+                "SELECT COUNT(*) AS refs FROM library_files "
+                "WHERE checksum = ? OR duplicate_of_checksum = ?",
+                (content_checksum, content_checksum)
+            )
+            return row['refs'] if row else 0
+        except Exception as e:
+            logger.error("Failed to count content references", error=str(e), exc_info=True)
+            return 0
+
+    async def list_inline_thumbnails(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """List files whose thumbnail is still stored inline as base64.
+
+        Args:
+            limit: Maximum rows to return
+
+        Returns:
+            List of dictionaries with checksum, thumbnail_data and thumbnail_format
+        """
+        try:
+            return await self._fetch_all(
+                "SELECT checksum, thumbnail_data, thumbnail_format FROM library_files "
+                "WHERE thumbnail_data IS NOT NULL AND thumbnail_hash IS NULL LIMIT ?",
+                (limit,)
+            )
+        except Exception as e:
+            logger.error("Failed to list inline thumbnails", error=str(e), exc_info=True)
+            return []
+
+    # =====================================================
+    # PLATE METHODS
+    # =====================================================
+
+    PLATE_COLUMNS = ('plate_index', 'name', 'object_count', 'estimated_time', 'filament_weight',
+                     'filament_length', 'filaments', 'layer_height', 'support_used', 'has_gcode',
+                     'thumbnail_hash')
+
+    async def replace_plates(self, checksum: str, plates: List[Dict[str, Any]]) -> bool:
+        """Replace the per-plate rows of a library file.
+
+        Args:
+            checksum: File checksum
+            plates: Plate dictionaries (see ``ThreeMFAnalyzer.analyze_plates``);
+                ``filaments`` is stored as JSON
+
+        Returns:
+            True if the rows were written, False otherwise
+
+        Notes:
+            - All plates are inserted with a single multi-row INSERT
+        """
+        try:
+            await self._execute_write("DELETE FROM library_file_plates WHERE file_checksum = ?",
+                                      (checksum,))
+            if not plates:
+                return True
+
+            params = []
+            for plate in plates:
+                params.append(checksum)
+                for column in self.PLATE_COLUMNS:
+                    value = plate.get(column)
+                    if column == 'filaments':
+                        value = json.dumps(value or [])
+                    params.append(value)
+
+            row = "(" + ", ".join("?" * (len(self.PLATE_COLUMNS) + 1)) + ")"
+            await self._execute_write(
+                f"INSERT INTO library_file_plates (file_checksum, {', '.join(self.PLATE_COLUMNS)}) "
+                f"VALUES {', '.join([row] * len(plates))}",
+                tuple(params)
+            )
+            return True
+        except Exception as e:
+            logger.error("Failed to replace library file plates", checksum=checksum,
+                        error=str(e), exc_info=True)
+            return False
+
+    async def list_plates(self, checksum: str, sort_by: str = 'plate_index',
+                          sort_order: str = 'asc') -> List[Dict[str, Any]]:
+        """List the plates of a library file.
+
+        Args:
+            checksum: File checksum
+            sort_by: 'plate_index', 'estimated_time', 'filament_weight' or 'object_count'
+            sort_order: 'asc' or 'desc'
+
+        Returns:
+            List of plate dictionaries with ``filaments`` decoded (empty on error)
+        """
+        try:
+            if sort_by not in ('plate_index', 'estimated_time', 'filament_weight', 'object_count'):
+                sort_by = 'plate_index'
+            direction = 'DESC' if sort_order.lower() == 'desc' else 'ASC'
+            rows = await self._fetch_all(
+                f"SELECT {', '.join(self.PLATE_COLUMNS)} FROM library_file_plates "
+                f"WHERE file_checksum = ? ORDER BY {sort_by} {direction}, plate_index ASC",
+                (checksum,)
+            )
+            for row in rows:
+                row['filaments'] = json.loads(row['filaments']) if row.get('filaments') else []
+                row['support_used'] = bool(row['support_used']) if row['support_used'] is not None else None
+                row['has_gcode'] = bool(row['has_gcode'])
+            return rows
+        except Exception as e:
+            logger.error("Failed to list library file plates", checksum=checksum,
+                        error=str(e), exc_info=True)
+            return []
+
+    async def delete_plates(self, checksum: str) -> bool:
+        """Delete all plate rows of a library file.
+
+        Args:
+            checksum: File checksum
+
+        Returns:
+            True if deletion succeeded, False otherwise
+        """
+        try:
+            await self._execute_write("DELETE FROM library_file_plates WHERE file_checksum = ?",
+                                      (checksum,))
+            return True
+        except Exception as e:
+            logger.error("Failed to delete library file plates", checksum=checksum,
+                        error=str(e), exc_info=True)
+            return False
+
+    # =====================================================
+    # LAYER STATISTICS METHODS
+    # =====================================================
+
+    LAYER_STATS_COLUMNS = ('layer_count', 'estimated_time', 'filament_length', 'filament_weight',
+                           'travel_distance', 'model_version', 'layers')
+
+    async def upsert_layer_stats(self, checksum: str, stats: Dict[str, Any]) -> bool:
+        """Store the layer statistics of a library file, replacing earlier ones.
+
+        Args:
+            checksum: File checksum
+            stats: ``LayerStatistics.summary()`` plus ``layers`` (packed blob)
+
+        Returns:
+            True if the row was written, False otherwise
+        """
+        try:
+            columns = ', '.join(self.LAYER_STATS_COLUMNS)
+            await self._execute_write(
+                f"INSERT OR REPLACE INTO library_file_layer_stats (file_checksum, {columns}) "
+                f"VALUES (?, {', '.join('?' * len(self.LAYER_STATS_COLUMNS))})",
+                (checksum, *(stats.get(c) for c in self.LAYER_STATS_COLUMNS))
+            )
+            return True
+        except Exception as e:
+            logger.error("Failed to store library file layer stats", checksum=checksum,
+                        error=str(e), exc_info=True)
+            return False
+
+    async def get_layer_stats(self, checksum: str) -> Optional[Dict[str, Any]]:
+        """Get the stored layer statistics of a library file.
+
+        Args:
+            checksum: File checksum
+
+        Returns:
+            Row dictionary (``layers`` is the packed blob), or None
+        """
+        try:
+            return await self._fetch_one(
+                f"SELECT {', '.join(self.LAYER_STATS_COLUMNS)}, analyzed_at "
+                f"FROM library_file_layer_stats WHERE file_checksum = ?",
+                (checksum,)
+            )
+        except Exception as e:
+            logger.error("Failed to get library file layer stats", checksum=checksum,
+                        error=str(e), exc_info=True)
+            return None
+
+    async def delete_layer_stats(self, checksum: str) -> bool:
+        """Delete the layer statistics of a library file.
+
+        Args:
+            checksum: File checksum
+
+        Returns:
+            True if deletion succeeded, False otherwise
+        """
+        try:
+            await self._execute_write(
+                "DELETE FROM library_file_layer_stats WHERE file_checksum = ?", (checksum,))
+            return True
+        except Exception as e:
+            logger.error("Failed to delete library file layer stats", checksum=checksum,
+                        error=str(e), exc_info=True)
+            return False
+
     # =====================================================
     # TAG MANAGEMENT METHODS
     # =====================================================
@@ -0,0 +1,88 @@
+"""
+Repository for the parse-result cache.
+
+Rows hold the compressed output of one parser run over one file content,
+keyed by ``(checksum, parser_name, parser_version)``. Only one version per
+checksum and parser is kept: storing a new version drops the older ones.
+"""
+from typing import Any, Dict, List, Optional
+
+import structlog
+
+from .base_repository import BaseRepository
+
+logger = structlog.get_logger(__name__)
+
+
+class ParseCacheRepository(BaseRepository):
+    """Data access for cached parser results."""
+
+    async def get(self, checksum: str, parser_name: str, parser_version: str) -> Optional[bytes]:
+        """Get a cached result blob.
+
+        Returns:
+            Compressed result, or None if not cached
+        """
+        row = await self._fetch_one(
+            "SELECT result FROM parse_result_cache "
+            "WHERE checksum = ? AND parser_name = ? AND parser_version = ?",
+            (checksum, parser_name, parser_version)
+        )
+        return row['result'] if row else None
+
+    async def put(self, checksum: str, parser_name: str, parser_version: str,
+                  result: bytes, result_size: int) -> None:
+        """Store a result blob, replacing other versions for the same file and parser."""
+        await self._execute_write(
+            "DELETE FROM parse_result_cache "
+            "WHERE checksum = ? AND parser_name = ? AND parser_version != ?",
+            (checksum, parser_name, parser_version)
+        )
+        await self._execute_write(
+            "INSERT OR REPLACE INTO parse_result_cache "
+            "(checksum, parser_name, parser_version, result, result_size) VALUES (?, ?, ?, ?, ?)",
+            (checksum, parser_name, parser_version, result, result_size)
+        )
+
+    async def versions(self, checksums: List[str], parser_name: str) -> Dict[str, str]:
+        """Cached version of a parser's result per checksum (missing if not cached)."""
+        versions: Dict[str, str] = {}
+        # Chunked to stay below SQLite's bound-parameter limit
+        for start in range(0, len(checksums), 500):
+            chunk = checksums[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = await self._fetch_all(
+                f"SELECT checksum, parser_version FROM parse_result_cache "
+                f"WHERE parser_name = ? AND checksum IN ({placeholders})",
+                (parser_name, *chunk)
+            )
+            versions.update((row['checksum'], row['parser_version']) for row in rows)
+        return versions
+
+    async def delete_parser(self, parser_name: str,
+                            keep_versions: Optional[List[str]] = None) -> None:
+        """Delete a parser's entries, optionally keeping some versions."""
+        if not keep_versions:
+            await self._execute_write(
+                "DELETE FROM parse_result_cache WHERE parser_name = ?", (parser_name,))
+        else:
+            placeholders = ", ".join("?" * len(keep_versions))
+            await self._execute_write(
+                f"DELETE FROM parse_result_cache "
+                f"WHERE parser_name = ? AND parser_version NOT IN ({placeholders})",
+                (parser_name, *keep_versions)
+            )
+
+    async def delete_checksum(self, checksum: str) -> None:
+        """Delete every cached result for a file content."""
+        await self._execute_write(
+            "DELETE FROM parse_result_cache WHERE checksum = ?", (checksum,))
+
+    async def get_stats(self) -> List[Dict[str, Any]]:
+        """Entry count and stored bytes per parser and version."""
+        return await self._fetch_all(
+            "SELECT parser_name, parser_version, COUNT(*) AS entries, "
+            "SUM(LENGTH(result)) AS stored_bytes, SUM(result_size) AS result_bytes "
+            "FROM parse_result_cache GROUP BY parser_name, parser_version "
+            "ORDER BY parser_name, parser_version"
+        )
@@ -77,6 +77,8 @@ from src.services.thumbnail_service import ThumbnailService
 from src.services.url_parser_service import UrlParserService
 from src.services.timelapse_service import TimelapseService
 from src.services.notification_service import NotificationService
+from src.services.analysis_executor import get_analysis_executor, shutdown_analysis_executor
+from src.services.parse_result_cache import ParseResultCache
 from src.utils.logging_config import setup_logging
 from src.utils.errors import (
     PrinternizerError,
@@ -180,6 +182,12 @@ async def lifespan(app: FastAPI):
     app.state.migration_service = migration_service
     timer.end("Database migrations")
     logger.info("[OK] Database migrations completed")
+
+    # Parser results are cached by content checksum and parser version;
+    # entries of superseded parser versions are dropped once per start
+    parse_result_cache = ParseResultCache(database)
+    await parse_result_cache.prune_stale_versions()
+    get_analysis_executor().result_cache = parse_result_cache
     
     # Initialize services
     timer.start("Core services initialization")
@@ -217,6 +225,8 @@ async def lifespan(app: FastAPI):
     from src.services.camera_snapshot_service import CameraSnapshotService
     camera_snapshot_service = CameraSnapshotService(printer_service)
     await camera_snapshot_service.start()
+    from src.services.camera_stream_proxy import CameraStreamProxy
+    camera_stream_proxy = CameraStreamProxy(printer_service, camera_snapshot_service)
 
     timer.end("Core services initialization")
     logger.info("[OK] Core services initialized")
@@ -348,6 +358,7 @@ async def lifespan(app: FastAPI):
     app.state.usage_statistics_service = usage_statistics_service
     app.state.usage_statistics_scheduler = usage_statistics_scheduler
     app.state.camera_snapshot_service = camera_snapshot_service
+    app.state.camera_stream_proxy = camera_stream_proxy
     app.state.slicer_service = slicer_service
     app.state.slicing_queue = slicing_queue
     app.state.generator_service = generator_service
@@ -575,6 +586,16 @@ async def lifespan(app: FastAPI):
             )
         )
 
+    # Camera stream proxy
+    if hasattr(app.state, 'camera_stream_proxy') and app.state.camera_stream_proxy:
+        shutdown_tasks.append(
+            shutdown_with_timeout(
+                app.state.camera_stream_proxy.shutdown(),
+                "Camera stream proxy",
+                timeout=TimeoutConstants.SERVICE_SHUTDOWN_TIMEOUT_SECONDS
+            )
+        )
+
     # Camera snapshot service
     if hasattr(app.state, 'camera_snapshot_service') and app.state.camera_snapshot_service:
         shutdown_tasks.append(
@@ -585,6 +606,25 @@ async def lifespan(app: FastAPI):
             )
         )
 
+    # Library service (metadata extraction workers)
+    if hasattr(app.state, 'library_service') and app.state.library_service:
+        shutdown_tasks.append(
+            shutdown_with_timeout(
+                app.state.library_service.shutdown(),
+                "Library service",
+                timeout=TimeoutConstants.SERVICE_SHUTDOWN_TIMEOUT_SECONDS
+            )
+        )
+
+    # Analysis worker processes (shared by library and file metadata services)
+    shutdown_tasks.append(
+        shutdown_with_timeout(
+            shutdown_analysis_executor(),
+            "Analysis executor",
+            timeout=TimeoutConstants.SERVICE_SHUTDOWN_TIMEOUT_SECONDS
+        )
+    )
+
     # Slicing queue
     if hasattr(app.state, 'slicing_queue') and app.state.slicing_queue:
         shutdown_tasks.append(
@@ -38,6 +38,10 @@ class Timelapse(BaseModel):
     error_message: Optional[str] = Field(None, description="Error details if failed")
     retry_count: int = Field(0, description="Number of retry attempts")
 
+    # Render queue (pending and processing timelapses only)
+    queue_position: Optional[int] = Field(None, description="Position in the render queue (1 = next)")
+    eta_seconds: Optional[int] = Field(None, description="Estimated seconds until the video is ready")
+
     # Auto-detection
     last_image_detected_at: Optional[datetime] = Field(None, description="Last time new image was found")
     auto_process_eligible_at: Optional[datetime] = Field(None, description="When auto-processing can trigger")
@@ -139,3 +143,22 @@ class TimelapseBulkDeleteResult(BaseModel):
     deleted: int = Field(0, description="Number of successfully deleted timelapses")
     failed: int = Field(0, description="Number of failed deletions")
     errors: list[str] = Field(default_factory=list, description="Error messages for failed deletions")
+
+
+class TimelapseQueueItem(BaseModel):
+    """Pending or processing timelapse in the render queue."""
+    id: str = Field(..., description="Timelapse ID")
+    folder_name: str = Field(..., description="Folder name (for display)")
+    status: TimelapseStatus = Field(..., description="pending or processing")
+    image_count: Optional[int] = Field(None, description="Number of source images")
+    queue_position: Optional[int] = Field(None, description="Position among pending timelapses (1 = next); None while processing")
+    eta_seconds: int = Field(0, description="Estimated seconds until the video is ready")
+
+
+class TimelapseQueue(BaseModel):
+    """Render queue state."""
+    max_concurrent: int = Field(..., description="Timelapses rendered at the same time")
+    processing_count: int = Field(0, description="Timelapses currently rendering")
+    pending_count: int = Field(0, description="Timelapses waiting to render")
+    seconds_per_image: float = Field(..., description="Render time per image used for estimates")
+    items: list[TimelapseQueueItem] = Field(default_factory=list, description="Processing timelapses, then pending ones in queue order")
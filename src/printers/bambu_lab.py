@@ -6,9 +6,8 @@ import asyncio
 import json
 import time
 import random
-from typing import Dict, Any, Optional, List
+from typing import AsyncIterator, Dict, Any, Optional, List
 from datetime import datetime
-from io import BytesIO
 import structlog
 
 from src.config.constants import file_url
@@ -22,6 +21,7 @@ from .download_strategies import (
     MQTTDownloadStrategy
 )
 from src.services.bambu_ftp_service import BambuFTPService, BambuFTPFile
+from src.services.bambu_camera_reader import BambuCameraReader
 from src.constants import (
     PortConstants,
     NetworkConstants,
@@ -81,6 +81,9 @@ class BambuLabPrinter(BasePrinter):
         # Download handler for file downloads (initialized in connect())
         self.download_handler: Optional[DownloadHandler] = None
 
+        # Camera session, opened on demand (see take_snapshot)
+        self.camera_reader: Optional[BambuCameraReader] = None
+
         # Initialize appropriate client
         # Always initialize client to None to prevent AttributeError in methods that check it
         self.client = None  # MQTT client (used when not using bambu_api)
@@ -365,10 +368,12 @@ class BambuLabPrinter(BasePrinter):
             self.bambu_client.on_printer_status = self._on_bambu_status_update
             self.bambu_client.on_file_list = self._on_bambu_file_list_update
 
-            # Connect to printer (synchronous method) - wrap in executor to prevent blocking
+            # Connect to printer (synchronous method) - wrap in executor to prevent blocking.
+            # Only MQTT is started: the library's camera thread would hold a camera
+            # session open permanently, while BambuCameraReader opens one on demand.
             connect_start = time.time()
             loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, self.bambu_client.connect)
+            await loop.run_in_executor(None, self.bambu_client.mqtt_start)
             connect_duration = time.time() - connect_start
             logger.info("[TIMING] Bambu API client connect completed",
                        printer_id=self.printer_id,
@@ -615,6 +620,9 @@ class BambuLabPrinter(BasePrinter):
                 pass
             self._reconnect_task = None
 
+        if self.camera_reader:
+            await self.camera_reader.close()
+
         if not self.is_connected:
             self._connection_state = "disconnected"
             return
@@ -2130,79 +2138,55 @@ class BambuLabPrinter(BasePrinter):
     async def get_camera_stream_url(self) -> Optional[str]:
         """Get camera stream URL for Bambu Lab printer.
 
-        DEPRECATED: Live streaming not yet implemented.
-        Bambu Lab cameras use proprietary TCP/TLS protocol on port 6000.
-        Use CameraSnapshotService for snapshot functionality.
-        Live MJPEG streaming planned for future implementation.
+        Bambu Lab A1/P1 cameras use a proprietary TCP/TLS protocol on port
+        6000 rather than a stream URL, so this returns None. Live frames are
+        available from camera_frames(), which the camera stream proxy serves.
         """
-        logger.warning(
-            "get_camera_stream_url is deprecated - live streaming not yet implemented",
-            printer_id=self.printer_id
-        )
         return None
 
+    def _get_camera_reader(self) -> BambuCameraReader:
+        if self.camera_reader is None:
+            self.camera_reader = BambuCameraReader(
+                self.ip_address, self.access_code, printer_id=self.printer_id
+            )
+        return self.camera_reader
+
     async def take_snapshot(self) -> Optional[bytes]:
-        """Take a camera snapshot from Bambu Lab printer using bambulabs-api library.
+        """Take a camera snapshot from Bambu Lab printer.
+
+        Returns the latest frame of the camera session, opening the session
+        if needed. Frames are the printer's own JPEG data, not re-encoded.
 
         Returns:
             JPEG image data as bytes, or None if camera unavailable
-
-        Raises:
-            Exception: If camera access fails
         """
-        if not self.bambu_client:
+        if not self.is_connected:
             logger.error(
-                "Cannot take snapshot - Bambu client not connected",
+                "Cannot take snapshot - printer not connected",
                 printer_id=self.printer_id
             )
             return None
 
-        try:
-            logger.debug("Requesting camera snapshot", printer_id=self.printer_id)
-
-            # Run blocking camera call in executor to maintain async compatibility
-            loop = asyncio.get_event_loop()
-            image = await loop.run_in_executor(
-                None,
-                self.bambu_client.get_camera_image
-            )
-
-            if not image:
-                logger.warning(
-                    "No camera image available from printer",
-                    printer_id=self.printer_id
-                )
-                return None
-
-            # Convert PIL Image to JPEG bytes
-            buffer = BytesIO()
-            image.save(buffer, format='JPEG', quality=85)
-            jpeg_bytes = buffer.getvalue()
+        logger.debug("Requesting camera snapshot", printer_id=self.printer_id)
+        frame = await self._get_camera_reader().get_frame()
 
-            logger.info(
-                "Camera snapshot captured successfully",
-                printer_id=self.printer_id,
-                size_bytes=len(jpeg_bytes)
-            )
-
-            return jpeg_bytes
-
-        except AttributeError as e:
-            logger.error(
-                "bambulabs-api camera method not available - may not support A1 series",
-                printer_id=self.printer_id,
-                error=str(e)
+        if not frame:
+            logger.warning(
+                "No camera image available from printer",
+                printer_id=self.printer_id
             )
             return None
 
-        except Exception as e:
-            logger.error(
-                "Camera snapshot failed",
-                printer_id=self.printer_id,
-                error=str(e),
-                error_type=type(e).__name__
-            )
-            return None
+        logger.debug(
+            "Camera snapshot captured successfully",
+            printer_id=self.printer_id,
+            size_bytes=len(frame)
+        )
+        return frame
+
+    def camera_frames(self) -> AsyncIterator[bytes]:
+        """Live camera frames (JPEG) for streaming; the session stays open while iterating."""
+        return self._get_camera_reader().frames()
 
     async def upload_file(self, local_path: str, remote_name: str) -> bool:
         """
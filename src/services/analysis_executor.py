@@ -0,0 +1,571 @@
+"""
+Process-pool executor for CPU-bound file analysis.
+
+G-code, 3MF and STL analysis is pure Python (regex scans, XML parsing,
+trimesh) and holds the GIL, so running it on the event loop or in the default
+thread pool stalls every API request while a large file is parsed. This
+executor runs the analyzers in separate worker processes instead.
+
+Each worker owns a dedicated pipe and handles one request at a time, which
+lets a stuck or crashed worker be killed and replaced without disturbing the
+others. Requests and results are plain dataclasses so they pickle cleanly
+across the process boundary.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from src.services.parse_result_cache import ParseResultCache
+
+logger = structlog.get_logger()
+
+
+class AnalysisKind(str, Enum):
+    """Analysis that can be executed in a worker process."""
+
+    FILE_PARSE = "file_parse"                # BambuParser.parse_file
+    THREEMF = "threemf"                      # ThreeMFAnalyzer.analyze_file
+    STL = "stl"                              # STLAnalyzer.analyze_file
+    GCODE_LAYERS = "gcode_layers"            # gcode_statistics.analyze_layers
+    THUMBNAIL_DERIVATIVES = "thumbnail_derivatives"  # ThumbnailStore.generate_derivatives
+    PREVIEW_FRAME = "preview_frame"          # software_renderer.render_mesh
+
+
+# Kinds that only feed previews; they share a smaller budget of the pool so
+# a burst of animation frames cannot hold every worker while files wait
+BACKGROUND_KINDS = frozenset({AnalysisKind.PREVIEW_FRAME})
+
+
+@dataclass(frozen=True)
+class AnalysisRequest:
+    """A single analysis job sent to a worker process."""
+
+    kind: AnalysisKind
+    file_path: str
+    options: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class AnalysisResult:
+    """
+    Outcome of an analysis job.
+
+    ``data`` holds the analyzer's own result dictionary. ``error`` is only set
+    when the job could not be executed (exception, crash or timeout); an
+    analyzer reporting ``success: False`` in ``data`` is still a completed job.
+    """
+
+    kind: AnalysisKind
+    file_path: str
+    data: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    timed_out: bool = False
+    duration_seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Return True if the analyzer ran to completion."""
+        return self.error is None
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+def _run_file_parse(file_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    from src.services.bambu_parser import BambuParser
+    return asyncio.run(BambuParser().parse_file(file_path))
+
+
+def _run_threemf(file_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    from src.services.threemf_analyzer import ThreeMFAnalyzer
+    return asyncio.run(ThreeMFAnalyzer().analyze_file(Path(file_path)))
+
+
+def _run_stl(file_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    from src.services.stl_analyzer import STLAnalyzer
+    return STLAnalyzer().analyze_file_sync(Path(file_path))
+
+
+def _run_gcode_layers(file_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    from src.utils.gcode_statistics import MotionModel, analyze_layers
+    stats = analyze_layers(file_path, MotionModel.from_options(options))
+    return {'success': True, **stats.summary(), 'layers': stats.to_bytes()}
+
+
+def _run_thumbnail_derivatives(file_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    from src.services.thumbnail_store import ThumbnailStore
+    store = ThumbnailStore(Path(options['store_root']))
+    return {'written': store.generate_derivatives(options['digest'])}
+
+
+def _run_preview_frame(file_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    import numpy as np
+    from src.utils.software_renderer import render_mesh
+    with np.load(file_path) as data:
+        vertices, faces = data['vertices'], data['faces']
+    image = render_mesh(vertices, faces, tuple(options['size']), **options['render'])
+    return {'frame': np.asarray(image)}
+
+
+_HANDLERS: Dict[AnalysisKind, Callable[[str, Dict[str, Any]], Dict[str, Any]]] = {
+    AnalysisKind.FILE_PARSE: _run_file_parse,
+    AnalysisKind.THREEMF: _run_threemf,
+    AnalysisKind.STL: _run_stl,
+    AnalysisKind.GCODE_LAYERS: _run_gcode_layers,
+    AnalysisKind.THUMBNAIL_DERIVATIVES: _run_thumbnail_derivatives,
+    AnalysisKind.PREVIEW_FRAME: _run_preview_frame,
+}
+
+
+def run_analysis(request: AnalysisRequest) -> AnalysisResult:
+    """
+    Execute an analysis request in the current process.
+
+    Used by worker processes and as the in-process fallback when no worker
+    processes are available.
+
+    Args:
+        request: Analysis request
+
+    Returns:
+        Analysis result (never raises)
+    """
+    started = time.monotonic()
+    try:
+        handler = _HANDLERS[request.kind]
+        data = handler(request.file_path, dict(request.options))
+        return AnalysisResult(
+            kind=request.kind,
+            file_path=request.file_path,
+            data=data,
+            duration_seconds=time.monotonic() - started
+        )
+    except Exception as e:
+        return AnalysisResult(
+            kind=request.kind,
+            file_path=request.file_path,
+            error=f"{type(e).__name__}: {e}",
+            duration_seconds=time.monotonic() - started
+        )
+
+
+def _worker_main(conn) -> None:
+    """Worker process loop: receive requests until told to stop."""
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
+        conn.send(run_analysis(request))
+    conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Parent side
+# ---------------------------------------------------------------------------
+
+class _WorkerDied(Exception):
+    """The worker process exited while handling a request."""
+
+
+class _Worker:
+    """A worker process and the parent end of its pipe."""
+
+    def __init__(self, context, name: str):
+        parent_conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn,), name=name, daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.tasks_done = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def exchange(self, request: AnalysisRequest, timeout: float) -> AnalysisResult:
+        """Send a request and block until the result arrives (runs in a thread)."""
+        try:
+            self.conn.send(request)
+            ready = self.conn.poll(timeout)
+            if ready:
+                return self.conn.recv()
+        except (EOFError, OSError) as e:
+            raise _WorkerDied(str(e) or type(e).__name__)
+        raise TimeoutError
+
+    def stop(self) -> None:
+        """Ask the worker to exit after its current request."""
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+    def kill(self) -> None:
+        """Terminate the worker immediately."""
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+def default_worker_count() -> int:
+    """Size the pool to the host, leaving one core for the event loop."""
+    return max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+class AnalysisExecutor:
+    """
+    Bounded pool of analysis worker processes.
+
+    Workers are started lazily on first use. A request that exceeds its
+    timeout, or whose caller is cancelled, gets its worker killed; a
+    replacement is started on the next submission. Workers are also recycled
+    after ``max_tasks_per_worker`` requests to bound memory growth from
+    long-lived mesh libraries.
+
+    When ``result_cache`` is set, parser requests that carry a content
+    checksum are answered from the persistent parse-result cache first.
+
+    Requests of ``BACKGROUND_KINDS`` run on at most ``background_workers``
+    workers at a time; the others queue for the pool only once one of them
+    finishes, so file analysis never waits behind more than that many.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 task_timeout: float = 300.0,
+                 max_tasks_per_worker: int = 200,
+                 start_method: str = "spawn",
+                 background_workers: Optional[int] = None):
+        """
+        Initialize analysis executor.
+
+        Args:
+            max_workers: Number of worker processes (default: sized to the host)
+            task_timeout: Default per-request timeout in seconds
+            max_tasks_per_worker: Requests handled before a worker is recycled
+            start_method: multiprocessing start method for worker processes
+            background_workers: Workers preview frames may use at once
+                (default: half the pool, at least one)
+        """
+        self.max_workers = max(1, int(max_workers or default_worker_count()))
+        self.background_workers = min(
+            self.max_workers, max(1, int(background_workers or self.max_workers // 2))
+        )
+        self.task_timeout = float(task_timeout)
+        self.max_tasks_per_worker = max(1, int(max_tasks_per_worker))
+        self._context = multiprocessing.get_context(start_method)
+
+        self._idle: List[_Worker] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._background_slots: Optional[asyncio.Semaphore] = None
+        self._io_threads: Optional[ThreadPoolExecutor] = None
+        self._worker_seq = 0
+        self._closed = False
+
+        self._completed = 0
+        self._failed = 0
+        self._timeouts = 0
+        self._workers_replaced = 0
+
+        self.result_cache: Optional['ParseResultCache'] = None
+
+    async def submit(self, request: AnalysisRequest,
+                     timeout: Optional[float] = None) -> AnalysisResult:
+        """
+        Run an analysis request in a worker process.
+
+        Args:
+            request: Analysis request
+            timeout: Per-request timeout in seconds (default: ``task_timeout``)
+
+        Returns:
+            Analysis result; failures are reported via ``result.error``
+        """
+        if self._closed:
+            return AnalysisResult(kind=request.kind, file_path=request.file_path,
+                                  error="Analysis executor is shut down")
+
+        timeout = self.task_timeout if timeout is None else timeout
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+            self._background_slots = asyncio.Semaphore(self.background_workers)
+            self._io_threads = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="analysis-io"
+            )
+
+        if request.kind in BACKGROUND_KINDS:
+            async with self._background_slots:
+                return await self._run(request, timeout)
+        return await self._run(request, timeout)
+
+    async def _run(self, request: AnalysisRequest, timeout: float) -> AnalysisResult:
+        """Run a request on a pool worker once one is free."""
+        async with self._slots:
+            try:
+                worker = self._acquire_worker()
+            except Exception as e:
+                # Process creation can fail in restricted environments
+                logger.warning("Analysis worker unavailable, running in thread",
+                               error=str(e))
+                return await asyncio.to_thread(run_analysis, request)
+
+            loop = asyncio.get_running_loop()
+            started = time.monotonic()
+            try:
+                result = await loop.run_in_executor(
+                    self._io_threads, worker.exchange, request, timeout
+                )
+            except asyncio.CancelledError:
+                # The worker cannot be interrupted; discard it
+                self._discard(worker)
+                raise
+            except TimeoutError:
+                self._discard(worker)
+                self._timeouts += 1
+                logger.warning("File analysis timed out, worker replaced",
+                               kind=request.kind.value,
+                               file_path=request.file_path,
+                               timeout=timeout)
+                return AnalysisResult(
+                    kind=request.kind, file_path=request.file_path,
+                    error=f"Analysis timed out after {timeout:g}s",
+                    timed_out=True, duration_seconds=time.monotonic() - started
+                )
+            except _WorkerDied as e:
+                self._discard(worker)
+                self._failed += 1
+                logger.error("Analysis worker died, worker replaced",
+                             kind=request.kind.value,
+                             file_path=request.file_path,
+                             exitcode=worker.process.exitcode)
+                return AnalysisResult(
+                    kind=request.kind, file_path=request.file_path,
+                    error=f"Analysis worker exited unexpectedly ({e})",
+                    duration_seconds=time.monotonic() - started
+                )
+
+            self._release_worker(worker)
+            if result.ok:
+                self._completed += 1
+            else:
+                self._failed += 1
+                logger.warning("File analysis failed",
+                               kind=request.kind.value,
+                               file_path=request.file_path,
+                               error=result.error)
+            return result
+
+    async def _cached(self, checksum: Optional[str], parser_name: str, file_path,
+                      parse: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Route a parser request through the result cache when possible."""
+        if self.result_cache is None or not checksum:
+            return await parse()
+        return await self.result_cache.get_or_parse(checksum, parser_name, str(file_path), parse)
+
+    async def parse_file(self, file_path: str,
+                         timeout: Optional[float] = None,
+                         checksum: Optional[str] = None) -> Dict[str, Any]:
+        """Run ``BambuParser.parse_file`` out of process; same result shape."""
+        async def parse() -> Dict[str, Any]:
+            result = await self.submit(
+                AnalysisRequest(AnalysisKind.FILE_PARSE, str(file_path)), timeout
+            )
+            if result.ok:
+                return result.data
+            return {
+                'success': False,
+                'error': result.error,
+                'thumbnails': [],
+                'metadata': {},
+                'needs_generation': False
+            }
+
+        return await self._cached(checksum, 'BambuParser', file_path, parse)
+
+    async def analyze_3mf(self, file_path: Path,
+                          timeout: Optional[float] = None,
+                          checksum: Optional[str] = None) -> Dict[str, Any]:
+        """Run ``ThreeMFAnalyzer.analyze_file`` out of process; same result shape."""
+        async def parse() -> Dict[str, Any]:
+            result = await self.submit(
+                AnalysisRequest(AnalysisKind.THREEMF, str(file_path)), timeout
+            )
+            return result.data if result.ok else {'success': False, 'error': result.error}
+
+        return await self._cached(checksum, 'ThreeMFAnalyzer', file_path, parse)
+
+    async def analyze_stl(self, file_path: Path,
+                          timeout: Optional[float] = None,
+                          checksum: Optional[str] = None) -> Dict[str, Any]:
+        """Run ``STLAnalyzer.analyze_file`` out of process; same result shape."""
+        async def parse() -> Dict[str, Any]:
+            result = await self.submit(
+                AnalysisRequest(AnalysisKind.STL, str(file_path)), timeout
+            )
+            return result.data if result.ok else {'success': False, 'error': result.error}
+
+        return await self._cached(checksum, 'STLAnalyzer', file_path, parse)
+
+    async def analyze_gcode_layers(self, file_path: str,
+                                   options: Optional[Dict[str, Any]] = None,
+                                   timeout: Optional[float] = None,
+                                   checksum: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Compute per-layer statistics of a G-code file out of process.
+
+        Args:
+            file_path: Path to the G-code file
+            options: ``MotionModel`` fields (acceleration, filament_density, ...).
+                With a ``checksum`` they must be derived from the file itself,
+                since cached results are keyed by content only
+            checksum: Content checksum; routes the request through the result cache
+
+        Returns:
+            ``LayerStatistics.summary()`` plus ``layers`` (the packed per-layer
+            table) and ``success``
+        """
+        async def parse() -> Dict[str, Any]:
+            result = await self.submit(
+                AnalysisRequest(AnalysisKind.GCODE_LAYERS, str(file_path), dict(options or {})),
+                timeout
+            )
+            return result.data if result.ok else {'success': False, 'error': result.error}
+
+        return await self._cached(checksum, 'GcodeLayers', file_path, parse)
+
+    async def generate_thumbnail_derivatives(self, store_root: Path, digest: str,
+                                             timeout: Optional[float] = None) -> bool:
+        """
+        Render the derivative set of a stored thumbnail out of process.
+
+        Args:
+            store_root: Root directory of the ``ThumbnailStore``
+            digest: Content hash of the stored thumbnail
+
+        Returns:
+            True if the derivatives were generated (or already existed)
+        """
+        result = await self.submit(
+            AnalysisRequest(
+                AnalysisKind.THUMBNAIL_DERIVATIVES, digest,
+                {'store_root': str(store_root), 'digest': digest}
+            ),
+            timeout
+        )
+        return result.ok
+
+    async def render_preview_frame(self, mesh_path: Path, size: Tuple[int, int],
+                                   render: Dict[str, Any],
+                                   timeout: Optional[float] = None) -> Optional['np.ndarray']:
+        """
+        Render one frame of a mesh preview out of process.
+
+        Args:
+            mesh_path: ``.npz`` file with ``vertices`` and ``faces`` arrays
+            size: Frame size (width, height)
+            render: Keyword arguments of ``software_renderer.render_mesh``
+
+        Returns:
+            RGB frame as an (height, width, 3) uint8 array, or None on failure
+        """
+        result = await self.submit(
+            AnalysisRequest(AnalysisKind.PREVIEW_FRAME, str(mesh_path),
+                            {'size': tuple(size), 'render': dict(render)}),
+            timeout
+        )
+        return result.data['frame'] if result.ok else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get executor statistics."""
+        return {
+            'max_workers': self.max_workers,
+            'background_workers': self.background_workers,
+            'idle_workers': len(self._idle),
+            'task_timeout': self.task_timeout,
+            'completed': self._completed,
+            'failed': self._failed,
+            'timeouts': self._timeouts,
+            'workers_replaced': self._workers_replaced,
+        }
+
+    async def shutdown(self) -> None:
+        """Stop all idle workers; busy workers are killed when their request ends."""
+        self._closed = True
+        idle, self._idle = self._idle, []
+        if idle:
+            await asyncio.to_thread(lambda: [worker.stop() for worker in idle])
+        if self._io_threads is not None:
+            self._io_threads.shutdown(wait=False, cancel_futures=True)
+        logger.info("Analysis executor stopped", **self.get_stats())
+
+    def _acquire_worker(self) -> _Worker:
+        """Take an idle live worker or start a new one."""
+        while self._idle:
+            worker = self._idle.pop()
+            if worker.alive:
+                return worker
+            worker.kill()
+            self._workers_replaced += 1
+        self._worker_seq += 1
+        return _Worker(self._context, name=f"analysis-worker-{self._worker_seq}")
+
+    def _release_worker(self, worker: _Worker) -> None:
+        """Return a worker to the idle list, recycling it when worn out."""
+        worker.tasks_done += 1
+        if self._closed or worker.tasks_done >= self.max_tasks_per_worker:
+            worker.stop()
+        else:
+            self._idle.append(worker)
+
+    def _discard(self, worker: _Worker) -> None:
+        """Kill a worker that can no longer be trusted."""
+        worker.kill()
+        self._workers_replaced += 1
+
+
+# Global executor shared by the services that analyse files
+_analysis_executor: Optional[AnalysisExecutor] = None
+
+
+def get_analysis_executor() -> AnalysisExecutor:
+    """Get or create the global AnalysisExecutor instance."""
+    global _analysis_executor
+    if _analysis_executor is None:
+        from src.utils.config import get_settings
+        settings = get_settings()
+        _analysis_executor = AnalysisExecutor(
+            max_workers=getattr(settings, 'analysis_worker_processes', 0) or None,
+            task_timeout=getattr(settings, 'analysis_task_timeout', 300)
+        )
+    return _analysis_executor
+
+
+async def shutdown_analysis_executor() -> None:
+    """Shut down the global AnalysisExecutor if it was created."""
+    global _analysis_executor
+    if _analysis_executor is not None:
+        await _analysis_executor.shutdown()
+        _analysis_executor = None
@@ -0,0 +1,220 @@
+"""
+Bambu Lab Camera Reader
+
+Reads the camera of Bambu Lab A1/P1 printers directly, without bambulabs-api.
+
+Protocol (TLS on port 6000, self-signed certificate):
+- Client sends an 80-byte authentication packet: four little-endian uint32
+  (payload size 0x40, packet type 0x3000, 0, 0), then the username ``bblp``
+  and the access code, each NUL-padded to 32 bytes
+- Printer sends frames as a 16-byte header, whose first little-endian uint32
+  is the payload size, followed by one JPEG image
+
+The reader keeps the newest frame and passes the printer's JPEG bytes on
+unchanged. It connects on the first request and disconnects after
+CAMERA_IDLE_TIMEOUT_SECONDS without requests or stream consumers, so the
+camera session is only held open while somebody is watching.
+"""
+
+import asyncio
+import ssl
+import struct
+import time
+from typing import AsyncIterator, Optional, Tuple
+
+import structlog
+
+from src.constants import CameraConstants, PortConstants
+
+logger = structlog.get_logger()
+
+
+def build_auth_packet(access_code: str, username: str = CameraConstants.CAMERA_USERNAME) -> bytes:
+    """Authentication packet opening a camera session."""
+    return (
+        struct.pack('<IIII', CameraConstants.AUTH_PAYLOAD_SIZE, CameraConstants.AUTH_PACKET_TYPE, 0, 0)
+        + username.encode('ascii').ljust(CameraConstants.AUTH_USERNAME_FIELD_SIZE, b'\0')
+        + access_code.encode('ascii').ljust(CameraConstants.AUTH_PASSWORD_FIELD_SIZE, b'\0')
+    )
+
+
+def is_valid_jpeg(data: bytes) -> bool:
+    """Whether a frame payload is a complete JPEG image."""
+    return (
+        data.startswith(CameraConstants.JPEG_START_MARKER)
+        and data.endswith(CameraConstants.JPEG_END_MARKER)
+    )
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    """
+    Read one frame payload from a camera session.
+
+    Raises:
+        asyncio.IncompleteReadError: If the printer closed the connection
+        ValueError: If the header announces an implausible payload size
+    """
+    header = await reader.readexactly(CameraConstants.FRAME_HEADER_SIZE)
+    size = int.from_bytes(header[:4], 'little')
+    if not 0 < size <= CameraConstants.JPEG_MAX_SIZE_BYTES:
+        raise ValueError(f"Invalid camera frame size: {size}")
+    return await reader.readexactly(size)
+
+
+class BambuCameraReader:
+    """Background reader holding the latest frame of one printer's camera."""
+
+    def __init__(self, ip_address: str, access_code: str, printer_id: str = '',
+                 port: int = PortConstants.BAMBU_CAMERA_PORT,
+                 idle_timeout: float = CameraConstants.CAMERA_IDLE_TIMEOUT_SECONDS):
+        """
+        Initialize camera reader.
+
+        Args:
+            ip_address: Printer IP address
+            access_code: Printer access code
+            printer_id: Printer ID for logging
+            port: Camera port
+            idle_timeout: Seconds without consumers after which the session is closed
+        """
+        self.ip_address = ip_address
+        self.access_code = access_code
+        self.printer_id = printer_id
+        self.port = port
+        self.idle_timeout = idle_timeout
+
+        self.latest_frame: Optional[bytes] = None
+        self.latest_frame_at: float = 0.0      # time.monotonic() of latest_frame
+        self.frames_received = 0
+
+        self._task: Optional[asyncio.Task] = None
+        self._update = asyncio.Event()         # Replaced on every frame or failed connection
+        self._last_used = 0.0
+        self._streams = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _touch(self) -> None:
+        """Record use, starting the session if needed."""
+        self._last_used = time.monotonic()
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    def _notify(self) -> None:
+        self._update.set()
+        self._update = asyncio.Event()
+
+    async def get_frame(self, max_age: float = CameraConstants.FRAME_CACHE_TTL_SECONDS,
+                        timeout: float = CameraConstants.CAMERA_CONNECTION_TIMEOUT_SECONDS) -> Optional[bytes]:
+        """
+        Latest camera frame, waiting for the session if it is not fresh.
+
+        Args:
+            max_age: Oldest acceptable frame, in seconds
+            timeout: Longest wait for a new frame
+
+        Returns:
+            JPEG bytes as sent by the printer, or None if no frame arrived
+        """
+        self._touch()
+        if self.latest_frame is not None and time.monotonic() - self.latest_frame_at <= max_age:
+            return self.latest_frame
+        try:
+            # Returns on the next frame or on a failed connection attempt
+            await asyncio.wait_for(self._update.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        if self.latest_frame is not None and time.monotonic() - self.latest_frame_at <= max_age:
+            return self.latest_frame
+        return None
+
+    async def frames(self) -> AsyncIterator[bytes]:
+        """Yield every new camera frame; the session stays open while iterating."""
+        self._streams += 1
+        try:
+            self._touch()
+            while True:
+                seen = self.frames_received
+                await self._update.wait()
+                self._last_used = time.monotonic()
+                if self.frames_received != seen:
+                    yield self.latest_frame
+                elif not self.running:
+                    return
+        finally:
+            self._streams -= 1
+
+    async def close(self) -> None:
+        """Close the camera session."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._notify()
+
+    def _idle(self) -> bool:
+        return self._streams == 0 and time.monotonic() - self._last_used > self.idle_timeout
+
+    async def _run(self) -> None:
+        """Hold a camera session, reconnecting until idle or out of attempts."""
+        failures = 0
+        try:
+            while not self._idle():
+                try:
+                    await self._read_session()
+                    failures = 0
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    failures += 1
+                    logger.warning("Bambu camera session failed", printer_id=self.printer_id,
+                                   error=str(e) or type(e).__name__, attempt=failures)
+                    self._notify()
+                    if failures >= CameraConstants.CAMERA_MAX_RECONNECT_ATTEMPTS:
+                        break
+                    await asyncio.sleep(CameraConstants.CAMERA_RECONNECT_DELAY_SECONDS)
+        finally:
+            self._notify()
+        logger.info("Bambu camera session closed", printer_id=self.printer_id,
+                    frames_received=self.frames_received)
+
+    async def _open_connection(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        context = ssl.create_default_context()
+        # Bambu Lab printers use self-signed certificates
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        return await asyncio.wait_for(
+            asyncio.open_connection(self.ip_address, self.port, ssl=context),
+            CameraConstants.CAMERA_CONNECTION_TIMEOUT_SECONDS
+        )
+
+    async def _read_session(self) -> None:
+        """One connection: authenticate and read frames until idle or disconnected."""
+        reader, writer = await self._open_connection()
+        logger.info("Bambu camera session opened", printer_id=self.printer_id)
+        try:
+            writer.write(build_auth_packet(self.access_code))
+            await writer.drain()
+            while not self._idle():
+                frame = await asyncio.wait_for(
+                    read_frame(reader), CameraConstants.CAMERA_CONNECTION_TIMEOUT_SECONDS
+                )
+                if not is_valid_jpeg(frame):
+                    logger.debug("Skipping incomplete camera frame", printer_id=self.printer_id,
+                                 size=len(frame))
+                    continue
+                self.latest_frame = frame
+                self.latest_frame_at = time.monotonic()
+                self.frames_received += 1
+                self._notify()
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
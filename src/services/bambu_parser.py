@@ -2,16 +2,24 @@
 Bambu G-code and 3MF file parser for extracting thumbnails and metadata.
 Supports parsing Bambu Lab slicer generated files for thumbnails and print information.
 """
+import asyncio
+import os
 import re
+import struct
+import zlib
 import base64
 import binascii
-import zipfile
 import xml.etree.ElementTree as ET
 from typing import Dict, Any, Optional, List, Tuple
 from pathlib import Path
 from io import BytesIO
 import structlog
 
+from src.services.threemf_analyzer import ThreeMFAnalyzer
+from src.services.file_role_classifier import threemf_has_gcode
+from src.services.threemf_archive import ThreeMFArchive
+from src.utils.gcode_metadata import scan_comment_metadata
+
 logger = structlog.get_logger()
 
 
@@ -22,74 +30,122 @@ class BambuParser:
     THUMBNAIL_PATTERN = re.compile(r'; thumbnail begin (\d+)x(\d+) (\d+)', re.MULTILINE)
     THUMBNAIL_END_PATTERN = re.compile(r'; thumbnail end', re.MULTILINE)
     
-    # Metadata patterns from G-code comments
-    METADATA_PATTERNS = {
-        'estimated_time': re.compile(r'; estimated printing time \(normal mode\) = (.+)', re.IGNORECASE),
-        'model_printing_time': re.compile(r'; model printing time[:\s]+(.+)', re.IGNORECASE),
-        'layer_height': re.compile(r'; layer_height = ([\d.]+)', re.IGNORECASE),
-        'first_layer_height': re.compile(r'; first_layer_height = ([\d.]+)', re.IGNORECASE),
-        'infill_density': re.compile(r'; fill_density = ([\d.]+)', re.IGNORECASE),
-        'support_used': re.compile(r'; support_used = (.+)', re.IGNORECASE),
-        'nozzle_temperature': re.compile(r'; nozzle_temperature_initial_layer = (\d+)', re.IGNORECASE),
-        'bed_temperature': re.compile(r'; bed_temperature_initial_layer = (\d+)', re.IGNORECASE),
-        'total_layer_count': re.compile(r'; total layer count = (\d+)', re.IGNORECASE),
-        'print_speed': re.compile(r'; outer_wall_speed = ([\d.]+)', re.IGNORECASE),
+    # Values are matched against the start of a comment value
+    _NUMBER = re.compile(r'[\d.]+')
+    _INTEGER = re.compile(r'\d+')
+    _NUMBER_LIST = re.compile(r'[\d.,]+')
+    _TEXT = re.compile(r'.+')
+
+    # Metadata keys -> (G-code comment key, value pattern). Comments are
+    # tokenized once by scan_comment_metadata() and looked up here.
+    METADATA_KEYS = {
+        'estimated_time': ('estimated printing time (normal mode)', _TEXT),
+        'model_printing_time': ('model printing time', _TEXT),
+        'layer_height': ('layer_height', _NUMBER),
+        'first_layer_height': ('first_layer_height', _NUMBER),
+        'infill_density': ('fill_density', _NUMBER),
+        'support_used': ('support_used', _TEXT),
+        'nozzle_temperature': ('nozzle_temperature_initial_layer', _INTEGER),
+        'bed_temperature': ('bed_temperature_initial_layer', _INTEGER),
+        'total_layer_count': ('total layer count', _INTEGER),
+        'print_speed': ('outer_wall_speed', _NUMBER),
     }
-    
-    # Filament usage patterns (Bambu AMS specific)
-    FILAMENT_PATTERNS = {
-        'filament_used': re.compile(r'; filament used \[g\] = ([\d.,]+)', re.IGNORECASE),
-        'filament_cost': re.compile(r'; filament cost = ([\d.]+)', re.IGNORECASE),
-        'filament_type': re.compile(r'; filament_type = (.+)', re.IGNORECASE),
-        'filament_ids': re.compile(r'; filament_ids = (.+)', re.IGNORECASE),
+
+    # Filament usage keys (Bambu AMS specific)
+    FILAMENT_KEYS = {
+        'filament_used': ('filament used [g]', _NUMBER_LIST),
+        'filament_cost': ('filament cost', _NUMBER),
+        'filament_type': ('filament_type', _TEXT),
+        'filament_ids': ('filament_ids', _TEXT),
     }
-    
-    # Advanced metadata patterns for enhanced extraction
-    ADVANCED_METADATA_PATTERNS = {
+
+    # Advanced metadata keys for enhanced extraction
+    ADVANCED_METADATA_KEYS = {
         # Physical properties
-        'model_width': re.compile(r'; model_width = ([\d.]+)', re.IGNORECASE),
-        'model_depth': re.compile(r'; model_depth = ([\d.]+)', re.IGNORECASE),
-        'model_height': re.compile(r'; model_height = ([\d.]+)', re.IGNORECASE),
-        'max_z_height': re.compile(r'; max_z_height = ([\d.]+)', re.IGNORECASE),
-        
+        'model_width': ('model_width', _NUMBER),
+        'model_depth': ('model_depth', _NUMBER),
+        'model_height': ('model_height', _NUMBER),
+        'max_z_height': ('max_z_height', _NUMBER),
+
         # Print settings
-        'nozzle_diameter': re.compile(r'; nozzle_diameter = ([\d.]+)', re.IGNORECASE),
-        'wall_loops': re.compile(r'; wall_loops = (\d+)', re.IGNORECASE),
-        'top_shell_layers': re.compile(r'; top_shell_layers = (\d+)', re.IGNORECASE),
-        'bottom_shell_layers': re.compile(r'; bottom_shell_layers = (\d+)', re.IGNORECASE),
-        'sparse_infill_pattern': re.compile(r'; sparse_infill_pattern = (.+)', re.IGNORECASE),
-        'sparse_infill_density': re.compile(r'; sparse_infill_density = ([\d.]+)%?', re.IGNORECASE),
-        
+        'nozzle_diameter': ('nozzle_diameter', _NUMBER),
+        'wall_loops': ('wall_loops', _INTEGER),
+        'top_shell_layers': ('top_shell_layers', _INTEGER),
+        'bottom_shell_layers': ('bottom_shell_layers', _INTEGER),
+        'sparse_infill_pattern': ('sparse_infill_pattern', _TEXT),
+        'sparse_infill_density': ('sparse_infill_density', _NUMBER),
+
         # Advanced settings
-        'overhang_speed': re.compile(r'; overhang_speed = ([\d.]+)', re.IGNORECASE),
-        'bridge_speed': re.compile(r'; bridge_speed = ([\d.]+)', re.IGNORECASE),
-        'support_threshold_angle': re.compile(r'; support_threshold_angle = (\d+)', re.IGNORECASE),
-        'enable_support': re.compile(r'; enable_support = (.+)', re.IGNORECASE),
-        
+        'overhang_speed': ('overhang_speed', _NUMBER),
+        'bridge_speed': ('bridge_speed', _NUMBER),
+        'support_threshold_angle': ('support_threshold_angle', _INTEGER),
+        'enable_support': ('enable_support', _TEXT),
+
         # Compatibility
-        'compatible_printers': re.compile(r'; compatible_printers = (.+)', re.IGNORECASE),
-        'curr_bed_type': re.compile(r'; curr_bed_type = (.+)', re.IGNORECASE),
-        
+        'compatible_printers': ('compatible_printers', _TEXT),
+        'curr_bed_type': ('curr_bed_type', _TEXT),
+
         # Slicer information
-        'generator': re.compile(r'; generated by (.+)', re.IGNORECASE),
-        
+        'generator': ('generated by', _TEXT),
+
         # Material properties
-        'filament_density': re.compile(r'; filament_density = ([\d.,]+)', re.IGNORECASE),
-        'filament_diameter': re.compile(r'; filament_diameter = ([\d.,]+)', re.IGNORECASE),
-        'total_filament_weight': re.compile(r'; total filament weight \[g\] : ([\d.,]+)', re.IGNORECASE),
-        'total_filament_length': re.compile(r'; total filament used \[mm\] : ([\d.,]+)', re.IGNORECASE),
+        'filament_density': ('filament_density', _NUMBER_LIST),
+        'filament_diameter': ('filament_diameter', _NUMBER_LIST),
+        'total_filament_weight': ('total filament weight [g]', _NUMBER_LIST),
+        'total_filament_length': ('total filament used [mm]', _NUMBER_LIST),
     }
     
+    # Slicers write metadata and thumbnails as comment blocks at the start
+    # and/or end of a G-code file; only those regions are scanned by default.
+    GCODE_HEADER_MAX_BYTES = 4 * 1024 * 1024
+    GCODE_FOOTER_BYTES = 1024 * 1024
+    # Consecutive non-comment lines that mark the end of the header block
+    GCODE_HEADER_CODE_LINES = 200
+
+    # Prusa binary G-code (.bgcode) layout, little-endian:
+    # file header = magic, version (u32), checksum type (u16);
+    # block header = type (u16), compression (u16), uncompressed size (u32)
+    # [+ compressed size (u32) when compressed], then block parameters,
+    # payload and an optional CRC32.
+    BGCODE_MAGIC = b'GCDE'
+    BGCODE_FILE_HEADER = struct.Struct('<4sIH')
+    BGCODE_BLOCK_HEADER = struct.Struct('<HHI')
+    BGCODE_CHECKSUM_CRC32 = 1
+    BGCODE_BLOCK_FILE_METADATA = 0
+    BGCODE_BLOCK_GCODE = 1
+    BGCODE_BLOCK_SLICER_METADATA = 2
+    BGCODE_BLOCK_PRINTER_METADATA = 3
+    BGCODE_BLOCK_PRINT_METADATA = 4
+    BGCODE_BLOCK_THUMBNAIL = 5
+    BGCODE_METADATA_BLOCKS = (0, 2, 3, 4)
+    BGCODE_COMPRESSION_NONE = 0
+    BGCODE_COMPRESSION_DEFLATE = 1
+    BGCODE_METADATA_INI = 0
+    BGCODE_THUMBNAIL_FORMATS = {0: 'PNG', 1: 'JPG', 2: 'QOI'}
+
+    # Output format version per file type, used as the parse-result cache
+    # key. Bump a type's entry whenever its parse output changes; cached
+    # results of the other types stay valid.
+    PARSER_VERSIONS = {'.3mf': 2, '.gcode': 1, '.g': 1, '.bgcode': 1, '.stl': 1}
+
     def __init__(self):
         """Initialize the Bambu parser."""
         pass
+
+    @classmethod
+    def parser_version(cls, file_path: str) -> str:
+        """Cache version of the output for a file, e.g. ``'gcode-1'``."""
+        suffix = Path(file_path).suffix.lower()
+        return f"{suffix.lstrip('.')}-{cls.PARSER_VERSIONS.get(suffix, 0)}"
     
-    async def parse_file(self, file_path: str) -> Dict[str, Any]:
+    async def parse_file(self, file_path: str,
+                         archive: Optional[ThreeMFArchive] = None) -> Dict[str, Any]:
         """
         Parse a Bambu G-code or 3MF file and extract thumbnails and metadata.
 
         Args:
             file_path: Path to the file to parse
+            archive: Already opened 3MF package to read from (3MF files only)
 
         Returns:
             Dictionary containing parsed data with keys:
@@ -98,6 +154,7 @@ class BambuParser:
             - success: Boolean indicating if parsing was successful
             - error: Error message if parsing failed
             - needs_generation: Boolean indicating if preview rendering is needed
+            - has_gcode: Whether a 3MF bundles sliced G-code (3MF files only)
         """
         try:
             file_path = Path(file_path)
@@ -113,7 +170,7 @@ class BambuParser:
 
             # Determine file type and parse accordingly
             if file_path.suffix.lower() == '.3mf':
-                return await self._parse_3mf_file(file_path)
+                return await self._parse_3mf_file(file_path, archive)
             elif file_path.suffix.lower() in ['.gcode', '.g']:
                 return await self._parse_gcode_file(file_path)
             elif file_path.suffix.lower() == '.bgcode':
@@ -140,17 +197,25 @@ class BambuParser:
             }
     
     async def _parse_gcode_file(self, file_path: Path) -> Dict[str, Any]:
-        """Parse G-code file for thumbnails and metadata."""
+        """Parse G-code file for thumbnails and metadata (file I/O runs off the event loop)."""
+        return await asyncio.to_thread(self._parse_gcode_file_sync, file_path)
+
+    def _parse_gcode_file_sync(self, file_path: Path) -> Dict[str, Any]:
+        """Parse G-code file for thumbnails and metadata (blocking)."""
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            # Extract thumbnails
+            # Scan the header and footer comment blocks; fall back to all
+            # comment lines only if they don't hold what we need
+            content, complete = self._read_gcode_comment_blocks(file_path)
             thumbnails = self._extract_gcode_thumbnails(content)
-            
-            # Extract metadata
             metadata = self._extract_gcode_metadata(content)
-            
+
+            if not complete and self._needs_full_gcode_scan(content):
+                logger.debug("G-code header/footer incomplete, scanning whole file",
+                             file_path=str(file_path))
+                content = self._read_gcode_comments(file_path)
+                thumbnails = self._extract_gcode_thumbnails(content)
+                metadata = self._extract_gcode_metadata(content)
+
             logger.info("Successfully parsed G-code file",
                        file_path=str(file_path),
                        thumbnail_count=len(thumbnails),
@@ -163,7 +228,7 @@ class BambuParser:
                 'error': None,
                 'needs_generation': len(thumbnails) == 0  # Generate if no embedded thumbnails
             }
-            
+
         except Exception as e:
             logger.error("Failed to parse G-code file", file_path=str(file_path), error=str(e))
             return {
@@ -173,76 +238,148 @@ class BambuParser:
                 'metadata': {},
                 'needs_generation': False
             }
-    
-    async def _parse_3mf_file(self, file_path: Path) -> Dict[str, Any]:
-        """Parse 3MF file for thumbnails and metadata."""
+
+    def _read_gcode_comment_blocks(self, file_path: Path) -> Tuple[str, bool]:
+        """
+        Collect the comment lines of a G-code file's header and footer.
+
+        The header ends once ``GCODE_HEADER_CODE_LINES`` consecutive G-code
+        commands have been read (or at ``GCODE_HEADER_MAX_BYTES``); the footer
+        is the last ``GCODE_FOOTER_BYTES`` of the file.
+
+        Returns:
+            Tuple of (comment lines joined by newlines, True if the whole file
+            was covered)
+        """
+        file_size = os.path.getsize(file_path)
+        comments: List[str] = []
+        header_end = 0
+        code_run = 0
+
+        with open(file_path, 'rb') as f:
+            for raw_line in f:
+                header_end += len(raw_line)
+                line = raw_line.decode('utf-8', errors='ignore').strip()
+                if line.startswith(';'):
+                    comments.append(line)
+                    code_run = 0
+                elif line:
+                    code_run += 1
+                if code_run >= self.GCODE_HEADER_CODE_LINES or header_end >= self.GCODE_HEADER_MAX_BYTES:
+                    break
+
+            footer_start = max(header_end, file_size - self.GCODE_FOOTER_BYTES)
+            if footer_start < file_size:
+                f.seek(footer_start)
+                footer = f.read().decode('utf-8', errors='ignore').split('\n')
+                if footer_start > header_end:
+                    footer = footer[1:]  # Drop the partial first line
+                comments.extend(
+                    line.strip() for line in footer if line.lstrip().startswith(';')
+                )
+
+        return '\n'.join(comments), footer_start <= header_end
+
+    def _read_gcode_comments(self, file_path: Path) -> str:
+        """Collect every comment line of a G-code file, streaming it line by line."""
+        comments = []
+        with open(file_path, 'rb') as f:
+            for raw_line in f:
+                if raw_line.lstrip().startswith(b';'):
+                    comments.append(raw_line.decode('utf-8', errors='ignore').strip())
+        return '\n'.join(comments)
+
+    def _needs_full_gcode_scan(self, content: str) -> bool:
+        """True if the header/footer scan cut a thumbnail or found no slicer metadata."""
+        begin_count = len(self.THUMBNAIL_PATTERN.findall(content))
+        if begin_count != len(self.THUMBNAIL_END_PATTERN.findall(content)):
+            return True
+
+        comments = scan_comment_metadata(content)
+        tables = (self.METADATA_KEYS, self.FILAMENT_KEYS, self.ADVANCED_METADATA_KEYS)
+        return not any(comment_key in comments
+                       for table in tables for comment_key, _ in table.values())
+
+    async def _parse_3mf_file(self, file_path: Path,
+                              archive: Optional[ThreeMFArchive] = None) -> Dict[str, Any]:
+        """Parse 3MF file for thumbnails and metadata (file I/O runs off the event loop)."""
+        return await asyncio.to_thread(self._parse_3mf_file_sync, file_path, archive)
+
+    def _parse_3mf_file_sync(self, file_path: Path,
+                             archive: Optional[ThreeMFArchive] = None) -> Dict[str, Any]:
+        """Parse 3MF file for thumbnails and metadata (blocking)."""
+        owns_archive = archive is None
         try:
             thumbnails = []
             metadata = {}
-            
-            with zipfile.ZipFile(file_path, 'r') as zip_file:
-                # Look for thumbnail images in 3MF package
-                thumbnail_files = [f for f in zip_file.namelist() 
-                                 if f.startswith('Metadata/') and f.endswith('.png')]
-                
-                # Extract thumbnails
-                for thumb_file in thumbnail_files:
-                    try:
-                        with zip_file.open(thumb_file) as thumb:
-                            thumb_data = thumb.read()
-                            thumb_base64 = base64.b64encode(thumb_data).decode('utf-8')
-                            
-                            # Try to get dimensions from filename or default
-                            width, height = self._parse_thumbnail_dimensions(thumb_file)
-                            
-                            thumbnails.append({
-                                'data': thumb_base64,
-                                'width': width,
-                                'height': height,
-                                'format': 'png',
-                                'source_file': thumb_file
-                            })
-                            
-                    except Exception as e:
-                        logger.warning("Failed to extract thumbnail from 3MF", 
-                                     file=thumb_file, error=str(e))
-                        continue
-                
-                # Parse 3MF model file for metadata
+
+            if owns_archive:
+                archive = ThreeMFArchive(file_path)
+
+            # Look for thumbnail images in 3MF package
+            for thumb_file in archive.members('Metadata/', '.png'):
                 try:
-                    with zip_file.open('3D/3dmodel.model') as model_file:
-                        model_content = model_file.read().decode('utf-8')
-                        metadata.update(self._extract_3mf_metadata(model_content))
+                    thumb_base64 = base64.b64encode(archive.read(thumb_file)).decode('utf-8')
+
+                    # Try to get dimensions from filename or default
+                    width, height = self._parse_thumbnail_dimensions(thumb_file)
+
+                    thumbnails.append({
+                        'data': thumb_base64,
+                        'width': width,
+                        'height': height,
+                        'format': 'png',
+                        'source_file': thumb_file
+                    })
+
                 except Exception as e:
-                    logger.warning("Could not parse 3MF model metadata", error=str(e))
-                
-                # Look for other metadata files
-                metadata_files = [f for f in zip_file.namelist() 
-                                if f.startswith('Metadata/') and f.endswith('.xml')]
-                
-                for meta_file in metadata_files:
-                    try:
-                        with zip_file.open(meta_file) as meta:
-                            meta_content = meta.read().decode('utf-8')
-                            metadata.update(self._extract_3mf_metadata(meta_content))
-                    except Exception as e:
-                        logger.warning("Failed to parse 3MF metadata file", 
-                                     file=meta_file, error=str(e))
-                        continue
-            
+                    logger.warning("Failed to extract thumbnail from 3MF",
+                                 file=thumb_file, error=str(e))
+                    continue
+
+            # Stream the 3MF model file for metadata and dimensions
+            try:
+                summary = archive.model_summary()
+                if summary is None:
+                    raise KeyError(f"{file_path.name} has no 3D/3dmodel.model")
+                for name, value in summary['metadata']:
+                    self._add_3mf_metadata(metadata, name, value)
+                if summary['bounds']:
+                    metadata.update(self._dimensions_from_bounds(*summary['bounds'],
+                                                                 summary['vertex_count']))
+            except Exception as e:
+                logger.warning("Could not parse 3MF model metadata", error=str(e))
+
+            # Look for other metadata files
+            for meta_file in archive.members('Metadata/', '.xml'):
+                try:
+                    metadata.update(self._extract_3mf_metadata(archive.text(meta_file)))
+                except Exception as e:
+                    logger.warning("Failed to parse 3MF metadata file",
+                                 file=meta_file, error=str(e))
+                    continue
+
+            # Per-plate metadata of multi-plate projects, from the same archive
+            plates = ThreeMFAnalyzer().analyze_plates(archive)
+            if plates:
+                metadata['plate_count'] = len(plates)
+
             logger.info("Successfully parsed 3MF file",
                        file_path=str(file_path),
                        thumbnail_count=len(thumbnails),
+                       plate_count=len(plates),
                        metadata_keys=list(metadata.keys()))
 
             return {
                 'success': True,
                 'thumbnails': thumbnails,
                 'metadata': metadata,
+                'plates': plates,
+                'has_gcode': threemf_has_gcode(archive),
                 'error': None,
                 'needs_generation': len(thumbnails) == 0  # Generate if no embedded thumbnails
             }
-            
+
         except Exception as e:
             logger.error("Failed to parse 3MF file", file_path=str(file_path), error=str(e))
             return {
@@ -252,7 +389,10 @@ class BambuParser:
                 'metadata': {},
                 'needs_generation': False
             }
-    
+        finally:
+            if owns_archive and archive is not None:
+                archive.close()
+
     def _extract_gcode_thumbnails(self, content: str) -> List[Dict[str, Any]]:
         """Extract thumbnails from G-code comments."""
         thumbnails = []
@@ -312,76 +452,76 @@ class BambuParser:
         
         return thumbnails
     
+    def _lookup_comment_values(self, comments: Dict[str, str], keys: Dict[str, Tuple[str, Any]]):
+        """Yield ``(metadata key, value)`` for each key found in scanned comments."""
+        for key, (comment_key, pattern) in keys.items():
+            value = comments.get(comment_key)
+            if value is None:
+                continue
+            match = pattern.match(value)
+            if match:
+                yield key, match.group(0).strip()
+
     def _extract_gcode_metadata(self, content: str) -> Dict[str, Any]:
         """Extract metadata from G-code comments."""
         metadata = {}
+        comments = scan_comment_metadata(content)
         
         # Extract standard metadata
-        for key, pattern in self.METADATA_PATTERNS.items():
-            match = pattern.search(content)
-            if match:
-                value = match.group(1).strip()
-                
-                # Convert to appropriate type
-                if key in ['layer_height', 'first_layer_height', 'infill_density', 'print_speed']:
-                    try:
-                        metadata[key] = float(value)
-                    except ValueError:
-                        metadata[key] = value
-                elif key in ['nozzle_temperature', 'bed_temperature', 'total_layer_count']:
-                    try:
-                        metadata[key] = int(value)
-                    except ValueError:
-                        metadata[key] = value
-                elif key == 'estimated_time' or key == 'model_printing_time':
-                    metadata['estimated_time'] = self._parse_time_duration(value)
-                elif key == 'support_used':
-                    metadata[key] = value.lower() in ['true', '1', 'yes']
-                else:
+        for key, value in self._lookup_comment_values(comments, self.METADATA_KEYS):
+            # Convert to appropriate type
+            if key in ['layer_height', 'first_layer_height', 'infill_density', 'print_speed']:
+                try:
+                    metadata[key] = float(value)
+                except ValueError:
+                    metadata[key] = value
+            elif key in ['nozzle_temperature', 'bed_temperature', 'total_layer_count']:
+                try:
+                    metadata[key] = int(value)
+                except ValueError:
                     metadata[key] = value
+            elif key == 'estimated_time' or key == 'model_printing_time':
+                metadata['estimated_time'] = self._parse_time_duration(value)
+            elif key == 'support_used':
+                metadata[key] = value.lower() in ['true', '1', 'yes']
+            else:
+                metadata[key] = value
         
         # Extract filament information
-        for key, pattern in self.FILAMENT_PATTERNS.items():
-            match = pattern.search(content)
-            if match:
-                value = match.group(1).strip()
-                
-                if key == 'filament_used':
-                    # Parse comma-separated list of filament usage per extruder
-                    try:
-                        filament_amounts = [float(x.strip()) for x in value.split(',')]
-                        metadata['filament_used_grams'] = filament_amounts
-                        metadata['total_filament_used'] = sum(filament_amounts)
-                    except ValueError:
-                        metadata[key] = value
-                elif key == 'filament_cost':
-                    try:
-                        metadata[key] = float(value)
-                    except ValueError:
-                        metadata[key] = value
-                elif key == 'filament_ids':
-                    # Split AMS slot IDs
-                    metadata['filament_ams_slots'] = [x.strip() for x in value.split(',')]
-                else:
+        for key, value in self._lookup_comment_values(comments, self.FILAMENT_KEYS):
+            if key == 'filament_used':
+                # Parse comma-separated list of filament usage per extruder
+                try:
+                    filament_amounts = [float(x.strip()) for x in value.split(',')]
+                    metadata['filament_used_grams'] = filament_amounts
+                    metadata['total_filament_used'] = sum(filament_amounts)
+                except ValueError:
                     metadata[key] = value
+            elif key == 'filament_cost':
+                try:
+                    metadata[key] = float(value)
+                except ValueError:
+                    metadata[key] = value
+            elif key == 'filament_ids':
+                # Split AMS slot IDs
+                metadata['filament_ams_slots'] = [x.strip() for x in value.split(',')]
+            else:
+                metadata[key] = value
         
-        # Extract advanced metadata patterns
-        metadata.update(self._extract_advanced_metadata(content))
+        # Extract advanced metadata
+        metadata.update(self._extract_advanced_metadata(comments))
         
         # Calculate derived metrics
         metadata.update(self._calculate_derived_metrics(metadata))
         
         return metadata
     
-    def _extract_advanced_metadata(self, content: str) -> Dict[str, Any]:
-        """Extract advanced metadata from G-code content."""
+    def _extract_advanced_metadata(self, comments: Dict[str, str]) -> Dict[str, Any]:
+        """Extract advanced metadata from scanned G-code comments."""
         advanced_metadata = {}
         
-        for key, pattern in self.ADVANCED_METADATA_PATTERNS.items():
-            match = pattern.search(content)
-            if match:
-                value = match.group(1).strip()
-                advanced_metadata[key] = self._convert_metadata_value(key, value)
+        for key, value in self._lookup_comment_values(comments, self.ADVANCED_METADATA_KEYS):
+            advanced_metadata[key] = self._convert_metadata_value(key, value)
         
         return advanced_metadata
     
@@ -477,13 +617,12 @@ class BambuParser:
         derived['difficulty_level'] = self._calculate_difficulty_level(metadata)
         
         # Calculate material cost estimate (if filament weight available)
+        weight = None
         if 'total_filament_weight_sum' in derived or 'total_filament_used' in metadata:
             weight = derived.get('total_filament_weight_sum') or metadata.get('total_filament_used', 0)
-            # Default cost: €25/kg for PLA
-            material_cost_per_kg = 25.0
-            derived['material_cost_estimate'] = round((weight / 1000) * material_cost_per_kg, 2)
         
         # Calculate energy cost estimate (if print time available)
+        print_time_seconds = None
         if 'estimated_time' in metadata or 'model printing time' in metadata:
             # Get print time in seconds
             print_time_seconds = metadata.get('estimated_time', 0)
@@ -492,23 +631,47 @@ class BambuParser:
             if not print_time_seconds and 'model printing time' in metadata:
                 # This might have been parsed as a string, we don't have seconds yet
                 # Skip energy cost if we can't get the time
-                pass
-            else:
-                # Estimate power consumption: ~200W average for heated bed + hotend
-                power_watts = 200
-                energy_kwh = (power_watts * print_time_seconds) / (1000 * 3600)
-                # €0.30 per kWh
-                energy_cost_per_kwh = 0.30
-                derived['energy_cost_estimate'] = round(energy_kwh * energy_cost_per_kwh, 2)
+                print_time_seconds = None
         
-        # Calculate total cost
-        if 'material_cost_estimate' in derived and 'energy_cost_estimate' in derived:
-            derived['total_cost_estimate'] = round(
-                derived['material_cost_estimate'] + derived['energy_cost_estimate'], 2
-            )
+        derived.update(self.estimate_costs(weight, print_time_seconds))
         
         return derived
     
+    @staticmethod
+    def estimate_costs(filament_weight: Optional[float],
+                       print_time_seconds: Optional[float]) -> Dict[str, float]:
+        """
+        Material, energy and total cost estimates for a print.
+
+        Args:
+            filament_weight: Filament used in grams (None: unknown)
+            print_time_seconds: Print time in seconds (None: unknown)
+
+        Returns:
+            ``material_cost_estimate``, ``energy_cost_estimate`` and
+            ``total_cost_estimate`` for the inputs that are known
+        """
+        costs = {}
+        if filament_weight is not None:
+            # Default cost: €25/kg for PLA
+            material_cost_per_kg = 25.0
+            costs['material_cost_estimate'] = round((filament_weight / 1000) * material_cost_per_kg, 2)
+        
+        if print_time_seconds is not None:
+            # Estimate power consumption: ~200W average for heated bed + hotend
+            power_watts = 200
+            energy_kwh = (power_watts * print_time_seconds) / (1000 * 3600)
+            # €0.30 per kWh
+            energy_cost_per_kwh = 0.30
+            costs['energy_cost_estimate'] = round(energy_kwh * energy_cost_per_kwh, 2)
+        
+        # Calculate total cost
+        if 'material_cost_estimate' in costs and 'energy_cost_estimate' in costs:
+            costs['total_cost_estimate'] = round(
+                costs['material_cost_estimate'] + costs['energy_cost_estimate'], 2
+            )
+        return costs
+    
     def _calculate_complexity_score(self, metadata: Dict[str, Any]) -> int:
         """Calculate print complexity score (1-10 scale)."""
         score = 5  # Base score
@@ -586,18 +749,7 @@ class BambuParser:
                     value = elem.text or elem.get('value', '')
 
                     if name and value:
-                        # Convert known numeric fields
-                        if name.lower() in ['layer_height', 'layer_count', 'print_time',
-                                          'nozzle_temperature', 'bed_temperature']:
-                            try:
-                                if '.' in value:
-                                    metadata[name.lower()] = float(value)
-                                else:
-                                    metadata[name.lower()] = int(value)
-                            except ValueError:
-                                metadata[name.lower()] = value
-                        else:
-                            metadata[name.lower()] = value
+                        self._add_3mf_metadata(metadata, name, value)
 
             # Extract model dimensions from vertices (bounding box calculation)
             # 3MF files contain vertices in the <mesh> elements
@@ -613,6 +765,20 @@ class BambuParser:
 
         return metadata
 
+    def _add_3mf_metadata(self, metadata: Dict[str, Any], name: str, value: str) -> None:
+        """Store a 3MF ``<metadata>`` entry, converting known numeric fields."""
+        if name.lower() in ['layer_height', 'layer_count', 'print_time',
+                            'nozzle_temperature', 'bed_temperature']:
+            try:
+                if '.' in value:
+                    metadata[name.lower()] = float(value)
+                else:
+                    metadata[name.lower()] = int(value)
+            except ValueError:
+                metadata[name.lower()] = value
+        else:
+            metadata[name.lower()] = value
+
     def _extract_3mf_dimensions(self, root_element) -> Dict[str, Any]:
         """Extract physical dimensions from 3MF model by calculating bounding box."""
         dimensions = {}
@@ -640,128 +806,94 @@ class BambuParser:
 
         # Calculate bounding box if we found vertices
         if vertices:
-            min_x = min(v[0] for v in vertices)
-            max_x = max(v[0] for v in vertices)
-            min_y = min(v[1] for v in vertices)
-            max_y = max(v[1] for v in vertices)
-            min_z = min(v[2] for v in vertices)
-            max_z = max(v[2] for v in vertices)
-
-            # Calculate dimensions in mm
-            dimensions['model_width'] = round(max_x - min_x, 2)
-            dimensions['model_depth'] = round(max_y - min_y, 2)
-            dimensions['model_height'] = round(max_z - min_z, 2)
-
-            # Calculate volume (simple bounding box volume, not actual mesh volume)
-            volume_mm3 = (max_x - min_x) * (max_y - min_y) * (max_z - min_z)
-            dimensions['model_volume'] = round(volume_mm3 / 1000, 2)  # Convert to cm³
-
-            # Calculate approximate surface area (bounding box surface area)
-            width = max_x - min_x
-            depth = max_y - min_y
-            height = max_z - min_z
-            surface_area_mm2 = 2 * (width * depth + width * height + depth * height)
-            dimensions['surface_area'] = round(surface_area_mm2 / 100, 2)  # Convert to cm²
-
-            logger.debug("Extracted 3MF dimensions",
-                        width=dimensions['model_width'],
-                        depth=dimensions['model_depth'],
-                        height=dimensions['model_height'],
-                        vertices=len(vertices))
+            dimensions = self._dimensions_from_bounds(
+                tuple(min(v[i] for v in vertices) for i in range(3)),
+                tuple(max(v[i] for v in vertices) for i in range(3)),
+                len(vertices)
+            )
+
+        return dimensions
+
+    def _dimensions_from_bounds(self, minimum: Tuple[float, float, float],
+                                maximum: Tuple[float, float, float],
+                                vertex_count: int) -> Dict[str, Any]:
+        """Model dimensions, bounding-box volume and surface area from vertex bounds."""
+        dimensions = {}
+        min_x, min_y, min_z = minimum
+        max_x, max_y, max_z = maximum
+
+        # Calculate dimensions in mm
+        dimensions['model_width'] = round(max_x - min_x, 2)
+        dimensions['model_depth'] = round(max_y - min_y, 2)
+        dimensions['model_height'] = round(max_z - min_z, 2)
+
+        # Calculate volume (simple bounding box volume, not actual mesh volume)
+        volume_mm3 = (max_x - min_x) * (max_y - min_y) * (max_z - min_z)
+        dimensions['model_volume'] = round(volume_mm3 / 1000, 2)  # Convert to cm³
+
+        # Calculate approximate surface area (bounding box surface area)
+        width = max_x - min_x
+        depth = max_y - min_y
+        height = max_z - min_z
+        surface_area_mm2 = 2 * (width * depth + width * height + depth * height)
+        dimensions['surface_area'] = round(surface_area_mm2 / 100, 2)  # Convert to cm²
+
+        logger.debug("Extracted 3MF dimensions",
+                    width=dimensions['model_width'],
+                    depth=dimensions['model_depth'],
+                    height=dimensions['model_height'],
+                    vertices=vertex_count)
 
         return dimensions
     
     async def _parse_bgcode_file(self, file_path: Path) -> Dict[str, Any]:
-        """Parse Binary G-code file for thumbnails and metadata.
-        
-        BGCode is a binary format that contains structured blocks.
-        For now, we'll implement basic parsing to extract embedded thumbnails.
+        """Parse Binary G-code file for thumbnails and metadata (file I/O runs off the event loop)."""
+        return await asyncio.to_thread(self._parse_bgcode_file_sync, file_path)
+
+    def _parse_bgcode_file_sync(self, file_path: Path) -> Dict[str, Any]:
+        """Parse Binary G-code file for thumbnails and metadata (blocking).
+
+        Walks the block headers and reads only the metadata and thumbnail
+        blocks. The format places all of them before the first G-code block,
+        so the walk stops there and the G-code itself is never read.
         """
         try:
             thumbnails = []
-            metadata = {}
-            
+            metadata_blocks: Dict[int, Dict[str, str]] = {}
+            file_size = file_path.stat().st_size
+
             with open(file_path, 'rb') as f:
-                # Read BGCode file header
-                # BGCode files start with specific magic bytes
-                magic = f.read(4)
-                if magic != b'BGD\x00':  # BGCode magic bytes
-                    logger.warning("File doesn't appear to be valid BGCode format", 
-                                 magic=magic.hex())
+                header = f.read(self.BGCODE_FILE_HEADER.size)
+                if len(header) < self.BGCODE_FILE_HEADER.size or header[:4] != self.BGCODE_MAGIC:
+                    logger.warning("File doesn't appear to be valid BGCode format",
+                                 magic=header[:4].hex())
                     return {
                         'success': False,
-                        'error': f"Invalid BGCode magic bytes: {magic.hex()}",
+                        'error': f"Invalid BGCode magic bytes: {header[:4].hex()}",
                         'thumbnails': [],
-                        'metadata': {}
+                        'metadata': {},
+                        'needs_generation': False
                     }
-                
-                # For now, we'll attempt to find embedded PNG thumbnails
-                # by scanning for PNG headers in the binary data
-                f.seek(0)  # Reset to beginning
-                content = f.read()
-                
-                # Look for PNG signatures in the binary data
-                png_start = b'\x89PNG\r\n\x1a\n'
-                png_positions = []
-                start = 0
-                while True:
-                    pos = content.find(png_start, start)
-                    if pos == -1:
-                        break
-                    png_positions.append(pos)
-                    start = pos + 1
-                
-                # Extract PNG thumbnails
-                for i, png_pos in enumerate(png_positions):
-                    try:
-                        # Find the end of this PNG by looking for the next PNG or end of file
-                        if i + 1 < len(png_positions):
-                            end_pos = png_positions[i + 1]
-                        else:
-                            # Look for PNG end marker (IEND chunk)
-                            iend_marker = b'IEND\xaeB`\x82'
-                            end_search = content.find(iend_marker, png_pos)
-                            if end_search != -1:
-                                end_pos = end_search + len(iend_marker)
-                            else:
-                                # If we can't find IEND, take a reasonable chunk
-                                end_pos = min(png_pos + 100000, len(content))  # Max 100KB per thumbnail
-                        
-                        png_data = content[png_pos:end_pos]
-                        
-                        # Validate this is actually a complete PNG
-                        if len(png_data) < 100:  # Too small to be a real thumbnail
-                            continue
-                            
-                        # Convert to base64
-                        thumbnail_base64 = base64.b64encode(png_data).decode('utf-8')
-                        
-                        # Try to extract dimensions from PNG header
-                        width, height = self._extract_png_dimensions(png_data)
-                        
-                        thumbnails.append({
-                            'data': thumbnail_base64,
-                            'width': width,
-                            'height': height,
-                            'format': 'PNG'
-                        })
-                        
-                        logger.debug(f"Extracted thumbnail {i+1} from BGCode", 
-                                   width=width, height=height, size_bytes=len(png_data))
-                        
-                    except Exception as e:
-                        logger.warning(f"Failed to extract thumbnail {i+1} from BGCode", 
-                                     error=str(e))
-                        continue
-                
-                # Basic metadata extraction - try to find text blocks
-                # BGCode may contain metadata in text blocks
-                metadata = {
-                    'file_size': len(content),
-                    'format': 'bgcode',
-                    'thumbnails_found': len(thumbnails)
-                }
-                
+
+                _, version, checksum_type = self.BGCODE_FILE_HEADER.unpack(header)
+                checksum_size = 4 if checksum_type == self.BGCODE_CHECKSUM_CRC32 else 0
+
+                for block_type, params, data in self._iter_bgcode_blocks(f, file_size, checksum_size):
+                    if block_type == self.BGCODE_BLOCK_THUMBNAIL:
+                        thumbnail = self._decode_bgcode_thumbnail(params, data)
+                        if thumbnail:
+                            thumbnails.append(thumbnail)
+                    else:
+                        metadata_blocks[block_type] = self._decode_bgcode_metadata(params, data)
+
+            metadata = self._bgcode_metadata(metadata_blocks)
+            metadata.update({
+                'file_size': file_size,
+                'format': 'bgcode',
+                'bgcode_version': version,
+                'thumbnails_found': len(thumbnails)
+            })
+
             logger.info("Successfully parsed BGCode file",
                        file_path=str(file_path),
                        thumbnail_count=len(thumbnails),
@@ -774,7 +906,7 @@ class BambuParser:
                 'error': None,
                 'needs_generation': len(thumbnails) == 0  # Generate if no embedded thumbnails
             }
-            
+
         except Exception as e:
             logger.error("Failed to parse BGCode file", file_path=str(file_path), error=str(e))
             return {
@@ -785,6 +917,126 @@ class BambuParser:
                 'needs_generation': False
             }
 
+    def _iter_bgcode_blocks(self, f, file_size: int, checksum_size: int):
+        """
+        Yield ``(block_type, params, data)`` for the metadata and thumbnail blocks.
+
+        Blocks are found by seeking from header to header; ``data`` is the
+        decompressed payload, or ``None`` if its compression is not supported.
+        Blocks failing their CRC32 are skipped.
+        """
+        offset = self.BGCODE_FILE_HEADER.size
+        while offset + self.BGCODE_BLOCK_HEADER.size <= file_size:
+            f.seek(offset)
+            header = f.read(self.BGCODE_BLOCK_HEADER.size)
+            block_type, compression, uncompressed_size = self.BGCODE_BLOCK_HEADER.unpack(header)
+            if compression != self.BGCODE_COMPRESSION_NONE:
+                size_field = f.read(4)
+                header += size_field
+                (payload_size,) = struct.unpack('<I', size_field)
+            else:
+                payload_size = uncompressed_size
+
+            if block_type == self.BGCODE_BLOCK_GCODE:
+                # Metadata and thumbnails always precede the G-code
+                return
+            if block_type not in self.BGCODE_METADATA_BLOCKS and block_type != self.BGCODE_BLOCK_THUMBNAIL:
+                raise ValueError(f"Unknown BGCode block type {block_type} at offset {offset}")
+
+            params_size = 6 if block_type == self.BGCODE_BLOCK_THUMBNAIL else 2
+            params = f.read(params_size)
+            payload = f.read(payload_size)
+            block_offset = offset
+            offset += len(header) + params_size + payload_size + checksum_size
+            if len(payload) < payload_size:
+                raise ValueError("Truncated BGCode block")
+
+            if checksum_size:
+                (expected,) = struct.unpack('<I', f.read(4))
+                if zlib.crc32(header + params + payload) != expected:
+                    logger.warning("BGCode block checksum mismatch, skipping",
+                                 block_type=block_type, offset=block_offset)
+                    continue
+
+            yield block_type, params, self._decompress_bgcode_payload(
+                compression, payload, uncompressed_size)
+
+    def _decompress_bgcode_payload(self, compression: int, payload: bytes,
+                                   uncompressed_size: int) -> Optional[bytes]:
+        """Decompress a block payload; Heatshrink (used for G-code blocks) is not supported."""
+        if compression == self.BGCODE_COMPRESSION_NONE:
+            return payload
+        if compression == self.BGCODE_COMPRESSION_DEFLATE:
+            data = zlib.decompress(payload)
+            if len(data) != uncompressed_size:
+                raise ValueError("BGCode block size mismatch after decompression")
+            return data
+        logger.debug("Unsupported BGCode block compression, skipping", compression=compression)
+        return None
+
+    def _decode_bgcode_metadata(self, params: bytes, data: Optional[bytes]) -> Dict[str, str]:
+        """Decode an INI-encoded (``key=value`` per line) metadata block."""
+        (encoding,) = struct.unpack('<H', params)
+        if data is None or encoding != self.BGCODE_METADATA_INI:
+            return {}
+
+        values = {}
+        for line in data.decode('utf-8', errors='replace').splitlines():
+            key, sep, value = line.partition('=')
+            if sep:
+                values[key.strip()] = value.strip()
+        return values
+
+    def _decode_bgcode_thumbnail(self, params: bytes, data: Optional[bytes]) -> Optional[Dict[str, Any]]:
+        """Turn a thumbnail block into a thumbnail entry; QOI images are converted to PNG."""
+        fmt, width, height = struct.unpack('<HHH', params)
+        fmt = self.BGCODE_THUMBNAIL_FORMATS.get(fmt)
+        if data is None or fmt is None:
+            return None
+
+        if fmt == 'QOI':
+            try:
+                from PIL import Image
+                with Image.open(BytesIO(data)) as image:
+                    buffer = BytesIO()
+                    image.save(buffer, format='PNG')
+                data, fmt = buffer.getvalue(), 'PNG'
+            except Exception as e:
+                logger.warning("Failed to convert QOI thumbnail from BGCode", error=str(e))
+                return None
+
+        return {
+            'data': base64.b64encode(data).decode('utf-8'),
+            'width': width,
+            'height': height,
+            'format': fmt
+        }
+
+    def _bgcode_metadata(self, blocks: Dict[int, Dict[str, str]]) -> Dict[str, Any]:
+        """
+        Build metadata from BGCode metadata blocks.
+
+        Printer, print and slicer metadata hold the same keys PrusaSlicer
+        writes as comments in text G-code, so they are run through the
+        G-code extractor as ``; key = value`` lines.
+        """
+        content = '\n'.join(
+            f"; {key} = {value}"
+            for block_type in (self.BGCODE_BLOCK_PRINTER_METADATA,
+                               self.BGCODE_BLOCK_PRINT_METADATA,
+                               self.BGCODE_BLOCK_SLICER_METADATA)
+            for key, value in blocks.get(block_type, {}).items()
+        )
+        metadata = self._extract_gcode_metadata(content)
+
+        producer = blocks.get(self.BGCODE_BLOCK_FILE_METADATA, {}).get('Producer')
+        if producer:
+            metadata.setdefault('generator', producer)
+        printer_model = blocks.get(self.BGCODE_BLOCK_PRINTER_METADATA, {}).get('printer_model')
+        if printer_model:
+            metadata['printer_model'] = printer_model
+        return metadata
+
     async def _parse_stl_file(self, file_path: Path) -> Dict[str, Any]:
         """
         Parse STL file - STL files never have embedded thumbnails.
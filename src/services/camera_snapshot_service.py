@@ -6,6 +6,13 @@ Delegates camera access to printer drivers via PrinterService.
 
 Features:
 - Frame caching with TTL (default 5 seconds)
+- Single-flight fetching: concurrent cache misses for a camera share one
+  request to the printer
+- Prefetching: while a camera is polled faster than the cache TTL (e.g. a
+  live view), its frame is refreshed before it expires, so viewers are
+  served from cache. Refreshes never outpace the observed request rate, and
+  a failing camera is retried with exponential backoff. Slow pollers, like
+  the 30s dashboard, are not prefetched at all
 - Automatic cache expiration cleanup
 - External webcam support (HTTP snapshots, RTSP streams)
 - Graceful error handling
@@ -24,9 +31,11 @@ Example:
 """
 
 import asyncio
+import time
 from datetime import datetime, timedelta
-from typing import Dict, Literal, Optional, Tuple, TYPE_CHECKING
-from dataclasses import dataclass
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Literal, Optional, Tuple, TypeVar, TYPE_CHECKING
+from dataclasses import dataclass, field
 
 import structlog
 
@@ -58,6 +67,8 @@ if TYPE_CHECKING:
 
 logger = structlog.get_logger(__name__)
 
+T = TypeVar('T')
+
 
 @dataclass
 class CachedFrame:
@@ -66,6 +77,29 @@ class CachedFrame:
     captured_at: datetime
 
 
+@dataclass
+class WatchedCamera:
+    """Recent requests and prefetch state of one camera (monotonic times)."""
+    requests: Deque[float] = field(
+        default_factory=lambda: deque(maxlen=CameraConstants.CAMERA_PREFETCH_RATE_SAMPLES)
+    )
+    last_prefetch: float = 0.0
+    failures: int = 0
+    retry_at: float = 0.0
+
+    def request_interval(self) -> Optional[float]:
+        """Mean time between recent requests, or None with fewer than two."""
+        if len(self.requests) < 2:
+            return None
+        return (self.requests[-1] - self.requests[0]) / (len(self.requests) - 1)
+
+    def record_failure(self, now: float) -> None:
+        """Back off exponentially before the next prefetch attempt."""
+        self.failures += 1
+        delay = CameraConstants.CAMERA_PREFETCH_BACKOFF_INITIAL_SECONDS * 2 ** (self.failures - 1)
+        self.retry_at = now + min(delay, CameraConstants.CAMERA_PREFETCH_BACKOFF_MAX_SECONDS)
+
+
 class CameraSnapshotService:
     """
     Service for managing camera snapshot requests with caching.
@@ -86,9 +120,17 @@ class CameraSnapshotService:
         self._frame_cache: Dict[str, CachedFrame] = {}
         self._external_cache: Dict[str, CachedFrame] = {}  # Separate cache for external webcams
         self._cleanup_task: Optional[asyncio.Task] = None
+        self._prefetch_task: Optional[asyncio.Task] = None
         self._running: bool = False
         self._external_camera_service = ExternalCameraService()
 
+        # In-flight fetches by cache key, shared by concurrent misses
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Request history of recently requested cameras, by (printer_id, source)
+        self._watched: Dict[Tuple[str, str], WatchedCamera] = {}
+        self._coalesced_requests = 0
+        self._prefetches = 0
+
         self._logger = logger.bind(service="camera_snapshot")
 
     async def start(self) -> None:
@@ -99,6 +141,7 @@ class CameraSnapshotService:
 
         self._running = True
         self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+        self._prefetch_task = asyncio.create_task(self._prefetch_loop())
         self._logger.info("Camera snapshot service started")
 
     async def shutdown(self) -> None:
@@ -106,13 +149,16 @@ class CameraSnapshotService:
         self._logger.info("Shutting down camera snapshot service")
         self._running = False
 
-        # Cancel cleanup task
-        if self._cleanup_task:
-            self._cleanup_task.cancel()
-            try:
-                await self._cleanup_task
-            except asyncio.CancelledError:
-                pass
+        # Cancel background tasks and in-flight fetches
+        for task in [self._cleanup_task, self._prefetch_task, *self._inflight.values()]:
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._inflight.clear()
+        self._watched.clear()
 
         # Close external camera service
         await self._external_camera_service.close()
@@ -158,6 +204,7 @@ class CameraSnapshotService:
 
         # Handle external webcam source
         if source == 'external':
+            self._mark_watched(printer_id, 'external')
             return await self._get_external_snapshot(printer_id, force_refresh)
 
         # For 'auto' mode, check if external webcam is configured
@@ -165,7 +212,9 @@ class CameraSnapshotService:
             webcam_url = await self._get_printer_webcam_url(printer_id)
             if webcam_url:
                 try:
-                    return await self._get_external_snapshot(printer_id, force_refresh)
+                    snapshot = await self._get_external_snapshot(printer_id, force_refresh)
+                    self._mark_watched(printer_id, 'external')
+                    return snapshot
                 except ValueError:
                     # Fall back to built-in camera if external fails
                     self._logger.debug(
@@ -174,6 +223,7 @@ class CameraSnapshotService:
                     )
 
         # Built-in camera: Check cache first (unless force refresh)
+        self._mark_watched(printer_id, 'builtin')
         if not force_refresh:
             cached = self._get_cached_frame(printer_id)
             if cached:
@@ -185,6 +235,22 @@ class CameraSnapshotService:
                 content_type = detect_image_format(cached.data)
                 return cached.data, content_type
 
+        frame = await self._fetch_builtin_frame(printer_id)
+        return frame, detect_image_format(frame)
+
+    async def _fetch_builtin_frame(self, printer_id: str) -> bytes:
+        """
+        Fetch a frame from the printer's built-in camera and cache it.
+
+        Concurrent calls for the same printer share one request.
+
+        Raises:
+            ValueError: If no frame available or printer not found
+        """
+        return await self._single_flight(printer_id, lambda: self._capture_builtin_frame(printer_id))
+
+    async def _capture_builtin_frame(self, printer_id: str) -> bytes:
+        """Request a frame from the printer driver (one request, not coalesced)."""
         # Get printer driver via PrinterService
         try:
             printer_driver = await self.printer_service.get_printer_driver(printer_id)
@@ -208,17 +274,42 @@ class CameraSnapshotService:
             captured_at=datetime.now()
         )
 
-        # Detect content type
-        content_type = detect_image_format(frame)
-
         self._logger.info(
             "Snapshot captured",
             printer_id=printer_id,
             size=len(frame),
-            content_type=content_type
+            content_type=detect_image_format(frame)
         )
 
-        return frame, content_type
+        return frame
+
+    async def _single_flight(self, key: str, fetch: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run ``fetch`` unless a fetch for ``key`` is already in flight, then share its result.
+
+        The shared fetch is shielded: a caller that gives up (e.g. a closed
+        HTTP request) does not cancel it for the others.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._fetch_done(key, done))
+        else:
+            self._coalesced_requests += 1
+            self._logger.debug("Joining in-flight camera fetch", key=key)
+        return await asyncio.shield(task)
+
+    def _fetch_done(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved here in case every caller gave up
+
+    def _mark_watched(self, printer_id: str, source: str) -> None:
+        """Record a viewer request; frequently requested cameras get prefetched."""
+        watched = self._watched.setdefault((printer_id, source), WatchedCamera())
+        watched.requests.append(time.monotonic())
 
     async def _get_printer_webcam_url(self, printer_id: str) -> Optional[str]:
         """Get the webcam_url configured for a printer, if any."""
@@ -273,9 +364,10 @@ class CameraSnapshotService:
                 content_type = detect_image_format(cached.data)
                 return cached.data, content_type
 
-        # Fetch from external webcam
-        frame, content_type = await self._external_camera_service.fetch_snapshot(
-            webcam_url, printer_id
+        # Fetch from external webcam (concurrent misses share one request)
+        frame, content_type = await self._single_flight(
+            cache_key,
+            lambda: self._external_camera_service.fetch_snapshot(webcam_url, printer_id)
         )
 
         if not frame:
@@ -337,36 +429,18 @@ class CameraSnapshotService:
                 )
                 return cached.data
 
-        # Get printer driver via PrinterService
-        try:
-            printer_driver = await self.printer_service.get_printer_driver(printer_id)
-        except Exception as e:
-            self._logger.error(
-                "Failed to get printer driver",
-                printer_id=printer_id,
-                error=str(e)
-            )
-            raise ValueError(f"Printer not found: {printer_id}") from e
+        return await self._fetch_builtin_frame(printer_id)
 
-        # Get snapshot from printer driver
-        frame = await printer_driver.take_snapshot()
-
-        if not frame:
-            raise ValueError("No frame available from camera")
-
-        # Update cache
-        self._frame_cache[printer_id] = CachedFrame(
-            data=frame,
-            captured_at=datetime.now()
-        )
-
-        self._logger.info(
-            "Snapshot captured",
-            printer_id=printer_id,
-            size=len(frame)
-        )
+    def store_frame(self, printer_id: str, frame: bytes) -> None:
+        """
+        Cache a frame of a printer's built-in camera obtained elsewhere (e.g. a live stream).
 
-        return frame
+        Args:
+            printer_id: Unique printer identifier
+            frame: Image data bytes
+        """
+        if frame:
+            self._frame_cache[printer_id] = CachedFrame(data=frame, captured_at=datetime.now())
 
     def _get_cached_frame(self, printer_id: str) -> Optional[CachedFrame]:
         """
@@ -409,6 +483,75 @@ class CameraSnapshotService:
 
         self._logger.debug("Cleanup loop stopped")
 
+    async def _prefetch_loop(self):
+        """Background task keeping the frames of watched cameras fresh."""
+        self._logger.debug("Starting prefetch loop")
+
+        while self._running:
+            try:
+                await asyncio.sleep(CameraConstants.CAMERA_PREFETCH_TICK_SECONDS)
+                await self._prefetch_watched()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self._logger.error("Error in prefetch loop", error=str(e))
+
+        self._logger.debug("Prefetch loop stopped")
+
+    async def _prefetch_watched(self) -> int:
+        """
+        Refresh frames of frequently requested cameras that are about to expire.
+
+        A camera is prefetched only while requests arrive faster than the
+        cache TTL; slower pollers find an expired frame anyway, so refreshing
+        for them would only add requests to the printer. A camera is not
+        refreshed more often than it is requested, and after a failed fetch
+        it is skipped until its backoff has passed.
+
+        Returns:
+            Number of frames refreshed
+        """
+        now = time.monotonic()
+        for key, watched in list(self._watched.items()):
+            if now - watched.requests[-1] > CameraConstants.CAMERA_WATCH_WINDOW_SECONDS:
+                del self._watched[key]
+
+        refresh_age = CameraConstants.FRAME_CACHE_TTL_SECONDS - CameraConstants.CAMERA_PREFETCH_LEAD_SECONDS
+        targets = []
+        fetches = []
+        for (printer_id, source), watched in self._watched.items():
+            interval = watched.request_interval()
+            if interval is None or interval > CameraConstants.FRAME_CACHE_TTL_SECONDS:
+                continue
+            if now < watched.retry_at or now - watched.last_prefetch < interval:
+                continue
+            if source == 'external':
+                cached = self._external_cache.get(f"external_{printer_id}")
+            else:
+                cached = self._frame_cache.get(printer_id)
+            if cached and (datetime.now() - cached.captured_at).total_seconds() < refresh_age:
+                continue
+            watched.last_prefetch = now
+            targets.append(watched)
+            if source == 'external':
+                fetches.append(self._get_external_snapshot(printer_id, force_refresh=True))
+            else:
+                fetches.append(self._fetch_builtin_frame(printer_id))
+
+        results = await asyncio.gather(*fetches, return_exceptions=True)
+        refreshed = 0
+        for watched, result in zip(targets, results):
+            if isinstance(result, BaseException):
+                watched.record_failure(now)
+                self._logger.debug("Camera prefetch failed", error=str(result),
+                                   failures=watched.failures, retry_in=watched.retry_at - now)
+            else:
+                watched.failures = 0
+                watched.retry_at = 0.0
+                refreshed += 1
+        self._prefetches += refreshed
+        return refreshed
+
     async def _cleanup_idle_connections(self):
         """Clean up expired cache entries."""
         now = datetime.now()
@@ -432,7 +575,7 @@ class CameraSnapshotService:
                 remaining=len(self._frame_cache)
             )
 
-    def get_stats(self) -> Dict[str, any]:
+    def get_stats(self) -> Dict[str, Any]:
         """
         Get service statistics.
 
@@ -442,6 +585,14 @@ class CameraSnapshotService:
         return {
             "cached_frames": len(self._frame_cache),
             "running": self._running,
+            "inflight_fetches": len(self._inflight),
+            "coalesced_requests": self._coalesced_requests,
+            "prefetches": self._prefetches,
+            "watched_cameras": len(self._watched),
+            "prefetched_cameras": sum(
+                1 for watched in self._watched.values()
+                if (watched.request_interval() or float('inf')) <= CameraConstants.FRAME_CACHE_TTL_SECONDS
+            ),
             "cache_entries": {
                 printer_id: {
                     "captured_at": frame.captured_at.isoformat(),
@@ -0,0 +1,435 @@
+"""
+Camera Stream Proxy.
+
+Serves printer camera streams through Printernizer so that any number of
+viewers share one connection to the printer, and streams work wherever the
+Printernizer UI does (e.g. behind Home Assistant ingress).
+
+Features:
+- One upstream MJPEG connection per printer, opened by the first viewer and
+  closed when the last viewer leaves
+- At most ``MAX_VIEWERS_PER_PRINTER`` viewers per printer
+- URLs serving something other than MJPEG (e.g. HLS or plain video) are
+  detected by ``is_mjpeg`` so the caller can redirect to them instead
+- Fan-out to viewers as ``multipart/x-mixed-replace``; every viewer holds at
+  most one pending frame, so slow viewers skip frames instead of buffering
+- Upstream reconnects with the camera reconnect limits from CameraConstants
+- The newest frame also refreshes CameraSnapshotService's cache, so snapshot
+  requests during a stream cost nothing
+
+Example:
+    proxy = CameraStreamProxy(printer_service, camera_snapshot_service)
+
+    if proxy.has_capacity(printer_id) and await proxy.is_mjpeg(stream_url):
+        return StreamingResponse(
+            proxy.stream(printer_id, stream_url),
+            media_type=proxy.media_type
+        )
+
+    await proxy.shutdown()
+"""
+
+import asyncio
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, TYPE_CHECKING
+
+import aiohttp
+import structlog
+
+from src.constants import CameraConstants
+from src.services.external_camera_service import mask_url_credentials
+
+if TYPE_CHECKING:
+    from src.services.camera_snapshot_service import CameraSnapshotService
+    from src.services.printer_service import PrinterService
+
+
+logger = structlog.get_logger(__name__)
+
+FrameSource = Callable[[], AsyncIterator[bytes]]
+
+
+class MJPEGParser:
+    """
+    Incremental parser splitting a ``multipart/x-mixed-replace`` body into frames.
+
+    Parts with a ``Content-Length`` header are emitted as soon as their body
+    is complete; others when the next boundary arrives. Declared boundaries
+    with or without the leading ``--`` are both accepted, as cameras differ.
+    """
+
+    MAX_BUFFER_BYTES = 2 * CameraConstants.JPEG_MAX_SIZE_BYTES
+
+    def __init__(self, boundary: str):
+        self._delimiter = b'--' + boundary.lstrip('-').encode('latin-1')
+        self._buffer = bytearray()
+        self._length: Optional[int] = None   # Body length of the current part, once known
+        self._in_part = False
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """
+        Add received bytes.
+
+        Returns:
+            Frames completed by this chunk, oldest first
+
+        Raises:
+            ValueError: If a part exceeds the maximum frame size
+        """
+        self._buffer += data
+        frames = []
+        while True:
+            if not self._in_part:
+                if not self._start_part():
+                    break
+            frame = self._end_part()
+            if frame is None:
+                break
+            if frame:
+                frames.append(frame)
+        if len(self._buffer) > self.MAX_BUFFER_BYTES:
+            raise ValueError("MJPEG part exceeds maximum frame size")
+        return frames
+
+    def _start_part(self) -> bool:
+        """Consume a delimiter line and part headers; False if more data is needed."""
+        start = self._buffer.find(self._delimiter)
+        if start < 0:
+            # Keep a tail that could hold the start of a split delimiter
+            del self._buffer[:max(0, len(self._buffer) - len(self._delimiter))]
+            return False
+        line_end = self._buffer.find(b'\r\n', start)
+        if line_end < 0:
+            return False
+        if self._buffer.startswith(b'\r\n', line_end + 2):
+            headers, body_start = b'', line_end + 4
+        else:
+            headers_end = self._buffer.find(b'\r\n\r\n', line_end)
+            if headers_end < 0:
+                return False
+            headers, body_start = bytes(self._buffer[line_end + 2:headers_end]), headers_end + 4
+
+        self._length = None
+        for header in headers.split(b'\r\n'):
+            name, _, value = header.partition(b':')
+            if name.strip().lower() == b'content-length':
+                try:
+                    self._length = int(value.strip())
+                except ValueError:
+                    pass
+        del self._buffer[:body_start]
+        self._in_part = True
+        return True
+
+    def _end_part(self) -> Optional[bytes]:
+        """Take the current part's body; None if more data is needed."""
+        if self._length is not None:
+            if len(self._buffer) < self._length:
+                return None
+            end, resume = self._length, self._length
+        else:
+            end = self._buffer.find(self._delimiter)
+            if end < 0:
+                return None
+            resume = end
+        body = bytes(self._buffer[:end])
+        del self._buffer[:resume]
+        self._in_part = False
+        return body.rstrip(b'\r\n') if self._length is None else body
+
+
+def multipart_boundary(content_type: str) -> Optional[str]:
+    """Boundary of a ``multipart/*`` content type; None for anything else."""
+    if not content_type.lower().startswith('multipart/'):
+        return None
+    for param in content_type.split(';')[1:]:
+        name, _, value = param.strip().partition('=')
+        if name.lower() == 'boundary':
+            return value.strip('"') or None
+    return None
+
+
+async def iter_mjpeg_frames(url: str, session: aiohttp.ClientSession) -> AsyncIterator[bytes]:
+    """
+    Read frames from an MJPEG HTTP stream.
+
+    Raises:
+        ConnectionError: If the stream cannot be opened or is not MJPEG
+    """
+    async with session.get(url) as response:
+        if response.status != 200:
+            raise ConnectionError(f"Camera stream returned HTTP {response.status}")
+        content_type = response.headers.get('Content-Type', '')
+        boundary = multipart_boundary(content_type)
+        if not boundary:
+            raise ConnectionError(f"Camera stream is not MJPEG: {content_type or 'no content type'}")
+
+        parser = MJPEGParser(boundary)
+        async for chunk in response.content.iter_any():
+            for frame in parser.feed(chunk):
+                yield frame
+
+
+def multipart_chunk(frame: bytes, content_type: str = 'image/jpeg') -> bytes:
+    """Encode a frame as one part of the proxy's multipart response."""
+    return (
+        f"--{CameraConstants.MJPEG_BOUNDARY}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(frame)}\r\n\r\n"
+    ).encode('ascii') + frame + b'\r\n'
+
+
+class CameraStream:
+    """One upstream connection for a printer, fanned out to its viewers."""
+
+    def __init__(self, printer_id: str, source: FrameSource, on_frame: Callable[[bytes], None]):
+        self.printer_id = printer_id
+        self._source = source
+        self._on_frame = on_frame
+        self._viewers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.latest_frame: Optional[bytes] = None
+        self.frames_received = 0
+        self.frames_dropped = 0
+        self._logger = logger.bind(service="camera_stream_proxy", printer_id=printer_id)
+
+    @property
+    def viewer_count(self) -> int:
+        return len(self._viewers)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def add_viewer(self) -> asyncio.Queue:
+        """Register a viewer, starting the upstream if needed. A None item ends the stream."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        if self.latest_frame is not None:
+            queue.put_nowait(self.latest_frame)
+        self._viewers.add(queue)
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def remove_viewer(self, queue: asyncio.Queue) -> None:
+        """
+        Unregister a viewer, closing the upstream when it was the last one.
+
+        Synchronous, as it runs while the viewer's request is being cancelled.
+        """
+        self._viewers.discard(queue)
+        if not self._viewers and self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def close(self) -> None:
+        """Close the upstream and end all viewer streams."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._end_viewers()
+
+    def _publish(self, frame: bytes) -> None:
+        self.latest_frame = frame
+        self.frames_received += 1
+        for queue in self._viewers:
+            if queue.full():
+                # Viewer still busy with the previous frame: replace it
+                queue.get_nowait()
+                self.frames_dropped += 1
+            queue.put_nowait(frame)
+        try:
+            self._on_frame(frame)
+        except Exception as e:
+            self._logger.debug("Frame callback failed", error=str(e))
+
+    def _end_viewers(self) -> None:
+        for queue in self._viewers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+    async def _run(self) -> None:
+        """Read frames from the upstream, reconnecting on failure."""
+        failures = 0
+        while self._viewers:
+            try:
+                self._logger.info("Opening upstream camera stream", viewers=len(self._viewers))
+                async for frame in self._source():
+                    failures = 0
+                    self._publish(frame)
+                    if not self._viewers:
+                        return
+                self._logger.info("Upstream camera stream ended")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._logger.warning("Upstream camera stream failed", error=str(e))
+            failures += 1
+            if failures > CameraConstants.CAMERA_MAX_RECONNECT_ATTEMPTS:
+                self._logger.error("Giving up on upstream camera stream", attempts=failures)
+                break
+            await asyncio.sleep(CameraConstants.CAMERA_RECONNECT_DELAY_SECONDS)
+        self._end_viewers()
+
+
+class CameraStreamProxy:
+    """
+    Shares printer camera streams between viewers.
+
+    Streams are keyed by printer; a stream exists only while it has viewers.
+    """
+
+    media_type = f"multipart/x-mixed-replace; boundary={CameraConstants.MJPEG_BOUNDARY}"
+
+    def __init__(self, printer_service: 'PrinterService',
+                 snapshot_service: Optional['CameraSnapshotService'] = None,
+                 max_viewers: int = CameraConstants.MAX_VIEWERS_PER_PRINTER):
+        """Initialize stream proxy.
+
+        Args:
+            printer_service: PrinterService instance for accessing printer drivers
+            snapshot_service: Snapshot service whose cache receives streamed frames
+            max_viewers: Concurrent viewers allowed per printer
+        """
+        self.printer_service = printer_service
+        self.snapshot_service = snapshot_service
+        self.max_viewers = max_viewers
+        self._streams: Dict[str, CameraStream] = {}
+        self._mjpeg_urls: Dict[str, bool] = {}   # Stream URL -> whether it serves MJPEG
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._logger = logger.bind(service="camera_stream_proxy")
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get or create the HTTP session; streams are long-lived, so only connecting is timed."""
+        if self._session is None or self._session.closed:
+            timeout = aiohttp.ClientTimeout(
+                total=None,
+                connect=CameraConstants.CAMERA_CONNECTION_TIMEOUT_SECONDS,
+                sock_read=CameraConstants.CAMERA_CONNECTION_TIMEOUT_SECONDS
+            )
+            self._session = aiohttp.ClientSession(timeout=timeout)
+        return self._session
+
+    async def is_mjpeg(self, url: str) -> bool:
+        """
+        Whether an HTTP stream URL serves MJPEG, which the proxy can split into frames.
+
+        The answer is remembered per URL. A URL that cannot be reached is not
+        judged and counts as not MJPEG for this request.
+        """
+        known = self._mjpeg_urls.get(url)
+        if known is not None:
+            return known
+        session = await self._get_session()
+        try:
+            async with session.get(url) as response:
+                if response.status != 200:
+                    return False
+                content_type = response.headers.get('Content-Type', '')
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self._logger.debug("Camera stream probe failed", url=mask_url_credentials(url), error=str(e))
+            return False
+        mjpeg = multipart_boundary(content_type) is not None
+        self._mjpeg_urls[url] = mjpeg
+        if not mjpeg:
+            self._logger.info("Camera stream is not MJPEG, not proxied", url=mask_url_credentials(url),
+                              content_type=content_type or None)
+        return mjpeg
+
+    def _mjpeg_source(self, url: str) -> FrameSource:
+        async def frames() -> AsyncIterator[bytes]:
+            session = await self._get_session()
+            async for frame in iter_mjpeg_frames(url, session):
+                yield frame
+        return frames
+
+    def _store_frame(self, printer_id: str, frame: bytes) -> None:
+        if self.snapshot_service:
+            self.snapshot_service.store_frame(printer_id, frame)
+
+    async def stream(self, printer_id: str, stream_url: Optional[str] = None,
+                     source: Optional[FrameSource] = None) -> AsyncIterator[bytes]:
+        """
+        Multipart response body streaming a printer's camera to one viewer.
+
+        The first viewer of a printer opens the upstream from ``source`` (or the
+        MJPEG ``stream_url``); later viewers join it. A viewer beyond
+        ``max_viewers`` gets an empty stream; check ``has_capacity`` first to
+        reject it with an error instead.
+
+        Args:
+            printer_id: Printer identifier
+            stream_url: Upstream MJPEG URL
+            source: Upstream frame iterator factory, used instead of ``stream_url``
+
+        Yields:
+            Multipart chunks, one per frame
+        """
+        camera_stream = self._streams.get(printer_id)
+        if camera_stream is None:
+            if source is None:
+                if not stream_url:
+                    raise ValueError("No camera stream source")
+                source = self._mjpeg_source(stream_url)
+                self._logger.info("Proxying camera stream", printer_id=printer_id,
+                                  url=mask_url_credentials(stream_url))
+            camera_stream = CameraStream(
+                printer_id, source, lambda frame: self._store_frame(printer_id, frame)
+            )
+            self._streams[printer_id] = camera_stream
+        elif camera_stream.viewer_count >= self.max_viewers:
+            self._logger.warning("Camera viewer limit reached", printer_id=printer_id,
+                                 max_viewers=self.max_viewers)
+            return
+
+        queue = camera_stream.add_viewer()
+        try:
+            while True:
+                frame = await queue.get()
+                if frame is None:
+                    break
+                yield multipart_chunk(frame)
+        finally:
+            camera_stream.remove_viewer(queue)
+            if camera_stream.viewer_count == 0 and self._streams.get(printer_id) is camera_stream:
+                del self._streams[printer_id]
+
+    def has_capacity(self, printer_id: str) -> bool:
+        """Whether another viewer may stream a printer's camera."""
+        return self.get_viewer_count(printer_id) < self.max_viewers
+
+    def get_viewer_count(self, printer_id: str) -> int:
+        """Number of viewers currently streaming a printer's camera."""
+        camera_stream = self._streams.get(printer_id)
+        return camera_stream.viewer_count if camera_stream else 0
+
+    async def shutdown(self) -> None:
+        """Close all upstream connections and end viewer streams."""
+        self._logger.info("Shutting down camera stream proxy", streams=len(self._streams))
+        for camera_stream in list(self._streams.values()):
+            await camera_stream.close()
+        self._streams.clear()
+        if self._session and not self._session.closed:
+            await self._session.close()
+            self._session = None
+
+    def get_stats(self) -> Dict[str, object]:
+        """Get proxy statistics."""
+        return {
+            "streams": {
+                printer_id: {
+                    "viewers": camera_stream.viewer_count,
+                    "upstream_connected": camera_stream.running,
+                    "frames_received": camera_stream.frames_received,
+                    "frames_dropped": camera_stream.frames_dropped,
+                }
+                for printer_id, camera_stream in self._streams.items()
+            }
+        }
+
+    def __repr__(self) -> str:
+        return f"<CameraStreamProxy(streams={len(self._streams)})>"
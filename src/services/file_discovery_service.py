@@ -304,7 +304,10 @@ class FileDiscoveryService:
         """
         try:
             # Check printer files in database first
-            files = await self.file_repo.list(printer_id=printer_id)
+            files = await self.file_repo.list(
+                printer_id=printer_id,
+                include=FileRepository.LIST_OPTIONAL_COLUMNS
+            )
             for file_data in files:
                 if file_data.get('filename') == filename:
                     return dict(file_data)
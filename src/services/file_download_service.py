@@ -615,7 +615,7 @@ class FileDownloadService:
                 "status": self.download_status.get(file_id, "unknown"),
                 "bytes_downloaded": self.download_bytes.get(file_id, 0),
                 "total_bytes": self.download_total_bytes.get(file_id, 0)
-            })
+            }, topic=f"download_progress:{file_id}")
         except Exception as e:
             # Don't fail the download if broadcast fails
             logger.warning("Failed to broadcast download progress",
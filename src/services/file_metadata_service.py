@@ -16,6 +16,7 @@ import structlog
 from src.database.database import Database
 from src.database.repositories import FileRepository
 from src.services.event_service import EventService
+from src.services.analysis_executor import AnalysisExecutor, get_analysis_executor
 from src.services.bambu_parser import BambuParser
 
 logger = structlog.get_logger()
@@ -51,7 +52,8 @@ class FileMetadataService:
     def __init__(
         self,
         database: Database,
-        event_service: EventService
+        event_service: EventService,
+        analysis_executor: Optional[AnalysisExecutor] = None
     ):
         """
         Initialize file metadata service.
@@ -59,11 +61,12 @@ class FileMetadataService:
         Args:
             database: Database instance for storing metadata
             event_service: Event service for emitting metadata events
+            analysis_executor: Process pool for file analysis (default: shared executor)
         """
         self.database = database
         self.file_repo = FileRepository(database._connection)
         self.event_service = event_service
-        self.bambu_parser = BambuParser()
+        self.analysis_executor = analysis_executor or get_analysis_executor()
 
     async def extract_enhanced_metadata(
         self,
@@ -195,7 +198,7 @@ class FileMetadataService:
         file_path: Path
     ) -> Optional[Dict[str, Any]]:
         """
-        Extract metadata from 3MF file using ThreeMFAnalyzer.
+        Extract metadata from 3MF file using ThreeMFAnalyzer (in a worker process).
 
         Args:
             file_path: Path to the 3MF file
@@ -204,10 +207,7 @@ class FileMetadataService:
             Enhanced metadata dictionary or None if analysis fails
         """
         try:
-            from src.services.threemf_analyzer import ThreeMFAnalyzer
-
-            analyzer = ThreeMFAnalyzer()
-            result = await analyzer.analyze_file(file_path)
+            result = await self.analysis_executor.analyze_3mf(file_path)
 
             if result.get('success'):
                 return result
@@ -228,7 +228,7 @@ class FileMetadataService:
         file_path: Path
     ) -> Optional[Dict[str, Any]]:
         """
-        Extract metadata from G-code file using BambuParser.
+        Extract metadata from G-code file using BambuParser (in a worker process).
 
         Args:
             file_path: Path to the G-code file
@@ -237,7 +237,7 @@ class FileMetadataService:
             Enhanced metadata dictionary or None if parsing fails
         """
         try:
-            result = await self.bambu_parser.parse_file(str(file_path))
+            result = await self.analysis_executor.parse_file(str(file_path))
 
             if not result.get('success'):
                 logger.warning("G-code parsing failed",
@@ -245,6 +245,9 @@ class FileMetadataService:
                 return None
 
             metadata = result.get('metadata', {})
+            if 'estimated_time' not in metadata or not (
+                    metadata.get('total_filament_weight_sum') or metadata.get('total_filament_used')):
+                metadata = await self._fill_from_layer_stats(file_path, metadata)
 
             # Convert parser output to enhanced metadata format
             enhanced_metadata = {
@@ -301,6 +304,39 @@ class FileMetadataService:
                         error=str(e))
             return None
 
+    async def _fill_from_layer_stats(self, file_path: Path,
+                                     metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fill in print time, filament and cost the slicer comments lack.
+
+        The values come from the toolpath's layer statistics; anything the
+        comments did provide is kept.
+
+        Args:
+            file_path: Path to the G-code file
+            metadata: Parser metadata
+
+        Returns:
+            Metadata with the missing fields added
+        """
+        stats = await self.analysis_executor.analyze_gcode_layers(str(file_path))
+        if not stats.get('success'):
+            logger.warning("G-code layer analysis failed",
+                           file_path=str(file_path), error=stats.get('error'))
+            return metadata
+
+        metadata = dict(metadata)
+        metadata.setdefault('estimated_time', stats['estimated_time'])
+        metadata.setdefault('total_layer_count', stats['layer_count'])
+        if not (metadata.get('total_filament_weight_sum') or metadata.get('total_filament_used')):
+            metadata['total_filament_used'] = stats['filament_weight']
+        metadata.setdefault('filament_length_meters', stats['filament_length'])
+        metadata.update(BambuParser.estimate_costs(
+            metadata.get('total_filament_weight_sum') or metadata['total_filament_used'],
+            metadata['estimated_time'],
+        ))
+        return metadata
+
     def _extract_printer_info(
         self,
         printer: Dict[str, Any]
@@ -1,8 +1,8 @@
 """Classify library files as a source model vs a printable (sliced) file."""
-import zipfile
-from pathlib import Path
 from typing import Optional
 
+from src.services.threemf_archive import ThreeMFArchive
+
 _MODEL_EXT = {"stl", "step", "stp", "obj"}
 _PRINTFILE_EXT = {"gcode", "gco", "g", "bgcode"}
 
@@ -18,10 +18,11 @@ def classify_role(file_type: str, threemf_has_gcode: Optional[bool] = None) -> O
     return None
 
 
-def threemf_has_gcode(path) -> bool:
-    """True if a .3mf bundles sliced gcode (e.g. Bambu Metadata/plate_*.gcode)."""
-    try:
-        with zipfile.ZipFile(Path(path)) as z:
-            return any(n.lower().endswith(".gcode") for n in z.namelist())
-    except Exception:
-        return False
+def threemf_has_gcode(archive: ThreeMFArchive) -> bool:
+    """True if a .3mf bundles sliced gcode (e.g. Bambu Metadata/plate_*.gcode).
+
+    Takes the archive the caller already has open; BambuParser reports the
+    result as ``has_gcode``. Only the member list is read, so it is also
+    cheap enough to check on its own, e.g. when a file enters the library.
+    """
+    return any(n.lower().endswith(".gcode") for n in archive.names)
@@ -109,7 +109,8 @@ class FileService:
         self.thumbnail = FileThumbnailService(
             database=database,
             event_service=event_service,
-            printer_service=printer_service
+            printer_service=printer_service,
+            preview_render_service=getattr(library_service, 'preview_service', None)
         )
 
         self.metadata = FileMetadataService(
@@ -387,8 +388,8 @@ class FileService:
             >>> file = await file_service.get_file_by_id("bambu_001_model.3mf")
         """
         try:
-            # Check printer files in database first
-            files = await self.database.list_files()
+            # Check printer files in database first (full rows incl. thumbnail)
+            files = await self.database.list_files(include=FileRepository.LIST_OPTIONAL_COLUMNS)
             for file_data in files:
                 if file_data['id'] == file_id:
                     return dict(file_data)
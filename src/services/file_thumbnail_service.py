@@ -8,7 +8,8 @@ and storing them in the database.
 Part of FileService refactoring - Phase 2 technical debt reduction.
 """
 import asyncio
-from typing import List, Dict, Any, Optional
+import base64
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 from datetime import datetime
 import os
@@ -19,6 +20,7 @@ from src.database.repositories import FileRepository
 from src.services.event_service import EventService
 from src.services.bambu_parser import BambuParser
 from src.services.preview_render_service import PreviewRenderService
+from src.services.thumbnail_store import ThumbnailStore
 
 logger = structlog.get_logger()
 
@@ -55,7 +57,9 @@ class FileThumbnailService:
         self,
         database: Database,
         event_service: EventService,
-        printer_service=None
+        printer_service=None,
+        thumbnail_store_dir: Optional[str] = None,
+        preview_render_service: Optional[PreviewRenderService] = None
     ):
         """
         Initialize file thumbnail service.
@@ -64,13 +68,20 @@ class FileThumbnailService:
             database: Database instance for storing thumbnail data
             event_service: Event service for emitting processing events
             printer_service: Optional printer service for API thumbnail downloads
+            thumbnail_store_dir: Directory for downscaled thumbnail derivatives
+            preview_render_service: Preview renderer to share (e.g. the library's),
+                so a model seen in several places is rendered once
         """
         self.database = database
         self.file_repo = FileRepository(database._connection)
         self.event_service = event_service
         self.printer_service = printer_service
         self.bambu_parser = BambuParser()
-        self.preview_render_service = PreviewRenderService()
+        self.preview_render_service = preview_render_service or PreviewRenderService()
+        if thumbnail_store_dir is None:
+            # Next to the default database, independent of the working directory
+            thumbnail_store_dir = Path(__file__).parent.parent.parent / "data" / "thumbnails"
+        self.thumbnail_store = ThumbnailStore(Path(thumbnail_store_dir))
 
         # Thumbnail processing status tracking
         self.thumbnail_processing_log: List[Dict[str, Any]] = []
@@ -163,10 +174,18 @@ class FileThumbnailService:
                     thumbnail_format = thumbnail_result['format']
                     thumbnail_source = thumbnail_result['source']
 
+            # Store the thumbnail and render its derivatives once, here
+            thumbnail_hash = None
+            if thumbnail_data:
+                thumbnail_hash = await self._prepare_thumbnail_derivatives(
+                    thumbnail_data, thumbnail_format
+                )
+
             # Update file record with thumbnail and metadata
             update_data = {
                 'has_thumbnail': thumbnail_data is not None,
                 'thumbnail_data': thumbnail_data,
+                'thumbnail_hash': thumbnail_hash,
                 'thumbnail_width': thumbnail_width,
                 'thumbnail_height': thumbnail_height,
                 'thumbnail_format': thumbnail_format,
@@ -225,6 +244,66 @@ class FileThumbnailService:
             self._log_thumbnail_processing(file_path, file_id, "failed", error_msg)
             return False
 
+    def get_thumbnail_variant(
+        self,
+        thumbnail_hash: Optional[str],
+        size: Optional[int] = None,
+        accept: Optional[str] = None
+    ) -> Optional[Tuple[Path, str, str]]:
+        """
+        Pick a precomputed PNG/WebP derivative of a file's thumbnail.
+
+        Derivatives are rendered when the thumbnail is extracted; files
+        processed before the store existed have no ``thumbnail_hash`` and
+        keep being served their inline thumbnail until processed again.
+
+        Args:
+            thumbnail_hash: Content hash stored on the file record
+            size: Requested edge length in pixels
+            accept: HTTP ``Accept`` header, used to choose WebP or PNG
+
+        Returns:
+            Tuple of (path, media type, entity tag), or None if unavailable
+        """
+        if not thumbnail_hash:
+            return None
+        return self.thumbnail_store.select(thumbnail_hash, size, accept)
+
+    async def _prepare_thumbnail_derivatives(
+        self,
+        thumbnail: Any,
+        thumbnail_format: Optional[str]
+    ) -> Optional[str]:
+        """
+        Put a thumbnail into the store and render its derivatives in a worker.
+
+        Args:
+            thumbnail: Thumbnail as raw bytes or base64 text
+            thumbnail_format: Image format
+
+        Returns:
+            Content hash of the stored thumbnail, or None on failure
+        """
+        from src.services.analysis_executor import get_analysis_executor
+
+        try:
+            if isinstance(thumbnail, str):
+                thumbnail = base64.b64decode(thumbnail.split(',', 1)[-1])
+            digest = await asyncio.to_thread(
+                self.thumbnail_store.put, thumbnail, thumbnail_format or 'png'
+            )
+            if not self.thumbnail_store.has_derivatives(digest):
+                ok = await get_analysis_executor().generate_thumbnail_derivatives(
+                    self.thumbnail_store.root, digest
+                )
+                if not ok:
+                    # Sized requests fall back to the original
+                    logger.warning("Failed to render thumbnail derivatives", digest=digest[:16])
+            return digest
+        except Exception as e:
+            logger.warning("Failed to prepare thumbnail derivatives", error=str(e))
+            return None
+
     async def _get_fallback_thumbnail(
         self,
         file_id: str,
@@ -663,12 +663,13 @@ class FileWatcherService:
                        filename=local_file.filename)
             return
 
-        # Only slice source models (not gcode or already-sliced 3mf bundles)
-        from src.services.file_role_classifier import classify_role, threemf_has_gcode
-        has_gcode = None
-        if local_file.file_type == '.3mf':
-            has_gcode = threemf_has_gcode(Path(local_file.file_path))
-        if classify_role(local_file.file_type, has_gcode) != 'model':
+        # Only slice source models (not gcode or already-sliced 3mf bundles).
+        # The library classified the file when adding it (a 3MF from its
+        # parsed contents), so the package is not opened again here
+        from src.services.file_role_classifier import classify_role
+        record = await self.library_service.get_file_by_checksum(local_file.checksum)
+        role = (record or {}).get('role') or classify_role(local_file.file_type)
+        if role != 'model':
             return
 
         try:
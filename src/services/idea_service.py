@@ -3,7 +3,7 @@ Idea service for managing print ideas and external model bookmarks.
 """
 import uuid
 import json
-from typing import Optional, List, Dict, Any
+from typing import Optional, Iterable, List, Dict, Any
 from datetime import datetime, timedelta
 import structlog
 
@@ -91,8 +91,14 @@ class IdeaService:
             return None
 
     async def list_ideas(self, filters: Optional[Dict[str, Any]] = None,
-                        page: int = 1, page_size: int = 20) -> Dict[str, Any]:
-        """List ideas with filtering and pagination."""
+                        page: int = 1, page_size: int = 20,
+                        include: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        List ideas with filtering and pagination.
+
+        Metadata, material notes and customer info are only loaded when named
+        in ``include``; ``get_idea`` always returns them.
+        """
         try:
             filters = filters or {}
             offset = (page - 1) * page_size
@@ -104,7 +110,8 @@ class IdeaService:
                 category=filters.get('category'),
                 source_type=filters.get('source_type'),
                 limit=page_size,
-                offset=offset
+                offset=offset,
+                include=include
             )
 
             ideas = []
@@ -0,0 +1,356 @@
+"""
+Library analysis queue for bounded, prioritized metadata extraction.
+
+Replaces the fire-and-forget ``asyncio.create_task`` per file with a fixed
+number of workers draining a priority queue. Interactive uploads jump ahead
+of new watch-folder/printer files, which in turn jump ahead of bulk
+re-analysis. Queue membership is persisted in ``library_analysis_queue`` so
+a restart resumes where it stopped.
+"""
+
+import asyncio
+import itertools
+import time
+from datetime import datetime
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+class AnalysisPriority(IntEnum):
+    """Analysis priority (lower value is processed first)."""
+
+    INTERACTIVE = 0
+    NEW_FILE = 1
+    BULK = 2
+
+
+class LibraryAnalysisQueue:
+    """
+    Priority queue with a bounded worker pool for library metadata extraction.
+
+    Workers are spawned on demand (up to ``max_workers``) and exit once the
+    queue is drained, so an idle library keeps no background tasks alive.
+    """
+
+    # Weight of the most recent job in the moving average used for the ETA
+    DURATION_SMOOTHING = 0.2
+
+    def __init__(self, database, handler: Callable[[str], Awaitable[Any]],
+                 max_workers: int = 2):
+        """
+        Initialize analysis queue.
+
+        Args:
+            database: Database instance used to persist queue state
+            handler: Coroutine function analysing one file, called with its checksum
+            max_workers: Maximum number of files analysed concurrently
+        """
+        self.database = database
+        self._handler = handler
+        self.max_workers = max(1, int(max_workers))
+
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        # checksum -> priority of the live queue entry; stale heap entries are skipped
+        self._pending: Dict[str, int] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._workers: Set[asyncio.Task] = set()
+        self._shutting_down = False
+
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._avg_duration: Optional[float] = None
+        self._started_at: Optional[str] = None
+
+    async def resume(self) -> int:
+        """
+        Re-enqueue work persisted by a previous session.
+
+        Returns:
+            Number of files resumed
+        """
+        try:
+            async with self.database.connection() as conn:
+                cursor = await conn.execute(
+                    "SELECT checksum, priority FROM library_analysis_queue "
+                    "ORDER BY priority, enqueued_at"
+                )
+                rows = await cursor.fetchall()
+        except Exception as e:
+            logger.warning("Failed to load persisted analysis queue", error=str(e))
+            return 0
+
+        for row in rows:
+            self._push(row[0], AnalysisPriority(row[1]))
+
+        if rows:
+            logger.info("Resumed library analysis queue", files=len(rows))
+            self._spawn_workers()
+        return len(rows)
+
+    async def enqueue(self, checksum: str,
+                      priority: AnalysisPriority = AnalysisPriority.NEW_FILE) -> bool:
+        """
+        Queue a file for analysis.
+
+        A file that is already pending keeps a single queue slot; enqueueing it
+        again with a more urgent priority promotes it.
+
+        Args:
+            checksum: Library file checksum
+            priority: Analysis priority
+
+        Returns:
+            True if the file was added or promoted; False if it is already
+            running or pending at the same or a more urgent priority
+        """
+        return bool(await self.enqueue_many([checksum], priority))
+
+    async def enqueue_many(self, checksums: Iterable[str],
+                           priority: AnalysisPriority = AnalysisPriority.NEW_FILE) -> int:
+        """
+        Queue several files for analysis with a single persistence round-trip.
+
+        Args:
+            checksums: Library file checksums
+            priority: Analysis priority
+
+        Returns:
+            Number of files added or promoted; files already running or
+            pending at the same or a more urgent priority are not counted
+        """
+        if self._shutting_down:
+            return 0
+
+        if not self._pending and not self._running:
+            self._reset_progress()
+
+        accepted: List[Tuple[str, int]] = []
+        for checksum in checksums:
+            if checksum in self._running:
+                continue
+            current = self._pending.get(checksum)
+            if current is not None and current <= priority:
+                continue
+            self._push(checksum, priority)
+            accepted.append((checksum, int(self._pending[checksum])))
+
+        await self._persist(accepted)
+        self._spawn_workers()
+        return len(accepted)
+
+    async def cancel(self, checksum: str) -> bool:
+        """
+        Cancel a pending or running analysis.
+
+        Args:
+            checksum: Library file checksum
+
+        Returns:
+            True if something was cancelled
+        """
+        cancelled = False
+        if self._pending.pop(checksum, None) is not None:
+            cancelled = True
+        task = self._running.get(checksum)
+        if task and not task.done():
+            task.cancel()
+            cancelled = True
+
+        if cancelled:
+            self._cancelled += 1
+            await self._forget([checksum])
+            logger.info("Library analysis cancelled", checksum=checksum[:16])
+        return cancelled
+
+    async def cancel_pending(self, priority: Optional[AnalysisPriority] = None) -> int:
+        """
+        Cancel all pending analyses, optionally only those of one priority.
+
+        Running analyses are left to finish.
+
+        Args:
+            priority: Only cancel entries with this priority
+
+        Returns:
+            Number of cancelled entries
+        """
+        checksums = [
+            checksum for checksum, prio in self._pending.items()
+            if priority is None or prio == priority
+        ]
+        for checksum in checksums:
+            del self._pending[checksum]
+
+        self._cancelled += len(checksums)
+        await self._forget(checksums)
+        if checksums:
+            logger.info("Pending library analyses cancelled",
+                        count=len(checksums),
+                        priority=priority.name.lower() if priority is not None else None)
+        return len(checksums)
+
+    def get_progress(self) -> Dict[str, Any]:
+        """
+        Get queue progress with an ETA for the remaining work.
+
+        Returns:
+            Progress dictionary
+        """
+        pending_by_priority = {p.name.lower(): 0 for p in AnalysisPriority}
+        for prio in self._pending.values():
+            pending_by_priority[AnalysisPriority(prio).name.lower()] += 1
+
+        pending = len(self._pending)
+        running = len(self._running)
+        processed = self._completed + self._failed
+        total = processed + pending + running
+
+        eta_seconds = None
+        if self._avg_duration is not None:
+            remaining = pending + running
+            eta_seconds = round(remaining * self._avg_duration / self.max_workers, 1)
+
+        return {
+            'workers': self.max_workers,
+            'active_workers': len([w for w in self._workers if not w.done()]),
+            'pending': pending,
+            'pending_by_priority': pending_by_priority,
+            'running': running,
+            'running_files': list(self._running.keys()),
+            'completed': self._completed,
+            'failed': self._failed,
+            'cancelled': self._cancelled,
+            'total': total,
+            'percent_complete': round(processed / total * 100, 1) if total else 100.0,
+            'avg_duration_seconds': round(self._avg_duration, 2) if self._avg_duration is not None else None,
+            'eta_seconds': eta_seconds,
+            'started_at': self._started_at,
+        }
+
+    def is_queued(self, checksum: str) -> bool:
+        """Return True if the file is pending or being analysed."""
+        return checksum in self._pending or checksum in self._running
+
+    async def shutdown(self) -> None:
+        """Stop workers; pending work stays persisted for the next start."""
+        self._shutting_down = True
+        tasks = list(self._workers) + list(self._running.values())
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers.clear()
+        logger.info("Library analysis queue stopped", pending=len(self._pending))
+
+    def _push(self, checksum: str, priority: AnalysisPriority) -> None:
+        """Add or promote an in-memory queue entry."""
+        self._pending[checksum] = int(priority)
+        self._queue.put_nowait((int(priority), next(self._sequence), checksum))
+
+    def _reset_progress(self) -> None:
+        """Start a new progress window once the previous batch has drained."""
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._started_at = datetime.now().isoformat()
+
+    def _spawn_workers(self) -> None:
+        """Start workers up to the configured limit while there is work."""
+        self._workers = {w for w in self._workers if not w.done()}
+        while len(self._workers) < self.max_workers and len(self._workers) < len(self._pending):
+            self._workers.add(asyncio.create_task(self._worker()))
+
+    async def _worker(self) -> None:
+        """Drain the queue, one file at a time."""
+        while not self._shutting_down:
+            try:
+                priority, _, checksum = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            # Skip stale entries left behind by promotion or cancellation
+            if self._pending.get(checksum) != priority:
+                continue
+            del self._pending[checksum]
+
+            task = asyncio.create_task(self._handler(checksum))
+            self._running[checksum] = task
+            started = time.monotonic()
+            await self._mark_running(checksum)
+            try:
+                await asyncio.wait([task])
+            finally:
+                self._running.pop(checksum, None)
+
+            if task.cancelled():
+                continue
+
+            duration = time.monotonic() - started
+            if task.exception() is not None:
+                self._failed += 1
+                logger.error("Library analysis failed",
+                             checksum=checksum[:16], error=str(task.exception()))
+            else:
+                self._completed += 1
+            self._record_duration(duration)
+            await self._forget([checksum])
+
+    def _record_duration(self, duration: float) -> None:
+        """Update the moving average job duration."""
+        if self._avg_duration is None:
+            self._avg_duration = duration
+        else:
+            self._avg_duration += self.DURATION_SMOOTHING * (duration - self._avg_duration)
+
+    async def _persist(self, entries: List[Tuple[str, int]]) -> None:
+        """Persist queued entries."""
+        if not entries:
+            return
+        now = datetime.now().isoformat()
+        try:
+            async with self.database.connection() as conn:
+                await conn.executemany(
+                    """INSERT INTO library_analysis_queue (checksum, priority, status, enqueued_at)
+                       VALUES (?, ?, 'queued', ?)
+                       ON CONFLICT(checksum) DO UPDATE SET
+                           priority = MIN(priority, excluded.priority),
+                           status = 'queued'""",
+                    [(checksum, priority, now) for checksum, priority in entries]
+                )
+                await conn.commit()
+        except Exception as e:
+            logger.warning("Failed to persist library analysis queue", error=str(e))
+
+    async def _mark_running(self, checksum: str) -> None:
+        """Record that analysis of a file started."""
+        try:
+            async with self.database.connection() as conn:
+                await conn.execute(
+                    "UPDATE library_analysis_queue SET status = 'running', started_at = ? "
+                    "WHERE checksum = ?",
+                    (datetime.now().isoformat(), checksum)
+                )
+                await conn.commit()
+        except Exception as e:
+            logger.debug("Failed to mark library analysis running", error=str(e))
+
+    async def _forget(self, checksums: List[str]) -> None:
+        """Remove finished or cancelled entries from persistent state."""
+        if not checksums:
+            return
+        try:
+            async with self.database.connection() as conn:
+                await conn.executemany(
+                    "DELETE FROM library_analysis_queue WHERE checksum = ?",
+                    [(checksum,) for checksum in checksums]
+                )
+                await conn.commit()
+        except Exception as e:
+            logger.debug("Failed to update persisted library analysis queue", error=str(e))
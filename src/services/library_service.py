@@ -7,8 +7,9 @@ import hashlib
 import asyncio
 import shutil
 import os
+import zipfile
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, Iterable, List, Dict, Any, Set, Tuple
 from datetime import datetime
 from uuid import uuid4
 import json
@@ -16,9 +17,12 @@ import json
 import structlog
 
 from src.database.repositories import LibraryRepository
+from src.services.analysis_executor import AnalysisExecutor, get_analysis_executor
+from src.services.parse_result_cache import ParseResultCache
 from src.services.bambu_parser import BambuParser
-from src.services.stl_analyzer import STLAnalyzer
 from src.services.preview_render_service import PreviewRenderService
+from src.services.library_analysis_queue import LibraryAnalysisQueue, AnalysisPriority
+from src.services.thumbnail_store import ThumbnailStore
 from src.services.filament_colors import (
     extract_colors_from_filament_ids,
     extract_color_from_name,
@@ -26,6 +30,8 @@ from src.services.filament_colors import (
     format_color_list
 )
 from src.services.file_role_classifier import classify_role, threemf_has_gcode
+from src.services.threemf_archive import ThreeMFArchive
+from src.utils.gcode_statistics import LayerStatistics, MODEL_VERSION
 import base64
 
 logger = structlog.get_logger()
@@ -34,7 +40,8 @@ logger = structlog.get_logger()
 class LibraryService:
     """Service for managing the unified file library."""
 
-    def __init__(self, database, config_service, event_service):
+    def __init__(self, database, config_service, event_service,
+                 analysis_executor: Optional[AnalysisExecutor] = None):
         """
         Initialize library service.
 
@@ -42,6 +49,7 @@ class LibraryService:
             database: Database instance for storage
             config_service: Configuration service
             event_service: Event service for notifications
+            analysis_executor: Process pool for file analysis (default: shared executor)
         """
         self.database = database
         self.library_repo = LibraryRepository(database._connection)
@@ -55,17 +63,29 @@ class LibraryService:
         self.auto_extract_metadata = getattr(config_service.settings, 'library_auto_extract_metadata', True)
         self.checksum_algorithm = getattr(config_service.settings, 'library_checksum_algorithm', 'sha256')
         self.preserve_originals = getattr(config_service.settings, 'library_preserve_originals', True)
+        self.processing_workers = getattr(config_service.settings, 'library_processing_workers', 2)
 
         # Processing state
         self._processing_files = set()  # Track files currently being processed
 
-        # Initialize metadata extraction parsers
-        self.bambu_parser = BambuParser()
-        self.stl_analyzer = STLAnalyzer()
+        # Bounded, prioritized metadata extraction
+        self.analysis_queue = LibraryAnalysisQueue(
+            database,
+            self._run_queued_analysis,
+            max_workers=self.processing_workers
+        )
+
+        # File parsers run in worker processes to keep the event loop responsive
+        self.analysis_executor = analysis_executor or get_analysis_executor()
 
         # Initialize preview rendering service for thumbnail generation
         cache_dir = self.library_path / '.metadata' / 'preview-cache'
-        self.preview_service = PreviewRenderService(cache_dir=str(cache_dir))
+        self.preview_service = PreviewRenderService(cache_dir=str(cache_dir),
+                                                    analysis_executor=self.analysis_executor)
+
+        # Thumbnails are stored on disk by content hash; rows keep the hash
+        self.thumbnail_store = ThumbnailStore(self.library_path / '.metadata' / 'thumbnails')
+        self._derivative_failures: Set[str] = set()
 
         logger.info("Library service initialized",
                    library_path=str(self.library_path),
@@ -110,13 +130,264 @@ class LibraryService:
             except Exception as e:  # noqa: BLE001
                 logger.warning("Library role backfill failed", error=str(e))
 
+            # Move thumbnails still stored inline as base64 into the thumbnail store
+            try:
+                await self.migrate_inline_thumbnails()
+            except Exception as e:  # noqa: BLE001
+                logger.warning("Library thumbnail migration failed", error=str(e))
+
+            # Resume metadata extraction interrupted by the last shutdown
+            await self.analysis_queue.resume()
+
         except Exception as e:
             logger.error("Failed to initialize library", error=str(e))
             raise
 
+    async def shutdown(self) -> None:
+        """Stop metadata extraction workers (queued work is resumed on next start)."""
+        await self.analysis_queue.shutdown()
+
+    async def migrate_inline_thumbnails(self, batch_size: int = 100) -> int:
+        """
+        One-time backfill: move base64 thumbnails from library rows into the store.
+
+        Args:
+            batch_size: Rows converted per database round-trip
+
+        Returns:
+            Number of rows migrated
+        """
+        migrated = 0
+        while True:
+            rows = await self.library_repo.list_inline_thumbnails(limit=batch_size)
+            if not rows:
+                break
+            for row in rows:
+                fields = {
+                    'thumbnail_data': row['thumbnail_data'],
+                    'thumbnail_format': row.get('thumbnail_format'),
+                }
+                await self._store_thumbnail(fields)
+                if not fields.get('thumbnail_hash'):
+                    # Undecodable data: drop it rather than retrying forever
+                    fields['has_thumbnail'] = 0
+                await self.library_repo.update_file(row['checksum'], fields)
+                migrated += 1
+
+        if migrated:
+            logger.info("Moved library thumbnails to thumbnail store", count=migrated)
+        return migrated
+
+    async def get_thumbnail(self, checksum: str, size: Optional[int] = None,
+                            accept: Optional[str] = None) -> Optional[Tuple[Path, str, str]]:
+        """
+        Locate the stored thumbnail of a library file.
+
+        Args:
+            checksum: File checksum
+            size: Requested edge length; selects a precomputed derivative
+            accept: HTTP ``Accept`` header, used to choose WebP or PNG
+
+        Returns:
+            Tuple of (path, media type, entity tag), or None if there is none
+        """
+        info = await self.library_repo.get_thumbnail_info(checksum)
+        if not info or not info.get('has_thumbnail') or not info.get('thumbnail_hash'):
+            return None
+        return await self.get_stored_thumbnail(info['thumbnail_hash'], size, accept)
+
+    async def get_stored_thumbnail(self, thumbnail_hash: str, size: Optional[int] = None,
+                                   accept: Optional[str] = None) -> Optional[Tuple[Path, str, str]]:
+        """
+        Locate a stored thumbnail by content hash (no database access).
+
+        Derivatives missing for thumbnails stored before they existed are
+        generated on first request.
+
+        Args:
+            thumbnail_hash: Content hash
+            size: Requested edge length; selects a precomputed derivative
+            accept: HTTP ``Accept`` header, used to choose WebP or PNG
+
+        Returns:
+            Tuple of (path, media type, entity tag), or None if not stored
+        """
+        if size and self.thumbnail_store.find(thumbnail_hash) \
+                and not self.thumbnail_store.has_derivatives(thumbnail_hash):
+            await self._generate_thumbnail_derivatives(thumbnail_hash)
+        return self.thumbnail_store.select(thumbnail_hash, size, accept)
+
+    async def _store_thumbnail(self, fields: Dict[str, Any]) -> None:
+        """
+        Replace base64 ``thumbnail_data`` in a field dict with a stored hash.
+
+        Args:
+            fields: Database fields; updated in place
+        """
+        thumbnail_b64 = fields.get('thumbnail_data')
+        if not thumbnail_b64:
+            return
+        if isinstance(thumbnail_b64, bytes):
+            thumbnail_b64 = thumbnail_b64.decode('ascii', errors='ignore')
+        # Remove data URL prefix if present
+        if ',' in thumbnail_b64:
+            thumbnail_b64 = thumbnail_b64.split(',', 1)[1]
+
+        try:
+            image_bytes = base64.b64decode(thumbnail_b64)
+        except (ValueError, TypeError) as e:
+            logger.warning("Could not decode thumbnail data", error=str(e))
+            fields['thumbnail_data'] = None
+            return
+
+        fields['thumbnail_hash'] = await asyncio.to_thread(
+            self.thumbnail_store.put, image_bytes, fields.get('thumbnail_format') or 'png'
+        )
+        fields['thumbnail_data'] = None
+
+    async def _generate_thumbnail_derivatives(self, thumbnail_hash: str) -> None:
+        """Render the downscaled PNG/WebP set of a stored thumbnail in a worker."""
+        if thumbnail_hash in self._derivative_failures:
+            return
+        ok = await self.analysis_executor.generate_thumbnail_derivatives(
+            self.thumbnail_store.root, thumbnail_hash
+        )
+        if not ok:
+            # Keep serving the original; don't retry a broken image on every request
+            self._derivative_failures.add(thumbnail_hash)
+
+    async def _store_plates(self, checksum: str, plates: List[Dict[str, Any]],
+                            thumbnails: List[Dict[str, Any]]) -> None:
+        """
+        Replace the plate rows of a file, storing each plate's thumbnail.
+
+        Args:
+            checksum: File checksum
+            plates: Plates from the 3MF parser
+            thumbnails: Parser thumbnails; matched to plates by ``source_file``
+        """
+        thumbnail_data = {t.get('source_file'): t.get('data') for t in thumbnails}
+        previous = await self.library_repo.list_plates(checksum)
+
+        rows = []
+        for plate in plates:
+            row = dict(plate)
+            data = thumbnail_data.get(plate.get('thumbnail_file'))
+            if data:
+                fields = {'thumbnail_data': data, 'thumbnail_format': 'png'}
+                await self._store_thumbnail(fields)
+                row['thumbnail_hash'] = fields.get('thumbnail_hash')
+            rows.append(row)
+
+        await self.library_repo.replace_plates(checksum, rows)
+
+        current = {row.get('thumbnail_hash') for row in rows}
+        for plate in previous:
+            if plate.get('thumbnail_hash') not in current:
+                await self._release_thumbnail(plate['thumbnail_hash'])
+
+    async def get_plates(self, checksum: str, sort_by: str = 'plate_index',
+                         sort_order: str = 'asc') -> List[Dict[str, Any]]:
+        """
+        Get the per-plate metadata of a multi-plate project.
+
+        Args:
+            checksum: File checksum
+            sort_by: Plate field to sort by
+            sort_order: 'asc' or 'desc'
+
+        Returns:
+            List of plate dictionaries (empty for single-model files)
+        """
+        return await self.library_repo.list_plates(checksum, sort_by, sort_order)
+
+    async def _store_layer_stats(self, checksum: str, file_path: Path,
+                                 parser_metadata: Dict[str, Any],
+                                 metadata_fields: Dict[str, Any],
+                                 content_checksum: Optional[str] = None) -> None:
+        """
+        Compute and store the layer statistics of a G-code file.
+
+        Layer count, filament and cost fields the slicer comments did not
+        provide are filled in from the statistics. Statistics already stored
+        for the checksum by the current model version are reused.
+
+        Args:
+            checksum: File checksum
+            file_path: Path to the G-code file
+            parser_metadata: Metadata from the comment parser (filament
+                diameter/density and print time, if present)
+            metadata_fields: Database fields being collected; updated in place
+            content_checksum: Checksum of the content (differs from ``checksum``
+                for duplicates); keys the cached analysis
+        """
+        stats = await self.library_repo.get_layer_stats(checksum)
+        if not stats or stats.get('model_version') != MODEL_VERSION:
+            options = {}
+            for key in ('filament_diameter', 'filament_density'):
+                value = parser_metadata.get(key)
+                if isinstance(value, list):
+                    value = value[0] if value else None
+                if isinstance(value, (int, float)) and value > 0:
+                    options[key] = value
+
+            stats = await self.analysis_executor.analyze_gcode_layers(
+                str(file_path), options, checksum=content_checksum
+            )
+            if not stats.get('success'):
+                logger.warning("G-code layer analysis failed",
+                               checksum=checksum[:16], error=stats.get('error'))
+                return
+            await self.library_repo.upsert_layer_stats(checksum, stats)
+
+        metadata_fields.setdefault('total_layer_count', stats['layer_count'])
+        metadata_fields.setdefault('total_filament_weight', stats['filament_weight'])
+        metadata_fields.setdefault('filament_length', stats['filament_length'])
+        costs = BambuParser.estimate_costs(
+            metadata_fields['total_filament_weight'],
+            parser_metadata.get('estimated_time') or stats['estimated_time'],
+        )
+        metadata_fields.setdefault('material_cost', costs['material_cost_estimate'])
+        metadata_fields.setdefault('energy_cost', costs['energy_cost_estimate'])
+        metadata_fields.setdefault('total_cost', costs['total_cost_estimate'])
+
+        logger.info("G-code layer statistics stored",
+                    checksum=checksum[:16],
+                    layers=stats['layer_count'],
+                    estimated_time=stats['estimated_time'])
+
+    async def get_layer_stats(self, checksum: str) -> Optional[LayerStatistics]:
+        """
+        Get the stored layer statistics of a G-code file.
+
+        Args:
+            checksum: File checksum
+
+        Returns:
+            LayerStatistics, or None if the file has none
+        """
+        row = await self.library_repo.get_layer_stats(checksum)
+        if not row or row.get('layers') is None:
+            return None
+        return LayerStatistics.from_bytes(row['layers'], row['model_version'])
+
+    async def _release_thumbnail(self, thumbnail_hash: Optional[str]) -> None:
+        """Delete a stored thumbnail once no library file references it."""
+        if not thumbnail_hash:
+            return
+        if await self.library_repo.count_thumbnail_references(thumbnail_hash) == 0:
+            await asyncio.to_thread(self.thumbnail_store.delete, thumbnail_hash)
+
+    async def _release_parse_results(self, content_checksum: str) -> None:
+        """Drop cached parser output once no library file holds the content."""
+        cache = getattr(self.analysis_executor, 'result_cache', None)
+        if not isinstance(cache, ParseResultCache):
+            return
+        if await self.library_repo.count_content_references(content_checksum) == 0:
+            await cache.discard(content_checksum)
+
     async def classify_unroled_files(self) -> int:
         """One-time backfill: classify library_files rows with role IS NULL."""
-        from src.services.file_role_classifier import classify_role, threemf_has_gcode
         updated = 0
         async with self.database.connection() as conn:
             cursor = await conn.execute(
@@ -128,7 +399,7 @@ class LibraryService:
             has_gcode = None
             if ext == "3mf":
                 full = self.library_path / library_path if library_path else None
-                has_gcode = threemf_has_gcode(full) if full and full.exists() else None
+                has_gcode = await asyncio.to_thread(self._read_threemf_has_gcode, full) if full else None
             role = classify_role(file_type or "", has_gcode)
             if role is None:
                 continue
@@ -142,6 +413,15 @@ class LibraryService:
             logger.info("Backfilled library file roles", count=updated)
         return updated
 
+    @staticmethod
+    def _read_threemf_has_gcode(path: Path) -> Optional[bool]:
+        """Open a 3MF once to check for bundled G-code; None if it cannot be read."""
+        try:
+            with ThreeMFArchive(path) as archive:
+                return threemf_has_gcode(archive)
+        except (OSError, zipfile.BadZipFile):
+            return None
+
     async def calculate_checksum(self, file_path: Path, algorithm: str = None) -> str:
         """
         Calculate file checksum.
@@ -385,9 +665,12 @@ class LibraryService:
             file_size = file_stat.st_size
             file_type = library_path.suffix.lower()
 
-            # Classify role if not provided
+            # Classify role if not provided. A 3MF's role depends on whether it
+            # holds sliced gcode; the full parse is left to metadata extraction
             if role is None:
-                has_gcode = threemf_has_gcode(library_path) if file_type.lstrip('.') == '3mf' else None
+                has_gcode = None
+                if file_type.lstrip('.') == '3mf':
+                    has_gcode = await asyncio.to_thread(self._read_threemf_has_gcode, library_path)
                 role = classify_role(file_type, has_gcode)
 
             # Create library file record
@@ -483,7 +766,9 @@ class LibraryService:
 
             # Schedule metadata extraction if enabled
             if self.auto_extract_metadata:
-                asyncio.create_task(self._extract_metadata_async(file_id, checksum))
+                priority = (AnalysisPriority.INTERACTIVE if source_type == 'upload'
+                            else AnalysisPriority.NEW_FILE)
+                await self.analysis_queue.enqueue(checksum, priority)
 
             return file_record
 
@@ -534,7 +819,8 @@ class LibraryService:
         return [dict(row) for row in rows]
 
     async def list_files(self, filters: Dict[str, Any] = None,
-                        page: int = 1, limit: int = 50) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+                        page: int = 1, limit: int = 50,
+                        include: Optional[Iterable[str]] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
         """
         List files in library with filters and pagination.
 
@@ -548,11 +834,13 @@ class LibraryService:
                 - has_metadata: Filter by metadata presence
             page: Page number (1-indexed)
             limit: Items per page
+            include: Heavy columns to return as well (``sources``, ``metadata``...);
+                see ``LibraryRepository.LIST_OPTIONAL_COLUMNS``
 
         Returns:
             Tuple of (files list, pagination info)
         """
-        return await self.library_repo.list_files(filters, page, limit)
+        return await self.library_repo.list_files(filters, page, limit, include=include)
 
     async def add_file_source(self, checksum: str, source_info: Dict[str, Any]) -> None:
         """
@@ -715,8 +1003,15 @@ class LibraryService:
                     logger.info("Deleted physical file", path=str(library_path))
 
             # Delete from database
+            plates = await self.library_repo.list_plates(checksum)
             await self.library_repo.delete_file(checksum)
             await self.library_repo.delete_file_sources(checksum)
+            await self.library_repo.delete_plates(checksum)
+            await self.library_repo.delete_layer_stats(checksum)
+            await self._release_thumbnail(file_record.get('thumbnail_hash'))
+            for plate in plates:
+                await self._release_thumbnail(plate.get('thumbnail_hash'))
+            await self._release_parse_results(file_record.get('duplicate_of_checksum') or checksum)
 
             logger.info("File deleted from library", checksum=checksum[:16])
 
@@ -732,6 +1027,13 @@ class LibraryService:
             logger.error("Failed to delete file from library", checksum=checksum[:16], error=str(e))
             return False
 
+    async def get_parse_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Hit rate and stored entries of the parse-result cache, or None without one."""
+        cache = getattr(self.analysis_executor, 'result_cache', None)
+        if not isinstance(cache, ParseResultCache):
+            return None
+        return await cache.get_stats()
+
     async def get_library_statistics(self) -> Dict[str, Any]:
         """
         Get library statistics.
@@ -1049,7 +1351,9 @@ class LibraryService:
                 return
 
             library_path = self.library_path / file_record['library_path']
-            file_type = file_record.get('file_type', '').lower()
+            file_type = file_record.get('file_type', '').lower().lstrip('.')
+            # Duplicates carry a suffixed checksum; parse results are keyed by content
+            content_checksum = file_record.get('duplicate_of_checksum') or checksum
 
             logger.info("Metadata extraction started",
                        checksum=checksum[:16],
@@ -1058,11 +1362,14 @@ class LibraryService:
 
             # Extract metadata using appropriate parser for file type
             metadata_fields = {}
+            plates = None
 
             if file_type in ['3mf', 'gcode', 'bgcode', 'stl']:
                 try:
                     # Parse file for metadata and thumbnails
-                    parse_result = await self.bambu_parser.parse_file(str(library_path))
+                    parse_result = await self.analysis_executor.parse_file(
+                        str(library_path), checksum=content_checksum
+                    )
 
                     if parse_result['success']:
                         # Map parser output to database fields
@@ -1070,6 +1377,9 @@ class LibraryService:
                             parse_result.get('metadata', {}),
                             parse_result.get('thumbnails', [])
                         )
+                        plates = parse_result.get('plates')
+                        if plates:
+                            metadata_fields['plate_count'] = len(plates)
 
                         logger.info("Metadata extracted from file parser",
                                    checksum=checksum[:16],
@@ -1100,7 +1410,9 @@ class LibraryService:
                     # For STL files, also extract geometric metadata using STL analyzer
                     if file_type == 'stl':
                         try:
-                            stl_result = await self.stl_analyzer.analyze_file(library_path)
+                            stl_result = await self.analysis_executor.analyze_stl(
+                                library_path, checksum=content_checksum
+                            )
 
                             if stl_result['success']:
                                 # Extract and merge STL-specific metadata
@@ -1125,6 +1437,14 @@ class LibraryService:
                                        checksum=checksum[:16],
                                        error=str(e), exc_info=True)
 
+                    # Per-layer statistics from the toolpath; they also stand in
+                    # for print time and filament the slicer comments lack
+                    if file_type == 'gcode':
+                        await self._store_layer_stats(
+                            checksum, library_path, parse_result.get('metadata', {}), metadata_fields,
+                            content_checksum=content_checksum
+                        )
+
                     # Generate thumbnail if file needs it (STL, gcode without embedded thumbnails)
                     if parse_result.get('needs_generation', False) and not metadata_fields.get('has_thumbnail'):
                         try:
@@ -1143,10 +1463,11 @@ class LibraryService:
                             )
 
                             if thumbnail_bytes:
-                                # Convert to base64 for database storage
-                                thumbnail_b64 = base64.b64encode(thumbnail_bytes).decode('utf-8')
                                 metadata_fields['has_thumbnail'] = 1
-                                metadata_fields['thumbnail_data'] = thumbnail_b64
+                                metadata_fields['thumbnail_hash'] = await asyncio.to_thread(
+                                    self.thumbnail_store.put, thumbnail_bytes, 'png'
+                                )
+                                metadata_fields['thumbnail_data'] = None
                                 metadata_fields['thumbnail_width'] = 512
                                 metadata_fields['thumbnail_height'] = 512
                                 metadata_fields['thumbnail_format'] = 'png'
@@ -1189,6 +1510,11 @@ class LibraryService:
                            checksum=checksum[:16],
                            file_type=file_type)
 
+            # Embedded thumbnails go to the thumbnail store, not the row
+            await self._store_thumbnail(metadata_fields)
+            if metadata_fields.get('thumbnail_hash'):
+                await self._generate_thumbnail_derivatives(metadata_fields['thumbnail_hash'])
+
             # Update database with extracted metadata and mark as ready
             update_fields = {
                 **metadata_fields,
@@ -1197,6 +1523,12 @@ class LibraryService:
             }
 
             await self.library_repo.update_file(checksum, update_fields)
+            if plates is not None:
+                await self._store_plates(checksum, plates, parse_result.get('thumbnails', []))
+
+            previous_hash = file_record.get('thumbnail_hash')
+            if metadata_fields.get('thumbnail_hash') and previous_hash != metadata_fields['thumbnail_hash']:
+                await self._release_thumbnail(previous_hash)
 
             logger.info("Metadata extraction completed",
                        checksum=checksum[:16],
@@ -1212,6 +1544,20 @@ class LibraryService:
         finally:
             self._processing_files.discard(checksum)
 
+    async def _run_queued_analysis(self, checksum: str) -> None:
+        """
+        Analysis queue handler: extract metadata for one file.
+
+        Args:
+            checksum: File checksum
+        """
+        try:
+            await self._extract_metadata_async(None, checksum)
+        except asyncio.CancelledError:
+            # Cancelled mid-extraction: don't leave the file stuck in 'processing'
+            await self.library_repo.update_file(checksum, {'status': 'available'})
+            raise
+
     async def add_file_from_upload(self, file_id: str, file_path: str) -> Dict[str, Any]:
         """
         Add uploaded file to library.
@@ -1285,12 +1631,14 @@ class LibraryService:
                         error=str(e))
             raise
 
-    async def reprocess_file(self, checksum: str) -> bool:
+    async def reprocess_file(self, checksum: str,
+                             priority: AnalysisPriority = AnalysisPriority.INTERACTIVE) -> bool:
         """
         Reprocess file metadata.
 
         Args:
             checksum: File checksum
+            priority: Analysis queue priority
 
         Returns:
             True if reprocessing started successfully
@@ -1302,7 +1650,7 @@ class LibraryService:
                 return False
 
             # Schedule metadata extraction
-            asyncio.create_task(self._extract_metadata_async(file_record['id'], checksum))
+            await self.analysis_queue.enqueue(checksum, priority)
 
             logger.info("File reprocessing scheduled", checksum=checksum[:16])
             return True
@@ -1310,3 +1658,70 @@ class LibraryService:
         except Exception as e:
             logger.error("Failed to schedule reprocessing", checksum=checksum[:16], error=str(e))
             return False
+
+    async def reprocess_files(self, checksums: List[str],
+                              priority: AnalysisPriority = AnalysisPriority.BULK) -> int:
+        """
+        Queue metadata re-extraction for many files at once.
+
+        Args:
+            checksums: Checksums of existing library files
+            priority: Analysis queue priority
+
+        Returns:
+            Number of files scheduled
+        """
+        scheduled = await self.analysis_queue.enqueue_many(checksums, priority)
+        logger.info("Bulk reprocessing scheduled", files=scheduled, priority=priority.name.lower())
+        return scheduled
+
+    async def filter_stale_files(self, files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Keep only files whose cached parse result is missing or outdated.
+
+        A parser version bump for one file type makes only files of that
+        type stale, so a bulk re-analysis skips everything else.
+
+        Args:
+            files: Library file records
+
+        Returns:
+            Records that would be parsed again
+        """
+        cache = getattr(self.analysis_executor, 'result_cache', None)
+        if not isinstance(cache, ParseResultCache):
+            return files
+
+        def content_checksum(file: Dict[str, Any]) -> str:
+            return file.get('duplicate_of_checksum') or file['checksum']
+
+        stale = await cache.stale_checksums(
+            (content_checksum(file), str(self.library_path / file['library_path']))
+            for file in files
+        )
+        return [file for file in files if content_checksum(file) in stale]
+
+    def get_analysis_progress(self) -> Dict[str, Any]:
+        """
+        Get metadata extraction queue progress.
+
+        Returns:
+            Progress dictionary with pending/running counts and ETA
+        """
+        return self.analysis_queue.get_progress()
+
+    async def cancel_analysis(self, checksum: Optional[str] = None,
+                              priority: Optional[AnalysisPriority] = None) -> int:
+        """
+        Cancel queued metadata extraction.
+
+        Args:
+            checksum: Cancel only this file (pending or running)
+            priority: Without a checksum, cancel only pending work of this priority
+
+        Returns:
+            Number of cancelled analyses
+        """
+        if checksum:
+            return 1 if await self.analysis_queue.cancel(checksum) else 0
+        return await self.analysis_queue.cancel_pending(priority)
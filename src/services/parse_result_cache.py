@@ -0,0 +1,201 @@
+"""
+Persistent cache of file parser output.
+
+Parsing a library file (G-code comment scan, 3MF package, STL mesh) costs far
+more than looking up its result, and the same content is parsed again on
+every reprocess, bulk re-analysis or when it arrives from another source.
+Results are stored keyed by ``(checksum, parser_name, parser_version)``:
+
+* the checksum is the file content's, so duplicates share one entry,
+* each parser declares its output version (``BambuParser.PARSER_VERSIONS``
+  per file type, ``ThreeMFAnalyzer.PARSER_VERSION``,
+  ``STLAnalyzer.PARSER_VERSION``, ``gcode_statistics.MODEL_VERSION``);
+  bumping one makes only that parser's (or file type's) entries miss.
+
+Only successful results are cached. Entries are zlib-compressed JSON.
+Entries of superseded versions are pruned at startup, and a content's entries
+are dropped when the last library file holding it is deleted, so the cache
+stays bounded by the library.
+"""
+import base64
+import json
+import zlib
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+import structlog
+
+from src.database.repositories import ParseCacheRepository
+
+logger = structlog.get_logger(__name__)
+
+BAMBU_PARSER = 'BambuParser'
+THREEMF_ANALYZER = 'ThreeMFAnalyzer'
+STL_ANALYZER = 'STLAnalyzer'
+GCODE_LAYERS = 'GcodeLayers'
+
+PARSERS = (BAMBU_PARSER, THREEMF_ANALYZER, STL_ANALYZER, GCODE_LAYERS)
+
+
+def parser_version(parser_name: str, file_path: str) -> str:
+    """Current output version of a parser for a file."""
+    if parser_name == BAMBU_PARSER:
+        from src.services.bambu_parser import BambuParser
+        return BambuParser.parser_version(file_path)
+    if parser_name == THREEMF_ANALYZER:
+        from src.services.threemf_analyzer import ThreeMFAnalyzer
+        return str(ThreeMFAnalyzer.PARSER_VERSION)
+    if parser_name == STL_ANALYZER:
+        from src.services.stl_analyzer import STLAnalyzer
+        return str(STLAnalyzer.PARSER_VERSION)
+    if parser_name == GCODE_LAYERS:
+        from src.utils.gcode_statistics import MODEL_VERSION
+        return str(MODEL_VERSION)
+    raise ValueError(f"Unknown parser: {parser_name}")
+
+
+def current_versions(parser_name: str) -> Set[str]:
+    """Every output version a parser currently produces (one per file type for BambuParser)."""
+    if parser_name == BAMBU_PARSER:
+        from src.services.bambu_parser import BambuParser
+        return {parser_version(parser_name, f"file{suffix}") for suffix in BambuParser.PARSER_VERSIONS}
+    return {parser_version(parser_name, '')}
+
+
+def _json_default(value: Any) -> Any:
+    """Encode the NumPy scalars/arrays and paths analyzers may return."""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if isinstance(value, Path):
+        return str(value)
+    if isinstance(value, bytes):
+        return {'__bytes__': base64.b64encode(value).decode('ascii')}
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def _json_object_hook(value: Dict[str, Any]) -> Any:
+    """Decode the binary blobs (e.g. packed layer tables) ``_json_default`` encoded."""
+    if len(value) == 1 and '__bytes__' in value:
+        return base64.b64decode(value['__bytes__'])
+    return value
+
+
+class ParseResultCache:
+    """Checksum- and version-keyed store of parser results."""
+
+    def __init__(self, database):
+        """
+        Initialize the cache.
+
+        Args:
+            database: Database instance holding the ``parse_result_cache`` table
+        """
+        self.repo = ParseCacheRepository(database._connection)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def get(self, checksum: str, parser_name: str,
+                  version: str) -> Optional[Dict[str, Any]]:
+        """Cached result, or None."""
+        try:
+            blob = await self.repo.get(checksum, parser_name, version)
+            if blob is None:
+                return None
+            return json.loads(zlib.decompress(blob), object_hook=_json_object_hook)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Failed to read cached parse result", checksum=checksum[:16],
+                           parser=parser_name, error=str(e))
+            return None
+
+    async def put(self, checksum: str, parser_name: str, version: str,
+                  result: Dict[str, Any]) -> bool:
+        """Store a result; returns False if it could not be encoded or written."""
+        try:
+            raw = json.dumps(result, default=_json_default, separators=(',', ':')).encode()
+            await self.repo.put(checksum, parser_name, version, zlib.compress(raw, 6), len(raw))
+            return True
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Failed to cache parse result", checksum=checksum[:16],
+                           parser=parser_name, error=str(e))
+            return False
+
+    async def get_or_parse(self, checksum: str, parser_name: str, file_path: str,
+                           parse: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Return the cached result for a file, running ``parse`` on a miss.
+
+        Args:
+            checksum: Content checksum of the file
+            parser_name: ``BAMBU_PARSER``, ``THREEMF_ANALYZER`` or ``STL_ANALYZER``
+            file_path: Path of the file (selects the per-type version)
+            parse: Coroutine factory producing the parser result
+
+        Returns:
+            Parser result dictionary
+        """
+        version = parser_version(parser_name, file_path)
+        cached = await self.get(checksum, parser_name, version)
+        if cached is not None:
+            self.hits += 1
+            logger.debug("Parse result cache hit", checksum=checksum[:16],
+                         parser=parser_name, version=version)
+            return cached
+
+        self.misses += 1
+        result = await parse()
+        if result.get('success'):
+            await self.put(checksum, parser_name, version, result)
+        return result
+
+    async def stale_checksums(self, files: Iterable[Tuple[str, str]],
+                              parser_name: str = BAMBU_PARSER) -> set:
+        """
+        Checksums whose cached result is missing or from an older version.
+
+        Args:
+            files: ``(checksum, file_path)`` pairs
+            parser_name: Parser whose entries are checked
+
+        Returns:
+            Set of checksums that would be re-parsed
+        """
+        files = list(files)
+        cached = await self.repo.versions([checksum for checksum, _ in files], parser_name)
+        return {
+            checksum for checksum, file_path in files
+            if cached.get(checksum) != parser_version(parser_name, file_path)
+        }
+
+    async def invalidate(self, parser_name: str,
+                         keep_versions: Optional[Iterable[str]] = None) -> None:
+        """Drop a parser's entries, optionally keeping some versions."""
+        keep = sorted(keep_versions) if keep_versions is not None else None
+        await self.repo.delete_parser(parser_name, keep)
+        logger.info("Parse result cache invalidated", parser=parser_name, kept=keep)
+
+    async def prune_stale_versions(self) -> None:
+        """Drop the entries of parser versions no longer produced; run at startup."""
+        for parser_name in PARSERS:
+            try:
+                await self.invalidate(parser_name, current_versions(parser_name))
+            except Exception as e:
+                self.errors += 1
+                logger.warning("Failed to prune parse result cache", parser=parser_name, error=str(e))
+
+    async def discard(self, checksum: str) -> None:
+        """Drop every entry for a file content."""
+        await self.repo.delete_checksum(checksum)
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and stored entries per parser version."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'entries': await self.repo.get_stats(),
+        }
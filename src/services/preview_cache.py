@@ -0,0 +1,279 @@
+"""
+Size-bounded disk cache of rendered previews.
+
+Entries are named after the file content hash and the render parameters
+(see ``PreviewRenderService._cache_key``), so a model rendered from the
+library, a watch folder or a printer download shares one entry, and changing
+a render setting simply misses. Disk use is bounded by a byte budget; the
+least recently used entries are evicted first.
+
+Recency is tracked in a small ``index.json`` next to the entries (name, size,
+last use in LRU order). It is rewritten atomically whenever entries are added
+or evicted, and at most every ``INDEX_FLUSH_SECONDS`` for plain hits, so a
+restart only loses recent recency updates. Files found on disk but missing
+from the index (an older cache layout, a lost index) are adopted as the least
+recently used entries, ordered by modification time.
+
+Entries that are in use by a running render (the level-of-detail mesh read
+by animation frame workers) can be pinned; eviction and cleanup skip them.
+"""
+import json
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+INDEX_NAME = 'index.json'
+INDEX_VERSION = 1
+INDEX_FLUSH_SECONDS = 30.0
+
+# Files that belong to the cache when the directory is scanned
+ENTRY_PATTERNS = ('*.png', '*.gif', '*.webp', 'lod/*.npz')
+
+
+class PreviewCache:
+    """Preview files under one directory, kept within a byte budget by LRU eviction."""
+
+    def __init__(self, root: Path, max_bytes: int):
+        """
+        Initialize the cache and load its index.
+
+        Args:
+            root: Cache directory
+            max_bytes: Byte budget for all entries
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max(0, int(max_bytes))
+
+        # name -> (size in bytes, last use as a Unix timestamp), oldest first
+        self._entries: 'OrderedDict[str, Tuple[int, float]]' = OrderedDict()
+        self._total_bytes = 0
+        self._pins: 'Counter[str]' = Counter()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._flushed_at = time.monotonic()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._load()
+
+    def path(self, name: str) -> Path:
+        """Location of an entry; ``name`` is relative to the cache directory."""
+        return self.root / name
+
+    def get(self, name: str) -> Optional[bytes]:
+        """Entry contents, or None on a miss."""
+        data = None
+        if name in self._entries:
+            try:
+                data = self.path(name).read_bytes()
+            except OSError:
+                self._forget(name)
+
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.touch(name)
+        return data
+
+    def touch(self, name: str) -> bool:
+        """
+        Mark an entry as just used.
+
+        Returns:
+            False if the cache has no such entry
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return False
+            self._entries[name] = (entry[0], time.time())
+            self._entries.move_to_end(name)
+            self._dirty = True
+            due = time.monotonic() - self._flushed_at >= INDEX_FLUSH_SECONDS
+        if due:
+            self.flush()
+        return True
+
+    def put(self, name: str, data: bytes) -> int:
+        """
+        Store an entry, replacing any previous version atomically.
+
+        Returns:
+            Number of entries evicted to stay within the budget
+        """
+        path = self.path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        return self.add(name)
+
+    @contextmanager
+    def pinned(self, name: str) -> Iterator[None]:
+        """Keep an entry from being evicted or cleared while the block runs."""
+        with self._lock:
+            self._pins[name] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pins[name] -= 1
+                if self._pins[name] <= 0:
+                    del self._pins[name]
+
+    def add(self, name: str) -> int:
+        """
+        Account for a file the caller wrote to ``path(name)``.
+
+        The new entry and pinned entries are never evicted, even if they
+        alone exceed the budget.
+
+        Returns:
+            Number of entries evicted to stay within the budget
+        """
+        size = self.path(name).stat().st_size
+        victims: List[str] = []
+        with self._lock:
+            previous = self._entries.pop(name, None)
+            if previous is not None:
+                self._total_bytes -= previous[0]
+            self._entries[name] = (size, time.time())
+            self._total_bytes += size
+
+            for victim, (victim_size, _) in list(self._entries.items()):
+                if self._total_bytes <= self.max_bytes:
+                    break
+                if victim == name or victim in self._pins:
+                    continue
+                del self._entries[victim]
+                self._total_bytes -= victim_size
+                victims.append(victim)
+            self.evictions += len(victims)
+            self._dirty = True
+
+        for victim in victims:
+            self.path(victim).unlink(missing_ok=True)
+        if victims:
+            logger.debug("Preview cache entries evicted", count=len(victims),
+                         cache_bytes=self._total_bytes, max_bytes=self.max_bytes)
+        self.flush()
+        return len(victims)
+
+    def clear(self, older_than: Optional[float] = None) -> int:
+        """
+        Remove entries.
+
+        Args:
+            older_than: Only remove entries unused for this many seconds;
+                None removes all. Pinned entries are kept
+
+        Returns:
+            Number of entries removed
+        """
+        cutoff = None if older_than is None else time.time() - older_than
+        with self._lock:
+            names = [name for name, (_, used) in self._entries.items()
+                     if (cutoff is None or used < cutoff) and name not in self._pins]
+            for name in names:
+                self._total_bytes -= self._entries.pop(name)[0]
+            self._dirty = True
+
+        for name in names:
+            self.path(name).unlink(missing_ok=True)
+        self.flush()
+        return len(names)
+
+    def names(self) -> List[str]:
+        """Entry names, least recently used first."""
+        with self._lock:
+            return list(self._entries)
+
+    def flush(self) -> None:
+        """Write the index if it changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {
+                'version': INDEX_VERSION,
+                'entries': [[name, size, used] for name, (size, used) in self._entries.items()],
+            }
+            self._dirty = False
+            self._flushed_at = time.monotonic()
+
+        index_path = self.root / INDEX_NAME
+        tmp_path = index_path.with_name(f"{INDEX_NAME}.{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(payload, separators=(',', ':')))
+            os.replace(tmp_path, index_path)
+        except OSError as e:
+            logger.warning("Failed to write preview cache index", error=str(e))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache statistics."""
+        return {
+            'entries': len(self._entries),
+            'bytes': self._total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def _forget(self, name: str) -> None:
+        """Drop an entry whose file disappeared."""
+        with self._lock:
+            entry = self._entries.pop(name, None)
+            if entry is not None:
+                self._total_bytes -= entry[0]
+                self._dirty = True
+
+    def _load(self) -> None:
+        """Read the index, reconcile it with the directory and apply the budget."""
+        indexed: List[Tuple[str, float]] = []
+        try:
+            payload = json.loads((self.root / INDEX_NAME).read_text())
+            if payload.get('version') == INDEX_VERSION:
+                indexed = [(name, float(used)) for name, _, used in payload['entries']]
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            logger.warning("Rebuilding unreadable preview cache index", error=str(e))
+
+        on_disk: Dict[str, os.stat_result] = {}
+        for pattern in ENTRY_PATTERNS:
+            for path in self.root.glob(pattern):
+                if path.is_file():
+                    on_disk[path.relative_to(self.root).as_posix()] = path.stat()
+
+        known = {name for name, _ in indexed}
+        adopted = sorted((stat.st_mtime, name) for name, stat in on_disk.items()
+                         if name not in known)
+        for used, name in adopted + [(used, name) for name, used in indexed]:
+            stat = on_disk.get(name)
+            if stat is not None:
+                self._entries[name] = (stat.st_size, used)
+                self._total_bytes += stat.st_size
+
+        self._dirty = bool(adopted) or len(self._entries) != len(indexed)
+        victims = []
+        while self._total_bytes > self.max_bytes and self._entries:
+            victim, (size, _) = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            victims.append(victim)
+            self._dirty = True
+        for victim in victims:
+            self.path(victim).unlink(missing_ok=True)
+        self.evictions += len(victims)
+        self.flush()
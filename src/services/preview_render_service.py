@@ -4,31 +4,55 @@ Generates thumbnail images from STL, GCODE, and other 3D file formats.
 """
 import asyncio
 import hashlib
+import json
 import os
-from datetime import datetime, timedelta
+import threading
+from collections import OrderedDict
+from datetime import timedelta
 from functools import lru_cache
 from io import BytesIO
 from pathlib import Path
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, List
 
 import structlog
+from prometheus_client import Counter
 
+from .analysis_executor import AnalysisExecutor, get_analysis_executor
 from ..utils.gcode_analyzer import GcodeAnalyzer
+from ..utils.gcode_toolpath import Toolpath, parse_toolpath
+from ..utils.mesh_decimation import decimate, face_budget
 from ..utils.config import get_settings
+from .preview_cache import PreviewCache
 
 logger = structlog.get_logger(__name__)
 
+# Bump when decimation output changes, to retire cached levels of detail
+LOD_VERSION = 1
+
+# Bump when rendering output changes, to retire cached previews
+RENDER_VERSION = 1
+
+# Prometheus metrics - initialized once
+try:
+    PREVIEW_CACHE_HITS = Counter('printernizer_preview_cache_hits_total',
+                                 'Previews served from the preview cache', ['kind'])
+    PREVIEW_CACHE_MISSES = Counter('printernizer_preview_cache_misses_total',
+                                   'Previews not found in the preview cache', ['kind'])
+    PREVIEW_CACHE_EVICTIONS = Counter('printernizer_preview_cache_evictions_total',
+                                      'Preview cache entries evicted to stay within budget')
+except ValueError:
+    # Metrics already registered (happens during reload)
+    from prometheus_client import REGISTRY
+    PREVIEW_CACHE_HITS = REGISTRY._names_to_collectors['printernizer_preview_cache_hits_total']
+    PREVIEW_CACHE_MISSES = REGISTRY._names_to_collectors['printernizer_preview_cache_misses_total']
+    PREVIEW_CACHE_EVICTIONS = REGISTRY._names_to_collectors['printernizer_preview_cache_evictions_total']
+
 # Optional imports with graceful degradation
 try:
     import trimesh
     import numpy as np
-    # Set matplotlib to non-GUI backend before importing pyplot
-    import matplotlib
-    matplotlib.use('Agg')
-    from matplotlib import pyplot as plt
-    from matplotlib.backends.backend_agg import FigureCanvasAgg
-    from mpl_toolkits.mplot3d import Axes3D
-    from PIL import Image
+    from PIL import Image, features
+    from ..utils.software_renderer import bounding_sphere, render_mesh, render_polyline
     RENDERING_AVAILABLE = True
 except ImportError as e:
     RENDERING_AVAILABLE = False
@@ -38,8 +62,12 @@ except ImportError as e:
 class PreviewRenderService:
     """Service for generating preview thumbnails from 3D files."""
 
-    def __init__(self, cache_dir: str = "data/preview-cache"):
+    def __init__(self, cache_dir: Optional[str] = None,
+                 analysis_executor: Optional[AnalysisExecutor] = None):
         """Initialize preview render service."""
+        if cache_dir is None:
+            # Next to the default database, independent of the working directory
+            cache_dir = Path(__file__).parent.parent.parent / "data" / "preview-cache"
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
 
@@ -54,10 +82,9 @@ class PreviewRenderService:
         self.stl_config = {
             'camera_angle': (45, 45, 0),  # azimuth, elevation, roll
             'background_color': '#ffffff',
-            'edge_color': 'none',  # No edges for cleaner look
             'face_color': '#6c757d',
-            'edge_width': 0,
-            'dpi': 100
+            'shading': 'flat',  # 'flat' (per face) or 'smooth' (per vertex)
+            'supersample': 2  # Anti-aliasing samples per pixel and axis
         }
 
         # Load settings
@@ -68,6 +95,8 @@ class PreviewRenderService:
             'enabled': True,  # Enabled for testing
             'max_lines': settings.gcode_render_max_lines,
             'line_color': '#007bff',
+            'line_width': 1,
+            'camera_angle': (-60, 30, 0),  # azimuth, elevation, roll
             'background_color': '#ffffff',
             'optimize_print_only': settings.gcode_optimize_print_only,
             'optimization_max_lines': settings.gcode_optimization_max_lines
@@ -83,10 +112,25 @@ class PreviewRenderService:
             'frame_duration': 500,  # Milliseconds per frame
             'elevation': 45,  # Fixed elevation angle
             'loop': 0,  # 0 = infinite loop
+            'format': settings.preview_animation_format,  # 'gif' or 'webp' (if Pillow supports it)
+            'colors': 64,  # Size of the palette shared by all GIF frames
+            'webp_quality': 80,
         }
 
-        # Cache settings
-        self.cache_duration = timedelta(days=30)
+        # Animation frames are rendered in parallel worker processes
+        self.analysis_executor = analysis_executor or get_analysis_executor()
+
+        # Decimated meshes (levels of detail), by content hash and face budget;
+        # a few stay in memory so static and animated previews share them
+        self.lod_dir = self.cache_dir / 'lod'
+        self.lod_memory_entries = 8
+        self._lod_memory: 'OrderedDict[str, Tuple[Any, Any]]' = OrderedDict()
+        self._content_hashes: Dict[Tuple[str, int, int], str] = {}
+        self._lod_lock = threading.Lock()
+
+        # Rendered previews and levels of detail, by content and render
+        # parameters, within a byte budget (PREVIEW_CACHE_MAX_MB)
+        self.cache = PreviewCache(self.cache_dir, settings.preview_cache_max_mb * 1024 * 1024)
         self._render_timeout = settings.preview_render_timeout  # seconds (configurable via PREVIEW_RENDER_TIMEOUT)
 
         # Statistics
@@ -95,7 +139,12 @@ class PreviewRenderService:
             'renders_cached': 0,
             'render_failures': 0,
             'animated_renders_generated': 0,
-            'animated_renders_cached': 0
+            'animated_renders_cached': 0,
+            'lod_hits': 0,
+            'lod_misses': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'cache_evictions': 0
         }
 
     async def get_or_generate_preview(
@@ -121,23 +170,22 @@ class PreviewRenderService:
 
         try:
             # Check cache first
-            cache_key = self._get_cache_key(file_path, size)
-            cache_path = self.cache_dir / f"{cache_key}.png"
-
-            if cache_path.exists():
-                # Check if cache is still valid
-                file_age = datetime.now() - datetime.fromtimestamp(cache_path.stat().st_mtime)
-                if file_age < self.cache_duration:
-                    logger.debug(f"Using cached preview: {cache_path}")
-                    with open(cache_path, 'rb') as f:
-                        self.stats['renders_cached'] += 1
-                        return f.read()
+            loop = asyncio.get_event_loop()
+            cache_key = await loop.run_in_executor(
+                None, self._cache_key, file_path, file_type, size, 'static'
+            )
+            cache_name = f"{cache_key}.png"
+
+            cached = self._cache_get(cache_name, 'static')
+            if cached is not None:
+                logger.debug(f"Using cached preview: {cache_name}")
+                self.stats['renders_cached'] += 1
+                return cached
 
             # Generate new preview
             logger.info(f"Generating preview for {file_path}", file_type=file_type, size=size)
 
             # Run rendering in executor to avoid blocking
-            loop = asyncio.get_event_loop()
             preview_bytes = await asyncio.wait_for(
                 loop.run_in_executor(None, self._render_file, file_path, file_type, size),
                 timeout=self._render_timeout
@@ -145,11 +193,10 @@ class PreviewRenderService:
 
             if preview_bytes:
                 # Cache the result
-                with open(cache_path, 'wb') as f:
-                    f.write(preview_bytes)
+                self._cache_put(cache_name, preview_bytes)
 
                 self.stats['renders_generated'] += 1
-                logger.info(f"Successfully generated and cached preview: {cache_path}")
+                logger.info(f"Successfully generated and cached preview: {cache_name}")
                 return preview_bytes
             else:
                 self.stats['render_failures'] += 1
@@ -203,41 +250,36 @@ class PreviewRenderService:
 
         try:
             # Check cache first
-            cache_key = self._get_cache_key(file_path, size)
-            cache_path = self.cache_dir / f"{cache_key}-animated.gif"
-
-            if cache_path.exists():
-                # Check if cache is still valid
-                file_age = datetime.now() - datetime.fromtimestamp(cache_path.stat().st_mtime)
-                if file_age < self.cache_duration:
-                    logger.info("Serving cached animated GIF",
-                               cache_path=str(cache_path),
-                               age_minutes=file_age.total_seconds() / 60)
-                    with open(cache_path, 'rb') as f:
-                        self.stats['animated_renders_cached'] += 1
-                        return f.read()
+            loop = asyncio.get_event_loop()
+            cache_key = await loop.run_in_executor(
+                None, self._cache_key, file_path, file_type_lower, size, 'animated'
+            )
+            cache_name = f"{cache_key}.{self.animation_format}"
+
+            cached = self._cache_get(cache_name, 'animated')
+            if cached is not None:
+                logger.info("Serving cached animated GIF", cache_name=cache_name)
+                self.stats['animated_renders_cached'] += 1
+                return cached
 
             # Generate new animated preview
             logger.info("Generating new animated GIF",
                        angles=self.animation_config['angles'],
                        frame_count=len(self.animation_config['angles']))
 
-            # Run rendering in executor to avoid blocking
-            loop = asyncio.get_event_loop()
             gif_bytes = await asyncio.wait_for(
-                loop.run_in_executor(None, self._render_animated_file, file_path, file_type, size),
+                self._generate_animation(file_path, file_type_lower, size),
                 timeout=self._render_timeout * len(self.animation_config['angles'])  # More time for multiple frames
             )
 
             if gif_bytes:
                 # Cache the result
-                with open(cache_path, 'wb') as f:
-                    f.write(gif_bytes)
+                self._cache_put(cache_name, gif_bytes)
 
                 self.stats['animated_renders_generated'] += 1
                 logger.info("Animated GIF generated successfully",
                            size_bytes=len(gif_bytes),
-                           cache_path=str(cache_path))
+                           cache_name=cache_name)
                 return gif_bytes
             else:
                 self.stats['render_failures'] += 1
@@ -259,14 +301,27 @@ class PreviewRenderService:
             self.stats['render_failures'] += 1
             return None
 
-    def _render_animated_file(
+    @property
+    def animation_format(self) -> str:
+        """Container of animated previews: 'webp' if configured and supported, else 'gif'."""
+        if str(self.animation_config.get('format', 'gif')).lower() == 'webp' and \
+                RENDERING_AVAILABLE and features.check('webp'):
+            return 'webp'
+        return 'gif'
+
+    @property
+    def animation_media_type(self) -> str:
+        """MIME type of animated previews."""
+        return f"image/{self.animation_format}"
+
+    async def _generate_animation(
         self,
         file_path: str,
         file_type: str,
         size: Tuple[int, int]
     ) -> Optional[bytes]:
         """
-        Render file to animated GIF with multiple camera angles (synchronous, run in executor).
+        Render animation frames in parallel worker processes and encode them.
 
         Args:
             file_path: Path to the file
@@ -274,65 +329,113 @@ class PreviewRenderService:
             size: Desired size
 
         Returns:
-            GIF bytes or None
+            Encoded animation bytes or None
         """
-        try:
-            # Load mesh
-            file_type_lower = file_type.lower()
-            if file_type_lower == 'stl':
-                mesh = trimesh.load_mesh(file_path)
-            elif file_type_lower == '3mf':
-                mesh = trimesh.load(file_path)
-                if isinstance(mesh, trimesh.Scene):
-                    mesh = trimesh.util.concatenate(
-                        [geom for geom in mesh.geometry.values() if isinstance(geom, trimesh.Trimesh)]
-                    )
-            else:
-                logger.warning(f"Unsupported file type for animation: {file_type}")
-                return None
+        if file_type not in ['stl', '3mf']:
+            logger.warning(f"Unsupported file type for animation: {file_type}")
+            return None
 
-            if mesh.is_empty:
-                logger.warning(f"Empty mesh in file: {file_path}")
-                return None
+        loop = asyncio.get_running_loop()
+        lod_key = await loop.run_in_executor(None, self._lod_key, file_path, face_budget(size))
 
-            # Generate frames for each angle
-            frames = []
-            angles = self.animation_config['angles']
-            elevation = self.animation_config['elevation']
-
-            for azimuth in angles:
-                frame_bytes = self._render_mesh_at_angle(mesh, size, azimuth, elevation)
-                if frame_bytes:
-                    # Convert PNG bytes to PIL Image
-                    frame_image = Image.open(BytesIO(frame_bytes))
-                    frames.append(frame_image)
-                else:
-                    logger.warning(f"Failed to render frame at angle {azimuth}")
-
-            if not frames:
-                logger.error("No frames generated for animated preview")
+        # Frame workers read the level of detail from disk; keep it from being
+        # evicted by other renders until every frame is done
+        angles = self.animation_config['angles']
+        with self.cache.pinned(f"lod/{lod_key}.npz"):
+            prepared = await loop.run_in_executor(None, self._animation_mesh, file_path, file_type, size)
+            if prepared is None:
                 return None
+            lod_path, render = prepared
 
-            # Create GIF
-            gif_buffer = BytesIO()
-            frames[0].save(
-                gif_buffer,
-                format='GIF',
-                save_all=True,
-                append_images=frames[1:],
-                duration=self.animation_config['frame_duration'],
-                loop=self.animation_config['loop'],
-                optimize=False  # Disable optimization for speed
-            )
+            frames = await asyncio.gather(*(
+                self.analysis_executor.render_preview_frame(
+                    lod_path, size, {**render, 'azimuth': azimuth}, timeout=self._render_timeout
+                )
+                for azimuth in angles
+            ))
+        frames = [frame for frame in frames if frame is not None]
+        if len(frames) < len(angles):
+            logger.warning("Failed to render animation frames",
+                           file_path=file_path, failed=len(angles) - len(frames))
+        if not frames:
+            return None
+        return await loop.run_in_executor(None, self._encode_animation, frames)
+
+    def _animation_mesh(
+        self,
+        file_path: str,
+        file_type: str,
+        size: Tuple[int, int]
+    ) -> Optional[Tuple[Path, Dict[str, Any]]]:
+        """
+        Prepare a mesh file for animation frames.
 
-            gif_buffer.seek(0)
-            logger.info(f"Generated animated GIF with {len(frames)} frames")
-            return gif_buffer.read()
+        The level of detail is decimated (or read from cache) and its
+        bounding sphere computed once; every frame renders the same ``.npz``
+        at the same scale, so the model turns without changing size.
 
-        except Exception as e:
-            logger.error(f"Failed to render animated file {file_path}: {e}")
+        Returns:
+            Path of the level of detail and the ``render_mesh`` arguments
+            shared by all frames, or None if the file holds no geometry
+        """
+        max_faces = face_budget(size)
+        mesh = self._preview_mesh(file_path, file_type, max_faces)
+        if mesh is None:
+            logger.warning(f"Empty mesh in file: {file_path}")
             return None
 
+        lod_path = self.lod_dir / f"{self._lod_key(file_path, max_faces)}.npz"
+        if not lod_path.exists():
+            # Served from memory after an age-based cache cleanup
+            self._write_lod(lod_path, mesh.vertices, mesh.faces)
+
+        centre, radius = bounding_sphere(mesh.vertices)
+        return lod_path, {
+            'elevation': self.animation_config['elevation'],
+            'color': self.stl_config['face_color'],
+            'background': self.stl_config['background_color'],
+            'shading': self.stl_config['shading'],
+            'supersample': self.stl_config['supersample'],
+            'centre': centre,
+            'radius': radius,
+        }
+
+    def _encode_animation(self, frames: List['np.ndarray']) -> bytes:
+        """
+        Encode RGB frames as an animated GIF or WebP.
+
+        GIF frames are quantized against one palette built from all frames,
+        so the file carries a single global color table.
+
+        Args:
+            frames: (height, width, 3) uint8 arrays of equal size
+
+        Returns:
+            Encoded animation bytes
+        """
+        images = [Image.fromarray(frame) for frame in frames]
+        options = {
+            'save_all': True,
+            'append_images': images[1:],
+            'duration': self.animation_config['frame_duration'],
+            'loop': self.animation_config['loop'],
+        }
+        buffer = BytesIO()
+        if self.animation_format == 'webp':
+            images[0].save(buffer, format='WEBP', quality=self.animation_config['webp_quality'],
+                           **options)
+        else:
+            palette = Image.fromarray(np.concatenate(frames, axis=0)).quantize(
+                colors=self.animation_config['colors'], method=Image.Quantize.MEDIANCUT
+            )
+            images = [image.quantize(palette=palette, dither=Image.Dither.NONE) for image in images]
+            options['append_images'] = images[1:]
+            images[0].save(buffer, format='GIF', palette=palette.getpalette(), optimize=False,
+                           **options)
+
+        logger.info(f"Generated animated {self.animation_format.upper()} with {len(frames)} frames")
+        return buffer.getvalue()
+
     def _render_mesh_at_angle(
         self,
         mesh: 'trimesh.Trimesh',
@@ -344,7 +447,7 @@ class PreviewRenderService:
         Render mesh at a specific camera angle.
 
         Args:
-            mesh: Trimesh object (already centered and normalized)
+            mesh: Trimesh object (scaled to fill the image)
             size: Desired size
             azimuth: Azimuth angle in degrees
             elevation: Elevation angle in degrees
@@ -353,63 +456,21 @@ class PreviewRenderService:
             PNG bytes
         """
         try:
-            # Clone mesh to avoid modifying original
-            mesh_copy = mesh.copy()
-
-            # Center and normalize
-            mesh_copy.vertices -= mesh_copy.centroid
-            scale = 1.0 / max(mesh_copy.extents)
-            mesh_copy.vertices *= scale
-
-            # Create figure
-            dpi = self.stl_config['dpi']
-            fig_width = size[0] / dpi
-            fig_height = size[1] / dpi
-
-            fig = plt.figure(figsize=(fig_width, fig_height), dpi=dpi)
-            ax = fig.add_subplot(111, projection='3d')
-
-            # Set colors
-            fig.patch.set_facecolor(self.stl_config['background_color'])
-            ax.set_facecolor(self.stl_config['background_color'])
-
-            # Plot mesh
-            ax.plot_trisurf(
-                mesh_copy.vertices[:, 0],
-                mesh_copy.vertices[:, 1],
-                mesh_copy.vertices[:, 2],
-                triangles=mesh_copy.faces,
+            image = render_mesh(
+                mesh.vertices,
+                mesh.faces,
+                size,
+                azimuth=azimuth,
+                elevation=elevation,
                 color=self.stl_config['face_color'],
-                edgecolor=self.stl_config['edge_color'],
-                linewidth=self.stl_config['edge_width'],
-                alpha=0.9,
-                shade=True
+                background=self.stl_config['background_color'],
+                shading=self.stl_config['shading'],
+                supersample=self.stl_config['supersample']
             )
 
-            # Set camera angle
-            ax.view_init(elev=elevation, azim=azimuth)
-            ax.set_axis_off()
-
-            # Set equal aspect ratio
-            max_range = 0.5
-            ax.set_xlim([-max_range, max_range])
-            ax.set_ylim([-max_range, max_range])
-            ax.set_zlim([-max_range, max_range])
-
-            # Save to bytes
             buf = BytesIO()
-            plt.savefig(
-                buf,
-                format='png',
-                dpi=dpi,
-                bbox_inches='tight',
-                pad_inches=0.1,
-                facecolor=self.stl_config['background_color']
-            )
-            plt.close(fig)
-
-            buf.seek(0)
-            return buf.read()
+            image.save(buf, format='PNG')
+            return buf.getvalue()
 
         except Exception as e:
             logger.error(f"Failed to render mesh at angle {azimuth}: {e}")
@@ -456,69 +517,10 @@ class PreviewRenderService:
             PNG image as bytes
         """
         try:
-            # Load STL file
-            mesh = trimesh.load_mesh(file_path)
+            mesh = self._preview_mesh(file_path, 'stl', face_budget(size))
 
-            if not mesh.is_empty:
-                # Center the mesh
-                mesh.vertices -= mesh.centroid
-
-                # Normalize size to fit in unit cube
-                scale = 1.0 / max(mesh.extents)
-                mesh.vertices *= scale
-
-                # Create figure with specified size
-                dpi = self.stl_config['dpi']
-                fig_width = size[0] / dpi
-                fig_height = size[1] / dpi
-
-                fig = plt.figure(figsize=(fig_width, fig_height), dpi=dpi)
-                ax = fig.add_subplot(111, projection='3d')
-
-                # Set background color
-                fig.patch.set_facecolor(self.stl_config['background_color'])
-                ax.set_facecolor(self.stl_config['background_color'])
-
-                # Plot mesh
-                ax.plot_trisurf(
-                    mesh.vertices[:, 0],
-                    mesh.vertices[:, 1],
-                    mesh.vertices[:, 2],
-                    triangles=mesh.faces,
-                    color=self.stl_config['face_color'],
-                    edgecolor=self.stl_config['edge_color'],
-                    linewidth=self.stl_config['edge_width'],
-                    alpha=0.9,
-                    shade=True
-                )
-
-                # Set camera angle
-                azim, elev, roll = self.stl_config['camera_angle']
-                ax.view_init(elev=elev, azim=azim)
-
-                # Remove axes for cleaner look
-                ax.set_axis_off()
-
-                # Set equal aspect ratio
-                max_range = 0.5
-                ax.set_xlim([-max_range, max_range])
-                ax.set_ylim([-max_range, max_range])
-                ax.set_zlim([-max_range, max_range])
-
-                # Save to bytes
-                buf = BytesIO()
-                plt.savefig(
-                    buf,
-                    format='png',
-                    dpi=dpi,
-                    bbox_inches='tight',
-                    pad_inches=0.1,
-                    facecolor=self.stl_config['background_color']
-                )
-                plt.close(fig)
-
-                buf.seek(0)
-                return buf.read()
+            if mesh is not None:
+                return self._render_mesh_common(mesh, size)
             else:
                 logger.warning(f"Empty mesh in STL file: {file_path}")
                 return None
@@ -539,19 +541,9 @@ class PreviewRenderService:
             PNG image as bytes
         """
         try:
-            # Load 3MF file (trimesh can handle this)
-            mesh = trimesh.load(file_path)
-
-            # 3MF might contain a scene with multiple meshes
-            if isinstance(mesh, trimesh.Scene):
-                # Combine all meshes in the scene
-                mesh = trimesh.util.concatenate(
-                    [geom for geom in mesh.geometry.values() if isinstance(geom, trimesh.Trimesh)]
-                )
+            mesh = self._preview_mesh(file_path, '3mf', face_budget(size))
 
-            if not mesh.is_empty:
-                # Use the same rendering as STL
-                # Temporarily store as STL-like rendering
+            if mesh is not None:
                 return self._render_mesh_common(mesh, size)
             else:
                 logger.warning(f"Empty mesh in 3MF file: {file_path}")
@@ -561,80 +553,159 @@ class PreviewRenderService:
             logger.error(f"Failed to render 3MF file {file_path}: {e}")
             return None
 
-    def _render_mesh_common(self, mesh: 'trimesh.Trimesh', size: Tuple[int, int]) -> Optional[bytes]:
+    def _load_mesh(self, file_path: str, file_type: str) -> Optional['trimesh.Trimesh']:
         """
-        Common mesh rendering logic for any trimesh object.
+        Load an STL or 3MF file as a single mesh.
 
         Args:
-            mesh: Trimesh object
-            size: Desired size
+            file_path: Path to the file
+            file_type: File type (stl, 3mf)
 
         Returns:
-            PNG bytes
+            Mesh, or None if the file holds no geometry
         """
-        try:
-            # Center the mesh
-            mesh.vertices -= mesh.centroid
-
-            # Normalize size
-            scale = 1.0 / max(mesh.extents)
-            mesh.vertices *= scale
-
-            # Create figure
-            dpi = self.stl_config['dpi']
-            fig_width = size[0] / dpi
-            fig_height = size[1] / dpi
-
-            fig = plt.figure(figsize=(fig_width, fig_height), dpi=dpi)
-            ax = fig.add_subplot(111, projection='3d')
-
-            # Set colors
-            fig.patch.set_facecolor(self.stl_config['background_color'])
-            ax.set_facecolor(self.stl_config['background_color'])
-
-            # Plot
-            ax.plot_trisurf(
-                mesh.vertices[:, 0],
-                mesh.vertices[:, 1],
-                mesh.vertices[:, 2],
-                triangles=mesh.faces,
-                color=self.stl_config['face_color'],
-                edgecolor=self.stl_config['edge_color'],
-                linewidth=self.stl_config['edge_width'],
-                alpha=0.9,
-                shade=True
-            )
+        if file_type == 'stl':
+            mesh = trimesh.load_mesh(file_path)
+        else:
+            mesh = trimesh.load(file_path)
+            # 3MF might contain a scene with multiple meshes
+            if isinstance(mesh, trimesh.Scene):
+                meshes = [geom for geom in mesh.geometry.values() if isinstance(geom, trimesh.Trimesh)]
+                if not meshes:
+                    return None
+                mesh = trimesh.util.concatenate(meshes)
+        return None if mesh.is_empty else mesh
+
+    def _content_hash(self, file_path: str) -> str:
+        """SHA-256 of a file's content, remembered per path, size and mtime."""
+        stat = os.stat(file_path)
+        key = (str(file_path), stat.st_size, stat.st_mtime_ns)
+        digest = self._content_hashes.get(key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    sha.update(chunk)
+            digest = sha.hexdigest()
+            self._content_hashes[key] = digest
+        return digest
+
+    def _preview_mesh(self, file_path: str, file_type: str,
+                      max_faces: int) -> Optional['trimesh.Trimesh']:
+        """
+        Level of detail of a mesh file with at most ``max_faces`` faces.
+
+        Decimated meshes are cached by content hash and face budget, in
+        memory and under ``lod/`` in the cache directory, so the full
+        mesh is only loaded once per file content.
 
-            # Camera
-            azim, elev, roll = self.stl_config['camera_angle']
-            ax.view_init(elev=elev, azim=azim)
-            ax.set_axis_off()
+        Args:
+            file_path: Path to the STL or 3MF file
+            file_type: File type (stl, 3mf)
+            max_faces: Face budget
 
-            # Aspect ratio
-            max_range = 0.5
-            ax.set_xlim([-max_range, max_range])
-            ax.set_ylim([-max_range, max_range])
-            ax.set_zlim([-max_range, max_range])
+        Returns:
+            Decimated mesh, or None if the file holds no geometry
+        """
+        key = self._lod_key(file_path, max_faces)
+        lod_name = f"lod/{key}.npz"
+        with self._lod_lock:
+            arrays = self._lod_memory.get(key)
+            if arrays is not None:
+                self._lod_memory.move_to_end(key)
+
+        lod_path = self.cache.path(lod_name)
+        if self.cache.touch(lod_name) and arrays is None:
+            try:
+                with np.load(lod_path) as data:
+                    arrays = (data['vertices'], data['faces'])
+            except Exception as e:
+                logger.warning(f"Discarding unreadable mesh LOD {lod_path}: {e}")
+                lod_path.unlink(missing_ok=True)
+
+        if arrays is None:
+            self.stats['lod_misses'] += 1
+            mesh = self._load_mesh(file_path, file_type)
+            if mesh is None:
+                return None
+            arrays = decimate(mesh.vertices, mesh.faces, max_faces)
+            logger.info("Mesh level of detail created", file_path=file_path,
+                        faces=len(mesh.faces), lod_faces=len(arrays[1]))
+            del mesh
+            self._write_lod(lod_path, *arrays)
+        else:
+            self.stats['lod_hits'] += 1
 
-            # Save
-            buf = BytesIO()
-            plt.savefig(
-                buf,
-                format='png',
-                dpi=dpi,
-                bbox_inches='tight',
-                pad_inches=0.1,
-                facecolor=self.stl_config['background_color']
-            )
-            plt.close(fig)
+        with self._lod_lock:
+            self._lod_memory[key] = arrays
+            self._lod_memory.move_to_end(key)
+            while len(self._lod_memory) > self.lod_memory_entries:
+                self._lod_memory.popitem(last=False)
+
+        if not len(arrays[1]):
+            return None
+        return trimesh.Trimesh(vertices=arrays[0], faces=arrays[1], process=False)
+
+    def _lod_key(self, file_path: str, max_faces: int) -> str:
+        """Cache key of a level of detail."""
+        return f"{self._content_hash(file_path)}-{max_faces}-v{LOD_VERSION}"
+
+    def _write_lod(self, lod_path: Path, vertices: 'np.ndarray', faces: 'np.ndarray') -> None:
+        """Atomically write a level of detail to the disk cache."""
+        self.lod_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = lod_path.with_name(f"{lod_path.name}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, vertices=vertices, faces=faces)
+        os.replace(tmp_path, lod_path)
+        self._record_evictions(self.cache.add(lod_path.relative_to(self.cache_dir).as_posix()))
+
+    async def get_mesh_lod(self, file_path: str, file_type: str,
+                           max_faces: int = 65536) -> Optional[bytes]:
+        """
+        Decimated mesh as binary STL, e.g. for a browser 3D viewer.
+
+        Shares the level-of-detail cache with preview rendering.
+
+        Args:
+            file_path: Path to the STL or 3MF file
+            file_type: File type (stl, 3mf)
+            max_faces: Face budget
+
+        Returns:
+            Binary STL bytes, or None if unavailable
+        """
+        if not RENDERING_AVAILABLE:
+            return None
+        file_type = file_type.lower().lstrip('.')
+        if file_type not in ['stl', '3mf']:
+            return None
 
-            buf.seek(0)
-            return buf.read()
+        def build() -> Optional[bytes]:
+            mesh = self._preview_mesh(file_path, file_type, max_faces)
+            return None if mesh is None else mesh.export(file_type='stl')
 
+        try:
+            loop = asyncio.get_event_loop()
+            return await asyncio.wait_for(loop.run_in_executor(None, build),
+                                          timeout=self._render_timeout)
         except Exception as e:
-            logger.error(f"Failed to render mesh: {e}")
+            logger.error(f"Failed to build mesh LOD for {file_path}: {e}")
             return None
 
+    def _render_mesh_common(self, mesh: 'trimesh.Trimesh', size: Tuple[int, int]) -> Optional[bytes]:
+        """
+        Common mesh rendering logic for any trimesh object.
+
+        Args:
+            mesh: Trimesh object
+            size: Desired size
+
+        Returns:
+            PNG bytes
+        """
+        azim, elev, roll = self.stl_config['camera_angle']
+        return self._render_mesh_at_angle(mesh, size, azim, elev)
+
     def _render_gcode_toolpath(self, file_path: str, size: Tuple[int, int]) -> Optional[bytes]:
         """
         Render GCODE toolpath visualization with optional print optimization.
@@ -650,125 +721,148 @@ class PreviewRenderService:
             logger.info(f"Rendering G-code toolpath: {file_path}", 
                        optimize_enabled=self.gcode_config['optimize_print_only'])
             
-            # Read and potentially optimize G-code
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = []
-                for i, line in enumerate(f):
-                    # Limit lines for performance, but analyze more for optimization
-                    max_lines = (self.gcode_config['optimization_max_lines'] 
-                               if self.gcode_config['optimize_print_only'] 
-                               else self.gcode_config['max_lines'])
-                    if i >= max_lines:
-                        break
-                    lines.append(line.rstrip())
-            
-            # Apply G-code optimization if enabled
+            # Parse the whole file in one vectorized pass
+            toolpath = parse_toolpath(file_path, start_markers=GcodeAnalyzer.PRINT_START_MARKERS)
+
+            # Skip the warmup phase if optimization is enabled
             if self.gcode_config['optimize_print_only']:
-                original_count = len(lines)
-                lines = self.gcode_analyzer.get_optimized_gcode_lines(lines)
-                
-                # Extend to max_lines from optimized start if needed
-                if len(lines) < self.gcode_config['max_lines']:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        all_lines = f.readlines()
-                        start_idx = original_count - len(lines)
-                        end_idx = min(start_idx + self.gcode_config['max_lines'], len(all_lines))
-                        lines = [line.rstrip() for line in all_lines[start_idx:end_idx]]
-                        
-                logger.info(f"G-code optimization applied: {original_count} -> {len(lines)} lines")
-            
-            # Parse movement commands
-            points = []
-            current_pos = [0.0, 0.0, 0.0]
-            
-            for line in lines:
-                # Parse G0/G1 movement commands
-                if line.startswith('G0 ') or line.startswith('G1 '):
-                    parts = line.strip().split()
-                    for part in parts[1:]:
-                        try:
-                            if part.startswith('X'):
-                                current_pos[0] = float(part[1:])
-                            elif part.startswith('Y'):
-                                current_pos[1] = float(part[1:])
-                            elif part.startswith('Z'):
-                                current_pos[2] = float(part[1:])
-                        except ValueError:
-                            continue  # Skip invalid coordinates
-                    
-                    points.append(current_pos.copy())
-
-            if not points:
+                start_line = self.gcode_analyzer.find_print_start(toolpath)
+                if start_line is not None:
+                    toolpath = toolpath.from_line(start_line)
+                    logger.info(f"G-code optimization applied: print starts at line {start_line + 1}")
+
+            points = self._toolpath_points(toolpath, self.gcode_config['max_lines'],
+                                           extrusion_only=self.gcode_config['optimize_print_only'])
+            if points is None:
                 logger.warning(f"No toolpath points found in {file_path}")
                 return None
-
-            # Convert to numpy array
-            points = np.array(points)
             logger.debug(f"Extracted {len(points)} toolpath points")
 
-            # Create figure
-            dpi = self.stl_config['dpi']
-            fig_width = size[0] / dpi
-            fig_height = size[1] / dpi
-
-            fig = plt.figure(figsize=(fig_width, fig_height), dpi=dpi)
-            ax = fig.add_subplot(111, projection='3d')
-
-            # Plot toolpath
-            ax.plot(points[:, 0], points[:, 1], points[:, 2],
-                   color=self.gcode_config['line_color'], linewidth=0.5, alpha=0.8)
-
-            # Styling
-            fig.patch.set_facecolor(self.gcode_config['background_color'])
-            ax.set_facecolor(self.gcode_config['background_color'])
-            ax.set_axis_off()
-            
-            # Auto-fit the view
-            if len(points) > 0:
-                ax.set_xlim(points[:, 0].min(), points[:, 0].max())
-                ax.set_ylim(points[:, 1].min(), points[:, 1].max())
-                ax.set_zlim(points[:, 2].min(), points[:, 2].max())
+            # Draw toolpath
+            azim, elev, roll = self.gcode_config['camera_angle']
+            image = render_polyline(
+                points,
+                size,
+                azimuth=azim,
+                elevation=elev,
+                color=self.gcode_config['line_color'],
+                background=self.gcode_config['background_color'],
+                line_width=self.gcode_config['line_width'],
+                supersample=self.stl_config['supersample']
+            )
+            if image is None:
+                logger.warning(f"No toolpath points found in {file_path}")
+                return None
 
-            # Save
             buf = BytesIO()
-            plt.savefig(buf, format='png', dpi=dpi, bbox_inches='tight', pad_inches=0.1,
-                       facecolor=self.gcode_config['background_color'])
-            plt.close(fig)
-
-            buf.seek(0)
-            return buf.read()
+            image.save(buf, format='PNG')
+            return buf.getvalue()
 
         except Exception as e:
             logger.error(f"Failed to render GCODE toolpath {file_path}: {e}")
             return None
 
-    def _get_cache_key(self, file_path: str, size: Tuple[int, int]) -> str:
+    def _toolpath_points(self, toolpath: Toolpath, max_moves: int,
+                         extrusion_only: bool = True) -> Optional['np.ndarray']:
+        """
+        Polyline of a toolpath's moves, ready to plot.
+
+        With ``extrusion_only`` travel moves become NaN breaks (files without
+        any extrusion are drawn in full). When more than ``max_moves`` moves
+        are selected, only every n-th layer is kept, so the preview still
+        covers the whole object.
+
+        Returns:
+            ``(n, 3)`` array, or None if the toolpath has no moves
+        """
+        if not len(toolpath):
+            return None
+        selected = toolpath.extruding
+        if not extrusion_only or not selected.any():
+            selected = np.ones(len(toolpath), dtype=bool)
+
+        moves = int(selected.sum())
+        if moves > max_moves and toolpath.layer_count > 1:
+            stride = -(-moves // max_moves)
+            selected &= toolpath.layer % stride == 0
+
+        # Each segment runs from the previous move end to its own end
+        points = toolpath.points()
+        keep = np.flatnonzero(selected)
+        starts_run = np.ones(len(keep), dtype=bool)
+        starts_run[1:] = np.diff(keep) > 1
+
+        # Rows: [start of run], end of every segment, NaN after each run
+        runs = np.flatnonzero(starts_run)
+        total = len(keep) + 2 * len(runs)
+        out = np.full((total, 3), np.nan, dtype=np.float32)
+        offsets = np.arange(len(keep)) + 1 + 2 * (np.cumsum(starts_run) - 1)
+        out[offsets] = points[keep + 1]
+        out[offsets[runs] - 1] = points[keep[runs]]
+        return out
+
+    def _cache_key(self, file_path: str, file_type: str, size: Tuple[int, int],
+                   kind: str) -> str:
         """
-        Generate cache key for a file and size.
+        Cache key of a preview: file content plus everything that shapes the image.
 
         Args:
             file_path: File path
+            file_type: File type
             size: Thumbnail size
+            kind: ``static`` or ``animated``
 
         Returns:
             Cache key hash
         """
-        # Include file path, size, and modification time in cache key
+        file_type = file_type.lower().lstrip('.')
+        params: Dict[str, Any] = {
+            'kind': kind,
+            'file_type': file_type,
+            'size': list(size),
+            'version': RENDER_VERSION,
+        }
+        if file_type in ('gcode', 'bgcode') and kind == 'static':
+            params['gcode'] = self.gcode_config
+        else:
+            params['stl'] = self.stl_config
+        if kind == 'animated':
+            params['animation'] = {**self.animation_config, 'format': self.animation_format}
+
         try:
-            mtime = os.path.getmtime(file_path)
-        except (OSError, FileNotFoundError):
-            # File not found or inaccessible, use 0 as fallback
-            mtime = 0
+            content = self._content_hash(file_path)
+        except OSError:
+            # File not found or inaccessible; nothing worth caching
+            content = f"missing:{file_path}"
+        cache_string = f"{content}_{json.dumps(params, sort_keys=True, default=str)}"
+        return hashlib.sha256(cache_string.encode()).hexdigest()
+
+    def _cache_get(self, name: str, kind: str) -> Optional[bytes]:
+        """Cached preview, counting the hit or miss."""
+        data = self.cache.get(name)
+        if data is None:
+            self.stats['cache_misses'] += 1
+            PREVIEW_CACHE_MISSES.labels(kind=kind).inc()
+        else:
+            self.stats['cache_hits'] += 1
+            PREVIEW_CACHE_HITS.labels(kind=kind).inc()
+        return data
 
-        cache_string = f"{file_path}_{size[0]}x{size[1]}_{mtime}"
-        return hashlib.md5(cache_string.encode()).hexdigest()
+    def _cache_put(self, name: str, data: bytes) -> None:
+        """Store a preview, evicting least recently used entries over budget."""
+        self._record_evictions(self.cache.put(name, data))
+
+    def _record_evictions(self, count: int) -> None:
+        if count:
+            self.stats['cache_evictions'] += count
+            PREVIEW_CACHE_EVICTIONS.inc(count)
 
     async def clear_cache(self, older_than_days: Optional[int] = None) -> int:
         """
         Clear preview cache.
 
         Args:
-            older_than_days: Only clear files older than this many days.
+            older_than_days: Only clear entries not used for this many days.
                            If None, clear all.
 
         Returns:
@@ -777,24 +871,13 @@ class PreviewRenderService:
         removed_count = 0
 
         try:
-            cutoff_time = None
-            if older_than_days is not None:
-                cutoff_time = datetime.now() - timedelta(days=older_than_days)
-
-            # Clear both PNG and GIF cache files
-            for pattern in ["*.png", "*.gif"]:
-                for cache_file in self.cache_dir.glob(pattern):
-                    if cache_file.is_file():
-                        if cutoff_time is None:
-                            # Remove all
-                            cache_file.unlink()
-                            removed_count += 1
-                        else:
-                            # Check age
-                            file_time = datetime.fromtimestamp(cache_file.stat().st_mtime)
-                            if file_time < cutoff_time:
-                                cache_file.unlink()
-                                removed_count += 1
+            # Clear PNG, GIF and WebP previews and mesh levels of detail
+            if older_than_days is None:
+                with self._lod_lock:
+                    self._lod_memory.clear()
+                removed_count = self.cache.clear()
+            else:
+                removed_count = self.cache.clear(older_than=timedelta(days=older_than_days).total_seconds())
 
             logger.info(f"Cleared {removed_count} preview cache files")
 
@@ -805,20 +888,26 @@ class PreviewRenderService:
 
     def get_statistics(self) -> Dict[str, Any]:
         """Get rendering statistics."""
-        png_files = list(self.cache_dir.glob("*.png"))
-        gif_files = list(self.cache_dir.glob("*.gif"))
-
-        cache_size = sum(f.stat().st_size for f in png_files + gif_files if f.is_file())
-        cache_count = len(png_files) + len(gif_files)
+        cache_stats = self.cache.get_stats()
+        names = self.cache.names()
+        counts = {suffix: sum(1 for name in names if name.endswith(suffix))
+                  for suffix in ('.png', '.gif', '.webp', '.npz')}
+        lod_size = sum(self.cache.path(name).stat().st_size for name in names
+                       if name.endswith('.npz') and self.cache.path(name).exists())
 
         return {
             **self.stats,
-            'cache_size_mb': round(cache_size / (1024 * 1024), 2),
-            'cache_file_count': cache_count,
-            'cache_png_count': len(png_files),
-            'cache_gif_count': len(gif_files),
+            'cache_size_mb': round((cache_stats['bytes'] - lod_size) / (1024 * 1024), 2),
+            'cache_max_mb': round(cache_stats['max_bytes'] / (1024 * 1024), 2),
+            'cache_file_count': counts['.png'] + counts['.gif'] + counts['.webp'],
+            'cache_png_count': counts['.png'],
+            'cache_gif_count': counts['.gif'],
+            'cache_webp_count': counts['.webp'],
+            'lod_count': counts['.npz'],
+            'lod_size_mb': round(lod_size / (1024 * 1024), 2),
             'rendering_available': RENDERING_AVAILABLE,
-            'animation_enabled': self.animation_config['enabled']
+            'animation_enabled': self.animation_config['enabled'],
+            'animation_format': self.animation_format
         }
 
     def update_config(self, config: Dict[str, Any]) -> None:
@@ -840,8 +929,13 @@ class PreviewRenderService:
         if 'animation' in config:
             self.animation_config.update(config['animation'])
 
+        if 'cache_max_mb' in config:
+            self.cache.max_bytes = int(config['cache_max_mb'] * 1024 * 1024)
+
         if 'cache_duration_days' in config:
-            self.cache_duration = timedelta(days=config['cache_duration_days'])
+            # The cache is bounded by size now; old previews are evicted least recently used first
+            logger.warning("Preview setting 'cache_duration_days' is deprecated and ignored; "
+                           "use 'cache_max_mb' (PREVIEW_CACHE_MAX_MB) or clear_cache(older_than_days)")
 
         if 'render_timeout' in config:
             self._render_timeout = config['render_timeout']
@@ -1,6 +1,7 @@
 """
 STL File Analyzer for extracting geometric metadata from STL files.
-Uses Trimesh library for robust 3D mesh analysis.
+Binary STL files are reduced straight from a memory map
+(``src/utils/stl_binary.py``); ASCII files are loaded with Trimesh.
 """
 import asyncio
 from pathlib import Path
@@ -13,6 +14,7 @@ logger = structlog.get_logger()
 try:
     import trimesh
     import numpy as np
+    from src.utils.stl_binary import analyze_binary_stl, binary_triangle_count
     TRIMESH_AVAILABLE = True
 except ImportError:
     TRIMESH_AVAILABLE = False
@@ -22,6 +24,9 @@ except ImportError:
 class STLAnalyzer:
     """Analyzer for STL files to extract geometric metadata."""
 
+    # Output format version (parse-result cache key); bump when it changes
+    PARSER_VERSION = 2
+
     def __init__(self):
         """Initialize the STL analyzer."""
         self.supported_extensions = ['.stl']
@@ -30,6 +35,23 @@ class STLAnalyzer:
         """
         Analyze STL file and extract comprehensive geometric metadata.
 
+        Args:
+            file_path: Path to the STL file
+
+        Returns:
+            Dictionary containing extracted metadata organized by category
+        """
+        # Run analysis in thread pool to avoid blocking
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self.analyze_file_sync, file_path)
+
+    def analyze_file_sync(self, file_path: Path) -> Dict[str, Any]:
+        """
+        Analyze STL file synchronously.
+
+        Entry point for callers that already run off the event loop, such as
+        analysis worker processes.
+
         Args:
             file_path: Path to the STL file
 
@@ -49,9 +71,7 @@ class STLAnalyzer:
             return metadata
 
         try:
-            # Run analysis in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            metadata = await loop.run_in_executor(None, self._analyze_stl_sync, file_path)
+            metadata = self._analyze_stl_sync(file_path)
 
             logger.info("Successfully analyzed STL file",
                       file_path=str(file_path),
@@ -86,18 +106,42 @@ class STLAnalyzer:
         }
 
         try:
-            # Load STL mesh
-            mesh = trimesh.load_mesh(str(file_path))
-
-            if mesh.is_empty:
-                logger.warning("Empty mesh in STL file", file_path=str(file_path))
-                metadata['error'] = "Empty mesh"
-                return metadata
+            if binary_triangle_count(file_path) is not None:
+                # Binary STL: vectorized over the memory-mapped triangle records
+                stats = analyze_binary_stl(file_path)
+                if not stats.triangle_count:
+                    logger.warning("Empty mesh in STL file", file_path=str(file_path))
+                    metadata['error'] = "Empty mesh"
+                    return metadata
+                bounds, extents, centroid = stats.bounds, stats.extents, stats.centroid
+                volume_mm3, surface_area_mm2 = stats.volume, stats.area
+                face_count = stats.triangle_count
+                metadata['geometry_info'] = {
+                    'vertex_count': stats.vertex_count,
+                    'vertex_count_estimated': stats.vertex_count_estimated,
+                }
+                is_watertight = stats.is_watertight
+            else:
+                # ASCII STL
+                mesh = trimesh.load_mesh(str(file_path))
+
+                if mesh.is_empty:
+                    logger.warning("Empty mesh in STL file", file_path=str(file_path))
+                    metadata['error'] = "Empty mesh"
+                    return metadata
+
+                bounds = mesh.bounds  # [[min_x, min_y, min_z], [max_x, max_y, max_z]]
+                extents = mesh.extents  # [width, depth, height]
+                centroid = mesh.centroid
+                volume_mm3, surface_area_mm2 = float(mesh.volume), float(mesh.area)
+                face_count = len(mesh.faces)
+                metadata['geometry_info'] = {
+                    'vertex_count': len(mesh.vertices),
+                    'vertex_count_estimated': False,
+                }
+                is_watertight = bool(mesh.is_watertight)
 
             # Extract physical properties (bounding box dimensions)
-            bounds = mesh.bounds  # [[min_x, min_y, min_z], [max_x, max_y, max_z]]
-            extents = mesh.extents  # [width, depth, height]
-
             metadata['physical_properties'] = {
                 'model_width': round(float(extents[0]), 3),      # X dimension
                 'model_depth': round(float(extents[1]), 3),      # Y dimension
@@ -111,45 +155,34 @@ class STLAnalyzer:
                     'max_z': round(float(bounds[1][2]), 3),
                 },
                 'center_of_mass': {
-                    'x': round(float(mesh.centroid[0]), 3),
-                    'y': round(float(mesh.centroid[1]), 3),
-                    'z': round(float(mesh.centroid[2]), 3),
+                    'x': round(float(centroid[0]), 3),
+                    'y': round(float(centroid[1]), 3),
+                    'z': round(float(centroid[2]), 3),
                 },
             }
 
-            # Calculate volume (convert mm³ to cm³)
-            volume_mm3 = float(mesh.volume)
+            # Volume (convert mm³ to cm³) and surface area (convert mm² to cm²)
             metadata['physical_properties']['model_volume'] = round(volume_mm3 / 1000, 3)
-
-            # Calculate surface area (convert mm² to cm²)
-            surface_area_mm2 = float(mesh.area)
             metadata['physical_properties']['surface_area'] = round(surface_area_mm2 / 100, 3)
 
             # Extract geometry information
-            metadata['geometry_info'] = {
-                'vertex_count': len(mesh.vertices),
-                'face_count': len(mesh.faces),
-                'triangle_count': len(mesh.faces),  # STL uses triangles
-                'edge_count': len(mesh.edges) if hasattr(mesh, 'edges') else None,
-            }
-
-            # Quality metrics
+            metadata['geometry_info'].update({
+                'face_count': face_count,
+                'triangle_count': face_count,  # STL uses triangles
+                'edge_count': 3 * face_count,  # Edges per face, as Trimesh counts them
+            })
+
+            # Quality metrics; watertightness is unknown (None) for meshes too
+            # large to check
+            needs_repair = None if is_watertight is None else not is_watertight
             metadata['quality_metrics'] = {
-                'is_watertight': bool(mesh.is_watertight),
-                'is_manifold': bool(mesh.is_watertight),  # Watertight implies manifold in most cases
-                'has_normals': mesh.face_normals is not None,
+                'is_watertight': is_watertight,
+                'is_manifold': is_watertight,  # Watertight implies manifold in most cases
+                'has_normals': True,
+                'has_holes': needs_repair,
+                'needs_repair': needs_repair,
             }
 
-            # Try to detect if mesh has issues
-            if hasattr(mesh, 'fill_holes'):
-                # Check for holes (non-watertight)
-                if not mesh.is_watertight:
-                    metadata['quality_metrics']['has_holes'] = True
-                    metadata['quality_metrics']['needs_repair'] = True
-                else:
-                    metadata['quality_metrics']['has_holes'] = False
-                    metadata['quality_metrics']['needs_repair'] = False
-
             # Calculate complexity score based on geometry
             complexity = self._calculate_complexity(metadata)
             metadata['quality_metrics']['complexity_score'] = complexity
@@ -215,10 +248,10 @@ class STLAnalyzer:
                 score += 1  # High detail/intricate geometry
 
         # Quality issues increase complexity
-        if not quality.get('is_watertight', True):
+        if quality.get('is_watertight') is False:
             score += 1  # Non-manifold meshes are harder to print
 
-        if quality.get('has_holes', False):
+        if quality.get('has_holes'):
             score += 1  # Holes need repair
 
         # Clamp score to 1-10 range
@@ -2,29 +2,38 @@
 3MF File Analyzer for extracting comprehensive metadata from 3MF packages.
 Supports Bambu Lab and PrusaSlicer 3MF files with detailed analysis.
 """
-import json
+import re
 import zipfile
-import xml.etree.ElementTree as ET
 from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 import structlog
 
+from src.services.threemf_archive import ThreeMFArchive
+
 logger = structlog.get_logger()
 
 
 class ThreeMFAnalyzer:
     """Comprehensive analyzer for 3MF files with enhanced metadata extraction."""
+
+    # Per-plate members of Bambu projects: plate_<n>.json / .png / .gcode
+    PLATE_MEMBER_PATTERN = re.compile(r'^Metadata/plate_(\d+)\.(?:json|png|gcode)$')
+    # Output format version (parse-result cache key); bump when it changes
+    PARSER_VERSION = 1
     
     def __init__(self):
         """Initialize the 3MF analyzer."""
         self.supported_extensions = ['.3mf']
     
-    async def analyze_file(self, file_path: Path) -> Dict[str, Any]:
+    async def analyze_file(self, file_path: Path,
+                           archive: Optional[ThreeMFArchive] = None) -> Dict[str, Any]:
         """
         Analyze 3MF file and extract comprehensive metadata.
         
         Args:
             file_path: Path to the 3MF file
+            archive: Already opened 3MF package to read from; opened (and
+                closed) here if not given
             
         Returns:
             Dictionary containing extracted metadata organized by category
@@ -39,22 +48,27 @@ class ThreeMFAnalyzer:
             'success': False
         }
         
+        owns_archive = archive is None
         try:
-            with zipfile.ZipFile(file_path, 'r') as zip_file:
-                # Analyze different components of the 3MF package
-                metadata['physical_properties'] = await self._analyze_model_geometry(zip_file)
-                metadata['print_settings'] = await self._analyze_print_settings(zip_file)
-                metadata['material_info'] = await self._analyze_material_usage(zip_file)
-                metadata['compatibility'] = await self._analyze_compatibility(zip_file)
-                
-                # Calculate derived metrics
-                metadata['cost_analysis'] = await self._calculate_costs(metadata)
-                metadata['quality_metrics'] = await self._assess_quality(metadata)
-                
-                metadata['success'] = True
-                logger.info("Successfully analyzed 3MF file", 
-                          file_path=str(file_path),
-                          objects=metadata['physical_properties'].get('object_count', 0))
+            if owns_archive:
+                archive = ThreeMFArchive(file_path)
+
+            # Analyze different components of the 3MF package
+            metadata['physical_properties'] = await self._analyze_model_geometry(archive)
+            metadata['print_settings'] = await self._analyze_print_settings(archive)
+            metadata['material_info'] = await self._analyze_material_usage(archive)
+            metadata['compatibility'] = await self._analyze_compatibility(archive)
+            metadata['plates'] = self.analyze_plates(archive)
+            metadata['material_info'].update(self._plate_totals(metadata['plates']))
+            
+            # Calculate derived metrics
+            metadata['cost_analysis'] = await self._calculate_costs(metadata)
+            metadata['quality_metrics'] = await self._assess_quality(metadata)
+            
+            metadata['success'] = True
+            logger.info("Successfully analyzed 3MF file", 
+                      file_path=str(file_path),
+                      objects=metadata['physical_properties'].get('object_count', 0))
                 
         except FileNotFoundError:
             logger.error("3MF file not found", file_path=str(file_path))
@@ -67,19 +81,20 @@ class ThreeMFAnalyzer:
                         file_path=str(file_path), 
                         error=str(e))
             metadata['error'] = str(e)
+        finally:
+            if owns_archive and archive is not None:
+                archive.close()
             
         return metadata
     
-    async def _analyze_model_geometry(self, zip_file: zipfile.ZipFile) -> Dict[str, Any]:
+    async def _analyze_model_geometry(self, archive: ThreeMFArchive) -> Dict[str, Any]:
         """Extract physical properties from 3MF model files."""
         geometry = {}
         
         try:
             # Try to parse Bambu Lab plate JSON for object layout
-            if 'Metadata/plate_1.json' in zip_file.namelist():
-                with zip_file.open('Metadata/plate_1.json') as f:
-                    plate_data = json.loads(f.read().decode('utf-8'))
-                    
+            plate_data = archive.json('Metadata/plate_1.json')
+            if plate_data is not None:
                 # Extract bounding box information
                 if 'bbox_all' in plate_data:
                     bbox = plate_data['bbox_all']
@@ -119,16 +134,14 @@ class ThreeMFAnalyzer:
             
         return geometry
     
-    async def _analyze_print_settings(self, zip_file: zipfile.ZipFile) -> Dict[str, Any]:
+    async def _analyze_print_settings(self, archive: ThreeMFArchive) -> Dict[str, Any]:
         """Extract print settings from configuration files."""
         settings = {}
         
         try:
             # Try Bambu Lab process settings
-            if 'Metadata/process_settings_1.config' in zip_file.namelist():
-                with zip_file.open('Metadata/process_settings_1.config') as f:
-                    config_data = json.loads(f.read().decode('utf-8'))
-                    
+            config_data = archive.json('Metadata/process_settings_1.config')
+            if config_data is not None:
                 # Extract key print parameters with safe defaults
                 settings['layer_height'] = self._safe_extract(config_data, 'layer_height', 0.2)
                 settings['first_layer_height'] = self._safe_extract(config_data, 'first_layer_height', 0.2)
@@ -174,18 +187,14 @@ class ThreeMFAnalyzer:
             
         return settings
     
-    async def _analyze_material_usage(self, zip_file: zipfile.ZipFile) -> Dict[str, Any]:
+    async def _analyze_material_usage(self, archive: ThreeMFArchive) -> Dict[str, Any]:
         """Extract material and filament information."""
         material_info = {}
         
         try:
             # Parse Bambu Lab slice info for material data
-            if 'Metadata/slice_info.config' in zip_file.namelist():
-                with zip_file.open('Metadata/slice_info.config') as f:
-                    slice_content = f.read().decode('utf-8')
-                    
-                # Parse XML content
-                root = ET.fromstring(slice_content)
+            root = archive.xml('Metadata/slice_info.config')
+            if root is not None:
                 plate = root.find('plate')
                 
                 if plate is not None:
@@ -211,10 +220,8 @@ class ThreeMFAnalyzer:
                         ]
             
             # Parse plate JSON for color information
-            if 'Metadata/plate_1.json' in zip_file.namelist():
-                with zip_file.open('Metadata/plate_1.json') as f:
-                    plate_data = json.loads(f.read().decode('utf-8'))
-                    
+            plate_data = archive.json('Metadata/plate_1.json')
+            if plate_data is not None:
                 material_info['filament_colors'] = plate_data.get('filament_colors', [])
                 material_info['filament_ids'] = plate_data.get('filament_ids', [])
                 
@@ -227,16 +234,14 @@ class ThreeMFAnalyzer:
             
         return material_info
     
-    async def _analyze_compatibility(self, zip_file: zipfile.ZipFile) -> Dict[str, Any]:
+    async def _analyze_compatibility(self, archive: ThreeMFArchive) -> Dict[str, Any]:
         """Extract compatibility information."""
         compatibility = {}
         
         try:
             # Try to extract printer compatibility from config
-            if 'Metadata/process_settings_1.config' in zip_file.namelist():
-                with zip_file.open('Metadata/process_settings_1.config') as f:
-                    config_data = json.loads(f.read().decode('utf-8'))
-                    
+            config_data = archive.json('Metadata/process_settings_1.config')
+            if config_data is not None:
                 # Extract compatible printers
                 printers = config_data.get('compatible_printers', [])
                 if isinstance(printers, list):
@@ -261,6 +266,151 @@ class ThreeMFAnalyzer:
             
         return compatibility
     
+    def analyze_plates(self, archive: ThreeMFArchive) -> List[Dict[str, Any]]:
+        """
+        Extract per-plate metadata from a multi-plate (Bambu) 3MF project.
+
+        Plates are enumerated from ``Metadata/plate_<n>.*`` members and the
+        ``<plate>`` entries of ``slice_info.config``. The shared files
+        (``slice_info.config``, ``model_settings.config``) are parsed once,
+        then each plate's small JSON members. Plate thumbnails are only
+        located here; they are inflated when the thumbnails are extracted.
+        The archive and its memoized members are not thread-safe, so
+        plates are read in the calling thread.
+
+        Args:
+            archive: Open 3MF package
+
+        Returns:
+            Plate dictionaries ordered by ``plate_index`` (empty if the
+            package has no plates)
+        """
+        slice_plates = self._slice_info_plates(archive)
+        plate_names = self._plate_names(archive)
+
+        indices = set(slice_plates)
+        for name in archive.names:
+            match = self.PLATE_MEMBER_PATTERN.match(name)
+            if match:
+                indices.add(int(match.group(1)))
+        if not indices:
+            return []
+
+        return [self._analyze_plate(archive, index, slice_plates.get(index, {}), plate_names.get(index))
+                for index in sorted(indices)]
+
+    def _plate_totals(self, plates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Plate count and time/weight summed over all plates."""
+        totals = {'plate_count': len(plates)}
+        if len(plates) > 1:
+            times = [p['estimated_time'] for p in plates if p.get('estimated_time') is not None]
+            weights = [p['filament_weight'] for p in plates if p.get('filament_weight') is not None]
+            if times:
+                totals['total_estimated_time'] = sum(times)
+            if weights:
+                totals['total_filament_weight'] = round(sum(weights), 2)
+        return totals
+
+    def _analyze_plate(self, archive: ThreeMFArchive, index: int,
+                       slice_plate: Dict[str, Any], name: Optional[str]) -> Dict[str, Any]:
+        """Build one plate's metadata from its members and slice info."""
+        filaments = slice_plate.get('filaments', [])
+        plate = {
+            'plate_index': index,
+            'name': name,
+            'object_count': slice_plate.get('object_count'),
+            'estimated_time': slice_plate.get('estimated_time'),
+            'filament_weight': slice_plate.get('filament_weight'),
+            'filament_length': round(sum(f['used_m'] for f in filaments if f.get('used_m')), 2)
+                               if filaments else None,
+            'filaments': filaments,
+            'filament_colors': [f['color'] for f in filaments if f.get('color')],
+            'layer_height': None,
+            'support_used': slice_plate.get('support_used'),
+            'has_gcode': archive.has(f'Metadata/plate_{index}.gcode'),
+            'thumbnail_file': None,
+        }
+
+        try:
+            plate_data = archive.json(f'Metadata/plate_{index}.json')
+            if plate_data is not None:
+                objects = [obj for obj in plate_data.get('bbox_objects', [])
+                           if obj.get('name') != 'wipe_tower']
+                if objects or plate.get('object_count') is None:
+                    plate['object_count'] = len(objects)
+                if not plate['filament_colors']:
+                    plate['filament_colors'] = plate_data.get('filament_colors', [])
+
+            config_data = archive.json(f'Metadata/process_settings_{index}.config')
+            if config_data is not None:
+                plate['layer_height'] = self._safe_extract(config_data, 'layer_height', None)
+
+            thumbnail_file = f'Metadata/plate_{index}.png'
+            if archive.has(thumbnail_file):
+                plate['thumbnail_file'] = thumbnail_file
+        except Exception as e:
+            logger.warning("Could not extract plate metadata", plate=index, error=str(e))
+
+        return plate
+
+    def _slice_info_plates(self, archive: ThreeMFArchive) -> Dict[int, Dict[str, Any]]:
+        """Per-plate time, weight, objects and filaments from ``slice_info.config``."""
+        plates = {}
+        try:
+            root = archive.xml('Metadata/slice_info.config')
+            if root is None:
+                return plates
+
+            for position, plate in enumerate(root.findall('plate'), start=1):
+                values = {m.get('key'): m.get('value') for m in plate.findall('metadata')}
+                try:
+                    index = int(values.get('index') or position)
+                except ValueError:
+                    index = position
+
+                info = {}
+                if values.get('prediction'):
+                    info['estimated_time'] = int(float(values['prediction']))
+                if values.get('weight'):
+                    info['filament_weight'] = float(values['weight'])
+                if values.get('support_used'):
+                    info['support_used'] = values['support_used'] == 'true'
+
+                objects = [obj for obj in plate.findall('object')
+                           if obj.get('skipped', 'false') != 'true']
+                if objects:
+                    info['object_count'] = len(objects)
+
+                info['filaments'] = [
+                    {
+                        'id': filament.get('id'),
+                        'type': filament.get('type'),
+                        'color': filament.get('color'),
+                        'used_g': float(filament.get('used_g') or 0),
+                        'used_m': float(filament.get('used_m') or 0),
+                    }
+                    for filament in plate.findall('filament')
+                ]
+                plates[index] = info
+        except Exception as e:
+            logger.warning("Could not parse plates from slice info", error=str(e))
+        return plates
+
+    def _plate_names(self, archive: ThreeMFArchive) -> Dict[int, str]:
+        """Plate names set in the slicer, from ``model_settings.config``."""
+        names = {}
+        try:
+            root = archive.xml('Metadata/model_settings.config')
+            if root is None:
+                return names
+            for plate in root.findall('plate'):
+                values = {m.get('key'): m.get('value') for m in plate.findall('metadata')}
+                if values.get('plater_id') and values.get('plater_name'):
+                    names[int(values['plater_id'])] = values['plater_name']
+        except Exception as e:
+            logger.warning("Could not parse plate names", error=str(e))
+        return names
+
     async def _calculate_costs(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
         """Calculate comprehensive cost breakdown."""
         costs = {
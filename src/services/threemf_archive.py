@@ -0,0 +1,140 @@
+"""
+Shared read-only view of a 3MF package.
+
+A 3MF file is a ZIP archive; the analyzers (BambuParser, ThreeMFAnalyzer,
+role classification) each need a few of its members. ThreeMFArchive opens
+the ZIP once, decodes members lazily and memoizes them, so one archive can be
+handed to every consumer.
+"""
+import json
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import structlog
+
+logger = structlog.get_logger()
+
+MODEL_PATH = '3D/3dmodel.model'
+
+
+class ThreeMFArchive:
+    """Open-once, lazily decoded 3MF package."""
+
+    def __init__(self, file_path: Union[str, Path]):
+        """
+        Open the archive.
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            zipfile.BadZipFile: If the file is not a ZIP archive
+        """
+        self.file_path = Path(file_path)
+        self._zip = zipfile.ZipFile(self.file_path, 'r')
+        self._names = self._zip.namelist()
+        self._name_set = set(self._names)
+        self._bytes: Dict[str, bytes] = {}
+        self._decoded: Dict[tuple, Any] = {}
+        self._model_summary: Optional[Dict[str, Any]] = None
+
+    def __enter__(self) -> 'ThreeMFArchive':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying ZIP file; memoized members stay readable."""
+        self._zip.close()
+
+    @property
+    def names(self) -> List[str]:
+        """Member names in archive order."""
+        return self._names
+
+    def has(self, name: str) -> bool:
+        """Return True if the archive contains ``name``."""
+        return name in self._name_set
+
+    def members(self, prefix: str = '', suffix: str = '') -> List[str]:
+        """Member names starting with ``prefix`` and ending with ``suffix`` (case-sensitive)."""
+        return [n for n in self._names if n.startswith(prefix) and n.endswith(suffix)]
+
+    def read(self, name: str) -> bytes:
+        """Raw bytes of a member (memoized). Raises KeyError if missing."""
+        data = self._bytes.get(name)
+        if data is None:
+            data = self._bytes[name] = self._zip.read(name)
+        return data
+
+    def text(self, name: str) -> Optional[str]:
+        """Member decoded as UTF-8, or None if missing."""
+        return self._decode(name, 'text', lambda data: data.decode('utf-8'))
+
+    def json(self, name: str) -> Optional[Any]:
+        """Member parsed as JSON, or None if missing."""
+        return self._decode(name, 'json', lambda data: json.loads(data.decode('utf-8')))
+
+    def xml(self, name: str) -> Optional[ET.Element]:
+        """Member parsed as an XML tree (small metadata files), or None if missing."""
+        return self._decode(name, 'xml', ET.fromstring)
+
+    def _decode(self, name: str, kind: str, decoder) -> Any:
+        key = (name, kind)
+        if key not in self._decoded:
+            self._decoded[key] = decoder(self.read(name)) if self.has(name) else None
+        return self._decoded[key]
+
+    def model_summary(self) -> Optional[Dict[str, Any]]:
+        """
+        Stream-parse ``3D/3dmodel.model`` once and summarize it.
+
+        The model XML can hold millions of vertices, so it is read with
+        ``iterparse`` straight from the ZIP stream; elements are cleared as
+        soon as they are processed and the bounding box is accumulated on the
+        fly.
+
+        Returns:
+            ``{'metadata': [(name, value), ...], 'vertex_count': int,
+            'bounds': ((min_x, min_y, min_z), (max_x, max_y, max_z)) or None}``,
+            or None if the package has no model file.
+        """
+        if self._model_summary is not None or not self.has(MODEL_PATH):
+            return self._model_summary
+
+        metadata = []
+        count = 0
+        min_x = min_y = min_z = float('inf')
+        max_x = max_y = max_z = float('-inf')
+
+        with self._zip.open(MODEL_PATH) as stream:
+            for _, elem in ET.iterparse(stream, events=('end',)):
+                tag = elem.tag
+                if tag.endswith('vertex'):
+                    try:
+                        x = float(elem.get('x', 0))
+                        y = float(elem.get('y', 0))
+                        z = float(elem.get('z', 0))
+                    except (ValueError, TypeError):
+                        elem.clear()
+                        continue
+                    count += 1
+                    min_x, max_x = min(min_x, x), max(max_x, x)
+                    min_y, max_y = min(min_y, y), max(max_y, y)
+                    min_z, max_z = min(min_z, z), max(max_z, z)
+                    elem.clear()
+                elif 'metadata' in tag.lower():
+                    name = elem.get('name', '')
+                    value = elem.text or elem.get('value', '')
+                    if name and value:
+                        metadata.append((name, value))
+                elif tag.endswith(('triangle', 'vertices', 'triangles', 'mesh')):
+                    elem.clear()
+
+        self._model_summary = {
+            'metadata': metadata,
+            'vertex_count': count,
+            'bounds': ((min_x, min_y, min_z), (max_x, max_y, max_z)) if count else None,
+        }
+        return self._model_summary
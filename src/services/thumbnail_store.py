@@ -0,0 +1,266 @@
+"""
+Content-addressed on-disk thumbnail store.
+
+Thumbnails are written once as binary files named by the SHA-256 of their
+bytes, so identical images share one file and a stored image never changes
+under its name. Database rows only keep the hash, and HTTP responses can use
+the hash as a strong ETag with immutable caching.
+
+Each stored image can also get a small set of downscaled derivatives
+(PNG and WebP at a few fixed sizes). Derivatives are named after the source
+hash, so they are just as immutable and need no database rows.
+
+Layout: ``<root>/<hash[:2]>/<hash>.<ext>`` and
+``<root>/<hash[:2]>/<hash>-<size>.<ext>`` for derivatives
+"""
+
+import hashlib
+import io
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+class ThumbnailStore:
+    """Stores thumbnail images on disk, keyed by content hash."""
+
+    MEDIA_TYPES = {
+        'png': 'image/png',
+        'webp': 'image/webp',
+        'jpg': 'image/jpeg',
+    }
+
+    HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+    # Bounding-box edge lengths (px) and formats of precomputed derivatives
+    DERIVATIVE_SIZES = (64, 128, 256)
+    DERIVATIVE_FORMATS = ('webp', 'png')
+
+    def __init__(self, root: Path):
+        """
+        Initialize thumbnail store.
+
+        Args:
+            root: Directory holding the stored images
+        """
+        self.root = Path(root)
+
+    @classmethod
+    def is_valid_hash(cls, digest: str) -> bool:
+        """Return True if ``digest`` looks like a store key."""
+        return bool(digest) and bool(cls.HASH_PATTERN.match(digest))
+
+    @classmethod
+    def normalize_format(cls, fmt: Optional[str]) -> str:
+        """Map a format name (``PNG``, ``jpeg``...) to a stored file extension."""
+        fmt = (fmt or 'png').lower().lstrip('.')
+        if fmt == 'jpeg':
+            fmt = 'jpg'
+        return fmt if fmt in cls.MEDIA_TYPES else 'png'
+
+    def put(self, data: bytes, fmt: str = 'png') -> str:
+        """
+        Store image bytes (no-op if already stored).
+
+        Args:
+            data: Encoded image
+            fmt: Image format
+
+        Returns:
+            Content hash of the stored image
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest, self.normalize_format(fmt))
+        if path.exists():
+            return digest
+
+        self._write_atomic(path, data)
+        return digest
+
+    def find(self, digest: str) -> Optional[Tuple[Path, str]]:
+        """
+        Locate a stored image.
+
+        Args:
+            digest: Content hash
+
+        Returns:
+            Tuple of (path, media type), or None if not stored
+        """
+        if not self.is_valid_hash(digest):
+            return None
+        for ext, media_type in self.MEDIA_TYPES.items():
+            path = self._path(digest, ext)
+            if path.is_file():
+                return path, media_type
+        return None
+
+    def find_derivative(self, digest: str, size: int, fmt: str) -> Optional[Tuple[Path, str]]:
+        """
+        Locate a precomputed derivative.
+
+        Args:
+            digest: Content hash of the source image
+            size: Derivative size from ``DERIVATIVE_SIZES``
+            fmt: Derivative format from ``DERIVATIVE_FORMATS``
+
+        Returns:
+            Tuple of (path, media type), or None if not generated
+        """
+        if not self.is_valid_hash(digest):
+            return None
+        path = self._derivative_path(digest, size, fmt)
+        return (path, self.MEDIA_TYPES[fmt]) if path.is_file() else None
+
+    def has_derivatives(self, digest: str) -> bool:
+        """Return True if the full derivative set exists for ``digest``."""
+        return all(
+            self.find_derivative(digest, size, fmt) is not None
+            for size in self.DERIVATIVE_SIZES
+            for fmt in self.DERIVATIVE_FORMATS
+        )
+
+    def generate_derivatives(self, digest: str,
+                             sizes: Optional[Iterable[int]] = None,
+                             formats: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Render downscaled copies of a stored image (CPU bound, blocking).
+
+        Images are only ever shrunk: a source smaller than a target size is
+        re-encoded at its own size, so every size is always present.
+
+        Args:
+            digest: Content hash of the source image
+            sizes: Sizes to render (default ``DERIVATIVE_SIZES``)
+            formats: Formats to render (default ``DERIVATIVE_FORMATS``)
+
+        Returns:
+            Names of the derivative files written (existing ones are skipped)
+        """
+        from PIL import Image
+
+        found = self.find(digest)
+        if not found:
+            return []
+
+        written = []
+        with Image.open(found[0]) as source:
+            source.load()
+            image = source.convert('RGBA') if source.mode not in ('RGB', 'RGBA') else source.copy()
+
+        for size in sorted(sizes or self.DERIVATIVE_SIZES, reverse=True):
+            # Shrink from the previous (larger) step; each step is cheaper
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+            for fmt in formats or self.DERIVATIVE_FORMATS:
+                path = self._derivative_path(digest, size, fmt)
+                if path.exists():
+                    continue
+                buffer = io.BytesIO()
+                if fmt == 'webp':
+                    image.save(buffer, format='WEBP', quality=85, method=4)
+                else:
+                    image.save(buffer, format='PNG', optimize=True)
+                self._write_atomic(path, buffer.getvalue())
+                written.append(path.name)
+        return written
+
+    def select(self, digest: str, size: Optional[int] = None,
+               accept: Optional[str] = None) -> Optional[Tuple[Path, str, str]]:
+        """
+        Pick the best stored representation for a request.
+
+        Without ``size`` the original image is returned. With ``size`` the
+        smallest derivative at least that large is used (the original when
+        ``size`` exceeds every derivative), as WebP when ``accept`` allows it
+        and PNG otherwise. Missing derivatives fall back to the original.
+
+        Args:
+            digest: Content hash of the source image
+            size: Requested edge length in pixels
+            accept: HTTP ``Accept`` header of the request
+
+        Returns:
+            Tuple of (path, media type, entity tag), or None if not stored
+        """
+        if size:
+            fitting = [s for s in self.DERIVATIVE_SIZES if s >= size]
+            if fitting:
+                fmt = 'webp' if accepts_webp(accept) else 'png'
+                found = self.find_derivative(digest, fitting[0], fmt)
+                if found:
+                    return found[0], found[1], f"{digest}-{fitting[0]}.{fmt}"
+
+        found = self.find(digest)
+        return (found[0], found[1], digest) if found else None
+
+    def read(self, digest: str) -> Optional[bytes]:
+        """Return stored image bytes, or None if not stored."""
+        found = self.find(digest)
+        return found[0].read_bytes() if found else None
+
+    def delete(self, digest: str) -> bool:
+        """
+        Remove a stored image and its derivatives.
+
+        Callers must make sure no other record still references the hash.
+
+        Returns:
+            True if a file was removed
+        """
+        found = self.find(digest)
+        if not found:
+            return False
+        try:
+            for size in self.DERIVATIVE_SIZES:
+                for fmt in self.DERIVATIVE_FORMATS:
+                    self._derivative_path(digest, size, fmt).unlink(missing_ok=True)
+            found[0].unlink()
+            return True
+        except OSError as e:
+            logger.warning("Failed to delete stored thumbnail", digest=digest[:16], error=str(e))
+            return False
+
+    def _path(self, digest: str, ext: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.{ext}"
+
+    def _derivative_path(self, digest: str, size: int, fmt: str) -> Path:
+        return self.root / digest[:2] / f"{digest}-{int(size)}.{fmt}"
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial image
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+
+
+def accepts_webp(accept: Optional[str]) -> bool:
+    """Return True if an HTTP ``Accept`` header allows WebP images."""
+    for part in (accept or '').lower().split(','):
+        media_type, _, params = part.partition(';')
+        if media_type.strip() == 'image/webp':
+            return params.replace(' ', '') not in ('q=0', 'q=0.0')
+    return False
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Return True if an HTTP ``If-None-Match`` header matches a quoted strong ETag."""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(',')}
+    return etag in candidates or f'W/{etag}' in candidates or '*' in candidates
@@ -0,0 +1,322 @@
+"""
+Timelapse Assembler
+
+Builds a timelapse video from a folder of images without intermediate files:
+
+- Frames are decoded by a thread pool, a bounded number ahead of the encoder
+- A deflicker pass scales each frame so its mean luminance matches the mean
+  over a centred sliding window of frames. This evens out exposure jumps
+  between shots but keeps gradual changes, such as daylight fading
+- Frames are written to ffmpeg's stdin as raw RGB and encoded to H.264
+
+Memory is bounded by the decode read-ahead plus the deflicker window, so it
+does not grow with the length of the print.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import structlog
+from PIL import Image
+
+from src.constants import TimelapseConstants
+
+logger = structlog.get_logger()
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+
+# Rec. 601 luma weights for R, G, B
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114])
+
+# Luminance is measured on every 4th row and column; the mean barely moves
+# and a 1080p frame is measured in a few milliseconds instead of ~35
+LUMA_SAMPLE_STEP = 4
+
+
+class AssemblyError(Exception):
+    """Raised when a timelapse video cannot be assembled."""
+
+
+@dataclass
+class AssemblyResult:
+    """Outcome of a successful assembly."""
+    frames: int
+    skipped_frames: int
+    width: int
+    height: int
+    duration: float
+
+
+def list_frames(folder: Path) -> List[Path]:
+    """Image files of a timelapse folder, in name order."""
+    with os.scandir(folder) as entries:
+        return sorted(
+            Path(entry.path) for entry in entries
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+        )
+
+
+def frame_luminance(frame: np.ndarray) -> float:
+    """Mean luma of an RGB frame."""
+    sample = frame[::LUMA_SAMPLE_STEP, ::LUMA_SAMPLE_STEP]
+    return float(sample.reshape(-1, 3).mean(axis=0) @ LUMA_WEIGHTS)
+
+
+def decode_frame(path: Path, size: Tuple[int, int]) -> np.ndarray:
+    """Decode an image to an RGB array of the given (width, height)."""
+    with Image.open(path) as image:
+        image = image.convert('RGB')
+        if image.size != size:
+            image = image.resize(size, Image.BILINEAR)
+        return np.asarray(image)
+
+
+class Deflicker:
+    """Sliding-window luminance normalisation over a stream of frames.
+
+    Each frame is output once the frames ``window // 2`` positions after it
+    have been pushed, so at most that many frames are held.
+    """
+
+    def __init__(self, window: int, max_gain: float = TimelapseConstants.TIMELAPSE_DEFLICKER_MAX_GAIN):
+        self.radius = max(0, window // 2)
+        self.max_gain = max_gain
+        self._pending: Deque[Tuple[np.ndarray, float]] = deque()
+        self._lumas: Deque[float] = deque()   # Luminances of the output frame's window
+        self._luma_sum = 0.0
+        self._levels = np.arange(256, dtype=np.float32)
+
+    def push(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """Add a frame; returns the next corrected frame once its window is complete."""
+        luma = frame_luminance(frame)
+        self._pending.append((frame, luma))
+        self._lumas.append(luma)
+        self._luma_sum += luma
+        if len(self._pending) > self.radius:
+            return self._emit()
+        return None
+
+    def flush(self) -> Iterator[np.ndarray]:
+        """Corrected frames still held back at the end of the stream."""
+        while self._pending:
+            yield self._emit()
+
+    def _emit(self) -> np.ndarray:
+        frame, luma = self._pending.popleft()
+        # Window: up to radius frames before, this frame, and the pending ones after
+        while len(self._lumas) > self.radius + 1 + len(self._pending):
+            self._luma_sum -= self._lumas.popleft()
+        target = self._luma_sum / len(self._lumas)
+        if luma < 1.0:
+            return frame
+        gain = min(max(target / luma, 1 / self.max_gain), self.max_gain)
+        if abs(gain - 1.0) < 0.002:
+            return frame
+        # One scalar gain per frame: apply it as a lookup table on the uint8 values
+        table = np.clip(self._levels * gain + 0.5, 0, 255).astype(np.uint8)
+        return table[frame]
+
+
+class TimelapseAssembler:
+    """Encodes a folder of images to a video by streaming frames into ffmpeg."""
+
+    def __init__(self, ffmpeg_path: str = 'ffmpeg', fps: int = 30,
+                 deflicker_window: int = TimelapseConstants.TIMELAPSE_DEFLICKER_WINDOW,
+                 decode_workers: Optional[int] = None, command_prefix: Optional[List[str]] = None,
+                 decode_nice: int = 0):
+        """
+        Initialize assembler.
+
+        Args:
+            ffmpeg_path: ffmpeg executable
+            fps: Output frame rate
+            deflicker_window: Frames averaged for the luminance target; 0 or 1 disables deflicker
+            decode_workers: Decoder threads (default: up to TIMELAPSE_DECODE_WORKERS, one per core)
+            command_prefix: Prepended to the ffmpeg command, e.g. ``nice -n 10``
+            decode_nice: Nice value for the decoder threads (Linux only)
+        """
+        self.ffmpeg_path = ffmpeg_path
+        self.fps = fps
+        self.deflicker_window = deflicker_window
+        self.decode_workers = decode_workers or min(
+            TimelapseConstants.TIMELAPSE_DECODE_WORKERS, os.cpu_count() or 1
+        )
+        self.command_prefix = command_prefix or []
+        self.decode_nice = decode_nice
+
+        self._process: Optional[subprocess.Popen] = None
+        self._cancelled = threading.Event()
+
+    def command(self, size: Tuple[int, int], output_path: Path) -> List[str]:
+        """ffmpeg command reading raw RGB frames of the given size from stdin."""
+        width, height = size
+        return self.command_prefix + [
+            self.ffmpeg_path, '-hide_banner', '-loglevel', 'error', '-y',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}', '-r', str(self.fps),
+            '-i', '-',
+            # yuv420p needs even dimensions
+            '-vf', 'crop=trunc(iw/2)*2:trunc(ih/2)*2',
+            '-c:v', 'libx264', '-preset', TimelapseConstants.TIMELAPSE_X264_PRESET,
+            '-crf', str(TimelapseConstants.TIMELAPSE_X264_CRF),
+            '-pix_fmt', 'yuv420p', '-movflags', '+faststart',
+            str(output_path)
+        ]
+
+    def cancel(self) -> None:
+        """Stop a running assembly; safe to call from any thread."""
+        self._cancelled.set()
+        process = self._process
+        if process is not None and process.poll() is None:
+            process.kill()
+
+    def assemble(self, source_folder: Path, output_path: Path) -> AssemblyResult:
+        """
+        Encode the images of a folder to a video. Blocking; run it in a worker thread.
+
+        The video is written under a temporary name and renamed on success, so
+        a failed or cancelled run never leaves a truncated file at ``output_path``.
+
+        Raises:
+            AssemblyError: If there are no readable images, ffmpeg fails or the run was cancelled
+        """
+        paths = list_frames(source_folder)
+        size = self._frame_size(paths)
+
+        partial_path = output_path.with_name(f"{output_path.stem}.partial{output_path.suffix}")
+        try:
+            written, skipped = self._encode(paths, size, partial_path)
+            if written == 0:
+                raise AssemblyError(f"No readable images in {source_folder}")
+            os.replace(partial_path, output_path)
+        except BaseException:
+            partial_path.unlink(missing_ok=True)
+            raise
+
+        logger.info("Timelapse assembled", output=str(output_path), frames=written,
+                    skipped_frames=len(skipped), width=size[0], height=size[1])
+        return AssemblyResult(
+            frames=written,
+            skipped_frames=len(skipped),
+            width=size[0],
+            height=size[1],
+            duration=round(written / self.fps, 2)
+        )
+
+    def _encode(self, paths: List[Path], size: Tuple[int, int],
+                output_path: Path) -> Tuple[int, List[Path]]:
+        """Stream frames into ffmpeg; returns the frames written and the paths skipped."""
+        try:
+            self._process = subprocess.Popen(
+                self.command(size, output_path),
+                stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+            )
+        except OSError as e:
+            raise AssemblyError(f"Could not start ffmpeg ({self.ffmpeg_path}): {e}") from e
+        process = self._process
+
+        # Drain stderr concurrently so a chatty ffmpeg cannot block on a full pipe
+        stderr_tail: Deque[str] = deque(maxlen=TimelapseConstants.TIMELAPSE_FFMPEG_STDERR_LINES)
+        stderr_reader = threading.Thread(
+            target=lambda: stderr_tail.extend(
+                line.decode('utf-8', errors='replace').rstrip() for line in process.stderr
+            ),
+            daemon=True
+        )
+        stderr_reader.start()
+
+        written = 0
+        skipped: List[Path] = []
+        try:
+            for frame in self._corrected_frames(paths, size, skipped):
+                if self._cancelled.is_set():
+                    break
+                process.stdin.write(np.ascontiguousarray(frame).data)
+                written += 1
+            process.stdin.close()
+        except (BrokenPipeError, ValueError):
+            # ffmpeg exited early (or was killed); its exit code says why
+            pass
+        finally:
+            if self._cancelled.is_set() and process.poll() is None:
+                process.kill()
+            returncode = process.wait()
+            stderr_reader.join(timeout=5)
+            self._process = None
+
+        if self._cancelled.is_set():
+            raise AssemblyError("Timelapse assembly cancelled")
+        if returncode != 0:
+            detail = '; '.join(line for line in stderr_tail if line) or 'no output'
+            raise AssemblyError(f"ffmpeg exited with code {returncode}: {detail}")
+        return written, skipped
+
+    @staticmethod
+    def _frame_size(paths: List[Path]) -> Tuple[int, int]:
+        """Size of the first readable image; all frames are scaled to it."""
+        for path in paths:
+            try:
+                with Image.open(path) as image:
+                    return image.size
+            except (OSError, ValueError):
+                continue
+        raise AssemblyError("No readable images found")
+
+    def _corrected_frames(self, paths: List[Path], size: Tuple[int, int],
+                          skipped: List[Path]) -> Iterator[np.ndarray]:
+        frames = self._decoded_frames(paths, size, skipped)
+        if self.deflicker_window <= 1:
+            yield from frames
+            return
+        deflicker = Deflicker(self.deflicker_window)
+        for frame in frames:
+            corrected = deflicker.push(frame)
+            if corrected is not None:
+                yield corrected
+        yield from deflicker.flush()
+
+    def _decoded_frames(self, paths: Iterable[Path], size: Tuple[int, int],
+                        skipped: List[Path]) -> Iterator[np.ndarray]:
+        """Decode frames in order, keeping a bounded number of decodes in flight."""
+        read_ahead = self.decode_workers * 2
+        remaining = iter(paths)
+        in_flight: Deque[Tuple[Path, Future]] = deque()
+        with ThreadPoolExecutor(max_workers=self.decode_workers, thread_name_prefix='timelapse-decode',
+                                initializer=self._lower_thread_priority) as pool:
+            try:
+                for path in remaining:
+                    in_flight.append((path, pool.submit(decode_frame, path, size)))
+                    if len(in_flight) >= read_ahead:
+                        break
+                while in_flight and not self._cancelled.is_set():
+                    path, future = in_flight.popleft()
+                    following = next(remaining, None)
+                    if following is not None:
+                        in_flight.append((following, pool.submit(decode_frame, following, size)))
+                    try:
+                        frame = future.result()
+                    except (OSError, ValueError) as e:
+                        # Typically the last image of a print that was still being written
+                        logger.warning("Skipping unreadable timelapse frame", path=str(path), error=str(e))
+                        skipped.append(path)
+                        continue
+                    yield frame
+            finally:
+                for _, future in in_flight:
+                    future.cancel()
+
+    def _lower_thread_priority(self) -> None:
+        """Apply decode_nice to a decoder thread; Linux schedules threads individually."""
+        if self.decode_nice <= 0 or not sys.platform.startswith('linux'):
+            return
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.decode_nice)
+        except OSError:
+            pass
@@ -1,8 +1,29 @@
 """
 Timelapse service for managing timelapse video creation.
 Handles folder monitoring, auto-detection, and video processing.
+
+Videos are rendered by the built-in TimelapseAssembler, which streams
+deflickered frames into ffmpeg, or by the external FlickerFree script when
+TIMELAPSE_RENDERER=flickerfree (or when ffmpeg is missing but the script is
+installed).
+
+Pending timelapses are rendered by an in-process scheduler running up to
+TIMELAPSE_MAX_CONCURRENT jobs at once (default: half the CPU cores). It is
+woken whenever a timelapse becomes pending or a job finishes, and renders
+run at reduced CPU priority (TIMELAPSE_PROCESS_NICE) so printer monitoring
+stays responsive.
+
+Source folders are scanned incrementally: each folder's directory mtime is
+stored in timelapse_folder_state, and a folder whose mtime has not changed
+is skipped after a single stat. New folders are reported by a watchdog
+observer on the source folder, so scan cost does not grow with the number
+of finished timelapses.
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple
+import os
+import shutil
+import time
+import heapq
 import uuid
 import asyncio
 import subprocess
@@ -10,10 +31,14 @@ import re
 from datetime import datetime, timedelta
 from pathlib import Path
 import structlog
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
 
 from src.config.constants import PollingIntervals
+from src.constants import TimelapseConstants
 from src.database.database import Database
 from src.services.event_service import EventService
+from src.services.timelapse_assembler import AssemblyError, TimelapseAssembler
 from src.models.timelapse import (
     Timelapse,
     TimelapseStatus,
@@ -22,11 +47,34 @@ from src.models.timelapse import (
     TimelapseStats,
     TimelapseBulkDeleteResult
 )
-from src.utils.config import get_settings
+from src.utils.config import get_settings, select_timelapse_renderer
 
 logger = structlog.get_logger()
 
 
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+
+
+class SourceFolderHandler(FileSystemEventHandler):
+    """Reports subfolders created in, or moved into, the timelapse source folder.
+
+    Runs on the watchdog observer thread; the service hands the path over to
+    its event loop.
+    """
+
+    def __init__(self, service: 'TimelapseService'):
+        super().__init__()
+        self.service = service
+
+    def on_created(self, event):
+        if event.is_directory:
+            self.service._folder_appeared(event.src_path)
+
+    def on_moved(self, event):
+        if event.is_directory:
+            self.service._folder_appeared(event.dest_path)
+
+
 class TimelapseService:
     """Service for managing timelapse videos."""
 
@@ -39,25 +87,76 @@ class TimelapseService:
         self._queue_task: Optional[asyncio.Task] = None
         self._shutdown = False
 
+        # Render scheduler
+        self._running_jobs: Dict[str, asyncio.Task] = {}
+        self._max_concurrent = self._resolve_max_concurrent()
+        self._queue_wakeup = asyncio.Event()
+
+        # Incremental folder scanning
+        self._folder_state: Dict[str, Dict[str, Any]] = {}  # source_folder -> timelapse_folder_state row
+        self._folder_state_loaded = False
+        self._source_mtime_ns: Optional[int] = None  # Source folder mtime when it was last listed
+        self._new_folders: Set[str] = set()          # Reported by the directory watcher
+        self._scan_wakeup = asyncio.Event()
+        self._observer = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _resolve_max_concurrent(self) -> int:
+        """Number of timelapses rendered at once; 0 in settings means half the CPU cores."""
+        configured = self.settings.timelapse_max_concurrent
+        if configured > 0:
+            return configured
+        return max(1, (os.cpu_count() or 1) // 2)
+
+    def _wake_queue(self) -> None:
+        """Let the scheduler look for pending timelapses."""
+        self._queue_wakeup.set()
+
+    def _select_renderer(self) -> str:
+        """'builtin' or 'flickerfree'; the FlickerFree script also covers a missing ffmpeg."""
+        return select_timelapse_renderer(self.settings)
+
+    def _priority_prefix(self) -> List[str]:
+        """Command prefix running a render at reduced CPU priority (POSIX ``nice``)."""
+        niceness = self.settings.timelapse_process_nice
+        if niceness <= 0:
+            return []
+        nice = shutil.which('nice')
+        return [nice, '-n', str(niceness)] if nice else []
+
     async def start(self) -> None:
         """Start timelapse service background tasks."""
         if not self.settings.timelapse_enabled:
             logger.info("Timelapse feature disabled in settings")
             return
 
-        # Check if FlickerFree script exists
-        flickerfree_path = Path(self.settings.timelapse_flickerfree_path)
-        if not flickerfree_path.exists():
+        # Check that a renderer is available
+        renderer = self._select_renderer()
+        if renderer == 'flickerfree' and not Path(self.settings.timelapse_flickerfree_path).exists():
             logger.warning(
                 "FlickerFree script not found, timelapse feature will be unavailable",
-                path=str(flickerfree_path)
+                path=self.settings.timelapse_flickerfree_path
+            )
+            return
+        if renderer == 'builtin' and not shutil.which(self.settings.timelapse_ffmpeg_path):
+            logger.warning(
+                "ffmpeg not found, timelapse feature will be unavailable",
+                path=self.settings.timelapse_ffmpeg_path
             )
             return
 
-        logger.info("Starting timelapse service")
+        logger.info("Starting timelapse service", max_concurrent=self._max_concurrent, renderer=renderer)
+
+        # Renders interrupted by a restart are queued again
+        await self.database.execute(
+            "UPDATE timelapses SET status = ?, updated_at = ? WHERE status = ?",
+            (TimelapseStatus.PENDING.value, datetime.now().isoformat(), TimelapseStatus.PROCESSING.value)
+        )
 
         # Start background tasks
         self._shutdown = False
+        self._loop = asyncio.get_running_loop()
+        self._start_folder_watcher()
         self._monitoring_task = asyncio.create_task(self._folder_monitor_loop())
         self._queue_task = asyncio.create_task(self._process_queue_loop())
 
@@ -76,85 +175,225 @@ class TimelapseService:
             except asyncio.CancelledError:
                 pass
 
-        # Cancel queue processing task
-        if self._queue_task and not self._queue_task.done():
-            self._queue_task.cancel()
-            try:
-                await self._queue_task
-            except asyncio.CancelledError:
-                pass
+        await self._stop_folder_watcher()
+
+        # Cancel queue processing task and running renders
+        for task in [self._queue_task, *self._running_jobs.values()]:
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._running_jobs.clear()
 
         logger.info("Timelapse service shutdown complete")
 
+    def _start_folder_watcher(self) -> None:
+        """Watch the source folder for new subfolders; scans still run if this fails."""
+        source_folder = Path(self.settings.timelapse_source_folder)
+        if not source_folder.is_dir():
+            return
+        try:
+            self._observer = Observer()
+            self._observer.schedule(SourceFolderHandler(self), str(source_folder), recursive=False)
+            self._observer.start()
+            logger.info("Watching timelapse source folder", path=str(source_folder))
+        except Exception as e:
+            logger.warning("Failed to watch timelapse source folder, relying on periodic scans",
+                           path=str(source_folder), error=str(e))
+            self._observer = None
+
+    async def _stop_folder_watcher(self) -> None:
+        """Stop the source folder watcher."""
+        if not self._observer:
+            return
+        observer, self._observer = self._observer, None
+        try:
+            observer.stop()
+            await asyncio.get_running_loop().run_in_executor(None, lambda: observer.join(timeout=5.0))
+        except Exception as e:
+            logger.debug("Failed to stop timelapse folder watcher", error=str(e))
+
+    def _folder_appeared(self, path: str) -> None:
+        """Called from the watcher thread when a subfolder appears."""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._queue_new_folder, path)
+
+    def _queue_new_folder(self, path: str) -> None:
+        self._new_folders.add(path)
+        self._scan_wakeup.set()
+
     async def _folder_monitor_loop(self):
         """Background task to monitor source folder for new timelapse folders."""
         logger.info("Starting folder monitoring loop")
 
         while not self._shutdown:
+            self._scan_wakeup.clear()
             try:
                 await self._scan_source_folders()
             except Exception as e:
                 logger.error("Folder monitoring error", error=str(e), error_type=type(e).__name__)
 
-            # Wait 30 seconds before next scan
-            await asyncio.sleep(PollingIntervals.TIMELAPSE_CHECK_INTERVAL)
+            # Rescan every 30 seconds, or as soon as the watcher reports a new folder
+            try:
+                await asyncio.wait_for(self._scan_wakeup.wait(), PollingIntervals.TIMELAPSE_CHECK_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
 
     async def _scan_source_folders(self):
-        """Scan source folder for timelapse image subfolders."""
+        """Check source subfolders for new images, skipping folders that have not changed."""
         source_folder = Path(self.settings.timelapse_source_folder)
 
-        # Check if source folder exists
-        if not source_folder.exists():
+        try:
+            source_mtime_ns = source_folder.stat().st_mtime_ns
+        except OSError:
             logger.warning("Timelapse source folder does not exist", path=str(source_folder))
             return
 
-        logger.debug("Scanning source folder for timelapses", path=str(source_folder))
+        await self._load_folder_state()
 
-        # List subfolders
-        try:
-            subfolders = [f for f in source_folder.iterdir() if f.is_dir() and not f.name.startswith('.')]
-        except Exception as e:
-            logger.error("Failed to list source folder contents", path=str(source_folder), error=str(e))
-            return
+        # Subfolders are only added or removed when the source folder's own
+        # mtime changes; otherwise the known folders plus any reported by the
+        # watcher are all there is to check.
+        new_folders, self._new_folders = self._new_folders, set()
+        if source_mtime_ns != self._source_mtime_ns:
+            try:
+                folders = await asyncio.to_thread(self._list_subfolders, source_folder)
+            except Exception as e:
+                logger.error("Failed to list source folder contents", path=str(source_folder), error=str(e))
+                return
+            removed = set(self._folder_state) - folders
+            if removed:
+                await self._forget_folders(removed)
+            self._source_mtime_ns = source_mtime_ns if self._is_settled(source_mtime_ns) else None
+        else:
+            folders = set(self._folder_state) | {
+                path for path in new_folders if not Path(path).name.startswith('.')
+            }
 
-        for subfolder in subfolders:
+        changed = await asyncio.to_thread(self._find_changed_folders, folders)
+        for path, mtime_ns in changed:
             try:
-                await self._process_subfolder(subfolder)
+                await self._process_subfolder(Path(path), mtime_ns)
             except Exception as e:
-                logger.error("Failed to process subfolder", folder=subfolder.name, error=str(e))
+                logger.error("Failed to process subfolder", folder=Path(path).name, error=str(e))
 
-        logger.debug("Folder scan complete", folders_found=len(subfolders))
+        await self._promote_eligible_timelapses()
 
-    async def _process_subfolder(self, subfolder: Path):
-        """Process a single subfolder - count images and track status."""
+        logger.debug("Folder scan complete", folders_found=len(folders), folders_changed=len(changed))
+
+    @staticmethod
+    def _list_subfolders(source_folder: Path) -> Set[str]:
+        with os.scandir(source_folder) as entries:
+            return {
+                entry.path for entry in entries
+                if entry.is_dir() and not entry.name.startswith('.')
+            }
+
+    def _find_changed_folders(self, folders: Set[str]) -> List[Tuple[str, Optional[int]]]:
+        """Folders whose mtime differs from the stored state; a vanished folder has mtime None."""
+        changed = []
+        for path in folders:
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime_ns = None
+            state = self._folder_state.get(path)
+            if state is None or mtime_ns is None or state['dir_mtime_ns'] != mtime_ns:
+                changed.append((path, mtime_ns))
+        return changed
+
+    @staticmethod
+    def _is_settled(mtime_ns: int) -> bool:
+        """Whether images added from now on are guaranteed to change the mtime.
+
+        Filesystems with coarse timestamps can report the same mtime before
+        and after a file is added within the same tick, so recently modified
+        folders are recounted on the next scan.
+        """
+        return time.time() - mtime_ns / 1e9 > TimelapseConstants.TIMELAPSE_FOLDER_MTIME_SETTLE_SECONDS
+
+    @staticmethod
+    def _count_images(subfolder: Path) -> int:
+        with os.scandir(subfolder) as entries:
+            return sum(
+                1 for entry in entries
+                if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+            )
+
+    async def _process_subfolder(self, subfolder: Path, mtime_ns: Optional[int]):
+        """Recount images in a changed subfolder and track its timelapse."""
         folder_name = subfolder.name
         source_folder_path = str(subfolder)
 
-        # Count image files
-        image_extensions = {'.jpg', '.jpeg', '.png'}
+        if mtime_ns is None:
+            if source_folder_path in self._folder_state:
+                await self._forget_folders({source_folder_path})
+            return
+
         try:
-            image_files = [
-                f for f in subfolder.iterdir()
-                if f.is_file() and f.suffix.lower() in image_extensions
-            ]
-            image_count = len(image_files)
+            image_count = await asyncio.to_thread(self._count_images, subfolder)
         except Exception as e:
             logger.error("Failed to count images in folder", folder=folder_name, error=str(e))
             return
 
-        # Skip folders with no images
-        if image_count == 0:
+        state = self._folder_state.get(source_folder_path)
+        if image_count > 0 and (state is None or state['image_count'] != image_count):
+            # Check if timelapse already tracked
+            existing = await self.get_timelapse_by_source_folder(source_folder_path)
+
+            if not existing:
+                # Create new timelapse record
+                await self._create_timelapse(source_folder_path, folder_name, image_count)
+            else:
+                # Update existing timelapse
+                await self._update_existing_timelapse(existing, image_count)
+
+        await self._save_folder_state(
+            source_folder_path, mtime_ns if self._is_settled(mtime_ns) else None, image_count
+        )
+
+    async def _load_folder_state(self) -> None:
+        """Load stored folder scan state once per service lifetime."""
+        if self._folder_state_loaded:
             return
+        rows = await self.database._fetch_all("SELECT * FROM timelapse_folder_state")
+        self._folder_state = {row['source_folder']: dict(row) for row in rows}
+        self._folder_state_loaded = True
+        logger.debug("Loaded timelapse folder state", folders=len(self._folder_state))
+
+    async def _save_folder_state(self, source_folder: str, mtime_ns: Optional[int], image_count: int) -> None:
+        state = {
+            'source_folder': source_folder,
+            'dir_mtime_ns': mtime_ns,
+            'image_count': image_count,
+            'last_scanned_at': datetime.now().isoformat()
+        }
+        await self.database.execute(
+            """
+            INSERT OR REPLACE INTO timelapse_folder_state (
+                source_folder, dir_mtime_ns, image_count, last_scanned_at
+            ) VALUES (?, ?, ?, ?)
+            """,
+            (source_folder, mtime_ns, image_count, state['last_scanned_at'])
+        )
+        self._folder_state[source_folder] = state
 
-        # Check if timelapse already tracked
-        existing = await self.get_timelapse_by_source_folder(source_folder_path)
+    async def _forget_folders(self, source_folders: Set[str]) -> None:
+        """Drop scan state of folders that no longer exist."""
+        for source_folder in source_folders:
+            self._folder_state.pop(source_folder, None)
+            await self.database.execute(
+                "DELETE FROM timelapse_folder_state WHERE source_folder = ?",
+                (source_folder,)
+            )
 
-        if not existing:
-            # Create new timelapse record
-            await self._create_timelapse(source_folder_path, folder_name, image_count)
-        else:
-            # Update existing timelapse
-            await self._update_existing_timelapse(existing, image_count)
+    async def _reset_folder_state(self, source_folder: str) -> None:
+        """Make the next scan recount a folder and look up its timelapse again."""
+        if source_folder in self._folder_state:
+            await self._save_folder_state(source_folder, None, 0)
 
     async def _create_timelapse(self, source_folder: str, folder_name: str, image_count: int):
         """Create a new timelapse record."""
@@ -226,68 +465,80 @@ class TimelapseService:
                 new_count=new_image_count
             )
 
-        # Check if auto-processing should be triggered
-        if existing['status'] == TimelapseStatus.DISCOVERED.value:
-            eligible_at = datetime.fromisoformat(existing['auto_process_eligible_at'])
-            if datetime.now() >= eligible_at:
-                # Mark as pending
-                await self.database.execute(
-                    "UPDATE timelapses SET status = ?, updated_at = ? WHERE id = ?",
-                    (TimelapseStatus.PENDING.value, datetime.now().isoformat(), existing['id'])
-                )
+    async def _promote_eligible_timelapses(self):
+        """Mark discovered timelapses pending once no new images arrived for the timeout."""
+        now = datetime.now().isoformat()
+        eligible = await self.database._fetch_all(
+            """
+            SELECT id, folder_name FROM timelapses
+            WHERE status = ? AND auto_process_eligible_at <= ?
+            """,
+            (TimelapseStatus.DISCOVERED.value, now)
+        )
 
-                logger.info("Timelapse moved to pending (timeout reached)", timelapse_id=existing['id'])
+        for timelapse in eligible:
+            await self.database.execute(
+                "UPDATE timelapses SET status = ?, updated_at = ? WHERE id = ?",
+                (TimelapseStatus.PENDING.value, datetime.now().isoformat(), timelapse['id'])
+            )
 
-                await self.event_service.emit('timelapse.pending', {
-                    'id': existing['id'],
-                    'folder_name': existing['folder_name'],
-                    'status': TimelapseStatus.PENDING.value
-                })
+            logger.info("Timelapse moved to pending (timeout reached)", timelapse_id=timelapse['id'])
+            self._wake_queue()
+
+            await self.event_service.emit('timelapse.pending', {
+                'id': timelapse['id'],
+                'folder_name': timelapse['folder_name'],
+                'status': TimelapseStatus.PENDING.value
+            })
 
     async def _process_queue_loop(self):
-        """Background task to process pending timelapses."""
+        """Background task starting pending timelapses whenever the scheduler is woken."""
         logger.info("Starting queue processing loop")
 
         while not self._shutdown:
+            self._queue_wakeup.clear()
             try:
                 await self._process_queue()
             except Exception as e:
                 logger.error("Queue processing error", error=str(e), error_type=type(e).__name__)
 
-            # Wait 10 seconds before next check
-            await asyncio.sleep(PollingIntervals.TIMELAPSE_FRAME_INTERVAL)
+            await self._queue_wakeup.wait()
 
     async def _process_queue(self):
-        """Check for pending timelapses and process next one if none currently processing."""
-        # Check if any timelapse is currently processing
-        result = await self.database._fetch_one(
-            "SELECT COUNT(*) as count FROM timelapses WHERE status = ?",
-            (TimelapseStatus.PROCESSING.value,)
-        )
-
-        if result and result['count'] > 0:
-            # Already processing one, wait
+        """Start pending timelapses (FIFO) while render slots are free."""
+        free_slots = self._max_concurrent - len(self._running_jobs)
+        if free_slots <= 0:
             return
 
-        # Get next pending timelapse (FIFO)
-        result = await self.database._fetch_one(
+        results = await self.database._fetch_all(
             """
-            SELECT * FROM timelapses
+            SELECT id FROM timelapses
             WHERE status = ?
             ORDER BY auto_process_eligible_at ASC
-            LIMIT 1
             """,
             (TimelapseStatus.PENDING.value,)
         )
 
-        if result:
-            logger.info("Found pending timelapse, starting processing", timelapse_id=result['id'])
-            # Process in background to avoid blocking queue loop
-            asyncio.create_task(self._process_timelapse(result['id']))
+        for row in results:
+            if free_slots <= 0:
+                break
+            timelapse_id = row['id']
+            if timelapse_id in self._running_jobs:
+                continue
+            logger.info("Found pending timelapse, starting processing", timelapse_id=timelapse_id,
+                        running=len(self._running_jobs) + 1, max_concurrent=self._max_concurrent)
+            task = asyncio.create_task(self._process_timelapse(timelapse_id))
+            self._running_jobs[timelapse_id] = task
+            task.add_done_callback(lambda _, tid=timelapse_id: self._on_job_done(tid))
+            free_slots -= 1
+
+    def _on_job_done(self, timelapse_id: str) -> None:
+        self._running_jobs.pop(timelapse_id, None)
+        self._wake_queue()
 
 
     async def _process_timelapse(self, timelapse_id: str):
-        """Process a timelapse by calling FlickerFree script."""
+        """Process a timelapse with the configured renderer."""
         try:
             # Load timelapse record
             timelapse = await self.get_timelapse(timelapse_id)
@@ -317,63 +568,111 @@ class TimelapseService:
             # Ensure output directory exists
             output_path.parent.mkdir(parents=True, exist_ok=True)
 
-            # Build FlickerFree command
-            flickerfree_script = Path(self.settings.timelapse_flickerfree_path)
             source_folder = Path(timelapse['source_folder'])
+            if self._select_renderer() == 'builtin':
+                await self._render_builtin(timelapse_id, source_folder, output_path)
+            else:
+                await self._render_flickerfree(timelapse_id, source_folder, output_path)
 
-            cmd = [
-                str(flickerfree_script),
-                str(source_folder),
-                str(output_path)
-            ]
+        except Exception as e:
+            logger.error("Unexpected error during processing", timelapse_id=timelapse_id, error=str(e), error_type=type(e).__name__)
+            await self._handle_processing_failure(timelapse_id, f"Unexpected error: {str(e)}")
 
-            logger.info(
-                "Executing FlickerFree command",
-                timelapse_id=timelapse_id,
-                command=" ".join(cmd)
+    async def _render_builtin(self, timelapse_id: str, source_folder: Path, output_path: Path):
+        """Render with the built-in assembler, streaming deflickered frames into ffmpeg."""
+        assembler = TimelapseAssembler(
+            ffmpeg_path=self.settings.timelapse_ffmpeg_path,
+            fps=self.settings.timelapse_fps,
+            deflicker_window=self.settings.timelapse_deflicker_window,
+            command_prefix=self._priority_prefix(),
+            decode_nice=self.settings.timelapse_process_nice
+        )
+        logger.info("Rendering timelapse", timelapse_id=timelapse_id, renderer='builtin',
+                    fps=self.settings.timelapse_fps, deflicker_window=self.settings.timelapse_deflicker_window)
+
+        try:
+            result = await asyncio.wait_for(
+                asyncio.to_thread(assembler.assemble, source_folder, output_path),
+                timeout=TimelapseConstants.TIMELAPSE_RENDER_TIMEOUT_SECONDS
             )
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # The worker thread stops once ffmpeg is gone
+            assembler.cancel()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            logger.error("Timelapse processing timeout", timelapse_id=timelapse_id)
+            await self._handle_processing_failure(
+                timelapse_id,
+                "Processing exceeded 30-minute timeout. Try with fewer images or increase timeout."
+            )
+            return
+        except AssemblyError as e:
+            await self._handle_processing_failure(timelapse_id, str(e))
+            return
 
-            # Execute subprocess with timeout (30 minutes)
-            try:
-                process = await asyncio.create_subprocess_exec(
-                    *cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
+        await self._handle_processing_success(timelapse_id, output_path, "", video_duration=result.duration)
 
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=1800  # 30 minutes
-                )
+    async def _render_flickerfree(self, timelapse_id: str, source_folder: Path, output_path: Path):
+        """Render by calling the external FlickerFree script."""
+        # Build FlickerFree command
+        flickerfree_script = Path(self.settings.timelapse_flickerfree_path)
 
-                stdout_str = stdout.decode('utf-8', errors='replace') if stdout else ""
-                stderr_str = stderr.decode('utf-8', errors='replace') if stderr else ""
+        cmd = self._priority_prefix() + [
+            str(flickerfree_script),
+            str(source_folder),
+            str(output_path)
+        ]
 
-                if process.returncode == 0:
-                    # Success!
-                    await self._handle_processing_success(timelapse_id, output_path, stdout_str)
-                else:
-                    # Failed
-                    error_msg = self._parse_error_message(stderr_str, stdout_str, process.returncode)
-                    await self._handle_processing_failure(timelapse_id, error_msg)
+        logger.info(
+            "Executing FlickerFree command",
+            timelapse_id=timelapse_id,
+            command=" ".join(cmd)
+        )
 
-            except asyncio.TimeoutError:
-                logger.error("Timelapse processing timeout", timelapse_id=timelapse_id)
-                await self._handle_processing_failure(
-                    timelapse_id,
-                    "Processing exceeded 30-minute timeout. Try with fewer images or increase timeout."
-                )
+        # Execute subprocess with timeout (30 minutes)
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
 
-            except FileNotFoundError:
-                logger.error("FlickerFree script not found", path=str(flickerfree_script))
-                await self._handle_processing_failure(
-                    timelapse_id,
-                    f"FlickerFree script not found at {flickerfree_script}. Please configure correct path."
+            try:
+                stdout, stderr = await asyncio.wait_for(
+                    process.communicate(),
+                    timeout=TimelapseConstants.TIMELAPSE_RENDER_TIMEOUT_SECONDS
                 )
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                # Don't leave the render running in the background
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                raise
+
+            stdout_str = stdout.decode('utf-8', errors='replace') if stdout else ""
+            stderr_str = stderr.decode('utf-8', errors='replace') if stderr else ""
+
+            if process.returncode == 0:
+                # Success!
+                await self._handle_processing_success(timelapse_id, output_path, stdout_str)
+            else:
+                # Failed
+                error_msg = self._parse_error_message(stderr_str, stdout_str, process.returncode)
+                await self._handle_processing_failure(timelapse_id, error_msg)
+
+        except asyncio.TimeoutError:
+            logger.error("Timelapse processing timeout", timelapse_id=timelapse_id)
+            await self._handle_processing_failure(
+                timelapse_id,
+                "Processing exceeded 30-minute timeout. Try with fewer images or increase timeout."
+            )
 
-        except Exception as e:
-            logger.error("Unexpected error during processing", timelapse_id=timelapse_id, error=str(e), error_type=type(e).__name__)
-            await self._handle_processing_failure(timelapse_id, f"Unexpected error: {str(e)}")
+        except FileNotFoundError:
+            logger.error("FlickerFree script not found", path=str(flickerfree_script))
+            await self._handle_processing_failure(
+                timelapse_id,
+                f"FlickerFree script not found at {flickerfree_script}. Please configure correct path."
+            )
 
     def _determine_output_path(self, timelapse: Dict[str, Any]) -> Path:
         """Determine output video path based on configuration strategy."""
@@ -417,7 +716,8 @@ class TimelapseService:
 
         return f"FlickerFree exited with code {returncode}. Check logs for details."
 
-    async def _handle_processing_success(self, timelapse_id: str, output_path: Path, stdout: str):
+    async def _handle_processing_success(self, timelapse_id: str, output_path: Path, stdout: str,
+                                         video_duration: Optional[float] = None):
         """Handle successful video processing."""
         try:
             # Get video file info
@@ -427,7 +727,8 @@ class TimelapseService:
             file_size = output_path.stat().st_size
 
             # Try to extract duration from ffmpeg output in stdout
-            video_duration = self._extract_video_duration(stdout)
+            if video_duration is None:
+                video_duration = self._extract_video_duration(stdout)
 
             # Update database
             now = datetime.now()
@@ -467,7 +768,6 @@ class TimelapseService:
             if self.settings.timelapse_output_strategy == "both":
                 source_copy = Path(timelapse['source_folder']) / output_path.name
                 try:
-                    import shutil
                     shutil.copy2(output_path, source_copy)
                     logger.info("Copied video to source folder", dest=str(source_copy))
                 except Exception as e:
@@ -531,6 +831,8 @@ class TimelapseService:
                     (TimelapseStatus.PENDING.value, new_retry_count, datetime.now().isoformat(), timelapse_id)
                 )
 
+                self._wake_queue()
+
                 logger.info(
                     "Timelapse processing failed, will retry",
                     timelapse_id=timelapse_id,
@@ -671,6 +973,98 @@ class TimelapseService:
         except Exception as e:
             logger.error("Error during job matching", timelapse_id=timelapse_id, error=str(e))
 
+    async def _render_seconds_per_image(self) -> float:
+        """Median render time per image of recent completed timelapses."""
+        rows = await self.database._fetch_all(
+            """
+            SELECT image_count, processing_started_at, processing_completed_at
+            FROM timelapses
+            WHERE status = ? AND image_count > 0
+              AND processing_started_at IS NOT NULL AND processing_completed_at IS NOT NULL
+            ORDER BY processing_completed_at DESC
+            LIMIT ?
+            """,
+            (TimelapseStatus.COMPLETED.value, TimelapseConstants.TIMELAPSE_ETA_SAMPLE_SIZE)
+        )
+        rates = sorted(
+            (datetime.fromisoformat(row['processing_completed_at'])
+             - datetime.fromisoformat(row['processing_started_at'])).total_seconds() / row['image_count']
+            for row in rows
+        )
+        if not rates:
+            return TimelapseConstants.TIMELAPSE_DEFAULT_SECONDS_PER_IMAGE
+        return rates[len(rates) // 2]
+
+    async def get_queue(self) -> Dict[str, Any]:
+        """
+        Get the render queue with queue positions and estimated completion times.
+
+        Estimates assume the configured number of parallel renders and the
+        median per-image render time of recent timelapses. ``eta_seconds`` is
+        the estimated time until the timelapse's video is ready.
+        """
+        rows = await self.database._fetch_all(
+            """
+            SELECT id, folder_name, status, image_count, processing_started_at
+            FROM timelapses
+            WHERE status IN (?, ?)
+            ORDER BY auto_process_eligible_at ASC
+            """,
+            (TimelapseStatus.PROCESSING.value, TimelapseStatus.PENDING.value)
+        )
+        seconds_per_image = await self._render_seconds_per_image()
+        now = datetime.now()
+
+        items = []
+        slots: List[float] = []  # Seconds until each render slot is free
+        for row in rows:
+            if row['status'] != TimelapseStatus.PROCESSING.value:
+                continue
+            started = row['processing_started_at']
+            elapsed = (now - datetime.fromisoformat(started)).total_seconds() if started else 0.0
+            remaining = max(0.0, seconds_per_image * (row['image_count'] or 0) - elapsed)
+            slots.append(remaining)
+            items.append(self._queue_item(row, None, remaining))
+        slots += [0.0] * max(0, self._max_concurrent - len(slots))
+        heapq.heapify(slots)
+
+        pending = [row for row in rows if row['status'] == TimelapseStatus.PENDING.value]
+        for position, row in enumerate(pending, start=1):
+            finish = heapq.heappop(slots) + seconds_per_image * (row['image_count'] or 0)
+            heapq.heappush(slots, finish)
+            items.append(self._queue_item(row, position, finish))
+
+        return {
+            'max_concurrent': self._max_concurrent,
+            'processing_count': len(items) - len(pending),
+            'pending_count': len(pending),
+            'seconds_per_image': round(seconds_per_image, 3),
+            'items': items
+        }
+
+    @staticmethod
+    def _queue_item(row: Dict[str, Any], position: Optional[int], eta_seconds: float) -> Dict[str, Any]:
+        return {
+            'id': row['id'],
+            'folder_name': row['folder_name'],
+            'status': row['status'],
+            'image_count': row['image_count'],
+            'queue_position': position,
+            'eta_seconds': round(eta_seconds)
+        }
+
+    async def _add_queue_estimates(self, timelapses: List[Dict[str, Any]]) -> None:
+        """Add queue_position and eta_seconds to pending and processing timelapses."""
+        queued = {TimelapseStatus.PENDING.value, TimelapseStatus.PROCESSING.value}
+        if not any(t.get('status') in queued for t in timelapses):
+            return
+        estimates = {item['id']: item for item in (await self.get_queue())['items']}
+        for timelapse in timelapses:
+            item = estimates.get(timelapse['id'])
+            if item:
+                timelapse['queue_position'] = item['queue_position']
+                timelapse['eta_seconds'] = item['eta_seconds']
+
     # Public API methods
 
     async def get_timelapses(
@@ -710,6 +1104,8 @@ class TimelapseService:
 
                 timelapses.append(timelapse_dict)
 
+            await self._add_queue_estimates(timelapses)
+
             logger.info("Retrieved timelapses", count=len(timelapses))
             return timelapses
 
@@ -737,6 +1133,8 @@ class TimelapseService:
             # Convert boolean
             timelapse_dict['pinned'] = bool(timelapse_dict.get('pinned', 0))
 
+            await self._add_queue_estimates([timelapse_dict])
+
             return timelapse_dict
 
         except Exception as e:
@@ -784,6 +1182,7 @@ class TimelapseService:
             )
 
             logger.info("Manually triggered processing", timelapse_id=timelapse_id)
+            self._wake_queue()
 
             await self.event_service.emit('timelapse.pending', {
                 'id': timelapse_id,
@@ -879,6 +1278,8 @@ class TimelapseService:
                 "DELETE FROM timelapses WHERE id = ?",
                 (timelapse_id,)
             )
+            # A source folder that still exists is discovered again
+            await self._reset_folder_state(timelapse['source_folder'])
 
             logger.info("Deleted timelapse", timelapse_id=timelapse_id, folder=timelapse.get('folder_name'))
 
@@ -5,6 +5,7 @@ Handles environment variables, settings validation, and Home Assistant integrati
 
 import os
 import secrets
+import shutil
 from typing import Optional, List
 from pathlib import Path
 from pydantic import Field, validator
@@ -261,6 +262,18 @@ class PrinternizerSettings(BaseSettings):
         ge=10,
         le=300
     )
+    preview_cache_max_mb: int = Field(
+        default=512,
+        env="PREVIEW_CACHE_MAX_MB",
+        description="Disk budget in MB for rendered previews and mesh levels of detail; least recently used entries are evicted first. Must be between 16 and 1048576.",
+        ge=16,
+        le=1048576
+    )
+    preview_animation_format: str = Field(
+        default="gif",
+        env="PREVIEW_ANIMATION_FORMAT",
+        description="Format of animated 3D previews: 'gif' or 'webp' (smaller, falls back to GIF if unsupported)."
+    )
 
     # Model Generator Configuration
     # Geometry is generated client-side (JSCAD); this dir only stages uploaded
@@ -310,10 +323,24 @@ class PrinternizerSettings(BaseSettings):
     library_processing_workers: int = Field(
         default=2,
         env="LIBRARY_PROCESSING_WORKERS",
-        description="Number of worker threads for library processing. Must be between 1 and 10.",
+        description="Number of concurrent metadata extraction workers for library analysis. Must be between 1 and 10.",
         ge=1,
         le=10
     )
+    analysis_worker_processes: int = Field(
+        default=0,
+        env="ANALYSIS_WORKER_PROCESSES",
+        description="Number of worker processes for CPU-bound file analysis. 0 sizes the pool to the host CPU count. Must be between 0 and 16.",
+        ge=0,
+        le=16
+    )
+    analysis_task_timeout: int = Field(
+        default=300,
+        env="ANALYSIS_TASK_TIMEOUT",
+        description="Timeout in seconds for analysing a single file. Stuck analysis workers are killed and replaced. Must be between 10 and 3600.",
+        ge=10,
+        le=3600
+    )
 
     # Library Search Configuration
     library_search_enabled: bool = Field(
@@ -364,11 +391,49 @@ class PrinternizerSettings(BaseSettings):
         ge=1,
         le=365
     )
+    timelapse_renderer: str = Field(
+        default="builtin",
+        env="TIMELAPSE_RENDERER",
+        description="Timelapse video renderer: builtin (streams frames into ffmpeg) or flickerfree (external script)"
+    )
+    timelapse_ffmpeg_path: str = Field(
+        default="ffmpeg",
+        env="TIMELAPSE_FFMPEG_PATH",
+        description="ffmpeg executable used by the built-in timelapse renderer."
+    )
+    timelapse_fps: int = Field(
+        default=30,
+        env="TIMELAPSE_FPS",
+        description="Frame rate of timelapse videos from the built-in renderer. Must be between 1 and 120.",
+        ge=1,
+        le=120
+    )
+    timelapse_deflicker_window: int = Field(
+        default=15,
+        env="TIMELAPSE_DEFLICKER_WINDOW",
+        description="Frames averaged by the built-in renderer's deflicker; 0 disables deflickering.",
+        ge=0,
+        le=300
+    )
     timelapse_flickerfree_path: str = Field(
         default="/usr/local/bin/do_timelapse.sh",
         env="TIMELAPSE_FLICKERFREE_PATH",
         description="Path to FlickerFree do_timelapse.sh script for video processing."
     )
+    timelapse_max_concurrent: int = Field(
+        default=0,
+        env="TIMELAPSE_MAX_CONCURRENT",
+        description="Timelapses rendered at the same time. 0 uses half the CPU cores (at least 1).",
+        ge=0,
+        le=64
+    )
+    timelapse_process_nice: int = Field(
+        default=10,
+        env="TIMELAPSE_PROCESS_NICE",
+        description="CPU priority (nice value) of timelapse render processes; 0 disables lowering the priority.",
+        ge=0,
+        le=19
+    )
 
     # Slicing Configuration
     slicing_output_dir: str = Field(
@@ -480,6 +545,16 @@ class PrinternizerSettings(BaseSettings):
             )
         return v.lower()
 
+    @validator('preview_animation_format')
+    def validate_preview_animation_format(cls, v):
+        """Validate animated preview format."""
+        valid_formats = ['gif', 'webp']
+        if v.lower() not in valid_formats:
+            raise ValueError(
+                f"Invalid preview animation format '{v}'. Must be one of: {', '.join(valid_formats)}"
+            )
+        return v.lower()
+
     @validator('timelapse_output_strategy')
     def validate_timelapse_strategy(cls, v):
         """Validate timelapse output strategy."""
@@ -490,6 +565,16 @@ class PrinternizerSettings(BaseSettings):
             )
         return v.lower()
 
+    @validator('timelapse_renderer')
+    def validate_timelapse_renderer(cls, v):
+        """Validate timelapse renderer."""
+        valid_renderers = ['builtin', 'flickerfree']
+        if v.lower() not in valid_renderers:
+            raise ValueError(
+                f"Invalid timelapse renderer '{v}'. Must be one of: {', '.join(valid_renderers)}"
+            )
+        return v.lower()
+
     @validator('database_path')
     def validate_database_path(cls, v):
         """Validate database path."""
@@ -645,6 +730,20 @@ def reload_settings() -> PrinternizerSettings:
     return _settings
 
 
+def select_timelapse_renderer(settings: PrinternizerSettings) -> str:
+    """Timelapse renderer that will run: 'builtin' or 'flickerfree'.
+
+    The FlickerFree script also covers a missing ffmpeg when the built-in
+    renderer is configured.
+    """
+    if settings.timelapse_renderer == "flickerfree":
+        return "flickerfree"
+    if (not shutil.which(settings.timelapse_ffmpeg_path)
+            and Path(settings.timelapse_flickerfree_path).exists()):
+        return "flickerfree"
+    return "builtin"
+
+
 def validate_settings_on_startup(settings: Optional[PrinternizerSettings] = None) -> dict:
     """
     Comprehensive startup validation of all settings.
@@ -778,11 +877,21 @@ def validate_settings_on_startup(settings: Optional[PrinternizerSettings] = None
         info.append("Library system disabled")
 
     if settings.timelapse_enabled:
-        # Check if flickerfree script exists
+        # Check that the renderer the timelapse service will select can run
         flickerfree_path = Path(settings.timelapse_flickerfree_path)
-        if not flickerfree_path.exists():
+        if select_timelapse_renderer(settings) == "flickerfree":
+            if not flickerfree_path.exists():
+                warnings.append(
+                    f"Timelapse enabled but FlickerFree script not found: {flickerfree_path}"
+                )
+            elif settings.timelapse_renderer != "flickerfree":
+                info.append(
+                    f"ffmpeg not found ({settings.timelapse_ffmpeg_path}), "
+                    f"timelapses are rendered with FlickerFree"
+                )
+        elif not shutil.which(settings.timelapse_ffmpeg_path):
             warnings.append(
-                f"Timelapse enabled but FlickerFree script not found: {flickerfree_path}"
+                f"Timelapse enabled but ffmpeg not found: {settings.timelapse_ffmpeg_path}"
             )
         info.append("Timelapse feature enabled")
     else:
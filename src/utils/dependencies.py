@@ -1,6 +1,8 @@
 """FastAPI dependency providers."""
 
-from fastapi import Depends, Request
+from typing import Callable, Optional, Tuple
+
+from fastapi import Depends, Query, Request
 
 from src.database.database import Database
 from src.database.repositories import (
@@ -26,8 +28,40 @@ from src.services.material_service import MaterialService
 from src.services.timelapse_service import TimelapseService
 from src.services.search_service import SearchService
 from src.services.camera_snapshot_service import CameraSnapshotService
+from src.services.camera_stream_proxy import CameraStreamProxy
 from src.services.slicer_service import SlicerService
 from src.services.slicing_queue import SlicingQueue
+from src.utils.errors import ValidationError
+
+
+def list_include(*allowed: str) -> Callable[..., Tuple[str, ...]]:
+    """
+    Build a dependency parsing a list endpoint's ``?include=`` parameter.
+
+    List endpoints leave heavy columns out; ``include`` is a comma-separated
+    list of the ones a client wants anyway.
+
+    Args:
+        allowed: Column names the endpoint can include
+
+    Returns:
+        Dependency yielding the requested column names
+    """
+    def dependency(
+        include: Optional[str] = Query(
+            None, description=f"Heavy fields to include (comma-separated): {', '.join(allowed)}"
+        )
+    ) -> Tuple[str, ...]:
+        names = tuple(dict.fromkeys(n.strip() for n in (include or '').split(',') if n.strip()))
+        unknown = [n for n in names if n not in allowed]
+        if unknown:
+            raise ValidationError(
+                "include", f"Unknown field(s): {', '.join(unknown)}",
+                details={"allowed": list(allowed)}
+            )
+        return names
+
+    return dependency
 
 
 async def get_database(request: Request) -> Database:
@@ -155,6 +189,11 @@ async def get_camera_snapshot_service(request: Request) -> CameraSnapshotService
     return request.app.state.camera_snapshot_service
 
 
+async def get_camera_stream_proxy(request: Request) -> CameraStreamProxy:
+    """Get camera stream proxy instance from app state."""
+    return request.app.state.camera_stream_proxy
+
+
 async def get_slicer_service(request: Request) -> SlicerService:
     """Get slicer service instance from app state."""
     return request.app.state.slicer_service
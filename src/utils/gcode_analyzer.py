@@ -4,8 +4,12 @@ Used to optimize G-code preview rendering by showing only the actual print.
 """
 import re
 from typing import List, Optional, Tuple
+
+import numpy as np
 import structlog
 
+from src.utils.gcode_toolpath import Toolpath, parse_toolpath, parse_toolpath_text
+
 logger = structlog.get_logger(__name__)
 
 
@@ -54,58 +58,79 @@ class GcodeAnalyzer:
         """
         if not self.optimize_enabled:
             return None
-            
-        heated = False
-        bed_heated = False
+
+        toolpath = parse_toolpath_text('\n'.join(gcode_lines), self.PRINT_START_MARKERS)
+        return self.find_print_start(toolpath)
+
+    def find_print_start(self, toolpath: Toolpath) -> Optional[int]:
+        """
+        Find the source line where actual printing starts in a parsed toolpath.
+
+        A slicer marker or the first likely print move after hotend heating,
+        whichever comes first; else the line after the last warmup command;
+        else the first extrusion after heating.
+
+        Args:
+            toolpath: Toolpath parsed with ``PRINT_START_MARKERS`` as start markers
+
+        Returns:
+            Line index where printing starts, or None if not found
+        """
+        if not self.optimize_enabled:
+            return None
+
+        candidates = []
+        if toolpath.start_marker_line is not None:
+            candidates.append(toolpath.start_marker_line)
+
         first_extrusion_after_heat = None
-        last_warmup_command = None
-        
-        for i, line in enumerate(gcode_lines):
-            line_upper = line.strip().upper()
-            line_original = line.strip()
-            
-            # Check for slicer-specific markers (most reliable)
-            for marker in self.PRINT_START_MARKERS:
-                if marker.upper() in line_upper or marker in line_original:
-                    logger.debug(f"Found print start marker '{marker}' at line {i + 1}")
-                    return i
-            
-            # Track heating commands
-            if line_upper.startswith('M104') or line_upper.startswith('M109'):  # Hotend
-                heated = True
-            elif line_upper.startswith('M140') or line_upper.startswith('M190'):  # Bed
-                bed_heated = True
-                
-            # Check for warmup end patterns
-            for pattern in self.WARMUP_END_PATTERNS:
-                if re.match(pattern, line_upper):
-                    last_warmup_command = i
-                    
-            # Look for first actual printing move (extrusion + movement after heating)
-            if heated and line_upper.startswith('G1') and 'E' in line_upper:
-                # Must have X or Y movement (not just Z or E-only moves)
-                if ('X' in line_upper or 'Y' in line_upper):
-                    if first_extrusion_after_heat is None:
-                        first_extrusion_after_heat = i
-                        
-                    # Skip obvious priming moves (low E values, edge positions)
-                    if self._is_likely_print_move(line_upper):
-                        logger.debug(f"Found likely print start at line {i + 1}")
-                        return i
-        
+        if toolpath.first_heat_line is not None:
+            # G1 extrusion moves in XY after the hotend was heated
+            extrusions = np.flatnonzero(
+                (toolpath.command == 1) & (toolpath.e != 0) & toolpath.xy_moved
+                & (toolpath.line > toolpath.first_heat_line)
+            )
+            if len(extrusions):
+                first_extrusion_after_heat = int(toolpath.line[extrusions[0]])
+                likely = extrusions[self._likely_print_moves(toolpath, extrusions)]
+                if len(likely):
+                    candidates.append(int(toolpath.line[likely[0]]))
+
+        if candidates:
+            start = min(candidates)
+            logger.debug(f"Found print start at line {start + 1}")
+            return start
+
         # Fallback strategies
-        if last_warmup_command is not None:
+        if toolpath.last_warmup_line is not None:
             # Start after the last warmup command
-            return last_warmup_command + 1
-            
+            return toolpath.last_warmup_line + 1
+
         if first_extrusion_after_heat is not None:
             # Use first extrusion after heating
             return first_extrusion_after_heat
-            
+
         # No optimization possible
         logger.debug("Could not identify print start, will render entire G-code")
         return None
-        
+
+    def _likely_print_moves(self, toolpath: Toolpath, moves: np.ndarray) -> np.ndarray:
+        """
+        Vectorized ``_is_likely_print_move`` over selected toolpath moves.
+
+        The small-extrusion check uses the filament each move advances, so it
+        means the same under M82 and M83. ``_is_likely_print_move`` reads the
+        E word, which under M82 is the running total.
+        """
+        e = np.abs(toolpath.e[moves])
+        x, y = toolpath.x[moves], toolpath.y[moves]
+        return (
+            (e >= 0.1)
+            # Priming lines near the origin and moves at common (250mm) bed edges
+            & ~((x < 5) & (y < 5))
+            & (x >= 2) & (x <= 248) & (y >= 2) & (y <= 248)
+        )
+
     def _is_likely_print_move(self, gcode_line: str) -> bool:
         """
         Determine if a G1 line is likely a print move vs priming.
@@ -187,17 +212,12 @@ class GcodeAnalyzer:
             Dictionary with analysis results
         """
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = []
-                for i, line in enumerate(f):
-                    if i >= max_lines:
-                        break
-                    lines.append(line.rstrip())
-                    
-            start_line = self.find_print_start_line(lines)
+            toolpath = parse_toolpath(file_path, max_lines=max_lines,
+                                      start_markers=self.PRINT_START_MARKERS)
+            start_line = self.find_print_start(toolpath)
             
             return {
-                'total_lines_analyzed': len(lines),
+                'total_lines_analyzed': toolpath.line_count,
                 'print_start_line': start_line,
                 'warmup_lines': start_line if start_line else 0,
                 'optimization_possible': start_line is not None,
@@ -0,0 +1,202 @@
+"""
+Per-layer G-code statistics from a parsed toolpath.
+
+Print time is estimated with a simple acceleration-aware motion model in the
+spirit of Klipper's planner: every move follows a trapezoidal velocity
+profile, and the speed carried through a corner is limited by the angle
+between the two moves (junction deviation from a square corner velocity).
+There is no full look-ahead; entry and exit speeds are only limited by what
+the move itself can reach, which is close enough for time estimates.
+
+Results are per layer (extrusion and travel distance, time, filament mass)
+and serialize to a compact binary blob for storage.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+
+from src.utils.gcode_toolpath import Toolpath, parse_toolpath
+
+# Bump when the model changes in a way that alters stored results
+MODEL_VERSION = 2
+
+# Columns of the serialized per-layer table (float32, little-endian)
+LAYER_COLUMNS = ('z', 'extrusion_length', 'print_distance', 'travel_distance',
+                 'time', 'filament_weight')
+
+
+@dataclass(frozen=True)
+class MotionModel:
+    """Printer and filament parameters for the time and mass estimates."""
+    acceleration: float = 1500.0           # mm/s²
+    max_velocity: float = 500.0            # mm/s
+    square_corner_velocity: float = 5.0    # mm/s
+    default_feedrate: float = 1500.0       # mm/min, until the file sets F
+    filament_diameter: float = 1.75        # mm
+    filament_density: float = 1.24         # g/cm³ (PLA)
+
+    @property
+    def junction_deviation(self) -> float:
+        scv = self.square_corner_velocity
+        return scv * scv * (np.sqrt(2.0) - 1.0) / self.acceleration
+
+    @property
+    def grams_per_mm(self) -> float:
+        """Mass of one millimetre of filament."""
+        area = np.pi * (self.filament_diameter / 2) ** 2        # mm²
+        return area * self.filament_density / 1000.0              # cm³ -> g
+
+    @classmethod
+    def from_options(cls, options: Optional[Dict[str, Any]]) -> 'MotionModel':
+        """Build from a dict, ignoring unknown keys and None values."""
+        fields = cls.__dataclass_fields__
+        return cls(**{k: float(v) for k, v in (options or {}).items()
+                      if k in fields and v is not None})
+
+
+@dataclass
+class LayerStatistics:
+    """Per-layer totals of a toolpath (one entry per layer)."""
+    z: np.ndarray                  # layer height (mm)
+    extrusion_length: np.ndarray   # filament pushed (mm)
+    print_distance: np.ndarray     # path length of extruding moves (mm)
+    travel_distance: np.ndarray    # path length of non-extruding moves (mm)
+    time: np.ndarray               # seconds
+    filament_weight: np.ndarray    # grams
+    model_version: int = MODEL_VERSION
+
+    @property
+    def layer_count(self) -> int:
+        return len(self.z)
+
+    @property
+    def total_time(self) -> float:
+        return float(self.time.sum())
+
+    def remaining_time(self, layer: int) -> float:
+        """Seconds left when ``layer`` (0-based) is about to start."""
+        return float(self.time[max(layer, 0):].sum())
+
+    def summary(self) -> Dict[str, Any]:
+        """Whole-file totals, in the units the library stores."""
+        return {
+            'layer_count': self.layer_count,
+            'estimated_time': int(round(self.total_time)),
+            'filament_length': round(float(self.extrusion_length.sum()) / 1000, 3),    # m
+            'filament_weight': round(float(self.filament_weight.sum()), 2),
+            'travel_distance': round(float(self.travel_distance.sum()) / 1000, 3),     # m
+            'model_version': self.model_version,
+        }
+
+    def to_bytes(self) -> bytes:
+        """Pack the per-layer columns into a float32 blob."""
+        table = np.column_stack([getattr(self, c) for c in LAYER_COLUMNS])
+        return table.astype('<f4').tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, model_version: int = MODEL_VERSION) -> 'LayerStatistics':
+        table = np.frombuffer(data, dtype='<f4').reshape(-1, len(LAYER_COLUMNS))
+        return cls(*(table[:, i].astype(np.float32) for i in range(len(LAYER_COLUMNS))),
+                   model_version=model_version)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Per-layer rows for JSON responses."""
+        rows = zip(*(np.round(getattr(self, c).astype(float), 4).tolist() for c in LAYER_COLUMNS))
+        return {'layers': [dict(zip(LAYER_COLUMNS, row)) for row in rows], **self.summary()}
+
+
+def move_times(toolpath: Toolpath, model: MotionModel = MotionModel()) -> np.ndarray:
+    """
+    Duration of every move (seconds) under a trapezoidal motion model.
+
+    Moves without XYZ motion (retracts, primes) run at their feedrate over
+    the filament distance and stop the toolhead on both sides.
+    """
+    count = len(toolpath)
+    if not count:
+        return np.zeros(0)
+
+    origin = np.asarray(toolpath.origin, dtype=np.float64)
+    points = np.column_stack([toolpath.x, toolpath.y, toolpath.z]).astype(np.float64)
+    delta = np.diff(np.vstack([origin, points]), axis=0)
+    length = np.sqrt((delta * delta).sum(axis=1))
+    moving = length > 1e-9
+    e = np.abs(toolpath.e.astype(np.float64))
+    distance = np.where(moving, length, e)
+
+    feedrate = np.where(toolpath.feedrate > 0, toolpath.feedrate, model.default_feedrate)
+    velocity = np.minimum(feedrate.astype(np.float64) / 60.0, model.max_velocity)
+    accel = model.acceleration
+
+    # Junction speed between consecutive XYZ moves
+    unit = np.divide(delta, length[:, None], out=np.zeros_like(delta), where=moving[:, None])
+    cos_theta = -(unit[:-1] * unit[1:]).sum(axis=1)
+    sin_half = np.sqrt(np.clip(0.5 * (1.0 - cos_theta), 0.0, 1.0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r_jd = sin_half / (1.0 - sin_half)
+    junction_v2 = np.where(sin_half >= 1.0 - 1e-9, np.inf,
+                           model.junction_deviation * r_jd * accel)
+    junction = np.sqrt(junction_v2)
+    junction = np.minimum(junction, np.minimum(velocity[:-1], velocity[1:]))
+    junction = np.where(moving[:-1] & moving[1:], junction, 0.0)
+
+    entry = np.concatenate([[0.0], junction])
+    exit_ = np.concatenate([junction, [0.0]])
+    # A move cannot change speed by more than its length allows
+    entry = np.minimum(entry, np.sqrt(exit_ * exit_ + 2 * accel * distance))
+    exit_ = np.minimum(exit_, np.sqrt(entry * entry + 2 * accel * distance))
+
+    # Trapezoid: accelerate to the cruise speed, cruise, decelerate
+    accel_dist = (velocity ** 2 - entry ** 2) / (2 * accel)
+    decel_dist = (velocity ** 2 - exit_ ** 2) / (2 * accel)
+    cruise = distance - accel_dist - decel_dist
+    with np.errstate(divide='ignore', invalid='ignore'):
+        full = (velocity - entry) / accel + (velocity - exit_) / accel + cruise / velocity
+        # Triangle: the cruise speed is never reached
+        peak = np.sqrt(np.maximum((2 * accel * distance + entry ** 2 + exit_ ** 2) / 2, 0.0))
+        peak = np.maximum(peak, np.maximum(entry, exit_))
+        triangle = (peak - entry) / accel + (peak - exit_) / accel
+    times = np.where(cruise >= 0, full, triangle)
+    return np.where(distance > 0, times, 0.0)
+
+
+def compute_layer_statistics(toolpath: Toolpath,
+                             model: MotionModel = MotionModel()) -> LayerStatistics:
+    """
+    Aggregate distance, time and filament per layer.
+
+    Travel before the first layer counts toward layer 0 and moves after the
+    last extrusion toward the last layer (see ``Toolpath.layer``). Filament
+    is net forward extrusion: an unretract only restores what the retract
+    pulled back, so only E beyond the furthest point fed so far counts.
+    """
+    layers = toolpath.layer_count
+    if not layers:
+        empty = np.zeros(0, dtype=np.float32)
+        return LayerStatistics(empty, empty, empty, empty, empty, empty)
+
+    extruding = toolpath.extruding
+    lengths = toolpath.segment_lengths().astype(np.float64)
+    fed = np.maximum.accumulate(np.maximum(np.cumsum(toolpath.e, dtype=np.float64), 0.0))
+    extruded = np.diff(fed, prepend=0.0)
+
+    def per_layer(weights):
+        return np.bincount(toolpath.layer, weights=weights, minlength=layers)[:layers].astype(np.float32)
+
+    extrusion = per_layer(extruded)
+    return LayerStatistics(
+        z=toolpath.layer_z.astype(np.float32),
+        extrusion_length=extrusion,
+        print_distance=per_layer(np.where(extruding, lengths, 0.0)),
+        travel_distance=per_layer(np.where(extruding, 0.0, lengths)),
+        time=per_layer(move_times(toolpath, model)),
+        filament_weight=(extrusion * model.grams_per_mm).astype(np.float32),
+    )
+
+
+def analyze_layers(file_path: Union[str, Path],
+                   model: MotionModel = MotionModel()) -> LayerStatistics:
+    """Parse a G-code file and compute its layer statistics."""
+    return compute_layer_statistics(parse_toolpath(file_path), model)
@@ -0,0 +1,490 @@
+"""
+Vectorized G-code toolpath parser.
+
+Turns a G-code file into compact NumPy arrays (one row per move) in a single
+chunked pass. Each chunk is tokenized as a byte array (comment masking, word
+detection and number parsing are array operations) and resolved the same way;
+no per-line or per-token Python work happens:
+
+* absolute/relative positioning (G90/G91) and extrusion (M82/M83),
+  including G92 position resets,
+* G2/G3 arcs (I/J or R form), expanded into short line segments,
+* a layer index derived from the Z height of extruding moves.
+
+Used by preview rendering, print-start detection (GcodeAnalyzer) and
+layer statistics.
+"""
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Bytes per read; chunks are cut at the last newline
+CHUNK_BYTES = 4 * 1024 * 1024
+# Target chord length (mm) when expanding arcs, and the per-arc segment cap
+ARC_SEGMENT_MM = 1.0
+ARC_MAX_SEGMENTS = 720
+# Z heights are compared at this resolution (mm) when numbering layers
+LAYER_Z_RESOLUTION = 1e-3
+
+# Parameter columns
+_AXES = 'XYZEFIJR'
+_X, _Y, _Z, _E, _F, _I, _J, _R = range(8)
+_AXIS_LOOKUP = np.full(256, -1, dtype=np.int8)
+for _index, _letter in enumerate(_AXES):
+    _AXIS_LOOKUP[ord(_letter)] = _index
+
+# Longest number (in bytes) read from a word
+MAX_NUMBER_BYTES = 24
+_POW10 = 10.0 ** np.arange(MAX_NUMBER_BYTES + 1)
+
+# Row kinds; 0-3 are the motion commands G0-G3
+_G90, _G91, _G92, _M82, _M83, _HEAT, _WARMUP, _OTHER = range(4, 12)
+_KINDS = {
+    'G0': 0, 'G1': 1, 'G2': 2, 'G3': 3,
+    'G90': _G90, 'G91': _G91, 'G92': _G92, 'M82': _M82, 'M83': _M83,
+    'M104': _HEAT, 'M109': _HEAT,
+    'G28': _WARMUP, 'G29': _WARMUP, 'M420': _WARMUP,
+}
+# Command word -> kind, keyed by letter * 1000 + number
+_KIND_CODES = {ord(name[0]) * 1000 + int(name[1:]): kind for name, kind in _KINDS.items()}
+
+
+@dataclass
+class Toolpath:
+    """
+    Moves of a G-code file as parallel arrays (one entry per move).
+
+    Arc moves are expanded, so several entries can share one source line.
+    Positions are the end point of each move; ``origin`` is where the first
+    move starts.
+    """
+    x: np.ndarray                 # float32, mm
+    y: np.ndarray                 # float32, mm
+    z: np.ndarray                 # float32, mm
+    e: np.ndarray                 # float32, filament advanced by the move (mm)
+    feedrate: np.ndarray          # float32, mm/min
+    command: np.ndarray           # int8, 0-3 for G0-G3
+    line: np.ndarray              # int32, 0-based source line
+    layer: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int32))
+    layer_z: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float32))
+    origin: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+    line_count: int = 0
+    # Print-start landmarks (0-based lines, None if absent)
+    start_marker_line: Optional[int] = None
+    first_heat_line: Optional[int] = None
+    last_warmup_line: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    @property
+    def layer_count(self) -> int:
+        return len(self.layer_z)
+
+    @property
+    def extruding(self) -> np.ndarray:
+        """Mask of moves that extrude while moving in XY."""
+        return (self.e > 0) & self.xy_moved
+
+    @property
+    def xy_moved(self) -> np.ndarray:
+        """Mask of moves that change the XY position."""
+        x0, y0 = self._previous(self.x, 0), self._previous(self.y, 1)
+        return (self.x != x0) | (self.y != y0)
+
+    def points(self) -> np.ndarray:
+        """Polyline vertices, ``(len + 1, 3)``: the origin then every move end."""
+        points = np.empty((len(self) + 1, 3), dtype=np.float32)
+        points[0] = self.origin
+        points[1:, 0], points[1:, 1], points[1:, 2] = self.x, self.y, self.z
+        return points
+
+    def segment_lengths(self) -> np.ndarray:
+        """Euclidean length of every move (mm)."""
+        dx = self.x - self._previous(self.x, 0)
+        dy = self.y - self._previous(self.y, 1)
+        dz = self.z - self._previous(self.z, 2)
+        return np.sqrt(dx * dx + dy * dy + dz * dz)
+
+    def from_line(self, line: int) -> 'Toolpath':
+        """The moves at or after a source line; origin is where they start."""
+        start = int(np.searchsorted(self.line, line))
+        if start == 0:
+            return self
+        points = self.points()
+        sliced = slice(start, None)
+        return Toolpath(
+            x=self.x[sliced], y=self.y[sliced], z=self.z[sliced], e=self.e[sliced],
+            feedrate=self.feedrate[sliced], command=self.command[sliced],
+            line=self.line[sliced], layer=self.layer[sliced], layer_z=self.layer_z,
+            origin=tuple(float(v) for v in points[start]),
+            line_count=self.line_count, start_marker_line=self.start_marker_line,
+            first_heat_line=self.first_heat_line, last_warmup_line=self.last_warmup_line,
+        )
+
+    def _previous(self, values: np.ndarray, axis: int) -> np.ndarray:
+        previous = np.empty_like(values)
+        if len(values):
+            previous[0] = self.origin[axis]
+            previous[1:] = values[:-1]
+        return previous
+
+
+class _ToolpathBuilder:
+    """Chunk-by-chunk tokenizer and state machine behind ``parse_toolpath``."""
+
+    def __init__(self, start_markers: Sequence[str] = ()):
+        self.position = np.zeros(4)         # X, Y, Z, E carried between chunks
+        self.feedrate = 0.0
+        self.relative_xyz = False
+        self.relative_e = False
+        self.line_offset = 0
+        self.parts: List[Tuple[np.ndarray, ...]] = []
+        self.start_marker_line: Optional[int] = None
+        self.first_heat_line: Optional[int] = None
+        self.last_warmup_line: Optional[int] = None
+        self._markers = (
+            re.compile(b'|'.join(re.escape(m.encode()) for m in start_markers), re.IGNORECASE)
+            if start_markers else None
+        )
+
+    def feed(self, data: bytes) -> None:
+        """Consume complete lines (``data`` must end with a newline)."""
+        if self._markers is not None and self.start_marker_line is None:
+            match = self._markers.search(data)
+            if match:
+                self.start_marker_line = self.line_offset + data.count(b'\n', 0, match.start())
+
+        line_offset = self.line_offset
+        self.line_offset += data.count(b'\n')
+        rows = self._tokenize(np.frombuffer(data, dtype=np.uint8))
+        if rows is None:
+            return
+        kinds, lines, values = rows
+        lines += line_offset
+        self._landmarks(kinds, lines, values)
+        self._resolve(kinds, lines, values)
+
+    @staticmethod
+    def _tokenize(raw: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Find the command lines of a chunk and parse their words.
+
+        Only a handful of whole-chunk array passes are made; everything else
+        works on the (much shorter) word arrays.
+
+        Returns:
+            ``(kinds, lines, values)``: kind and chunk-relative line of every
+            recognized command, and its parameter words as an ``(rows, 8)``
+            array (NaN where absent); None if the chunk has no commands
+        """
+        size = len(raw)
+        newlines = np.flatnonzero(raw == 10)
+        folded = raw | 32
+        letter = (folded >= 97) & (folded <= 122)
+        number = ((raw >= 48) & (raw <= 57)) | (raw == 46) | (raw == 45) | (raw == 43)
+
+        # A word is a letter directly followed by a number
+        word_start = np.flatnonzero(number[1:] & ~number[:-1] & letter[:-1]) + 1
+        if not len(word_start):
+            return None
+        word_line = np.searchsorted(newlines, word_start)
+
+        # Drop words after the first ';' of their line
+        semicolons = np.flatnonzero(raw == 59)
+        if len(semicolons):
+            comment_start = np.full(len(newlines) + 1, size)
+            comment_start[np.searchsorted(newlines, semicolons)[::-1]] = semicolons[::-1]
+            live = word_start < comment_start[word_line]
+            word_start, word_line = word_start[live], word_line[live]
+
+        # Parse the numbers byte column by byte column
+        count = len(word_start)
+        mantissa = np.zeros(count)
+        decimals = np.zeros(count, dtype=np.int64)
+        seen_dot = np.zeros(count, dtype=bool)
+        negative = raw[word_start] == 45
+        active = np.ones(count, dtype=bool)
+        for offset in range(MAX_NUMBER_BYTES):
+            index = np.minimum(word_start + offset, size - 1)
+            active &= number[index] & (word_start + offset < size)
+            if offset and not active.any():
+                break
+            byte = raw[index]
+            digit = active & (byte >= 48) & (byte <= 57)
+            mantissa = np.where(digit, mantissa * 10 + (byte.astype(np.float64) - 48), mantissa)
+            decimals += digit & seen_dot
+            seen_dot |= active & (byte == 46)
+        value = mantissa / _POW10[decimals]
+        value[negative] *= -1
+
+        # The command is a line's first word, at the start of the line
+        word_letter = raw[word_start - 1] & 0xDF
+        letter_at = word_start - 1
+        line_start = np.where(word_line > 0, newlines[np.maximum(word_line - 1, 0)] + 1, 0)
+        first_in_line = np.ones(len(word_start), dtype=bool)
+        first_in_line[1:] = word_line[1:] != word_line[:-1]
+        first_word = first_in_line & (letter_at == line_start)
+        indented = np.flatnonzero(first_in_line & (letter_at > line_start))
+        if len(indented):
+            # Leading blanks are allowed before the command
+            starts, ends = line_start[indented], letter_at[indented]
+            blank = np.ones(len(indented), dtype=bool)
+            for offset in range(int((ends - starts).max())):
+                index = np.minimum(starts + offset, size - 1)
+                inside = starts + offset < ends
+                blank &= ~inside | (raw[index] == 32) | (raw[index] == 9)
+            first_word[indented[blank]] = True
+
+        # A leading N line number (as sent by hosts) is skipped; the next word is the command
+        numbered = np.flatnonzero(first_word & (word_letter == ord('N')))
+        numbered = numbered[numbered + 1 < len(word_start)]
+        numbered = numbered[word_line[numbered + 1] == word_line[numbered]]
+        first_word[numbered] = False
+        first_word[numbered + 1] = True
+
+        command = np.flatnonzero(first_word)
+        command_code = word_letter[command].astype(np.int64) * 1000 + value[command].astype(np.int64)
+        codes, inverse = np.unique(command_code, return_inverse=True)
+        code_kinds = np.array([_KIND_CODES.get(int(c), _OTHER) for c in codes], dtype=np.int8)
+        kinds = code_kinds[inverse.reshape(-1)]
+        known = kinds != _OTHER
+        if not known.any():
+            return None
+        command, kinds = command[known], kinds[known]
+
+        # Parameter words of the recognized command lines
+        row_of_line = np.full(len(newlines) + 1, -1)
+        row_of_line[word_line[command]] = np.arange(len(command))
+        columns = _AXIS_LOOKUP[word_letter]
+        parameter = ~first_word & (row_of_line[word_line] >= 0) & (columns >= 0)
+        values = np.full((len(command), len(_AXES)), np.nan)
+        values[row_of_line[word_line[parameter]], columns[parameter]] = value[parameter]
+        return kinds, word_line[command].astype(np.int32), values
+
+    def _landmarks(self, kinds: np.ndarray, lines: np.ndarray, values: np.ndarray) -> None:
+        heat = np.flatnonzero(kinds == _HEAT)
+        if self.first_heat_line is None and len(heat):
+            self.first_heat_line = int(lines[heat[0]])
+        warmup = np.flatnonzero((kinds == _WARMUP) | ((kinds == _G92) & (values[:, _E] == 0)))
+        if len(warmup):
+            self.last_warmup_line = int(lines[warmup[-1]])
+
+    def _resolve(self, kinds: np.ndarray, lines: np.ndarray, values: np.ndarray) -> None:
+        """Turn one chunk's rows into absolute positions and append its moves."""
+        count = len(kinds)
+        index = np.arange(count)
+        is_move = kinds <= 3
+        is_reset = kinds == _G92
+
+        # Positioning modes in effect at each row. As in Klipper, E is relative
+        # under M83 or G91; G90 leaves an earlier M83 in force.
+        relative_xyz = self._forward_fill(
+            np.where(kinds == _G90, 0, np.where(kinds == _G91, 1, -1)), int(self.relative_xyz))
+        relative_e = self._forward_fill(
+            np.where(kinds == _M82, 0, np.where(kinds == _M83, 1, -1)), int(self.relative_e))
+        self.relative_xyz, self.relative_e = bool(relative_xyz[-1]), bool(relative_e[-1])
+        relative_e = relative_e | relative_xyz
+
+        # Per axis: absolute assignments anchor the position, relative words add to it
+        position = np.empty((count, 4))
+        for axis in range(4):
+            given = ~np.isnan(values[:, axis])
+            relative = (relative_e if axis == _E else relative_xyz).astype(bool)
+            anchor = given & (is_reset | (is_move & ~relative))
+            delta = np.where(given & is_move & relative, values[:, axis], 0.0)
+            total = np.cumsum(delta)
+            last_anchor = np.maximum.accumulate(np.where(anchor, index, -1))
+            anchored = last_anchor >= 0
+            safe = np.maximum(last_anchor, 0)
+            position[:, axis] = np.where(
+                anchored,
+                np.where(anchor, values[:, axis], 0.0)[safe] + total - total[safe],
+                self.position[axis] + total,
+            )
+
+        feedrate = self._forward_fill(np.where(is_move, values[:, _F], np.nan), self.feedrate,
+                                      missing=np.nan)
+        previous = np.vstack([self.position, position[:-1]])
+        self.position = position[-1].copy()
+        self.feedrate = float(feedrate[-1])
+
+        moves = np.flatnonzero(is_move)
+        if not len(moves):
+            return
+        self._append(kinds[moves], lines[moves], previous[moves], position[moves],
+                     feedrate[moves], values[moves])
+
+    def _append(self, commands, lines, start, end, feedrate, values) -> None:
+        """Expand arcs and store one chunk's moves."""
+        extruded = end[:, _E] - start[:, _E]
+        arcs = commands >= 2
+        if not arcs.any():
+            self.parts.append((end[:, 0], end[:, 1], end[:, 2], extruded, feedrate,
+                               commands, lines))
+            return
+
+        # Arc centre from I/J offsets, or from R (positive R: the shorter arc)
+        sx, sy, ex, ey = start[:, 0], start[:, 1], end[:, 0], end[:, 1]
+        clockwise = commands == 2
+        i = np.nan_to_num(values[:, _I])
+        j = np.nan_to_num(values[:, _J])
+        radius_form = np.isnan(values[:, _I]) & np.isnan(values[:, _J]) & ~np.isnan(values[:, _R])
+        if radius_form.any():
+            r = values[:, _R]
+            mx, my = (ex - sx) / 2, (ey - sy) / 2
+            half_chord = np.hypot(mx, my)
+            offset = np.sqrt(np.maximum(r * r - half_chord * half_chord, 0.0))
+            offset = np.where(clockwise ^ (r < 0), -offset, offset)
+            scale = np.where(half_chord > 0, offset / np.where(half_chord > 0, half_chord, 1), 0)
+            i = np.where(radius_form, mx - my * scale, i)
+            j = np.where(radius_form, my + mx * scale, j)
+        cx, cy = sx + i, sy + j
+        radius = np.hypot(i, j)
+        angle0 = np.arctan2(sy - cy, sx - cx)
+        sweep = np.arctan2(ey - cy, ex - cx) - angle0
+        sweep = np.where(clockwise & (sweep >= -1e-9), sweep - 2 * np.pi, sweep)
+        sweep = np.where(~clockwise & (sweep <= 1e-9), sweep + 2 * np.pi, sweep)
+        valid_arc = arcs & (radius > 0)
+
+        segments = np.where(
+            valid_arc,
+            np.clip(np.ceil(np.abs(sweep) * radius / ARC_SEGMENT_MM), 1, ARC_MAX_SEGMENTS),
+            1,
+        ).astype(np.int64)
+        move = np.repeat(np.arange(len(commands)), segments)
+        step = np.arange(len(move)) - np.repeat(np.cumsum(segments) - segments, segments)
+        t = (step + 1) / segments[move]
+
+        x = sx[move] + (ex - sx)[move] * t
+        y = sy[move] + (ey - sy)[move] * t
+        on_arc = valid_arc[move] & (t < 1)
+        theta = angle0[move] + sweep[move] * t
+        x = np.where(on_arc, cx[move] + radius[move] * np.cos(theta), x)
+        y = np.where(on_arc, cy[move] + radius[move] * np.sin(theta), y)
+        z = start[move, 2] + (end[:, 2] - start[:, 2])[move] * t
+
+        self.parts.append((x, y, z, extruded[move] / segments[move], feedrate[move],
+                           commands[move], lines[move]))
+
+    @staticmethod
+    def _forward_fill(values: np.ndarray, initial, missing=-1) -> np.ndarray:
+        """Carry the last set value forward (``missing`` marks unset rows)."""
+        unset = np.isnan(values) if missing != missing else values == missing
+        index = np.where(unset, -1, np.arange(len(values)))
+        last = np.maximum.accumulate(index)
+        return np.where(last >= 0, values[np.maximum(last, 0)], initial)
+
+    def build(self) -> Toolpath:
+        """Concatenate the chunks and number the layers."""
+        if self.parts:
+            columns = [np.concatenate(column) for column in zip(*self.parts)]
+        else:
+            columns = [np.zeros(0)] * 7
+        x, y, z, e, feedrate, commands, lines = columns
+        toolpath = Toolpath(
+            x=x.astype(np.float32), y=y.astype(np.float32), z=z.astype(np.float32),
+            e=e.astype(np.float32), feedrate=feedrate.astype(np.float32),
+            command=commands.astype(np.int8), line=lines.astype(np.int32),
+            line_count=self.line_offset, start_marker_line=self.start_marker_line,
+            first_heat_line=self.first_heat_line, last_warmup_line=self.last_warmup_line,
+        )
+        toolpath.layer, toolpath.layer_z = _number_layers(toolpath)
+        return toolpath
+
+
+def _number_layers(toolpath: Toolpath) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Layer index per move and the Z height of each layer.
+
+    A layer starts whenever an extruding move reaches a Z above every earlier
+    extruding move. Travel moves (including Z hops) belong to the layer of
+    the next extruding move.
+    """
+    count = len(toolpath)
+    extruding = np.flatnonzero(toolpath.extruding)
+    if not len(extruding):
+        return np.zeros(count, dtype=np.int32), np.zeros(0, dtype=np.float32)
+
+    heights = np.round(toolpath.z[extruding] / LAYER_Z_RESOLUTION).astype(np.int64)
+    highest_before = np.concatenate([[np.iinfo(np.int64).min],
+                                     np.maximum.accumulate(heights)[:-1]])
+    new_layer = heights > highest_before
+    extruding_layer = (np.cumsum(new_layer) - 1).astype(np.int32)
+    layer_z = toolpath.z[extruding][new_layer]
+
+    # Backfill: each move takes the layer of the next extruding move
+    next_extruding = np.searchsorted(extruding, np.arange(count))
+    layer = extruding_layer[np.minimum(next_extruding, len(extruding) - 1)]
+    return layer.astype(np.int32), layer_z.astype(np.float32)
+
+
+def _read_chunks(path: Path, max_lines: Optional[int]) -> Iterable[bytes]:
+    """Chunks of complete lines, stopping after ``max_lines``."""
+    remaining = max_lines
+    with open(path, 'rb') as f:
+        tail = b''
+        while True:
+            block = f.read(CHUNK_BYTES)
+            if not block:
+                data, tail = tail, b''
+                if data and not data.endswith(b'\n'):
+                    data += b'\n'
+            else:
+                data = tail + block
+                cut = data.rfind(b'\n')
+                if cut < 0:
+                    tail = data
+                    continue
+                data, tail = data[:cut + 1], data[cut + 1:]
+            if not data:
+                return
+            if remaining is not None:
+                lines = data.count(b'\n')
+                if lines >= remaining:
+                    cut = -1
+                    for _ in range(remaining):
+                        cut = data.index(b'\n', cut + 1)
+                    yield data[:cut + 1]
+                    return
+                remaining -= lines
+            yield data
+            if not block:
+                return
+
+
+def parse_toolpath(file_path: Union[str, Path], max_lines: Optional[int] = None,
+                   start_markers: Sequence[str] = ()) -> Toolpath:
+    """
+    Parse a G-code file into a Toolpath in one chunked pass.
+
+    Args:
+        file_path: Path to the G-code file
+        max_lines: Stop after this many lines (None: whole file)
+        start_markers: Strings whose first (case-insensitive) occurrence is
+            recorded as ``start_marker_line``
+
+    Returns:
+        Toolpath of every G0-G3 move
+    """
+    builder = _ToolpathBuilder(start_markers)
+    for chunk in _read_chunks(Path(file_path), max_lines):
+        builder.feed(chunk)
+    toolpath = builder.build()
+    logger.debug("Parsed G-code toolpath", file_path=str(file_path), moves=len(toolpath),
+                 layers=toolpath.layer_count, lines=toolpath.line_count)
+    return toolpath
+
+
+def parse_toolpath_text(text: str, start_markers: Sequence[str] = ()) -> Toolpath:
+    """Parse G-code held in memory; see ``parse_toolpath``."""
+    builder = _ToolpathBuilder(start_markers)
+    data = text.encode('utf-8', errors='ignore')
+    builder.feed(data if data.endswith(b'\n') else data + b'\n')
+    return builder.build()
@@ -0,0 +1,124 @@
+"""
+Mesh decimation by vertex clustering.
+
+Vertices are snapped to a uniform grid and every occupied cell is replaced
+by the mean of its vertices. Faces whose corners end up in fewer than three
+cells disappear, and faces that collapse onto the same three cells are
+kept once. The grid resolution is chosen so the result stays within a face
+budget.
+
+Clustering is one pass of array operations (no edge collapse queue); it
+does not preserve topology, which is fine for previews: a face smaller
+than a pixel is invisible anyway.
+"""
+from typing import Tuple
+
+import numpy as np
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Faces per output pixel kept for previews
+FACES_PER_PIXEL = 1.0
+# Smallest budget handed out, so tiny previews still show shape
+MIN_FACE_BUDGET = 4096
+# Resolution refinements tried before giving up on hitting the budget
+MAX_PASSES = 6
+
+
+def face_budget(size: Tuple[int, int]) -> int:
+    """
+    Face budget for rendering at an image size.
+
+    Budgets are rounded up to powers of two, so nearby sizes (200 and
+    256 px) share one level of detail.
+
+    Args:
+        size: Image size (width, height)
+
+    Returns:
+        Maximum number of faces worth rendering
+    """
+    wanted = max(MIN_FACE_BUDGET, int(size[0] * size[1] * FACES_PER_PIXEL))
+    return 1 << int(np.ceil(np.log2(wanted)))
+
+
+def cluster_vertices(vertices: np.ndarray, faces: np.ndarray,
+                     resolution: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cluster vertices on a grid of ``resolution`` cells along the longest axis.
+
+    Args:
+        vertices: ``(V, 3)`` vertex positions
+        faces: ``(F, 3)`` vertex indices
+        resolution: Grid cells along the longest bounding box edge
+
+    Returns:
+        ``(vertices, faces)`` of the clustered mesh
+    """
+    lo = vertices.min(axis=0)
+    extent = float((vertices.max(axis=0) - lo).max())
+    if extent <= 0 or not len(faces):
+        return vertices, faces
+
+    cell = extent / resolution
+    grid = np.minimum(((vertices - lo) / cell).astype(np.int64), resolution - 1)
+    keys = (grid[:, 0] * resolution + grid[:, 1]) * resolution + grid[:, 2]
+    cells, cluster = np.unique(keys, return_inverse=True)
+
+    counts = np.bincount(cluster, minlength=len(cells)).astype(np.float64)
+    centres = np.column_stack([
+        np.bincount(cluster, weights=vertices[:, axis], minlength=len(cells)) / counts
+        for axis in range(3)
+    ])
+
+    remapped = cluster[faces]
+    distinct = ((remapped[:, 0] != remapped[:, 1]) & (remapped[:, 1] != remapped[:, 2])
+                & (remapped[:, 0] != remapped[:, 2]))
+    remapped = remapped[distinct]
+    # Keep one face per cell triple, with its original winding
+    _, first = np.unique(np.sort(remapped, axis=1), axis=0, return_index=True)
+    remapped = remapped[np.sort(first)]
+
+    # Drop clusters no face refers to any more
+    used, compact = np.unique(remapped, return_inverse=True)
+    return centres[used], compact.reshape(-1, 3)
+
+
+def decimate(vertices: np.ndarray, faces: np.ndarray,
+             max_faces: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce a mesh to at most ``max_faces`` faces.
+
+    Meshes already within budget are returned unchanged. Otherwise the
+    grid resolution is estimated from the face count (faces grow with the
+    square of the resolution on a surface) and refined until the result
+    fits.
+
+    Args:
+        vertices: ``(V, 3)`` vertex positions
+        faces: ``(F, 3)`` vertex indices
+        max_faces: Face budget
+
+    Returns:
+        ``(vertices, faces)`` as float32 and int32 arrays
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    if len(faces) <= max_faces:
+        return vertices.astype(np.float32), faces.astype(np.int32)
+
+    # Start from the resolution the current vertex density corresponds to
+    lo = vertices.min(axis=0)
+    extent = float((vertices.max(axis=0) - lo).max())
+    resolution = max(2, int(np.sqrt(len(faces) / 2)))
+    out_vertices, out_faces = vertices, faces
+    for _ in range(MAX_PASSES):
+        resolution = max(2, int(resolution * np.sqrt(max_faces / max(len(out_faces), 1)) * 0.95))
+        out_vertices, out_faces = cluster_vertices(vertices, faces, resolution)
+        if len(out_faces) <= max_faces or resolution == 2:
+            break
+
+    logger.debug("Mesh decimated", faces=len(faces), decimated_faces=len(out_faces),
+                 resolution=resolution, cell=round(extent / resolution, 4))
+    return out_vertices.astype(np.float32), out_faces.astype(np.int32)
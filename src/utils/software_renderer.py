@@ -0,0 +1,333 @@
+"""
+Software renderer for preview thumbnails.
+
+Meshes are drawn by a vectorized z-buffer rasterizer. Triangles are projected
+orthographically and scan-converted in batches: the pixel span of every
+face on every row is solved at once, so no per-triangle Python work
+happens:
+
+* Lambert (diffuse) shading from a light over the viewer's shoulder, per
+  face (``flat``) or interpolated from vertex normals (``smooth``); faces
+  are lit from both sides, so inconsistent STL winding does not matter,
+* anti-aliasing by rendering at ``supersample`` times the output size and
+  box-filtering down.
+
+Toolpaths (polylines) are projected the same way and drawn with Pillow.
+
+Used by preview rendering; needs only NumPy and Pillow.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw
+
+# Candidate pixels tested per batch; bounds peak memory
+BATCH_PIXELS = 1 << 21
+# Fraction of the image left empty on each side of the model
+MARGIN = 0.05
+# Surface colour multipliers: unlit, and added at full light (above 1 brightens)
+AMBIENT = 0.45
+DIFFUSE = 0.95
+# Direction towards the light in view space (x right, y up, z towards viewer)
+LIGHT = np.array([-0.4, 0.5, 1.0]) / np.linalg.norm([-0.4, 0.5, 1.0])
+# Tolerance of the inside test, so shared edges leave no gaps
+_EDGE_EPS = 1e-7
+
+SHADING_MODES = ('flat', 'smooth')
+
+
+def view_basis(azimuth: float, elevation: float) -> np.ndarray:
+    """
+    Rotation from world to view space.
+
+    Follows matplotlib's ``view_init`` convention: Z is up, the camera sits
+    at ``azimuth`` degrees around Z and ``elevation`` degrees above the XY
+    plane, looking at the origin.
+
+    Returns:
+        ``(3, 3)`` array whose rows are screen right, screen up and the
+        direction towards the viewer
+    """
+    az, el = np.radians(azimuth), np.radians(elevation)
+    return np.array([
+        [-np.sin(az), np.cos(az), 0.0],
+        [-np.sin(el) * np.cos(az), -np.sin(el) * np.sin(az), np.cos(el)],
+        [np.cos(el) * np.cos(az), np.cos(el) * np.sin(az), np.sin(el)],
+    ])
+
+
+def _fit_to_screen(view: np.ndarray, width: int, height: int,
+                   radius: Optional[float] = None) -> np.ndarray:
+    """
+    Scale view-space points to pixels; y points down, z is depth.
+
+    Without ``radius`` the points' bounding box fills the image. With it,
+    the view-space origin is the image centre and a sphere of that radius
+    fills the image, so every view of a model gets the same scale.
+    """
+    if radius is None:
+        lo = view[:, :2].min(axis=0)
+        hi = view[:, :2].max(axis=0)
+        span = np.maximum(hi - lo, 1e-12)
+        scale = min(width * (1 - 2 * MARGIN) / span[0], height * (1 - 2 * MARGIN) / span[1])
+        centre = (lo + hi) / 2
+    else:
+        scale = (1 - 2 * MARGIN) * min(width, height) / (2 * max(radius, 1e-12))
+        centre = np.zeros(2)
+    screen = np.empty_like(view)
+    screen[:, 0] = width / 2 + (view[:, 0] - centre[0]) * scale
+    screen[:, 1] = height / 2 - (view[:, 1] - centre[1]) * scale
+    screen[:, 2] = view[:, 2]
+    return screen
+
+
+def bounding_sphere(vertices: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Centre and radius enclosing a model from every view direction.
+
+    The centre is the bounding box centre, so the result is cheap and
+    stable; pass both to :func:`render_mesh` to render turntable frames at
+    one scale.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    centre = (vertices.min(axis=0) + vertices.max(axis=0)) / 2
+    radius = float(np.sqrt(((vertices - centre) ** 2).sum(axis=1).max())) if len(vertices) else 0.0
+    return centre, radius
+
+
+def _lambert(normals: np.ndarray) -> np.ndarray:
+    """Two-sided diffuse intensity of view-space normals (need not be unit length)."""
+    length = np.linalg.norm(normals, axis=1)
+    cosine = np.abs(normals @ LIGHT) / np.where(length > 0, length, 1.0)
+    return (AMBIENT + DIFFUSE * cosine).astype(np.float32)
+
+
+def _corner_shades(view: np.ndarray, faces: np.ndarray, shading: str) -> np.ndarray:
+    """Light intensity at the three corners of every face, ``(F, 3)``."""
+    corners = view[faces]
+    face_normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    if shading == 'flat':
+        return np.repeat(_lambert(face_normals)[:, None], 3, axis=1)
+
+    # Area-weighted vertex normals
+    vertex_normals = np.column_stack([
+        np.bincount(faces.ravel(), weights=np.repeat(face_normals[:, axis], 3),
+                    minlength=len(view))
+        for axis in range(3)
+    ])
+    return _lambert(vertex_normals)[faces]
+
+
+def _ramp(counts: np.ndarray) -> np.ndarray:
+    """``0 .. n-1`` for every n in ``counts``, concatenated."""
+    total = int(counts.sum())
+    return np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+
+
+def rasterize(screen: np.ndarray, faces: np.ndarray, shades: np.ndarray,
+              width: int, height: int) -> np.ndarray:
+    """
+    Z-buffer rasterization of screen-space triangles.
+
+    Barycentric weights, depth and shade are planes over the screen. For
+    every row of pixel centres a face spans, the covered column range is
+    solved from the three weight planes, so the work is proportional to
+    the pixels covered rather than to bounding boxes. Faces are processed
+    in batches of bounded size.
+
+    Args:
+        screen: ``(V, 3)`` vertex positions in pixels; z grows towards the viewer
+        faces: ``(F, 3)`` vertex indices
+        shades: ``(F, 3)`` value at each face corner, interpolated across the face
+        width: Image width in pixels
+        height: Image height in pixels
+
+    Returns:
+        ``(height, width)`` float32 array of the nearest face's value per
+        pixel, NaN where no face covers the pixel centre
+    """
+    depth = np.full(width * height, -np.inf)
+    value = np.full(width * height, np.nan, dtype=np.float32)
+
+    tri = screen[faces]
+    x, y = tri[..., 0], tri[..., 1]
+
+    def corner_min(a: np.ndarray) -> np.ndarray:
+        return np.minimum(np.minimum(a[:, 0], a[:, 1]), a[:, 2])
+
+    def corner_max(a: np.ndarray) -> np.ndarray:
+        return np.maximum(np.maximum(a[:, 0], a[:, 1]), a[:, 2])
+
+    # Pixel centres (i + 0.5) inside each bounding box
+    col0 = np.maximum(np.ceil(corner_min(x) - 0.5), 0).astype(np.int64)
+    col1 = np.minimum(np.floor(corner_max(x) - 0.5), width - 1).astype(np.int64)
+    row0 = np.maximum(np.ceil(corner_min(y) - 0.5), 0).astype(np.int64)
+    row1 = np.minimum(np.floor(corner_max(y) - 0.5), height - 1).astype(np.int64)
+    area = (x[:, 1] - x[:, 0]) * (y[:, 2] - y[:, 0]) - (x[:, 2] - x[:, 0]) * (y[:, 1] - y[:, 0])
+    keep = np.flatnonzero((np.abs(area) > 1e-12) & (col1 >= col0) & (row1 >= row0))
+    if not len(keep):
+        return value.reshape(height, width)
+
+    x, y, area, tri, shades = x[keep], y[keep], area[keep], tri[keep], shades[keep]
+    col0, col1, row0, row1 = col0[keep], col1[keep], row0[keep], row1[keep]
+
+    # Weight of corner k at column offset u, row offset v from the first
+    # pixel centre of the bounding box: w_k = base_k + du_k * u + dv_k * v
+    origin_x, origin_y = col0 + 0.5, row0 + 0.5
+    base = np.empty((len(keep), 3))
+    du = np.empty((len(keep), 3))
+    dv = np.empty((len(keep), 3))
+    for k in range(3):
+        i, j = (k + 1) % 3, (k + 2) % 3
+        base[:, k] = ((x[:, i] - origin_x) * (y[:, j] - origin_y)
+                      - (x[:, j] - origin_x) * (y[:, i] - origin_y)) / area
+        du[:, k] = (y[:, i] - y[:, j]) / area
+        dv[:, k] = (x[:, j] - x[:, i]) / area
+
+    def plane(corner_values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Coefficients of a per-corner value interpolated over each face."""
+        return tuple(
+            coefficients[:, 0] * corner_values[:, 0] + coefficients[:, 1] * corner_values[:, 1]
+            + coefficients[:, 2] * corner_values[:, 2]
+            for coefficients in (base, du, dv)
+        )
+
+    depth_plane = plane(tri[..., 2])
+    shade_plane = plane(shades)
+
+    # Batches bounded by bounding box area (an upper bound on pixels emitted)
+    rows = row1 - row0 + 1
+    bound = np.cumsum(rows * (col1 - col0 + 1))
+    cuts = np.searchsorted(bound, np.arange(BATCH_PIXELS, bound[-1], BATCH_PIXELS))
+    edges = np.unique(np.concatenate([[0], cuts, [len(keep)]]))
+
+    for start, stop in zip(edges[:-1], edges[1:]):
+        # One entry per face and row
+        face = np.repeat(np.arange(start, stop), rows[start:stop])
+        v = _ramp(rows[start:stop]).astype(np.float64)
+        low = np.zeros(len(face))
+        high = (col1 - col0)[face].astype(np.float64)
+        for k in range(3):
+            offset = base[face, k] + dv[face, k] * v + _EDGE_EPS
+            slope = du[face, k]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                limit = -offset / slope
+            low = np.where(slope > 0, np.maximum(low, limit), low)
+            high = np.where(slope < 0, np.minimum(high, limit), high)
+            high = np.where((slope == 0) & (offset < 0), -1.0, high)
+        low, high = np.ceil(low), np.floor(high)
+        count = np.maximum(high - low + 1, 0).astype(np.int64)
+        if not count.any():
+            continue
+
+        # One entry per covered pixel
+        face = np.repeat(face, count)
+        cv = np.repeat(v, count)
+        cu = np.repeat(low, count) + _ramp(count)
+        d = depth_plane[0][face] + depth_plane[1][face] * cu + depth_plane[2][face] * cv
+        pix = (row0[face] + cv.astype(np.int64)) * width + col0[face] + cu.astype(np.int64)
+        np.maximum.at(depth, pix, d)
+        # Candidates that won their pixel (equal depths: either may win)
+        front = d == depth[pix]
+        face, cu, cv, pix = face[front], cu[front], cv[front], pix[front]
+        value[pix] = (shade_plane[0][face] + shade_plane[1][face] * cu
+                      + shade_plane[2][face] * cv)
+
+    return value.reshape(height, width)
+
+
+def render_mesh(vertices: np.ndarray, faces: np.ndarray, size: Tuple[int, int],
+                azimuth: float = 45.0, elevation: float = 45.0,
+                color: str = '#6c757d', background: str = '#ffffff',
+                shading: str = 'flat', supersample: int = 2,
+                centre: Optional[np.ndarray] = None,
+                radius: Optional[float] = None) -> Image.Image:
+    """
+    Render a triangle mesh, scaled to fill the image.
+
+    Args:
+        vertices: ``(V, 3)`` vertex positions
+        faces: ``(F, 3)`` vertex indices
+        size: Output size (width, height)
+        azimuth: Camera azimuth in degrees
+        elevation: Camera elevation in degrees
+        color: Surface colour
+        background: Background colour
+        shading: ``flat`` (per face) or ``smooth`` (per vertex)
+        supersample: Samples per output pixel along each axis
+        centre: With ``radius``, the model point at the image centre
+        radius: Radius filling the image, instead of fitting this view
+            (see :func:`bounding_sphere`)
+
+    Returns:
+        RGB image
+    """
+    if shading not in SHADING_MODES:
+        raise ValueError(f"Unknown shading mode: {shading}")
+    width, height = size
+    factor = max(1, int(supersample))
+    full_width, full_height = width * factor, height * factor
+
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    if radius is not None and centre is not None:
+        vertices = vertices - np.asarray(centre, dtype=np.float64)
+    view = vertices @ view_basis(azimuth, elevation).T
+    screen = _fit_to_screen(view, full_width, full_height, radius)
+    shades = _corner_shades(view, faces, shading)
+    light = rasterize(screen, faces, shades, full_width, full_height)
+
+    rgb = np.empty((full_height, full_width, 3), dtype=np.float32)
+    rgb[:] = ImageColor.getrgb(background)[:3]
+    covered = ~np.isnan(light)
+    rgb[covered] = np.asarray(ImageColor.getrgb(color)[:3], dtype=np.float32) * light[covered, None]
+
+    image = Image.fromarray(np.clip(rgb + 0.5, 0, 255).astype(np.uint8), 'RGB')
+    return image.reduce(factor) if factor > 1 else image
+
+
+def render_polyline(points: np.ndarray, size: Tuple[int, int],
+                    azimuth: float = -60.0, elevation: float = 30.0,
+                    color: str = '#007bff', background: str = '#ffffff',
+                    line_width: float = 1.0, supersample: int = 2) -> Optional[Image.Image]:
+    """
+    Render 3D polylines, scaled to fill the image.
+
+    Points are drawn in order, so later segments (upper layers of a
+    toolpath) cover earlier ones.
+
+    Args:
+        points: ``(n, 3)`` points; rows of NaN separate polylines
+        size: Output size (width, height)
+        azimuth: Camera azimuth in degrees
+        elevation: Camera elevation in degrees
+        color: Line colour
+        background: Background colour
+        line_width: Line width in output pixels
+        supersample: Samples per output pixel along each axis
+
+    Returns:
+        RGB image, or None if there are no points
+    """
+    points = np.asarray(points, dtype=np.float64)
+    valid = ~np.isnan(points).any(axis=1)
+    if not valid.any():
+        return None
+    width, height = size
+    factor = max(1, int(supersample))
+
+    screen = np.full((len(points), 2), np.nan)
+    view = points[valid] @ view_basis(azimuth, elevation).T
+    screen[valid] = _fit_to_screen(view, width * factor, height * factor)[:, :2]
+
+    image = Image.new('RGB', (width * factor, height * factor), background)
+    draw = ImageDraw.Draw(image)
+    stroke = max(1, int(round(line_width * factor)))
+    breaks = np.flatnonzero(~valid)
+    for run in np.split(screen, breaks):
+        run = run[~np.isnan(run).any(axis=1)]
+        if len(run) > 1:
+            draw.line(run.ravel().tolist(), fill=color, width=stroke)
+        elif len(run) == 1:
+            draw.point(run.ravel().tolist(), fill=color)
+    return image.reduce(factor) if factor > 1 else image
@@ -0,0 +1,164 @@
+"""
+Streaming statistics of binary STL files.
+
+A binary STL is an 80-byte header, a little-endian uint32 triangle count and
+one 50-byte record per triangle (normal, three vertices, attribute word).
+The records are memory-mapped and reduced in fixed-size chunks, so bounds,
+signed volume, surface area and the area-weighted centroid of any file need
+only ``CHUNK_TRIANGLES`` records in memory at a time.
+
+Vertex count and watertightness need the mesh topology: vertices are merged
+by exact coordinates and every edge must be shared by two triangles. That
+costs memory proportional to the mesh, so it is only computed for meshes up
+to ``TOPOLOGY_MAX_TRIANGLES``; larger meshes report an estimated vertex count
+and unknown watertightness.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+HEADER_BYTES = 84
+RECORD_DTYPE = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3, 3)),
+    ('attributes', '<u2'),
+])
+
+CHUNK_TRIANGLES = 1 << 20
+TOPOLOGY_MAX_TRIANGLES = 2_000_000
+
+
+@dataclass
+class STLStatistics:
+    """Geometry of a triangle soup."""
+
+    triangle_count: int
+    bounds: np.ndarray           # [[min_x, min_y, min_z], [max_x, max_y, max_z]]
+    volume: float                # signed; positive for outward-facing normals
+    area: float
+    centroid: np.ndarray         # area-weighted mean of the triangle centres
+    vertex_count: int
+    vertex_count_estimated: bool
+    is_watertight: Optional[bool]
+
+    @property
+    def extents(self) -> np.ndarray:
+        return self.bounds[1] - self.bounds[0]
+
+
+def binary_triangle_count(path: Union[str, Path]) -> Optional[int]:
+    """
+    Triangle count of a binary STL, or None if the file is not one.
+
+    A file is binary when its size matches the count in its header; ASCII
+    files (which usually start with ``solid``, as some binary headers do too)
+    fail the check.
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    if size < HEADER_BYTES:
+        return None
+    with open(path, 'rb') as f:
+        f.seek(80)
+        count = int.from_bytes(f.read(4), 'little')
+    if size != HEADER_BYTES + count * RECORD_DTYPE.itemsize:
+        return None
+    return count
+
+
+def open_triangles(path: Union[str, Path], count: int) -> np.ndarray:
+    """Read-only memory map of the triangle records of a binary STL."""
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER_BYTES, shape=(count,))
+
+
+def mesh_topology(vertices: np.ndarray) -> Tuple[int, bool]:
+    """
+    Unique vertex count and watertightness of a triangle soup.
+
+    Args:
+        vertices: (triangles, 3, 3) float32 corner coordinates
+
+    Returns:
+        Number of distinct vertices, and whether every edge is shared by
+        exactly two triangles
+    """
+    # Merge by exact bits (+0.0 folds -0.0 into 0.0); sort on two 64/32-bit keys
+    corners = np.ascontiguousarray(vertices.reshape(-1, 3) + np.float32(0)).view(np.uint32)
+    xy = (corners[:, 0].astype(np.uint64) << np.uint64(32)) | corners[:, 1]
+    order = np.lexsort((corners[:, 2], xy))
+    xy, z = xy[order], corners[order, 2]
+    first = np.empty(len(order), dtype=bool)
+    first[:1] = True
+    first[1:] = (xy[1:] != xy[:-1]) | (z[1:] != z[:-1])
+    del xy, z
+    ids = np.empty(len(order), dtype=np.uint64)
+    ids[order] = np.cumsum(first) - 1
+    vertex_count = int(first.sum())
+    del order, first
+
+    faces = ids.reshape(-1, 3)
+    a = faces
+    b = np.roll(faces, -1, axis=1)
+    edges = (np.minimum(a, b) << np.uint64(32)) | np.maximum(a, b)
+    _, counts = np.unique(edges.ravel(), return_counts=True)
+    return vertex_count, bool(len(counts)) and bool((counts == 2).all())
+
+
+def analyze_binary_stl(path: Union[str, Path],
+                       chunk_triangles: int = CHUNK_TRIANGLES,
+                       topology_max_triangles: int = TOPOLOGY_MAX_TRIANGLES) -> STLStatistics:
+    """
+    Statistics of a binary STL file.
+
+    Args:
+        path: File path
+        chunk_triangles: Records reduced per step
+        topology_max_triangles: Largest mesh whose topology is computed
+
+    Returns:
+        File statistics
+
+    Raises:
+        ValueError: If the file is not a binary STL
+    """
+    count = binary_triangle_count(path)
+    if count is None:
+        raise ValueError(f"Not a binary STL file: {path}")
+    records = open_triangles(path, count)
+
+    lo = np.full(3, np.inf)
+    hi = np.full(3, -np.inf)
+    volume = 0.0
+    area = 0.0
+    weighted_centres = np.zeros(3)
+    for start in range(0, count, chunk_triangles):
+        v = records['vertices'][start:start + chunk_triangles].astype(np.float64)
+        v0, v1, v2 = v[:, 0], v[:, 1], v[:, 2]
+        lo = np.minimum(lo, v.min(axis=(0, 1)))
+        hi = np.maximum(hi, v.max(axis=(0, 1)))
+        volume += float(np.einsum('ij,ij->', v0, np.cross(v1, v2))) / 6
+        areas = np.linalg.norm(np.cross(v1 - v0, v2 - v0), axis=1) / 2
+        area += float(areas.sum())
+        weighted_centres += areas @ (v0 + v1 + v2) / 3
+
+    if count <= topology_max_triangles:
+        vertex_count, watertight = mesh_topology(records['vertices'][:])
+        estimated = False
+    else:
+        # Euler characteristic of a closed genus-0 mesh: V = F / 2 + 2
+        vertex_count, watertight, estimated = count // 2 + 2, None, True
+
+    return STLStatistics(
+        triangle_count=count,
+        bounds=np.array([lo, hi]) if count else np.zeros((2, 3)),
+        volume=volume,
+        area=area,
+        centroid=weighted_centres / area if area > 0 else (lo + hi) / 2 if count else np.zeros(3),
+        vertex_count=vertex_count,
+        vertex_count_estimated=estimated,
+        is_watertight=watertight,
+    )
@@ -66,6 +66,66 @@ class TestFileAPI:
         assert response.content == b"3mf bytes"
         assert 'benchy.3mf' in response.headers['content-disposition']
 
+    def test_analyze_gcode_runs_in_analysis_worker(self, client, test_app, tmp_path):
+        """Test POST /api/v1/files/{file_id}/analyze/gcode parses through the analysis executor"""
+        from src.utils.dependencies import get_file_service
+
+        gcode = tmp_path / "benchy.gcode"
+        gcode.write_text("; layer_height = 0.2\nG1 X1 Y1\n")
+        mock_file_service = Mock()
+        mock_file_service.get_file_by_id = AsyncMock(return_value={
+            'id': 'file_001', 'filename': 'benchy.gcode', 'file_path': str(gcode)
+        })
+        mock_file_service.database.update_file = AsyncMock()
+        test_app.dependency_overrides[get_file_service] = lambda: mock_file_service
+        executor = Mock()
+        executor.parse_file = AsyncMock(return_value={
+            'success': True, 'metadata': {'layer_height': 0.2}, 'thumbnails': []
+        })
+
+        with patch('src.api.routers.files.get_analysis_executor', return_value=executor):
+            response = client.post("/api/v1/files/file_001/analyze/gcode")
+
+        assert response.status_code == 200
+        assert response.json()['data']['metadata'] == {'layer_height': 0.2}
+        executor.parse_file.assert_awaited_once_with(str(gcode))
+        mock_file_service.database.update_file.assert_awaited_once_with(
+            'file_001', {'metadata': {'layer_height': 0.2}})
+
+    def test_sized_thumbnail_answers_304_for_matching_etag(self, client, test_app, tmp_path):
+        """Test GET /api/v1/files/{file_id}/thumbnail?size= serves the stored derivative by hash"""
+        import base64
+        import io
+        from PIL import Image
+        from src.services.thumbnail_store import ThumbnailStore
+        from src.utils.dependencies import get_file_service
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (300, 200), (200, 40, 40)).save(buffer, format='PNG')
+        store = ThumbnailStore(tmp_path / "thumbnails")
+        digest = store.put(buffer.getvalue(), 'png')
+        store.generate_derivatives(digest)
+        mock_file_service = Mock()
+        mock_file_service.get_file_by_id = AsyncMock(return_value={
+            'id': 'file_001', 'has_thumbnail': True, 'thumbnail_format': 'png',
+            'thumbnail_data': base64.b64encode(buffer.getvalue()).decode(),
+            'thumbnail_hash': digest,
+        })
+        mock_file_service.thumbnail.get_thumbnail_variant = Mock(side_effect=store.select)
+        test_app.dependency_overrides[get_file_service] = lambda: mock_file_service
+
+        response = client.get("/api/v1/files/file_001/thumbnail?size=64",
+                               headers={'Accept': 'image/webp'})
+        assert response.status_code == 200
+        assert response.headers['content-type'] == 'image/webp'
+        assert response.headers['etag'] == f'"{digest}-64.webp"'
+        mock_file_service.thumbnail.get_thumbnail_variant.assert_called_with(digest, 64, 'image/webp')
+
+        cached = client.get("/api/v1/files/file_001/thumbnail?size=64",
+                            headers={'Accept': 'image/webp', 'If-None-Match': response.headers['etag']})
+        assert cached.status_code == 304
+        assert cached.content == b''
+
     def test_get_file_content_not_local(self, client, test_app):
         """Test file content returns 404 when the file is not on disk"""
         from src.utils.dependencies import get_file_service
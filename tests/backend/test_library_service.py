@@ -10,6 +10,7 @@ from pathlib import Path
 from datetime import datetime
 from unittest.mock import Mock, AsyncMock, patch
 import json
+import zipfile
 
 
 # Sample file content for testing
@@ -73,6 +74,9 @@ def mock_library_repo():
     repo.create_file_source = AsyncMock(return_value=True)
     repo.delete_file = AsyncMock(side_effect=delete_file)
     repo.delete_file_sources = AsyncMock(return_value=True)
+    repo.list_plates = AsyncMock(return_value=[])
+    repo.delete_plates = AsyncMock(return_value=True)
+    repo.delete_layer_stats = AsyncMock(return_value=True)
     repo.list_files = AsyncMock(return_value=([], {'page': 1, 'total_items': 0}))
     repo.get_stats = AsyncMock(return_value={})
     return repo
@@ -89,6 +93,7 @@ def mock_config_service(temp_library_path):
     config.settings.library_auto_extract_metadata = True
     config.settings.library_checksum_algorithm = 'sha256'
     config.settings.library_preserve_originals = True
+    config.settings.library_processing_workers = 2
     return config
 
 
@@ -255,6 +260,22 @@ class TestFileAddition:
         assert result['filename'] == 'test_input.3mf'
         mock_library_repo.create_file.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_sliced_3mf_role_comes_from_member_list(self, library_service, temp_library_path,
+                                                          mock_library_repo):
+        """Test a 3MF is classified from its member names, without a full parse"""
+        sliced = temp_library_path / 'sliced.3mf'
+        with zipfile.ZipFile(sliced, 'w') as archive:
+            archive.writestr('3D/3dmodel.model', '<model/>')
+            archive.writestr('Metadata/plate_1.gcode', 'G28\n')
+        library_service.analysis_executor = Mock()
+        library_service.analysis_executor.parse_file = AsyncMock()
+
+        await library_service.add_file_to_library(sliced, {'type': 'upload'}, copy_file=True)
+
+        library_service.analysis_executor.parse_file.assert_not_awaited()
+        assert mock_library_repo.create_file.call_args.args[0]['role'] == 'printfile'
+
     @pytest.mark.asyncio
     async def test_add_duplicate_file_adds_source(self, library_service, sample_test_file, mock_library_repo):
         """Test that adding duplicate file creates new record marked as duplicate"""
@@ -501,6 +522,25 @@ class TestReprocessing:
         assert result is False
 
 
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('file_type', ['.3mf', '3mf', '.3MF'])
+    async def test_metadata_extraction_accepts_dotted_file_type(self, library_service,
+                                                                mock_library_repo, file_type):
+        """Test stored file types like '.3mf' are parsed (they were skipped as unsupported)"""
+        mock_library_repo._created_files[SAMPLE_FILE_CHECKSUM] = {
+            'id': 'file-uuid', 'checksum': SAMPLE_FILE_CHECKSUM, 'filename': 'test.3mf',
+            'library_path': 'models/test.3mf', 'file_type': file_type,
+        }
+        library_service.analysis_executor = Mock()
+        library_service.analysis_executor.parse_file = AsyncMock(return_value={
+            'success': False, 'error': 'corrupt', 'thumbnails': [], 'metadata': {},
+            'needs_generation': False,
+        })
+
+        await library_service._extract_metadata_async('file-uuid', SAMPLE_FILE_CHECKSUM)
+
+        library_service.analysis_executor.parse_file.assert_awaited_once()
+
 class TestStatistics:
     """Test library statistics"""
 
@@ -0,0 +1,171 @@
+"""
+Tests for list-query column projections.
+
+List endpoints render cards, so repositories leave heavy columns (thumbnail
+blobs, JSON sources/metadata, search index) out of list queries unless a
+caller names them in ``include``.
+"""
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.api.routers import library as library_router
+from src.database.database import Database
+from src.database.repositories import FileRepository, IdeaRepository, LibraryRepository
+from src.utils.errors import PrinternizerError, printernizer_exception_handler
+
+PAGE_SIZE = 50
+
+
+@pytest.fixture
+async def db(temp_database):
+    database = Database(temp_database)
+    await database.initialize()
+    try:
+        yield database
+    finally:
+        await database.close()
+
+
+async def _seed_library(repo, count=PAGE_SIZE):
+    """Library rows shaped like real ones: legacy inline thumbnail, rich JSON."""
+    sources = json.dumps([
+        {'type': 'printer', 'printer_id': f'printer_{i}', 'printer_name': f'Printer {i}',
+         'original_path': f'/cache/some/long/path/model_{i}.3mf',
+         'discovered_at': datetime.now().isoformat()}
+        for i in range(20)
+    ])
+    for i in range(count):
+        checksum = f"{i:064x}"
+        await repo.create_file({
+            'id': f'file-{i}',
+            'checksum': checksum,
+            'filename': f'model_{i}.3mf',
+            'library_path': f'models/model_{i}.3mf',
+            'file_size': 1024,
+            'file_type': '.3mf',
+            'sources': sources,
+            'added_to_library': datetime.now().isoformat(),
+            'search_index': ' '.join(f'model_{i} keyword{k}' for k in range(500)),
+        })
+        await repo.update_file(checksum, {
+            'has_thumbnail': 1,
+            'thumbnail_data': 'A' * 60_000,
+            'metadata': json.dumps({'plate': [{'object': k, 'name': 'x' * 40} for k in range(200)]}),
+        })
+
+
+async def test_library_list_leaves_out_heavy_columns(db):
+    repo = LibraryRepository(db._connection)
+    await _seed_library(repo, count=2)
+
+    files, pagination = await repo.list_files()
+
+    assert pagination['total_items'] == 2
+    for column in LibraryRepository.LIST_OPTIONAL_COLUMNS:
+        assert column not in files[0]
+    assert files[0]['filename'].startswith('model_')
+    assert files[0]['has_thumbnail'] == 1
+
+    files, _ = await repo.list_files(include=['sources'])
+    assert json.loads(files[0]['sources'])[0]['type'] == 'printer'
+    assert 'thumbnail_data' not in files[0]
+
+    # The manufacturer JOIN path uses the same projection
+    files, _ = await repo.list_files({'manufacturer': 'bambu_lab'})
+    assert files == []
+
+
+async def test_legacy_database_list_library_files_uses_projection(db):
+    await _seed_library(LibraryRepository(db._connection), count=1)
+
+    files, _ = await db.list_library_files()
+    assert 'thumbnail_data' not in files[0]
+
+    files, _ = await db.list_library_files(include=LibraryRepository.LIST_OPTIONAL_COLUMNS)
+    assert files[0]['thumbnail_data']
+
+
+async def test_file_and_idea_lists_leave_out_heavy_columns(db):
+    await db._connection.execute(
+        """INSERT INTO files (id, printer_id, filename, status, source, has_thumbnail,
+                              thumbnail_data, metadata)
+           VALUES ('p1_a.gcode', 'p1', 'a.gcode', 'available', 'printer', 1, ?, ?)""",
+        ('A' * 1000, json.dumps({'layers': 10}))
+    )
+    await db._connection.commit()
+
+    files = await FileRepository(db._connection).list()
+    assert files[0]['has_thumbnail'] == 1
+    assert 'thumbnail_data' not in files[0] and 'metadata' not in files[0]
+
+    legacy = await db.list_files(include=FileRepository.LIST_OPTIONAL_COLUMNS)
+    assert legacy[0]['thumbnail_data'] and legacy[0]['metadata'] == {'layers': 10}
+
+    ideas = IdeaRepository(db._connection)
+    await ideas.create({'id': 'idea-1', 'title': 'Vase', 'description': 'Tall vase',
+                        'material_notes': 'PETG', 'metadata': json.dumps({'likes': 3})})
+    listed = await ideas.list()
+    assert listed[0]['description'] == 'Tall vase'
+    assert 'metadata' not in listed[0] and 'material_notes' not in listed[0]
+    listed = await ideas.list(include=['metadata'])
+    assert json.loads(listed[0]['metadata']) == {'likes': 3}
+
+
+@pytest.fixture
+async def library_client(db):
+    class _Service:
+        def __init__(self, repo):
+            self.repo = repo
+
+        async def list_files(self, filters, page, limit, include=None):
+            return await self.repo.list_files(filters, page, limit, include=include)
+
+    service = _Service(LibraryRepository(db._connection))
+    app = FastAPI()
+    app.add_exception_handler(PrinternizerError, printernizer_exception_handler)
+    app.include_router(library_router.router, prefix="/api/v1")
+    app.dependency_overrides[library_router.get_library_service] = lambda: service
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client, service.repo
+
+
+async def test_library_endpoint_include_parameter(library_client):
+    client, repo = library_client
+    await _seed_library(repo, count=1)
+
+    plain = (await client.get("/api/v1/library/files")).json()
+    assert plain['files'][0]['sources'] is None
+
+    full = (await client.get("/api/v1/library/files?include=sources")).json()
+    assert json.loads(full['files'][0]['sources'])
+
+    bad = await client.get("/api/v1/library/files?include=thumbnail_data")
+    assert bad.status_code == 400
+
+
+async def test_library_page_payload(library_client):
+    """A 50-item page leaves the heavy columns out and stays small."""
+    client, repo = library_client
+    await _seed_library(repo)
+
+    projected_rows, _ = await repo.list_files(page=1, limit=PAGE_SIZE)
+    full_rows, _ = await repo.list_files(page=1, limit=PAGE_SIZE,
+                                         include=LibraryRepository.LIST_OPTIONAL_COLUMNS)
+    assert len(projected_rows) == len(full_rows) == PAGE_SIZE
+    for column in LibraryRepository.LIST_OPTIONAL_COLUMNS:
+        assert projected_rows[0].get(column) is None
+        assert full_rows[0][column] is not None
+
+    projected_bytes = len(json.dumps(projected_rows, default=str))
+    full_bytes = len(json.dumps(full_rows, default=str))
+    assert projected_bytes * 20 < full_bytes
+
+    response = await client.get(f"/api/v1/library/files?limit={PAGE_SIZE}")
+    assert response.status_code == 200
+    assert len(response.json()['files']) == PAGE_SIZE
+    # ~1 KB per card; the seeded sources JSON alone is ~3 KB per row
+    assert len(response.content) < PAGE_SIZE * 2048
@@ -850,4 +850,55 @@ class TestMemoryAndResourceUsage(PerformanceTestBase):
         assert execution_times[5] > execution_times[1] * 0.5, \
             "Medium complexity should take longer than low complexity"
         assert execution_times[10] > execution_times[5] * 0.5, \
-            "High complexity should take longer than medium complexity"
\ No newline at end of file
+            "High complexity should take longer than medium complexity"
+
+class TestGcodeMetadataPerformance(PerformanceTestBase):
+    """Benchmark single-pass comment scanning against per-pattern matching"""
+
+    def best_time_ms(self, func, runs=5):
+        """Fastest of several runs, to keep one slow run from deciding the comparison"""
+        metrics = [self.measure_performance(func) for _ in range(runs)]
+        assert all(m['success'] for m in metrics), metrics[0]['error']
+        return min(m['execution_time_ms'] for m in metrics), metrics[0]['result']
+
+    @pytest.mark.benchmark
+    def test_comment_scanner_vs_line_loop(self):
+        """Test the single pass against line-by-line, pattern-by-pattern matching"""
+        from src.utils.gcode_metadata import parse_metadata_from_text
+        from tests.services.test_gcode_metadata import _line_loop_reference
+
+        # A large G-code header with the statistics at its end
+        content = "".join(f"G1 X{i % 200} Y{i % 150} E0.02\n" for i in range(20000))
+        content += "; filament used [g] = 3.7\n; estimated printing time (normal mode) = 1h 2m 3s\n"
+
+        scan_ms, md = self.best_time_ms(lambda: parse_metadata_from_text(content))
+        loop_ms, reference = self.best_time_ms(lambda: _line_loop_reference(content))
+
+        print(f"\nG-code metadata: single pass {scan_ms:.1f} ms, line loop {loop_ms:.1f} ms "
+              f"({loop_ms / scan_ms:.1f}x)")
+        assert (md.estimated_print_time, md.filament_used) == reference
+        assert scan_ms < loop_ms  # Typically over 20x faster
+
+    @pytest.mark.benchmark
+    def test_bambu_comment_lookups_vs_per_key_regexes(self):
+        """Test dictionary lookups against one regex search per metadata key"""
+        from src.services.bambu_parser import BambuParser
+        from src.utils.gcode_metadata import scan_comment_metadata
+        from tests.services.test_gcode_metadata import _bambu_like_gcode_comments, _regex_per_key_metadata
+
+        parser = BambuParser()
+        content = _bambu_like_gcode_comments(config_keys=5000)
+        tables = (parser.METADATA_KEYS, parser.FILAMENT_KEYS, parser.ADVANCED_METADATA_KEYS)
+
+        def lookups():
+            comments = scan_comment_metadata(content)
+            return {key: value for table in tables
+                    for key, value in parser._lookup_comment_values(comments, table)}
+
+        scan_ms, found = self.best_time_ms(lookups)
+        regex_ms, reference = self.best_time_ms(lambda: _regex_per_key_metadata(content))
+
+        print(f"\nBambu metadata: single pass {scan_ms:.1f} ms, per-key regexes {regex_ms:.1f} ms "
+              f"({regex_ms / scan_ms:.1f}x)")
+        # Report only: the margin is small, so a busy machine could invert it
+        assert found == reference
@@ -0,0 +1,149 @@
+"""
+Tests for WebSocket fan-out through per-client send queues.
+"""
+import asyncio
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.routers import websocket as websocket_router
+from src.api.routers.websocket import ConnectionManager
+
+
+class FakeWebSocket:
+    """WebSocket whose sends can be held back by the test."""
+
+    def __init__(self, blocked: bool = False):
+        self.sent = []
+        self.closed_with = None
+        self.open = asyncio.Event()
+        if not blocked:
+            self.open.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await self.open.wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def status(printer_id, progress):
+    return {"type": "printer_status", "printer_id": printer_id, "data": {"progress": progress}}
+
+
+@pytest.mark.asyncio
+async def test_slow_client_does_not_delay_others():
+    manager = ConnectionManager()
+    slow, fast = FakeWebSocket(blocked=True), FakeWebSocket()
+    await manager.connect(slow)
+    await manager.connect(fast)
+
+    # Returns at once although one client is not reading
+    await asyncio.wait_for(manager.broadcast({"type": "job_update", "job_id": "1"}), 0.1)
+    await settle()
+
+    assert fast.sent == [{"type": "job_update", "job_id": "1"}]
+    assert slow.sent == []
+
+    slow.open.set()
+    await settle()
+    assert slow.sent == [{"type": "job_update", "job_id": "1"}]
+    manager.disconnect(slow)
+    manager.disconnect(fast)
+
+
+@pytest.mark.asyncio
+async def test_queued_printer_status_is_coalesced_to_latest():
+    manager = ConnectionManager()
+    client = FakeWebSocket(blocked=True)
+    await manager.connect(client)
+    manager.subscribe_to_printer(client, "printer_001")
+
+    # First status is in flight, the rest queue up behind it
+    for progress in range(5):
+        await manager.send_to_printer_subscribers("printer_001", status("printer_001", progress),
+                                                  topic="printer_status:printer_001")
+        await settle()
+    await manager.broadcast({"type": "job_update", "job_id": "1"})
+    await manager.send_to_printer_subscribers("printer_001", status("printer_001", 5),
+                                              topic="printer_status:printer_001")
+
+    assert manager.get_stats()['queued_messages'] == 2
+    client.open.set()
+    await settle()
+
+    assert client.sent == [
+        status("printer_001", 0),
+        status("printer_001", 5),       # Keeps the place of the first queued status
+        {"type": "job_update", "job_id": "1"},
+    ]
+    assert manager.get_stats()['messages_coalesced'] == 4
+    manager.disconnect(client)
+
+
+@pytest.mark.asyncio
+async def test_client_is_disconnected_when_queue_overflows():
+    manager = ConnectionManager()
+    client = FakeWebSocket(blocked=True)
+    await manager.connect(client)
+    manager.subscribe_to_printer(client, "printer_001")
+    manager.clients[client].max_queue = 3
+
+    for i in range(5):
+        await manager.broadcast({"type": "job_update", "job_id": str(i)})
+        await settle()
+
+    assert client not in manager.clients
+    assert client not in manager.printer_subscriptions["printer_001"]
+    assert client.closed_with == 1013
+    assert manager.get_stats() == {'clients': 0, 'queued_messages': 0, 'max_queue_depth': 0,
+                                   'messages_sent': 0, 'messages_coalesced': 0}
+
+
+@pytest.mark.asyncio
+async def test_client_is_disconnected_when_send_times_out():
+    manager = ConnectionManager()
+    stalled, healthy = FakeWebSocket(blocked=True), FakeWebSocket()
+    await manager.connect(stalled)
+    await manager.connect(healthy)
+    manager.clients[stalled].send_timeout = 0.05
+
+    await manager.broadcast({"type": "job_update", "job_id": "1"})
+    await asyncio.sleep(0.1)
+    await settle()
+
+    assert stalled not in manager.clients
+    assert stalled.closed_with == 1013
+    assert healthy in manager.clients
+    manager.disconnect(healthy)
+
+
+def test_endpoint_replies_through_send_queue():
+    app = FastAPI()
+    app.include_router(websocket_router.router, prefix="/ws")
+    app.state.event_service = MagicMock()
+
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws") as ws:
+            ws.send_text(json.dumps({"type": "ping"}))
+            assert json.loads(ws.receive_text()) == {"type": "pong"}
+
+            ws.send_text(json.dumps({"type": "subscribe_printer", "printer_id": "printer_001"}))
+            assert json.loads(ws.receive_text()) == {"type": "subscribed", "printer_id": "printer_001"}
+
+            ws.send_text("not json")
+            assert json.loads(ws.receive_text())["message"] == "Invalid JSON format"
+
+    assert websocket_router.manager.clients == {}
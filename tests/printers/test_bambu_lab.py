@@ -179,7 +179,7 @@ class TestBambuLabPrinterConnection:
         assert result is True
         assert printer.is_connected is True
         assert printer.bambu_client is not None
-        mock_client.connect.assert_called_once()
+        mock_client.mqtt_start.assert_called_once()
 
     @pytest.mark.skip(reason="Mock not correctly applied due to module-level import of BambuClient")
     @patch('src.printers.bambu_lab.BAMBU_API_AVAILABLE', True)
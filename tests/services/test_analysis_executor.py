@@ -0,0 +1,190 @@
+"""
+Tests for the process-pool analysis executor.
+"""
+import asyncio
+import os
+import pickle
+import time
+from enum import Enum
+
+import pytest
+
+from src.services import analysis_executor as executor_module
+from src.services.analysis_executor import (
+    AnalysisExecutor,
+    AnalysisKind,
+    AnalysisRequest,
+    AnalysisResult,
+    run_analysis,
+)
+
+
+GCODE_SAMPLE = "\n".join([
+    "; generated by BambuStudio 01.09.00.70",
+    "; layer_height = 0.2",
+    "; total layer count = 120",
+    "; filament used [g] = 12.5",
+    "G28",
+    "G1 X10 Y10 E1.0",
+])
+
+
+@pytest.fixture
+def gcode_file(tmp_path):
+    path = tmp_path / "part.gcode"
+    path.write_text(GCODE_SAMPLE)
+    return path
+
+
+class _TestKind(str, Enum):
+    SLEEP = "sleep"
+    PID = "pid"
+    CRASH = "crash"
+
+
+def _sleep_handler(file_path, options):
+    time.sleep(options.get('seconds', 30))
+    return {'slept': True}
+
+
+def _pid_handler(file_path, options):
+    return {'pid': os.getpid()}
+
+
+def _crash_handler(file_path, options):
+    os._exit(3)
+
+
+def _interval_handler(file_path, options):
+    started = time.monotonic()
+    time.sleep(options.get('seconds', 0.2))
+    return {'started': started, 'finished': time.monotonic()}
+
+
+@pytest.fixture
+def forked_handlers(monkeypatch):
+    """Register test handlers; forked workers inherit the patched table."""
+    handlers = dict(executor_module._HANDLERS)
+    handlers.update({
+        _TestKind.SLEEP: _sleep_handler,
+        _TestKind.PID: _pid_handler,
+        _TestKind.CRASH: _crash_handler,
+        AnalysisKind.PREVIEW_FRAME: _interval_handler,
+    })
+    monkeypatch.setattr(executor_module, '_HANDLERS', handlers)
+
+
+@pytest.fixture
+async def fork_executor(forked_handlers):
+    executor = AnalysisExecutor(max_workers=2, task_timeout=10, start_method="fork")
+    try:
+        yield executor
+    finally:
+        await executor.shutdown()
+
+
+def _request(kind, **options):
+    return AnalysisRequest(kind=kind, file_path="unused", options=options)
+
+
+def test_request_and_result_are_picklable():
+    request = AnalysisRequest(AnalysisKind.STL, "/tmp/model.stl", {'max_lines': 10})
+    result = AnalysisResult(AnalysisKind.STL, "/tmp/model.stl", data={'success': True})
+
+    assert pickle.loads(pickle.dumps(request)) == request
+    assert pickle.loads(pickle.dumps(result)) == result
+
+
+def test_run_analysis_reports_handler_errors(tmp_path):
+    result = run_analysis(AnalysisRequest(AnalysisKind.STL, str(tmp_path / "missing.stl")))
+
+    assert result.ok
+    assert result.data['success'] is False
+
+
+async def test_parse_file_runs_in_worker_process(gcode_file):
+    executor = AnalysisExecutor(max_workers=1, task_timeout=60)
+    try:
+        result = await executor.parse_file(str(gcode_file))
+    finally:
+        await executor.shutdown()
+
+    assert result['success'] is True
+    assert result['metadata']['layer_height'] == 0.2
+    assert result['metadata']['total_layer_count'] == 120
+    assert executor.get_stats()['completed'] == 1
+
+
+async def test_workers_are_reused(fork_executor):
+    first = await fork_executor.submit(_request(_TestKind.PID))
+    second = await fork_executor.submit(_request(_TestKind.PID))
+
+    assert first.data['pid'] != os.getpid()
+    assert first.data['pid'] == second.data['pid']
+
+
+async def test_concurrency_is_bounded(fork_executor):
+    results = await asyncio.gather(*[
+        fork_executor.submit(_request(_TestKind.PID)) for _ in range(6)
+    ])
+
+    assert all(result.ok for result in results)
+    assert len({result.data['pid'] for result in results}) <= 2
+
+
+async def test_preview_frames_leave_workers_for_analysis(fork_executor):
+    assert fork_executor.background_workers == 1
+    frames = [asyncio.create_task(fork_executor.submit(
+        _request(AnalysisKind.PREVIEW_FRAME, seconds=0.5))) for _ in range(3)]
+    await asyncio.sleep(0)
+    parse = await fork_executor.submit(_request(_TestKind.PID))
+    parsed_at = time.monotonic()
+    frames = [result.data for result in await asyncio.gather(*frames)]
+
+    # Frames take one worker at a time; the file request got the other at once
+    frames.sort(key=lambda frame: frame['started'])
+    assert all(a['finished'] <= b['started'] for a, b in zip(frames, frames[1:]))
+    assert parse.ok and parsed_at < frames[1]['started']
+    assert len(fork_executor._idle) == 2
+
+
+async def test_timeout_kills_and_replaces_worker(fork_executor):
+    stuck = await fork_executor.submit(_request(_TestKind.SLEEP, seconds=30), timeout=0.5)
+    after = await fork_executor.submit(_request(_TestKind.PID))
+
+    assert stuck.timed_out is True
+    assert "timed out" in stuck.error
+    assert after.ok
+    stats = fork_executor.get_stats()
+    assert stats['timeouts'] == 1
+    assert stats['workers_replaced'] == 1
+
+
+async def test_crashed_worker_is_replaced(fork_executor):
+    crashed = await fork_executor.submit(_request(_TestKind.CRASH))
+    after = await fork_executor.submit(_request(_TestKind.PID))
+
+    assert not crashed.ok
+    assert "exited unexpectedly" in crashed.error
+    assert after.ok
+
+
+async def test_cancelled_caller_discards_worker(fork_executor):
+    task = asyncio.create_task(fork_executor.submit(_request(_TestKind.SLEEP, seconds=30)))
+    await asyncio.sleep(0.3)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert fork_executor.get_stats()['workers_replaced'] == 1
+    assert (await fork_executor.submit(_request(_TestKind.PID))).ok
+
+
+async def test_submit_after_shutdown_fails_cleanly(forked_handlers):
+    executor = AnalysisExecutor(max_workers=1, start_method="fork")
+    await executor.shutdown()
+
+    result = await executor.submit(_request(_TestKind.PID))
+
+    assert not result.ok
+    assert "shut down" in result.error
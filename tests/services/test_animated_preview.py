@@ -0,0 +1,141 @@
+"""
+Tests for animated previews: shared scale, shared palette, parallel frames.
+"""
+import asyncio
+from io import BytesIO
+
+import numpy as np
+import pytest
+
+from src.services.analysis_executor import run_analysis
+
+trimesh = pytest.importorskip("trimesh")
+Image = pytest.importorskip("PIL.Image")
+
+
+def _gif_color_tables(data: bytes):
+    """Global color table flag and the local color table flag of each frame."""
+    flags = data[10]
+    pos = 13 + (3 * (2 << (flags & 7)) if flags & 0x80 else 0)
+    local = []
+    while data[pos] != 0x3B:
+        if data[pos] == 0x21:          # extension: label, then sub-blocks
+            pos += 2
+        else:                          # image descriptor, table, LZW code size
+            packed = data[pos + 9]
+            local.append(bool(packed & 0x80))
+            pos += 11 + (3 * (2 << (packed & 7)) if packed & 0x80 else 0)
+        while data[pos]:
+            pos += data[pos] + 1
+        pos += 1
+    return bool(flags & 0x80), local
+
+
+class RecordingExecutor:
+    """Runs frame requests in threads and records them."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def render_preview_frame(self, mesh_path, size, render, timeout=None):
+        from src.services.analysis_executor import AnalysisKind, AnalysisRequest
+        self.calls.append((str(mesh_path), render))
+        result = await asyncio.to_thread(run_analysis, AnalysisRequest(
+            AnalysisKind.PREVIEW_FRAME, str(mesh_path), {'size': size, 'render': render}
+        ))
+        return result.data['frame'] if result.ok else None
+
+
+@pytest.fixture
+def executor():
+    return RecordingExecutor()
+
+
+@pytest.fixture
+def service(tmp_path, executor):
+    from src.services.preview_render_service import PreviewRenderService
+    return PreviewRenderService(cache_dir=str(tmp_path / "cache"), analysis_executor=executor)
+
+
+@pytest.fixture
+def bar(tmp_path):
+    path = tmp_path / "bar.stl"
+    trimesh.creation.box(extents=[1, 4, 1]).export(path)
+    return path
+
+
+def _rows_covered(image):
+    return int((np.asarray(image.convert('L')) < 250).any(axis=1).sum())
+
+
+def test_turntable_frames_share_one_scale(bar):
+    from src.utils.software_renderer import bounding_sphere, render_mesh
+
+    mesh = trimesh.load(bar)
+    centre, radius = bounding_sphere(mesh.vertices)
+    assert radius == pytest.approx(np.sqrt(0.5 ** 2 * 2 + 2 ** 2))
+
+    # Seen end-on (azimuth 90) the bar is short; fitted per view it fills the frame
+    heights = [_rows_covered(render_mesh(mesh.vertices, mesh.faces, (96, 96), azimuth=azimuth,
+                                         elevation=0, centre=centre, radius=radius))
+               for azimuth in (0, 90)]
+    fitted = _rows_covered(render_mesh(mesh.vertices, mesh.faces, (96, 96), azimuth=90, elevation=0))
+
+    assert heights[0] == heights[1] < fitted
+
+
+async def test_frames_render_in_parallel_from_one_lod(service, executor, bar):
+    data = await service.get_or_generate_animated_preview(str(bar), 'stl', (64, 64))
+
+    assert len(executor.calls) == 4
+    assert len({path for path, _ in executor.calls}) == 1
+    assert len({render['radius'] for _, render in executor.calls}) == 1
+    assert sorted(render['azimuth'] for _, render in executor.calls) == [0, 90, 180, 270]
+
+    gif = Image.open(BytesIO(data))
+    assert gif.format == 'GIF' and gif.n_frames == 4
+    # One palette for the whole animation: no frame carries a local table
+    assert _gif_color_tables(data) == (True, [False] * 4)
+
+    # Served from cache afterwards
+    assert await service.get_or_generate_animated_preview(str(bar), 'stl', (64, 64)) == data
+    assert len(executor.calls) == 4
+    assert service.stats['animated_renders_generated'] == 1
+    assert service.stats['animated_renders_cached'] == 1
+
+
+async def test_lod_is_kept_while_frames_render(service, executor, bar):
+    render_frame = executor.render_preview_frame
+
+    async def render_after_other_preview(mesh_path, size, render, timeout=None):
+        # Another render fills the cache while the frames are in flight
+        service.cache.max_bytes = 1
+        service.cache.put(f"other-{render['azimuth']}.png", b'png')
+        return await render_frame(mesh_path, size, render, timeout)
+
+    executor.render_preview_frame = render_after_other_preview
+
+    data = await service._generate_animation(str(bar), 'stl', (64, 64))
+
+    assert Image.open(BytesIO(data)).n_frames == 4
+    assert [name for name in service.cache.names() if name.startswith('lod/')]
+
+
+async def test_animated_webp_output(service, bar):
+    from PIL import features
+    if not features.check('webp'):
+        pytest.skip("Pillow built without WebP support")
+    service.update_config({'animation': {'format': 'webp'}})
+
+    data = await service.get_or_generate_animated_preview(str(bar), 'stl', (64, 64))
+
+    webp = Image.open(BytesIO(data))
+    assert webp.format == 'WEBP' and webp.n_frames == 4
+    assert service.animation_media_type == 'image/webp'
+    stats = service.get_statistics()
+    assert stats['cache_webp_count'] == 1 and stats['animation_format'] == 'webp'
+
+
+async def test_unsupported_type_has_no_animation(service, executor, bar):
+    assert await service._generate_animation(str(bar), 'gcode', (64, 64)) is None
+    assert executor.calls == []
@@ -0,0 +1,124 @@
+"""
+Tests for the Bambu Lab camera frame reader.
+"""
+import asyncio
+import struct
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.services.bambu_camera_reader import BambuCameraReader, build_auth_packet, read_frame
+
+JPEG = b'\xff\xd8\xff\xe0' + b'\x10' * 200 + b'\xff\xd9'
+NEXT_JPEG = b'\xff\xd8\xff\xe0' + b'\x20' * 300 + b'\xff\xd9'
+
+
+def frame_bytes(payload: bytes) -> bytes:
+    return struct.pack('<IIII', len(payload), 0, 1, 0) + payload
+
+
+class FakeCamera:
+    """Camera sessions served from in-memory streams."""
+
+    def __init__(self):
+        self.sessions = []
+        self.written = b''
+
+    async def open(self):
+        reader = asyncio.StreamReader()
+        self.sessions.append(reader)
+        writer = MagicMock()
+        writer.write.side_effect = lambda data: setattr(self, 'written', self.written + data)
+        writer.drain = MagicMock(return_value=asyncio.sleep(0))
+        writer.wait_closed = MagicMock(return_value=asyncio.sleep(0))
+        return reader, writer
+
+    def send(self, payload: bytes):
+        self.sessions[-1].feed_data(frame_bytes(payload))
+
+
+@pytest.fixture
+def camera():
+    return FakeCamera()
+
+
+@pytest.fixture
+def reader(camera):
+    reader = BambuCameraReader('192.168.1.100', '12345678', printer_id='bambu_001')
+    reader._open_connection = camera.open
+    return reader
+
+
+def test_auth_packet_layout():
+    packet = build_auth_packet('12345678')
+
+    assert len(packet) == 80
+    assert struct.unpack('<IIII', packet[:16]) == (0x40, 0x3000, 0, 0)
+    assert packet[16:48] == b'bblp'.ljust(32, b'\0')
+    assert packet[48:] == b'12345678'.ljust(32, b'\0')
+
+
+@pytest.mark.asyncio
+async def test_read_frame_uses_length_prefix():
+    stream = asyncio.StreamReader()
+    stream.feed_data(frame_bytes(JPEG) + frame_bytes(JPEG[::-1]))
+
+    assert await read_frame(stream) == JPEG
+    assert await read_frame(stream) == JPEG[::-1]
+
+    stream.feed_data(struct.pack('<IIII', 0, 0, 0, 0))
+    with pytest.raises(ValueError):
+        await read_frame(stream)
+
+
+@pytest.mark.asyncio
+async def test_snapshots_are_served_from_one_session(reader, camera):
+    pending = asyncio.create_task(reader.get_frame())
+    await asyncio.sleep(0.01)
+    camera.send(JPEG)
+
+    assert await pending == JPEG
+    assert camera.written == build_auth_packet('12345678')
+
+    # Later snapshots reuse the latest frame; invalid payloads are skipped
+    camera.send(b'not a jpeg')
+    await asyncio.sleep(0.01)
+    assert await reader.get_frame() == JPEG
+    assert len(camera.sessions) == 1
+
+    await reader.close()
+    assert not reader.running
+
+
+@pytest.mark.asyncio
+async def test_frames_keeps_session_open_and_idle_reader_closes(reader, camera):
+    reader.idle_timeout = 0
+    frames = reader.frames()
+    first = asyncio.create_task(frames.__anext__())
+    await asyncio.sleep(0.01)
+    camera.send(JPEG)
+    assert await first == JPEG
+
+    second = asyncio.create_task(frames.__anext__())
+    await asyncio.sleep(0.01)
+    camera.send(NEXT_JPEG)
+    assert await second == NEXT_JPEG
+    assert reader.running
+
+    # Without stream consumers the session ends at the next frame
+    await frames.aclose()
+    camera.send(JPEG)
+    await asyncio.sleep(0.01)
+    assert not reader.running
+    assert reader.frames_received == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_connection_does_not_stall_snapshot(reader):
+    async def refuse():
+        raise ConnectionRefusedError("refused")
+
+    reader._open_connection = refuse
+
+    assert await asyncio.wait_for(reader.get_frame(), 1) is None
+    await reader.close()
@@ -0,0 +1,196 @@
+"""
+Tests for BambuParser G-code extraction (header/footer comment scanning, binary G-code).
+"""
+import base64
+import io
+import struct
+import zlib
+
+import pytest
+from PIL import Image
+
+from src.services import bambu_parser as bambu_parser_module
+from src.services.bambu_parser import BambuParser
+
+THUMB_B64 = base64.b64encode(b'\x89PNG\r\n\x1a\n' + b'\x00' * 90).decode()
+
+
+def _thumbnail_block(width=300, height=300):
+    lines = [f"; thumbnail begin {width}x{height} {len(THUMB_B64)}"]
+    lines += [f"; {THUMB_B64[i:i + 78]}" for i in range(0, len(THUMB_B64), 78)]
+    lines.append("; thumbnail end")
+    return "\n".join(lines) + "\n"
+
+
+def _body(lines):
+    return "".join(f"G1 X{i % 200} Y{i % 150} E0.02\n" for i in range(lines))
+
+
+@pytest.fixture
+def parser():
+    parser = BambuParser()
+    # Small regions keep the test files small
+    parser.GCODE_FOOTER_BYTES = 4096
+    parser.GCODE_HEADER_CODE_LINES = 20
+    return parser
+
+
+async def test_header_and_footer_metadata_without_reading_body(parser, tmp_path, monkeypatch):
+    gcode = tmp_path / "bambu.gcode"
+    gcode.write_text(
+        "; HEADER_BLOCK_START\n"
+        "; total layer count = 120\n"
+        "; HEADER_BLOCK_END\n"
+        + _thumbnail_block()
+        + "; layer_height = 0.2\n"
+        + _body(5000)
+        # A comment in the body must not be picked up
+        + "; nozzle_diameter = 9.9\n"
+        + _body(5000)
+        + "; filament used [g] = 1.5,2.5\n"
+        "; estimated printing time (normal mode) = 1h 2m 3s\n"
+    )
+    monkeypatch.setattr(parser, '_read_gcode_comments',
+                        lambda path: pytest.fail("unexpected full scan"))
+
+    result = await parser.parse_file(str(gcode))
+
+    assert result['success'] is True
+    assert len(result['thumbnails']) == 1
+    assert result['thumbnails'][0]['data'] == THUMB_B64
+    metadata = result['metadata']
+    assert metadata['total_layer_count'] == 120
+    assert metadata['layer_height'] == 0.2
+    assert metadata['total_filament_used'] == 4.0
+    assert metadata['estimated_time'] == 3723
+    assert 'nozzle_diameter' not in metadata
+
+
+async def test_falls_back_to_full_scan_without_header_metadata(parser, tmp_path):
+    gcode = tmp_path / "plain.gcode"
+    gcode.write_text(_body(2000) + "; layer_height = 0.28\n" + _body(2000))
+
+    result = await parser.parse_file(str(gcode))
+
+    assert result['metadata']['layer_height'] == 0.28
+    assert result['needs_generation'] is True
+
+
+async def test_falls_back_when_thumbnail_is_cut_off(parser, tmp_path):
+    parser.GCODE_HEADER_MAX_BYTES = 100
+    gcode = tmp_path / "cut.gcode"
+    gcode.write_text("; layer_height = 0.2\n" + _thumbnail_block() + _body(2000))
+
+    result = await parser.parse_file(str(gcode))
+
+    assert len(result['thumbnails']) == 1
+
+
+async def test_small_file_is_read_once(parser, tmp_path):
+    gcode = tmp_path / "small.gcode"
+    gcode.write_text("; layer_height = 0.16\nG28\n; total layer count = 7\r\n")
+
+    content, complete = parser._read_gcode_comment_blocks(gcode)
+
+    assert complete is True
+    assert content == "; layer_height = 0.16\n; total layer count = 7"
+
+
+def _bgcode_block(block_type, params, payload, compress=False):
+    if compress:
+        data = zlib.compress(payload)
+        header = struct.pack('<HHII', block_type, 1, len(payload), len(data))
+    else:
+        data = payload
+        header = struct.pack('<HHI', block_type, 0, len(payload))
+    block = header + params + data
+    return block + struct.pack('<I', zlib.crc32(block))
+
+
+def _ini(**values):
+    return "\n".join(f"{key}={value}" for key, value in values.items()).encode()
+
+
+def _bgcode(gcode_bytes=1024):
+    png = io.BytesIO()
+    Image.new('RGB', (16, 12), (10, 200, 10)).save(png, format='PNG')
+    qoi = io.BytesIO()
+    Image.new('RGB', (8, 6), (10, 10, 200)).save(qoi, format='QOI')
+    ini = struct.pack('<H', 0)
+    return b''.join([
+        b'GCDE' + struct.pack('<IH', 1, 1),
+        _bgcode_block(0, ini, _ini(Producer='PrusaSlicer 2.7.1')),
+        _bgcode_block(3, ini, _ini(printer_model='MK4', layer_height=0.2)),
+        _bgcode_block(5, struct.pack('<HHH', 0, 16, 12), png.getvalue()),
+        _bgcode_block(5, struct.pack('<HHH', 2, 8, 6), qoi.getvalue()),
+        _bgcode_block(4, ini, _ini(**{
+            'filament used [g]': '12.5',
+            'estimated printing time (normal mode)': '1h 0m 5s',
+        })),
+        _bgcode_block(2, ini, _ini(nozzle_diameter=0.4, first_layer_height=0.25), compress=True),
+        # G-code block: heatshrink-compressed, never read by the parser
+        struct.pack('<HHII', 1, 3, gcode_bytes * 2, gcode_bytes) + struct.pack('<H', 1)
+        + b'\xaa' * gcode_bytes + b'\x00' * 4,
+    ])
+
+
+async def test_bgcode_blocks_are_decoded(parser, tmp_path):
+    bgcode = tmp_path / "part.bgcode"
+    bgcode.write_bytes(_bgcode())
+
+    result = await parser.parse_file(str(bgcode))
+
+    assert result['success'] is True
+    assert [(t['format'], t['width'], t['height']) for t in result['thumbnails']] == [
+        ('PNG', 16, 12), ('PNG', 8, 6)]
+    with Image.open(io.BytesIO(base64.b64decode(result['thumbnails'][1]['data']))) as image:
+        assert image.format == 'PNG' and image.size == (8, 6)
+    metadata = result['metadata']
+    assert metadata['generator'] == 'PrusaSlicer 2.7.1'
+    assert metadata['printer_model'] == 'MK4'
+    assert metadata['layer_height'] == 0.2
+    assert metadata['first_layer_height'] == 0.25
+    assert metadata['nozzle_diameter'] == 0.4
+    assert metadata['total_filament_used'] == 12.5
+    assert metadata['estimated_time'] == 3605
+    assert metadata['format'] == 'bgcode'
+    assert result['needs_generation'] is False
+
+
+async def test_bgcode_skips_gcode_blocks(parser, tmp_path, monkeypatch):
+    bgcode = tmp_path / "large.bgcode"
+    bgcode.write_bytes(_bgcode(gcode_bytes=5 * 1024 * 1024))
+    bytes_read = []
+
+    class CountingFile(io.FileIO):
+        def read(self, size=-1):
+            data = super().read(size)
+            bytes_read.append(len(data))
+            return data
+
+    monkeypatch.setattr(bambu_parser_module, 'open',
+                        lambda path, mode='r': CountingFile(path, 'r'), raising=False)
+
+    result = await parser.parse_file(str(bgcode))
+
+    assert result['success'] is True
+    assert result['metadata']['file_size'] > 5 * 1024 * 1024
+    assert sum(bytes_read) < 4096
+
+
+async def test_bgcode_rejects_bad_magic_and_corrupt_blocks(parser, tmp_path):
+    bad = tmp_path / "bad.bgcode"
+    bad.write_bytes(b'BGD\x00' + b'\x00' * 32)
+    result = await parser.parse_file(str(bad))
+    assert result['success'] is False
+    assert 'magic' in result['error']
+
+    data = bytearray(_bgcode())
+    # Flip a byte inside the printer metadata payload: that block is skipped
+    data[data.index(b'printer_model')] ^= 0xFF
+    corrupt = tmp_path / "corrupt.bgcode"
+    corrupt.write_bytes(bytes(data))
+    result = await parser.parse_file(str(corrupt))
+    assert result['success'] is True
+    assert 'printer_model' not in result['metadata']
+    assert len(result['thumbnails']) == 2
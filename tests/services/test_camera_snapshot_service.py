@@ -6,12 +6,15 @@ Sprint 2 Phase 2 - Feature Service Test Coverage.
 """
 import pytest
 import asyncio
+import time
+from collections import deque
 from datetime import datetime, timedelta
 from unittest.mock import MagicMock, AsyncMock, patch
 
 from src.services.camera_snapshot_service import (
     CameraSnapshotService, CachedFrame, detect_image_format
 )
+from src.constants import CameraConstants
 
 
 class TestDetectImageFormat:
@@ -482,3 +485,173 @@ class TestCameraSnapshotServiceConcurrency:
 
         # Driver should only be called once
         assert call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_fetch(self):
+        """Test concurrent cache misses are coalesced into one driver call."""
+        mock_printer_service = MagicMock()
+        mock_driver = AsyncMock()
+        release = asyncio.Event()
+
+        async def mock_take_snapshot():
+            await release.wait()
+            return b'\xff\xd8\xff\xe0' + b'\x00' * 100
+
+        mock_driver.take_snapshot = AsyncMock(side_effect=mock_take_snapshot)
+        mock_printer_service.get_printer_driver = AsyncMock(return_value=mock_driver)
+
+        service = CameraSnapshotService(mock_printer_service)
+
+        tasks = [
+            asyncio.create_task(service.get_snapshot_by_id("printer_001", source='builtin'))
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+        assert mock_driver.take_snapshot.call_count == 1
+        assert len({data for data, _ in results}) == 1
+        stats = service.get_stats()
+        assert stats["coalesced_requests"] == 4
+        assert stats["inflight_fetches"] == 0
+
+    @pytest.mark.asyncio
+    async def test_shared_fetch_failure_reaches_all_callers(self):
+        """Test a failed shared fetch raises for every waiting caller."""
+        mock_printer_service = MagicMock()
+        mock_driver = AsyncMock()
+        mock_driver.take_snapshot = AsyncMock(return_value=None)
+        mock_printer_service.get_printer_driver = AsyncMock(return_value=mock_driver)
+
+        service = CameraSnapshotService(mock_printer_service)
+
+        results = await asyncio.gather(
+            *(service.get_snapshot_by_id("printer_001", source='builtin') for _ in range(3)),
+            return_exceptions=True
+        )
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert mock_driver.take_snapshot.call_count == 1
+
+
+class TestCameraSnapshotServicePrefetch:
+    """Test prefetching of frequently requested cameras."""
+
+    @staticmethod
+    def make_service():
+        mock_printer_service = MagicMock()
+        mock_driver = AsyncMock()
+        mock_driver.take_snapshot = AsyncMock(return_value=b'\xff\xd8\xff\xe0' + b'\x00' * 100)
+        mock_printer_service.get_printer_driver = AsyncMock(return_value=mock_driver)
+        return CameraSnapshotService(mock_printer_service), mock_printer_service, mock_driver
+
+    @staticmethod
+    def backdate(service, key, seconds):
+        """Shift a camera's request and prefetch history into the past."""
+        watched = service._watched[key]
+        watched.requests = deque((t - seconds for t in watched.requests), maxlen=watched.requests.maxlen)
+        watched.last_prefetch -= seconds
+        watched.retry_at -= seconds
+
+    @pytest.mark.asyncio
+    async def test_prefetch_refreshes_only_watched_expiring_frames(self):
+        """Test the prefetcher refreshes frequently requested cameras whose frame is about to expire."""
+        service, mock_printer_service, mock_driver = self.make_service()
+        await service.get_snapshot_by_id("printer_001", source='builtin')
+        await service.get_snapshot_by_id("printer_001", source='builtin')
+        mock_driver.take_snapshot.reset_mock()
+
+        # Fresh frame: nothing to do
+        assert await service._prefetch_watched() == 0
+
+        # Frame near expiry, and an unwatched printer with a stale frame
+        service._frame_cache["printer_001"].captured_at = datetime.now() - timedelta(seconds=4)
+        service._frame_cache["printer_002"] = CachedFrame(b"data", datetime.now() - timedelta(seconds=4))
+        assert await service._prefetch_watched() == 1
+
+        mock_printer_service.get_printer_driver.assert_awaited_with("printer_001")
+        assert mock_driver.take_snapshot.call_count == 1
+        assert (datetime.now() - service._frame_cache["printer_001"].captured_at).total_seconds() < 1
+        assert service.get_stats()["prefetches"] == 1
+        assert service.get_stats()["prefetched_cameras"] == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_poller_is_not_prefetched(self):
+        """Test a camera requested less often than the cache TTL is never prefetched."""
+        service, _, mock_driver = self.make_service()
+        key = ("printer_001", "builtin")
+        await service.get_snapshot_by_id("printer_001", source='builtin')
+        self.backdate(service, key, 30)
+        service._frame_cache.clear()
+        await service.get_snapshot_by_id("printer_001", source='builtin')
+        service._frame_cache["printer_001"].captured_at = datetime.now() - timedelta(seconds=4)
+
+        assert await service._prefetch_watched() == 0
+        assert mock_driver.take_snapshot.call_count == 2
+        assert service.get_stats()["prefetched_cameras"] == 0
+
+    @pytest.mark.asyncio
+    async def test_prefetch_is_capped_at_request_rate(self):
+        """Test a camera is not refreshed more often than it is requested."""
+        service, _, mock_driver = self.make_service()
+        key = ("printer_001", "builtin")
+        await service.get_snapshot_by_id("printer_001", source='builtin')
+        self.backdate(service, key, 4.5)
+        await service.get_snapshot_by_id("printer_001", source='builtin')
+        service._frame_cache.clear()
+
+        assert await service._prefetch_watched() == 1
+        service._frame_cache.clear()
+        assert await service._prefetch_watched() == 0
+
+        self.backdate(service, key, 5)
+        assert await service._prefetch_watched() == 1
+        assert mock_driver.take_snapshot.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_failing_camera_backs_off_exponentially(self):
+        """Test failed prefetches are retried with a doubling delay."""
+        service, _, mock_driver = self.make_service()
+        key = ("printer_001", "builtin")
+        await service.get_snapshot_by_id("printer_001", source='builtin')
+        await service.get_snapshot_by_id("printer_001", source='builtin')
+        service._frame_cache.clear()
+        mock_driver.take_snapshot.reset_mock()
+        mock_driver.take_snapshot.return_value = None
+
+        assert await service._prefetch_watched() == 0
+        watched = service._watched[key]
+        assert watched.failures == 1
+        backoff = CameraConstants.CAMERA_PREFETCH_BACKOFF_INITIAL_SECONDS
+        assert watched.retry_at - watched.last_prefetch == pytest.approx(backoff)
+
+        # Still backing off on the next tick
+        await service._prefetch_watched()
+        assert mock_driver.take_snapshot.call_count == 1
+
+        self.backdate(service, key, backoff)
+        service._watched[key].requests.append(time.monotonic())
+        await service._prefetch_watched()
+        assert mock_driver.take_snapshot.call_count == 2
+        assert watched.retry_at - watched.last_prefetch == pytest.approx(backoff * 2)
+
+        # A successful fetch resets the backoff
+        mock_driver.take_snapshot.return_value = b'\xff\xd8\xff\xe0'
+        self.backdate(service, key, backoff * 2)
+        service._watched[key].requests.append(time.monotonic())
+        assert await service._prefetch_watched() == 1
+        assert (watched.failures, watched.retry_at) == (0, 0.0)
+
+    @pytest.mark.asyncio
+    async def test_prefetch_stops_when_viewers_leave(self):
+        """Test cameras not requested within the watch window are no longer prefetched."""
+        service, _, mock_driver = self.make_service()
+        await service.get_snapshot_by_id("printer_001", source='builtin')
+        await service.get_snapshot_by_id("printer_001", source='builtin')
+        service._frame_cache.clear()
+        self.backdate(service, ("printer_001", "builtin"), 60)
+
+        assert await service._prefetch_watched() == 0
+        assert service.get_stats()["watched_cameras"] == 0
+        assert mock_driver.take_snapshot.call_count == 1
@@ -0,0 +1,233 @@
+"""
+Tests for the MJPEG camera stream fan-out proxy.
+"""
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.services.camera_snapshot_service import CameraSnapshotService
+from src.services.camera_stream_proxy import CameraStreamProxy, MJPEGParser, multipart_chunk
+
+JPEG = b'\xff\xd8\xff\xe0' + b'\x00' * 20 + b'\xff\xd9'
+
+
+class TestMJPEGParser:
+    """Test splitting multipart bodies into frames."""
+
+    def test_parts_with_content_length_split_anywhere(self):
+        """Test frames are complete whatever the chunking of the body."""
+        body = b''.join(
+            b'--myboundary\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n' % len(frame)
+            + frame + b'\r\n'
+            for frame in (JPEG, JPEG[::-1], JPEG)
+        )
+
+        for chunk_size in (1, 7, len(body)):
+            parser = MJPEGParser('myboundary')
+            frames = []
+            for i in range(0, len(body), chunk_size):
+                frames += parser.feed(body[i:i + chunk_size])
+            assert frames == [JPEG, JPEG[::-1], JPEG]
+
+    def test_part_with_content_length_is_emitted_before_next_boundary(self):
+        """Test a sized frame is not held back until the next frame starts."""
+        parser = MJPEGParser('frame')
+
+        frames = parser.feed(b'--frame\r\nContent-Length: %d\r\n\r\n' % len(JPEG) + JPEG)
+
+        assert frames == [JPEG]
+
+    def test_parts_without_headers_end_at_next_boundary(self):
+        """Test unsized parts, and a declared boundary that includes the dashes."""
+        parser = MJPEGParser('--frame')
+
+        assert parser.feed(b'--frame\r\n\r\n' + JPEG + b'\r\n') == []
+        assert parser.feed(b'--frame\r\n\r\n' + JPEG[::-1] + b'\r\n--frame') == [JPEG, JPEG[::-1]]
+
+
+class FakeUpstream:
+    """Frame source controlled by the test."""
+
+    def __init__(self):
+        self.frames: asyncio.Queue = asyncio.Queue()
+        self.connections = 0
+        self.open = 0
+
+    async def __call__(self):
+        self.connections += 1
+        self.open += 1
+        try:
+            while True:
+                yield await self.frames.get()
+        finally:
+            self.open -= 1
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestCameraStreamProxy:
+    """Test fan-out of one upstream to many viewers."""
+
+    @pytest.mark.asyncio
+    async def test_viewers_share_one_upstream_which_closes_with_the_last_viewer(self):
+        """Test one upstream connection serves all viewers and is closed afterwards."""
+        snapshot_service = CameraSnapshotService(MagicMock())
+        proxy = CameraStreamProxy(MagicMock(), snapshot_service)
+        upstream = FakeUpstream()
+
+        first = proxy.stream("printer_001", source=upstream)
+        second = proxy.stream("printer_001", source=upstream)
+        first_chunk = asyncio.create_task(first.__anext__())
+        second_chunk = asyncio.create_task(second.__anext__())
+        await settle()
+        upstream.frames.put_nowait(JPEG)
+
+        assert await first_chunk == multipart_chunk(JPEG)
+        assert await second_chunk == multipart_chunk(JPEG)
+        assert upstream.connections == 1
+        assert proxy.get_viewer_count("printer_001") == 2
+        assert snapshot_service._get_cached_frame("printer_001").data == JPEG
+
+        await first.aclose()
+        await settle()
+        assert upstream.open == 1
+
+        await second.aclose()
+        await settle()
+        assert upstream.open == 0
+        assert proxy.get_viewer_count("printer_001") == 0
+        assert proxy.get_stats() == {"streams": {}}
+
+    @pytest.mark.asyncio
+    async def test_slow_viewer_gets_latest_frame_only(self):
+        """Test frames a viewer has not consumed are replaced, not queued."""
+        proxy = CameraStreamProxy(MagicMock())
+        upstream = FakeUpstream()
+        viewer = proxy.stream("printer_001", source=upstream)
+        pending = asyncio.create_task(viewer.__anext__())
+        await settle()
+        upstream.frames.put_nowait(b'frame-1')
+        assert await pending == multipart_chunk(b'frame-1')
+
+        # Viewer is busy while three frames arrive
+        for frame in (b'frame-2', b'frame-3', b'frame-4'):
+            upstream.frames.put_nowait(frame)
+            await settle()
+
+        assert await viewer.__anext__() == multipart_chunk(b'frame-4')
+        stats = proxy.get_stats()["streams"]["printer_001"]
+        assert stats["frames_received"] == 4
+        assert stats["frames_dropped"] == 2
+
+        await viewer.aclose()
+
+    @pytest.mark.asyncio
+    async def test_shutdown_ends_viewer_streams(self):
+        """Test shutdown closes upstreams and finishes every viewer's response."""
+        proxy = CameraStreamProxy(MagicMock())
+        upstream = FakeUpstream()
+        viewer = proxy.stream("printer_001", source=upstream)
+        pending = asyncio.create_task(viewer.__anext__())
+        await settle()
+
+        await proxy.shutdown()
+
+        with pytest.raises(StopAsyncIteration):
+            await pending
+        assert upstream.open == 0
+
+    @pytest.mark.asyncio
+    async def test_viewers_beyond_limit_get_no_stream(self):
+        """Test the per-printer viewer limit."""
+        proxy = CameraStreamProxy(MagicMock(), max_viewers=2)
+        upstream = FakeUpstream()
+        viewers = [proxy.stream("printer_001", source=upstream) for _ in range(2)]
+        pending = [asyncio.create_task(viewer.__anext__()) for viewer in viewers]
+        await settle()
+
+        assert not proxy.has_capacity("printer_001")
+        assert proxy.has_capacity("printer_002")
+        with pytest.raises(StopAsyncIteration):
+            await proxy.stream("printer_001", source=upstream).__anext__()
+        assert proxy.get_viewer_count("printer_001") == 2
+
+        await proxy.shutdown()
+        for task in pending:
+            with pytest.raises(StopAsyncIteration):
+                await task
+
+    @pytest.mark.asyncio
+    async def test_proxies_http_mjpeg_stream(self):
+        """Test frames are read from a real MJPEG HTTP response."""
+        from aiohttp import web
+
+        async def mjpeg(request):
+            response = web.StreamResponse(headers={
+                'Content-Type': 'multipart/x-mixed-replace; boundary=boundarydonotcross'
+            })
+            await response.prepare(request)
+            for frame in (JPEG, JPEG[::-1]):
+                await response.write(
+                    b'--boundarydonotcross\r\nContent-Type: image/jpeg\r\n'
+                    b'Content-Length: %d\r\n\r\n' % len(frame) + frame + b'\r\n'
+                )
+            await asyncio.sleep(1)
+            return response
+
+        app = web.Application()
+        app.router.add_get('/stream', mjpeg)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        proxy = CameraStreamProxy(MagicMock())
+        try:
+            viewer = proxy.stream("printer_001", f"http://127.0.0.1:{port}/stream")
+            # Frames arriving together are coalesced to the newest
+            chunk = await asyncio.wait_for(viewer.__anext__(), 5)
+            if chunk == multipart_chunk(JPEG):
+                chunk = await asyncio.wait_for(viewer.__anext__(), 5)
+            await viewer.aclose()
+        finally:
+            await proxy.shutdown()
+            await runner.cleanup()
+
+        assert chunk == multipart_chunk(JPEG[::-1])
+
+    @pytest.mark.asyncio
+    async def test_detects_streams_that_are_not_mjpeg(self):
+        """Test content types the parser cannot split are reported, and answers are remembered."""
+        from aiohttp import web
+
+        requests = []
+
+        async def stream(request):
+            requests.append(request.path)
+            content_type = {
+                '/mjpeg': 'multipart/x-mixed-replace; boundary=frame',
+                '/hls': 'application/vnd.apple.mpegurl',
+            }[request.path]
+            return web.Response(body=b'', headers={'Content-Type': content_type})
+
+        app = web.Application()
+        app.router.add_get('/{name}', stream)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        proxy = CameraStreamProxy(MagicMock())
+        try:
+            assert await proxy.is_mjpeg(f"http://127.0.0.1:{port}/mjpeg")
+            assert not await proxy.is_mjpeg(f"http://127.0.0.1:{port}/hls")
+            assert not await proxy.is_mjpeg(f"http://127.0.0.1:{port}/hls")
+        finally:
+            await proxy.shutdown()
+            await runner.cleanup()
+
+        assert requests == ['/mjpeg', '/hls']
@@ -1,6 +1,7 @@
 from pathlib import Path
 import zipfile
 from src.services.file_role_classifier import classify_role, threemf_has_gcode
+from src.services.threemf_archive import ThreeMFArchive
 
 
 def test_classify_models():
@@ -28,9 +29,10 @@ def test_threemf_has_gcode(tmp_path):
     sliced = tmp_path / "sliced.3mf"
     with zipfile.ZipFile(sliced, "w") as z:
         z.writestr("Metadata/plate_1.gcode", "; gcode")
-    assert threemf_has_gcode(sliced) is True
+    with ThreeMFArchive(sliced) as archive:
+        assert threemf_has_gcode(archive) is True
     model = tmp_path / "model.3mf"
     with zipfile.ZipFile(model, "w") as z:
         z.writestr("3D/3dmodel.model", "<model/>")
-    assert threemf_has_gcode(model) is False
-    assert threemf_has_gcode(tmp_path / "missing.3mf") is False
+    with ThreeMFArchive(model) as archive:
+        assert threemf_has_gcode(archive) is False
@@ -1007,7 +1007,7 @@ class TestFileWatcherServiceFolderRules:
 class TestFileWatcherServiceAutoSlice:
     """Test the auto-slice workflow (Phase 7c)."""
 
-    def _make_service(self, folder, slicers='default'):
+    def _make_service(self, folder, slicers='default', record=None):
         mock_config = MagicMock()
         mock_config.watch_folder_db.get_watch_folder_by_path = AsyncMock(return_value=folder)
         mock_event = MagicMock()
@@ -1015,6 +1015,7 @@ class TestFileWatcherServiceAutoSlice:
         library = MagicMock()
         library.enabled = True
         library.assign_tag_by_name = AsyncMock(return_value=True)
+        library.get_file_by_checksum = AsyncMock(return_value=record)
 
         service = FileWatcherService(mock_config, mock_event, library)
 
@@ -1101,6 +1102,23 @@ class TestFileWatcherServiceAutoSlice:
 
         queue.create_job.assert_not_awaited()
 
+    @pytest.mark.asyncio
+    async def test_auto_slice_uses_library_role_for_3mf(self):
+        """Test a sliced 3MF is skipped by its library role, without reopening it."""
+        from src.models.watch_folder import WatchFolder
+        folder = WatchFolder(folder_path="/watch", auto_slice=True,
+                             default_profile_id="prof_1")
+
+        service, queue = self._make_service(folder, record={'role': 'printfile'})
+        await service._apply_folder_rules(
+            self._local_file("prints/plate.3mf"), is_new_file=True)
+        queue.create_job.assert_not_awaited()
+
+        service, queue = self._make_service(folder, record={'role': 'model'})
+        await service._apply_folder_rules(
+            self._local_file("models/bracket.3mf"), is_new_file=True)
+        queue.create_job.assert_awaited_once()
+
     @pytest.mark.asyncio
     async def test_auto_slice_skips_without_available_slicer(self):
         """Test missing slicer configuration skips gracefully."""
@@ -89,6 +89,24 @@ class TestGcodeAnalyzer:
         result = analyzer.find_print_start_line(gcode_lines)
         assert result is None  # No heating or obvious print start
         
+    @pytest.mark.parametrize("extrusion_mode,e_words", [
+        ("M83", ["E0.05", "E0.05", "E2.0"]),
+        ("M82", ["E0.05", "E0.10", "E2.10"]),   # Same moves with absolute E
+    ])
+    def test_find_print_start_small_extrusion_per_move(self, extrusion_mode, e_words):
+        """Test that small extrusions are judged by the filament each move advances."""
+        analyzer = GcodeAnalyzer(optimize_enabled=True)
+        gcode_lines = [
+            "M109 S200 ; set hotend temp",
+            extrusion_mode,
+            f"G1 X50 Y50 {e_words[0]}",
+            f"G1 X60 Y50 {e_words[1]}",
+            f"G1 X70 Y50 {e_words[2]}",  # First move advancing 0.1 mm or more
+        ]
+
+        result = analyzer.find_print_start_line(gcode_lines)
+        assert result == 4
+
     def test_is_likely_print_move_small_extrusion(self):
         """Test that small extrusions are not considered print moves."""
         analyzer = GcodeAnalyzer(optimize_enabled=True)
@@ -1,4 +1,9 @@
-from src.utils.gcode_metadata import parse_metadata_from_text
+import re
+
+import pytest
+
+from src.services.bambu_parser import BambuParser
+from src.utils.gcode_metadata import _parse_human_time, parse_metadata_from_text, scan_comment_metadata
 
 ORCA_SAMPLE = "\n".join([
     "; model printing time: 33m 52s; total estimated time: 40m 39s",
@@ -24,3 +29,145 @@ def test_prusa_still_parses():
     md = parse_metadata_from_text(PRUSA_SAMPLE)
     assert md.estimated_print_time == 3600 + 30 * 60 + 15
     assert md.filament_used == 15.23
+
+
+def test_scan_comment_metadata_tokenizes_comment_lines_once():
+    pairs = scan_comment_metadata("\n".join([
+        "; generated by PrusaSlicer 2.7.1+linux on 2026-01-02 at 10:11:12 UTC",
+        "G1 X1 ; travel",
+        "; model printing time: 33m 52s; total estimated time: 40m 39s",
+        "  ; Layer_Height = 0.2",
+        "; layer_height = 0.3",
+        "; total filament weight [g] : 3.1",
+        "; filament_colour = #FFFFFF;#000000",
+        ";TIME:6520",
+        "; HEADER_BLOCK_START",
+    ]))
+
+    assert pairs == {
+        'generated by': 'PrusaSlicer 2.7.1+linux on 2026-01-02 at 10:11:12 UTC',
+        'model printing time': '33m 52s',
+        'total estimated time': '40m 39s',
+        'layer_height': '0.2',
+        'total filament weight [g]': '3.1',
+        'filament_colour': '#FFFFFF;#000000',
+        'time': '6520',
+    }
+    assert scan_comment_metadata(PRUSA_SAMPLE)['estimated printing time'] == '1h 30m 15s'
+
+
+def test_cura_time_and_filament():
+    md = parse_metadata_from_text(";FLAVOR:Marlin\n;TIME:6520\n;Filament used: 1.5m\n")
+    assert md.estimated_print_time == 6520
+    assert round(md.filament_used, 2) == 4.47
+
+
+def _bambu_like_gcode_comments(config_keys=1500):
+    lines = [
+        "; HEADER_BLOCK_START",
+        "; generated by BambuStudio 01.09.00.70",
+        "; model printing time: 1h 10m 3s; total estimated time: 1h 16m 40s",
+        "; total layer count = 240",
+        "; total filament weight [g] : 42.17",
+        "; HEADER_BLOCK_END",
+        "; CONFIG_BLOCK_START",
+    ]
+    lines += [f"; setting_{i} = value {i}" for i in range(config_keys)]
+    lines += [
+        "; layer_height = 0.2",
+        "; nozzle_diameter = 0.4",
+        "; filament used [g] = 42.17",
+        "; filament_type = PLA",
+        "; sparse_infill_density = 15%",
+        "; CONFIG_BLOCK_END",
+    ]
+    return "\n".join(lines)
+
+
+def _regex_per_key_metadata(content):
+    """Reference: one compiled regex per key, each searched over the whole text."""
+    parser = BambuParser()
+    found = {}
+    for table in (parser.METADATA_KEYS, parser.FILAMENT_KEYS, parser.ADVANCED_METADATA_KEYS):
+        for key, (comment_key, value_pattern) in table.items():
+            pattern = re.compile(rf'; {re.escape(comment_key)}\s*[=:]?\s*({value_pattern.pattern})',
+                                 re.IGNORECASE)
+            match = pattern.search(content)
+            if match:
+                # BambuStudio separates pairs sharing a line with "; "
+                found[key] = match.group(1).split('; ')[0].strip()
+    return found
+
+
+def test_bambu_parser_lookups_match_per_key_regexes():
+    parser = BambuParser()
+    content = _bambu_like_gcode_comments()
+    comments = scan_comment_metadata(content)
+
+    found = {key: value
+             for table in (parser.METADATA_KEYS, parser.FILAMENT_KEYS, parser.ADVANCED_METADATA_KEYS)
+             for key, value in parser._lookup_comment_values(comments, table)}
+
+    assert found == _regex_per_key_metadata(content)
+    metadata = parser._extract_gcode_metadata(content)
+    assert metadata['layer_height'] == 0.2
+    assert metadata['total_layer_count'] == 240
+    assert metadata['generator'] == 'BambuStudio 01.09.00.70'
+    assert metadata['total_filament_used'] == 42.17
+    assert metadata['estimated_time'] == 70 * 60 + 3
+
+
+# Line-by-line, pattern-by-pattern matching used before scan_comment_metadata()
+_LINE_TIME_PATTERNS = [
+    (r';\s*total estimated time:\s*(.+?)$', 'human'),
+    (r';\s*model printing time:\s*(.+?)$', 'human'),
+    (r';\s*estimated printing time.*?=\s*(.+?)$', 'human'),
+    (r';\s*TIME:\s*(\d+)', 'seconds'),
+    (r';\s*total estimated time.*?=\s*(\d+)', 'seconds'),
+    (r';\s*print_time\s*=\s*(\d+)', 'seconds'),
+]
+_LINE_FILAMENT_PATTERNS = [
+    r';\s*(?:total\s+)?filament used \[g\]\s*=\s*([\d.]+)',
+    r';\s*filament used \[mm\]\s*=\s*([\d.]+)',
+    r';\s*Filament used:\s*([\d.]+)\s*m(?:m)?',
+    r';\s*filament_used\s*=\s*([\d.]+)',
+    r';\s*filament weight\s*=\s*([\d.]+)',
+]
+
+
+def _line_loop_reference(text):
+    lines = text.splitlines()
+    print_time = filament = None
+    for pattern, fmt in _LINE_TIME_PATTERNS:
+        for line in lines:
+            m = re.search(pattern, line, re.IGNORECASE)
+            if m:
+                print_time = int(m.group(1)) if fmt == 'seconds' else _parse_human_time(m.group(1))
+                break
+        if print_time:
+            break
+    for pattern in _LINE_FILAMENT_PATTERNS:
+        for line in lines:
+            m = re.search(pattern, line, re.IGNORECASE)
+            if m:
+                filament = float(m.group(1))
+                break
+        if filament is not None:
+            break
+    return print_time, filament
+
+
+def test_single_pass_scanner_matches_line_loop():
+    """The single pass finds what per-line, per-pattern matching finds."""
+    # What parse_gcode_metadata() reads from a PrusaSlicer file: 500 header
+    # lines of G-code, then a footer ending in the print statistics
+    header = "".join(f"G1 X{i % 200} Y{i % 150} E0.02\n" for i in range(500))
+    footer = "".join(f"G1 X{i % 200} Y{i % 150} E0.02\n" for i in range(150))
+    footer += "; filament used [g] = 3.7\n; estimated printing time (normal mode) = 1h 2m 3s\n"
+    footer += "".join(f"; setting_{i} = {i}\n" for i in range(45))
+    content = header + footer
+
+    reference = _line_loop_reference(content)
+    md = parse_metadata_from_text(content)
+
+    assert reference == (md.estimated_print_time, md.filament_used) == (3723, 3.7)
@@ -0,0 +1,248 @@
+"""
+Tests for per-layer G-code statistics and their storage in the library.
+"""
+from unittest.mock import AsyncMock, Mock
+
+import numpy as np
+import pytest
+
+from src.database.database import Database
+from src.services.analysis_executor import AnalysisKind, AnalysisRequest, run_analysis
+from src.services.event_service import EventService
+from src.services.file_metadata_service import FileMetadataService
+from src.services.library_service import LibraryService
+from src.utils.gcode_statistics import (
+    LayerStatistics, MotionModel, analyze_layers, compute_layer_statistics, move_times,
+)
+from src.utils.gcode_toolpath import parse_toolpath_text
+
+MODEL = MotionModel(acceleration=1000.0, square_corner_velocity=5.0)
+
+
+def _layers_gcode(layers=3, side=20):
+    """Square perimeters, one per layer, with a travel and retract between."""
+    lines = ["G90", "M83", "G1 F3000"]
+    for layer in range(layers):
+        z = 0.2 * (layer + 1)
+        lines += [f"G1 E-0.8 F2400", f"G0 X0 Y0 Z{z:.1f} F6000", "G1 E0.8 F2400", "G1 F3000"]
+        lines += [f"G1 X{side} Y0 E1", f"G1 X{side} Y{side} E1",
+                  f"G1 X0 Y{side} E1", "G1 X0 Y0 E1"]
+    return "\n".join(lines) + "\n"
+
+
+def test_straight_move_follows_trapezoid():
+    toolpath = parse_toolpath_text("G1 X100 E1 F6000\n")
+
+    # 100 mm/s, 1000 mm/s²: 5 mm to accelerate, 5 mm to stop, 90 mm cruise
+    assert move_times(toolpath, MODEL)[0] == pytest.approx(0.1 + 0.1 + 0.9)
+
+    short = parse_toolpath_text("G1 X2 E1 F6000\n")
+    # Never reaches cruise speed: 1 mm up and 1 mm down at 1000 mm/s²
+    assert move_times(short, MODEL)[0] == pytest.approx(2 * np.sqrt(2 * 1 / 1000))
+
+
+def test_corners_slow_down_but_straight_runs_do_not():
+    straight = parse_toolpath_text("G1 X50 F6000\nG1 X100\n")
+    corner = parse_toolpath_text("G1 X50 F6000\nG1 X50 Y50\n")
+    stop = parse_toolpath_text("G1 X50 F6000\nG1 X0\n")
+
+    straight_time = move_times(straight, MODEL).sum()
+    corner_time = move_times(corner, MODEL).sum()
+    reversal_time = move_times(stop, MODEL).sum()
+
+    assert straight_time == pytest.approx(1.1)
+    assert straight_time < corner_time < reversal_time
+    assert reversal_time == pytest.approx(2 * (0.1 + 0.1 + 0.4))
+
+
+def test_retracts_take_time_at_their_feedrate():
+    toolpath = parse_toolpath_text("M83\nG1 E-2 F1200\n")
+
+    # 20 mm/s over 2 mm of filament: 0.2 mm each to accelerate and stop
+    assert move_times(toolpath, MODEL)[0] == pytest.approx(0.02 + 0.02 + 1.6 / 20)
+
+
+def test_layer_statistics_are_aggregated_per_layer():
+    toolpath = parse_toolpath_text(_layers_gcode(layers=3, side=20))
+
+    stats = compute_layer_statistics(toolpath, MODEL)
+
+    assert stats.layer_count == 3
+    np.testing.assert_allclose(stats.z, [0.2, 0.4, 0.6], rtol=1e-6)
+    np.testing.assert_allclose(stats.print_distance, [80, 80, 80], rtol=1e-5)
+    # Primes only restore the retracted filament
+    np.testing.assert_allclose(stats.extrusion_length, [4, 4, 4], rtol=1e-5)
+    # Retract/prime pairs move no toolhead: only the Z moves count as travel
+    np.testing.assert_allclose(stats.travel_distance, [0.2, 0.2, 0.2], atol=1e-5)
+    np.testing.assert_allclose(stats.filament_weight, stats.extrusion_length * MODEL.grams_per_mm,
+                               rtol=1e-6)
+    assert stats.time.sum() == pytest.approx(move_times(toolpath, MODEL).sum(), rel=1e-5)
+    assert stats.remaining_time(1) == pytest.approx(stats.time[1:].sum(), rel=1e-6)
+    assert stats.remaining_time(3) == 0
+
+
+@pytest.mark.parametrize('extrusion_mode', ['M82', 'M83'])
+def test_retractions_are_not_counted_as_filament(extrusion_mode):
+    lines = [extrusion_mode, "G92 E0", "G1 F1800"]
+    e = 0.0
+    for i in range(100):
+        e += 1.0
+        if extrusion_mode == 'M82':
+            lines += [f"G1 X{i + 1} E{e:.1f}", f"G1 E{e - 0.8:.1f}", f"G1 E{e:.1f}"]
+        else:
+            lines += [f"G1 X{i + 1} E1", "G1 E-0.8", "G1 E0.8"]
+
+    stats = compute_layer_statistics(parse_toolpath_text("\n".join(lines) + "\n"), MODEL)
+
+    assert stats.extrusion_length.sum() == pytest.approx(100, rel=1e-5)
+
+
+def test_filament_mass_uses_model_parameters():
+    assert MotionModel().grams_per_mm == pytest.approx(np.pi * 0.875 ** 2 * 1.24 / 1000)
+    model = MotionModel.from_options({'filament_diameter': 2.85, 'filament_density': None,
+                                      'unknown': 1})
+    assert model.filament_diameter == 2.85 and model.filament_density == 1.24
+
+
+def test_statistics_round_trip_through_bytes():
+    stats = compute_layer_statistics(parse_toolpath_text(_layers_gcode(layers=4)), MODEL)
+
+    blob = stats.to_bytes()
+    restored = LayerStatistics.from_bytes(blob)
+
+    assert len(blob) == 4 * 6 * 4
+    assert restored.summary() == stats.summary()
+    np.testing.assert_array_equal(restored.time, stats.time)
+    assert len(stats.to_dict()['layers']) == 4
+
+
+def test_file_without_extrusion_has_no_layers(tmp_path):
+    path = tmp_path / "travel.gcode"
+    path.write_text("G0 X10\nG0 Y10\n")
+
+    stats = analyze_layers(path)
+
+    assert stats.layer_count == 0
+    assert stats.summary()['estimated_time'] == 0
+
+
+def test_worker_handler_returns_summary_and_blob(tmp_path):
+    path = tmp_path / "part.gcode"
+    path.write_text(_layers_gcode())
+
+    result = run_analysis(AnalysisRequest(AnalysisKind.GCODE_LAYERS, str(path),
+                                          {'filament_diameter': 2.85}))
+
+    assert result.ok
+    assert result.data['success'] is True
+    assert result.data['layer_count'] == 3
+    expected = analyze_layers(path, MotionModel(filament_diameter=2.85))
+    assert result.data['layers'] == expected.to_bytes()
+
+
+@pytest.fixture
+async def library(temp_database, tmp_path):
+    db = Database(temp_database)
+    await db.initialize()
+    config = Mock()
+    config.settings = Mock()
+    config.settings.library_path = str(tmp_path / "library")
+    config.settings.library_enabled = True
+    config.settings.library_auto_organize = True
+    config.settings.library_auto_extract_metadata = False
+    config.settings.library_checksum_algorithm = "sha256"
+    config.settings.library_preserve_originals = True
+    config.settings.library_processing_workers = 2
+    executor = Mock()
+    executor.parse_file = AsyncMock(return_value={
+        'success': True, 'thumbnails': [], 'metadata': {'total_filament_weight': 9.5},
+        'needs_generation': False,
+    })
+    executor.analyze_gcode_layers = AsyncMock(
+        side_effect=lambda path, options=None, checksum=None: run_analysis(
+            AnalysisRequest(AnalysisKind.GCODE_LAYERS, path, options or {})).data)
+    svc = LibraryService(db, config, EventService(), analysis_executor=executor)
+    await svc.initialize()
+    try:
+        yield svc
+    finally:
+        await db.close()
+
+
+async def test_library_stores_layer_statistics(library):
+    svc = library
+    models = svc.library_path / "models"
+    models.mkdir(parents=True, exist_ok=True)
+    (models / "part.gcode").write_text(_layers_gcode())
+    await svc.library_repo.create_file({
+        'id': 'part', 'checksum': 'part', 'filename': 'part.gcode',
+        'library_path': 'models/part.gcode', 'file_size': 1, 'file_type': '.gcode',
+        'sources': '[]', 'added_to_library': '2026-10-19T00:00:00',
+    })
+
+    await svc._extract_metadata_async(None, 'part')
+
+    record = await svc.get_file_by_checksum('part')
+    stats = await svc.get_layer_stats('part')
+    assert record['status'] == 'ready'
+    assert stats.layer_count == 3
+    assert record['total_layer_count'] == 3
+    assert record['total_filament_weight'] == 9.5             # the slicer's value wins
+    assert record['filament_length'] == pytest.approx(0.012, abs=1e-3)
+    assert record['energy_cost'] is not None and record['total_cost'] is not None
+
+    # Reprocessing reuses the stored statistics of the current model version
+    svc.analysis_executor.analyze_gcode_layers.reset_mock()
+    await svc._extract_metadata_async(None, 'part')
+    svc.analysis_executor.analyze_gcode_layers.assert_not_awaited()
+    assert (await svc.get_file_by_checksum('part'))['total_layer_count'] == 3
+
+    # ...and re-analyzes statistics of an older model version
+    await svc.library_repo._execute_write(
+        "UPDATE library_file_layer_stats SET model_version = 0 WHERE file_checksum = 'part'")
+    await svc._extract_metadata_async(None, 'part')
+    svc.analysis_executor.analyze_gcode_layers.assert_awaited_once()
+
+    from fastapi import FastAPI
+    from httpx import ASGITransport, AsyncClient
+
+    from src.api.routers import library as library_router
+    from src.utils.errors import PrinternizerError, printernizer_exception_handler
+
+    app = FastAPI()
+    app.add_exception_handler(PrinternizerError, printernizer_exception_handler)
+    app.include_router(library_router.router, prefix="/api/v1")
+    app.dependency_overrides[library_router.get_library_service] = lambda: svc
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/v1/library/files/part/layers",
+                                    params={'current_layer': 1})
+        assert response.status_code == 200
+        body = response.json()
+        assert body['layer_count'] == 3 and len(body['layers']) == 3
+        assert body['remaining_time'] == round(stats.remaining_time(1))
+
+        response = await client.get("/api/v1/library/files/part/layers",
+                                    params={'include_layers': False})
+        assert response.json()['layers'] == []
+
+        response = await client.get("/api/v1/library/files/unknown/layers")
+        assert response.status_code == 404
+
+    assert await svc.delete_file('part', delete_physical=False) is True
+    assert await svc.get_layer_stats('part') is None
+
+
+async def test_file_metadata_falls_back_to_layer_statistics(tmp_path):
+    path = tmp_path / "bare.gcode"
+    path.write_text(_layers_gcode())
+    executor = Mock()
+    executor.parse_file = AsyncMock(return_value={'success': True, 'metadata': {}})
+    executor.analyze_gcode_layers = AsyncMock(
+        return_value=run_analysis(AnalysisRequest(AnalysisKind.GCODE_LAYERS, str(path))).data)
+    service = FileMetadataService(Mock(), Mock(), analysis_executor=executor)
+
+    metadata = await service._extract_gcode_metadata(path)
+
+    assert metadata['material_requirements']['total_weight'] > 0
+    assert metadata['print_settings']['total_layer_count'] == 3
+    assert metadata['cost_breakdown']['total_cost'] is not None
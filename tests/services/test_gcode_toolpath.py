@@ -0,0 +1,187 @@
+"""
+Tests for the vectorized G-code toolpath parser and its preview consumer.
+"""
+import numpy as np
+import pytest
+
+import src.utils.gcode_toolpath as toolpath_module
+from src.services.preview_render_service import PreviewRenderService
+from src.utils.gcode_analyzer import GcodeAnalyzer
+from src.utils.gcode_toolpath import parse_toolpath, parse_toolpath_text
+
+
+def _layered_gcode(layers=5, moves=20, hop=True):
+    lines = ["; generated", "M104 S200", "G28", "G90", "M83", "G92 E0"]
+    for layer in range(layers):
+        z = 0.2 * (layer + 1)
+        if hop and layer:
+            lines.append(f"G0 Z{z + 0.4:.2f}")        # Z hop while travelling
+        lines.append(f"G0 X0 Y0 Z{z:.2f} F6000")
+        for i in range(moves):
+            lines.append(f"G1 X{i + 1} Y{(i * 3) % 7} E0.05 F1800 ; extrude")
+    return "\n".join(lines) + "\n"
+
+
+def test_modes_and_position_resets():
+    toolpath = parse_toolpath_text(
+        "G90\nM82\nG1 X10 Y5 Z0.2 E1\nG1 X20 E3\n"
+        "G91\nG1 X-5 Y1\nG90\n"
+        "G92 E0\nG1 X0 E0.5\n"
+        "M83\nG1 X2 E0.25\nG1 X4 E0.25\n"
+    )
+
+    np.testing.assert_allclose(toolpath.x, [10, 20, 15, 0, 2, 4])
+    np.testing.assert_allclose(toolpath.y, [5, 5, 6, 6, 6, 6])
+    np.testing.assert_allclose(toolpath.e, [1, 2, 0, 0.5, 0.25, 0.25])
+    assert toolpath.line.tolist() == [2, 3, 5, 8, 10, 11]
+    assert toolpath.line_count == 12
+
+
+def test_relative_extrusion_follows_g91():
+    toolpath = parse_toolpath_text("M82\nG1 X1 E5\nG91\nG1 X1 E1\nG90\nG1 X3 E6\n")
+
+    # G91 makes E relative too; G90 restores absolute E (no M83 was given)
+    np.testing.assert_allclose(toolpath.x, [1, 2, 3])
+    np.testing.assert_allclose(toolpath.e, [5, 1, 0])
+
+
+def test_comments_case_and_indentation():
+    toolpath = parse_toolpath_text(
+        "; G1 X99 Y99\n  g1 x1 y2 e0.5 ; G1 X50\nG1X3Y4E-0.2\nM117 G1 X77\nG4 P100\n")
+
+    np.testing.assert_allclose(toolpath.x, [1, 3])
+    np.testing.assert_allclose(toolpath.y, [2, 4])
+    np.testing.assert_allclose(toolpath.e, [0.5, -0.7], rtol=1e-6)   # absolute E
+    assert toolpath.line.tolist() == [1, 2]
+
+
+
+def test_line_numbers_and_checksums():
+    toolpath = parse_toolpath_text("N1 G90*17\nN2 M83*20\nN3 G1 X1 Y2 E0.5*54\n  n4 g1 x3 e0.5\nN5*30\n")
+
+    np.testing.assert_allclose(toolpath.x, [1, 3])
+    np.testing.assert_allclose(toolpath.e, [0.5, 0.5])    # relative E from the numbered M83
+    assert toolpath.line.tolist() == [2, 3]
+
+
+@pytest.mark.parametrize("arc", ["G2 X10 Y0 I5 J0", "G2 X10 Y0 R5"])
+def test_arcs_are_expanded(arc):
+    toolpath = parse_toolpath_text(f"G1 X0 Y0 F1200\n{arc} E2\n")
+    arc_moves = toolpath.command == 2
+
+    assert arc_moves.sum() == 16          # ceil(pi * 5mm / 1mm)
+    assert set(toolpath.line[arc_moves]) == {1}
+    np.testing.assert_allclose(toolpath.e[arc_moves].sum(), 2, rtol=1e-6)
+    radius = np.hypot(toolpath.x[arc_moves] - 5, toolpath.y[arc_moves])
+    np.testing.assert_allclose(radius, 5, rtol=1e-5)
+    # Clockwise from (0, 0) around (5, 0) passes over the top
+    assert toolpath.y[arc_moves].max() == pytest.approx(5, abs=0.05)
+    assert (toolpath.x[-1], toolpath.y[-1]) == (10, 0)
+
+
+def test_layers_ignore_z_hops():
+    toolpath = parse_toolpath_text(_layered_gcode(layers=4))
+
+    assert toolpath.layer_count == 4
+    np.testing.assert_allclose(toolpath.layer_z, [0.2, 0.4, 0.6, 0.8], rtol=1e-6)
+    # The hop up to 0.8 before the second layer belongs to that layer
+    hop = np.flatnonzero(np.isclose(toolpath.z, 0.8))[0]
+    assert toolpath.layer[hop] == 1
+    assert (np.diff(toolpath.layer) >= 0).all()
+
+
+def test_landmarks_are_recorded():
+    toolpath = parse_toolpath_text(_layered_gcode(), start_markers=("; generated",))
+
+    assert toolpath.start_marker_line == 0
+    assert toolpath.first_heat_line == 1
+    assert toolpath.last_warmup_line == 5
+
+
+def test_chunked_file_matches_in_memory(tmp_path, monkeypatch):
+    text = _layered_gcode(layers=6) + "G3 X5 Y5 I2 J2 E1"      # no trailing newline
+    path = tmp_path / "part.gcode"
+    path.write_text(text)
+    expected = parse_toolpath_text(text)
+
+    monkeypatch.setattr(toolpath_module, 'CHUNK_BYTES', 97)
+    chunked = parse_toolpath(path)
+
+    for column in ('x', 'y', 'z', 'e', 'feedrate', 'command', 'line', 'layer', 'layer_z'):
+        np.testing.assert_array_equal(getattr(chunked, column), getattr(expected, column))
+    assert chunked.line_count == expected.line_count
+
+    limited = parse_toolpath(path, max_lines=20)
+    assert limited.line_count == 20
+    assert limited.line.max() == 19
+
+
+def test_from_line_keeps_the_start_position():
+    toolpath = parse_toolpath_text("G1 X1 Y1\nG1 X2 Y2\nG1 X3 Y3\n")
+
+    tail = toolpath.from_line(2)
+
+    assert tail.x.tolist() == [3]
+    assert tail.origin == (2.0, 2.0, 0.0)
+    np.testing.assert_allclose(tail.segment_lengths(), [np.sqrt(2)], rtol=1e-6)
+
+
+def test_print_start_uses_toolpath(tmp_path):
+    path = tmp_path / "part.gcode"
+    path.write_text(_layered_gcode())
+
+    result = GcodeAnalyzer().analyze_gcode_file(str(path))
+
+    assert result['print_start_line'] is not None
+    assert result['total_lines_analyzed'] == len(path.read_text().splitlines())
+
+
+def test_preview_points_break_on_travel_and_decimate_layers(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    service = PreviewRenderService(cache_dir=str(tmp_path / "cache"))
+    toolpath = parse_toolpath_text(_layered_gcode(layers=10, moves=20))
+
+    points = service._toolpath_points(toolpath, max_moves=10_000)
+    breaks = np.isnan(points[:, 0])
+    assert breaks.sum() == 10                   # one run per layer
+    assert (~breaks).sum() == 10 * 21           # run start + 20 extrusion ends
+
+    decimated = service._toolpath_points(toolpath, max_moves=70)
+    assert np.isnan(decimated[:, 0]).sum() == 4
+    heights = np.unique(decimated[~np.isnan(decimated[:, 2]), 2])
+    np.testing.assert_allclose(heights, [0.2, 0.8, 1.4, 2.0], rtol=1e-6)
+
+    travel_only = parse_toolpath_text("G0 X1\nG0 X2\n")
+    assert len(service._toolpath_points(travel_only, max_moves=100)) == 4
+
+
+def _split_loop_reference(lines):
+    """The per-line parser the preview renderer used before the toolpath engine."""
+    points = []
+    current = [0.0, 0.0, 0.0]
+    for line in lines:
+        if line.startswith('G0 ') or line.startswith('G1 '):
+            for part in line.strip().split()[1:]:
+                try:
+                    if part.startswith('X'):
+                        current[0] = float(part[1:])
+                    elif part.startswith('Y'):
+                        current[1] = float(part[1:])
+                    elif part.startswith('Z'):
+                        current[2] = float(part[1:])
+                except ValueError:
+                    continue
+            points.append(current.copy())
+    return np.array(points)
+
+
+def test_toolpath_matches_split_loop(tmp_path):
+    """The vectorized parse yields the points of the per-line split loop."""
+    path = tmp_path / "big.gcode"
+    path.write_text(_layered_gcode(layers=20, moves=250))
+
+    with open(path) as f:
+        expected = _split_loop_reference(f.read().splitlines())
+    toolpath = parse_toolpath(path)
+
+    np.testing.assert_allclose(toolpath.points()[1:], expected, atol=1e-4)
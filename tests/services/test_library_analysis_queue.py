@@ -0,0 +1,201 @@
+"""
+Tests for the bounded, prioritized library analysis queue.
+"""
+import asyncio
+
+import pytest
+
+from src.database.database import Database
+from src.services.library_analysis_queue import LibraryAnalysisQueue, AnalysisPriority
+
+
+@pytest.fixture
+async def db(temp_database):
+    database = Database(temp_database)
+    await database.initialize()
+    try:
+        yield database
+    finally:
+        await database.close()
+
+
+class _Recorder:
+    """Handler that records call order and concurrency."""
+
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def __call__(self, checksum):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await self.gate.wait()
+            await asyncio.sleep(self.delay)
+            self.calls.append(checksum)
+        finally:
+            self.active -= 1
+
+
+async def _drain(queue):
+    for _ in range(500):
+        progress = queue.get_progress()
+        if progress['pending'] == 0 and progress['running'] == 0:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("queue did not drain")
+
+
+async def _wait_running(queue, checksum):
+    for _ in range(500):
+        if checksum in queue.get_progress()['running_files']:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"{checksum} never started")
+
+
+async def _persisted(db):
+    async with db.connection() as conn:
+        cursor = await conn.execute("SELECT checksum, priority FROM library_analysis_queue")
+        return {row[0]: row[1] for row in await cursor.fetchall()}
+
+
+async def test_worker_count_is_bounded(db):
+    handler = _Recorder()
+    queue = LibraryAnalysisQueue(db, handler, max_workers=3)
+
+    scheduled = await queue.enqueue_many([f"c{i}" for i in range(20)], AnalysisPriority.BULK)
+    await _drain(queue)
+
+    assert scheduled == 20
+    assert len(handler.calls) == 20
+    assert handler.max_active <= 3
+    assert queue.get_progress()['completed'] == 20
+
+
+async def test_interactive_work_runs_before_bulk(db):
+    handler = _Recorder()
+    handler.gate.clear()
+    queue = LibraryAnalysisQueue(db, handler, max_workers=1)
+
+    await queue.enqueue_many(["b1", "b2", "b3"], AnalysisPriority.BULK)
+    await _wait_running(queue, "b1")
+    await queue.enqueue("w1", AnalysisPriority.NEW_FILE)
+    await queue.enqueue("u1", AnalysisPriority.INTERACTIVE)
+    handler.gate.set()
+    await _drain(queue)
+
+    assert handler.calls == ["b1", "u1", "w1", "b2", "b3"]
+
+
+async def test_enqueue_promotes_pending_file(db):
+    handler = _Recorder()
+    handler.gate.clear()
+    queue = LibraryAnalysisQueue(db, handler, max_workers=1)
+
+    await queue.enqueue_many(["b1", "b2", "b3"], AnalysisPriority.BULK)
+    await _wait_running(queue, "b1")
+    assert await queue.enqueue("b3", AnalysisPriority.INTERACTIVE) is True
+    assert (await _persisted(db))["b3"] == AnalysisPriority.INTERACTIVE
+
+    # Only files actually added or promoted count as scheduled
+    assert await queue.enqueue_many(["b1", "b2", "b3", "n1", "n1"], AnalysisPriority.BULK) == 1
+    assert await queue.enqueue("b1", AnalysisPriority.INTERACTIVE) is False
+    handler.gate.set()
+    await _drain(queue)
+
+    assert handler.calls == ["b1", "b3", "b2", "n1"]
+
+
+async def test_cancel_pending_by_priority(db):
+    handler = _Recorder()
+    handler.gate.clear()
+    queue = LibraryAnalysisQueue(db, handler, max_workers=1)
+
+    await queue.enqueue_many(["b1", "b2", "b3"], AnalysisPriority.BULK)
+    await queue.enqueue("u1", AnalysisPriority.INTERACTIVE)
+    await _wait_running(queue, "u1")
+
+    cancelled = await queue.cancel_pending(AnalysisPriority.BULK)
+    handler.gate.set()
+    await _drain(queue)
+
+    assert cancelled == 3
+    assert handler.calls == ["u1"]
+    assert await _persisted(db) == {}
+
+
+async def test_cancel_running_file(db):
+    handler = _Recorder()
+    handler.gate.clear()
+    queue = LibraryAnalysisQueue(db, handler, max_workers=1)
+
+    await queue.enqueue("c1")
+    await _wait_running(queue, "c1")
+
+    assert await queue.cancel("c1") is True
+    await _drain(queue)
+
+    assert handler.calls == []
+    assert queue.get_progress()['cancelled'] == 1
+    assert await queue.cancel("c1") is False
+
+
+async def test_failures_are_counted_and_queue_continues(db):
+    calls = []
+
+    async def handler(checksum):
+        calls.append(checksum)
+        if checksum == "bad":
+            raise RuntimeError("parse error")
+
+    queue = LibraryAnalysisQueue(db, handler, max_workers=1)
+    await queue.enqueue_many(["bad", "good"])
+    await _drain(queue)
+
+    progress = queue.get_progress()
+    assert calls == ["bad", "good"]
+    assert progress['failed'] == 1
+    assert progress['completed'] == 1
+    assert progress['percent_complete'] == 100.0
+
+
+async def test_progress_reports_eta(db):
+    handler = _Recorder(delay=0.02)
+    queue = LibraryAnalysisQueue(db, handler, max_workers=1)
+
+    await queue.enqueue_many(["c1", "c2", "c3", "c4"])
+    for _ in range(200):
+        if queue.get_progress()['completed'] >= 1:
+            break
+        await asyncio.sleep(0.01)
+
+    progress = queue.get_progress()
+    assert progress['total'] == 4
+    assert progress['eta_seconds'] is not None and progress['eta_seconds'] > 0
+    await _drain(queue)
+
+
+async def test_shutdown_keeps_state_and_resume_continues(db):
+    handler = _Recorder()
+    handler.gate.clear()
+    queue = LibraryAnalysisQueue(db, handler, max_workers=1)
+
+    await queue.enqueue_many(["b1", "b2"], AnalysisPriority.BULK)
+    await queue.enqueue("u1", AnalysisPriority.INTERACTIVE)
+    await _wait_running(queue, "u1")
+    await queue.shutdown()
+
+    assert set(await _persisted(db)) == {"b1", "b2", "u1"}
+
+    resumed_handler = _Recorder()
+    resumed = LibraryAnalysisQueue(db, resumed_handler, max_workers=1)
+    assert await resumed.resume() == 3
+    await _drain(resumed)
+
+    assert resumed_handler.calls == ["u1", "b1", "b2"]
+    assert await _persisted(db) == {}
@@ -17,6 +17,7 @@ async def lib(temp_database, tmp_path):
     config.settings.library_auto_extract_metadata = False
     config.settings.library_checksum_algorithm = "sha256"
     config.settings.library_preserve_originals = True
+    config.settings.library_processing_workers = 2
     svc = LibraryService(db, config, EventService())
     await svc.initialize()
     try:
@@ -16,6 +16,7 @@ def _config(library_dir):
     config.settings.library_auto_extract_metadata = False  # no background metadata tasks in tests
     config.settings.library_checksum_algorithm = "sha256"
     config.settings.library_preserve_originals = True
+    config.settings.library_processing_workers = 2
     return config
 
 
@@ -0,0 +1,206 @@
+"""
+Tests for the content-addressed library thumbnail store.
+"""
+import base64
+import hashlib
+import io
+from unittest.mock import Mock
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from PIL import Image
+
+from src.api.routers import library as library_router
+from src.database.database import Database
+from src.services.event_service import EventService
+from src.services.library_service import LibraryService
+from src.services.analysis_executor import AnalysisExecutor
+from src.services.thumbnail_store import ThumbnailStore, accepts_webp
+from src.utils.errors import PrinternizerError, printernizer_exception_handler
+
+PNG_BYTES = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+
+
+def _png(width=300, height=200):
+    buffer = io.BytesIO()
+    Image.new('RGBA', (width, height), (200, 40, 40, 255)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _config(library_dir):
+    config = Mock()
+    config.settings = Mock()
+    config.settings.library_path = str(library_dir)
+    config.settings.library_enabled = True
+    config.settings.library_auto_organize = True
+    config.settings.library_auto_extract_metadata = False
+    config.settings.library_checksum_algorithm = "sha256"
+    config.settings.library_preserve_originals = True
+    config.settings.library_processing_workers = 2
+    return config
+
+
+@pytest.fixture
+async def lib(temp_database, tmp_path):
+    db = Database(temp_database)
+    await db.initialize()
+    svc = LibraryService(db, _config(tmp_path / "library"), EventService(),
+                         analysis_executor=AnalysisExecutor(max_workers=1, start_method="fork"))
+    await svc.initialize()
+    try:
+        yield svc, tmp_path
+    finally:
+        await svc.analysis_executor.shutdown()
+        await db.close()
+
+
+async def _add_file(svc, tmp_path, name="part.gcode"):
+    f = tmp_path / name
+    f.write_text(f"; {name}\n")
+    return await svc.add_file_to_library(f, {"type": "upload"})
+
+
+@pytest.fixture
+async def client(lib):
+    svc, _ = lib
+    app = FastAPI()
+    app.add_exception_handler(PrinternizerError, printernizer_exception_handler)
+    app.include_router(library_router.router, prefix="/api/v1")
+    app.dependency_overrides[library_router.get_library_service] = lambda: svc
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+
+
+def test_store_is_content_addressed(tmp_path):
+    store = ThumbnailStore(tmp_path)
+
+    digest = store.put(PNG_BYTES, 'PNG')
+
+    assert digest == hashlib.sha256(PNG_BYTES).hexdigest()
+    assert store.put(PNG_BYTES, 'png') == digest
+    path, media_type = store.find(digest)
+    assert path == tmp_path / digest[:2] / f"{digest}.png"
+    assert media_type == 'image/png'
+    assert store.read(digest) == PNG_BYTES
+    assert store.find("../../etc/passwd") is None
+
+
+async def test_inline_thumbnails_are_moved_to_store(lib):
+    svc, tmp_path = lib
+    rec = await _add_file(svc, tmp_path)
+    await svc.library_repo.update_file(rec["checksum"], {
+        'has_thumbnail': 1,
+        'thumbnail_data': base64.b64encode(PNG_BYTES).decode(),
+        'thumbnail_format': 'png',
+    })
+
+    assert await svc.migrate_inline_thumbnails() == 1
+
+    stored = await svc.get_file_by_checksum(rec["checksum"])
+    assert stored['thumbnail_data'] is None
+    assert stored['thumbnail_hash'] == hashlib.sha256(PNG_BYTES).hexdigest()
+    assert svc.thumbnail_store.read(stored['thumbnail_hash']) == PNG_BYTES
+    assert await svc.migrate_inline_thumbnails() == 0
+
+
+async def test_thumbnail_endpoint_uses_etag(lib, client):
+    svc, tmp_path = lib
+    rec = await _add_file(svc, tmp_path)
+    fields = {'has_thumbnail': 1, 'thumbnail_data': base64.b64encode(PNG_BYTES).decode()}
+    await svc._store_thumbnail(fields)
+    await svc.library_repo.update_file(rec["checksum"], fields)
+    etag = f'"{fields["thumbnail_hash"]}"'
+
+    response = await client.get(f"/api/v1/library/files/{rec['checksum']}/thumbnail")
+    assert response.status_code == 200
+    assert response.content == PNG_BYTES
+    assert response.headers['etag'] == etag
+    assert response.headers['content-type'] == 'image/png'
+
+    cached = await client.get(f"/api/v1/library/files/{rec['checksum']}/thumbnail",
+                              headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.content == b''
+
+
+async def test_hash_endpoint_is_immutable(lib, client):
+    svc, _ = lib
+    digest = svc.thumbnail_store.put(PNG_BYTES, 'png')
+
+    response = await client.get(f"/api/v1/library/thumbnails/{digest}")
+    assert response.status_code == 200
+    assert 'immutable' in response.headers['cache-control']
+    assert response.headers['etag'] == f'"{digest}"'
+
+    missing = await client.get(f"/api/v1/library/thumbnails/{'0' * 64}")
+    assert missing.status_code == 404
+
+
+async def test_deleting_last_reference_removes_stored_thumbnail(lib):
+    svc, tmp_path = lib
+    first = await _add_file(svc, tmp_path, "a.gcode")
+    second = await _add_file(svc, tmp_path, "b.gcode")
+    digest = svc.thumbnail_store.put(PNG_BYTES, 'png')
+    for rec in (first, second):
+        await svc.library_repo.update_file(rec["checksum"], {'has_thumbnail': 1, 'thumbnail_hash': digest})
+
+    await svc.delete_file(first["checksum"])
+    assert svc.thumbnail_store.find(digest) is not None
+
+    await svc.delete_file(second["checksum"])
+    assert svc.thumbnail_store.find(digest) is None
+
+
+def test_derivatives_are_downscaled_and_selected(tmp_path):
+    store = ThumbnailStore(tmp_path)
+    digest = store.put(_png(), 'png')
+
+    written = store.generate_derivatives(digest)
+
+    assert len(written) == 6
+    assert store.has_derivatives(digest)
+    assert store.generate_derivatives(digest) == []
+    path, media_type = store.find_derivative(digest, 128, 'webp')
+    assert media_type == 'image/webp'
+    with Image.open(path) as image:
+        assert image.size[0] == 128 and image.size[1] < 128
+
+    path, media_type, tag = store.select(digest, 100, 'image/avif,image/webp,*/*')
+    assert path.name == f"{digest}-128.webp"
+    assert tag == f"{digest}-128.webp"
+    assert store.select(digest, 100, 'image/png')[1] == 'image/png'
+    assert store.select(digest, 1000)[2] == digest
+    assert store.select(digest)[2] == digest
+
+    store.delete(digest)
+    assert not any(tmp_path.rglob(f"{digest}*"))
+
+
+def test_accepts_webp():
+    assert accepts_webp('image/webp,*/*')
+    assert accepts_webp('image/avif, image/webp;q=0.9')
+    assert not accepts_webp('image/webp;q=0')
+    assert not accepts_webp('*/*')
+    assert not accepts_webp(None)
+
+
+async def test_thumbnail_endpoint_serves_negotiated_derivative(lib, client):
+    svc, _ = lib
+    # Stored without derivatives: generated on first sized request
+    digest = svc.thumbnail_store.put(_png(), 'png')
+    assert not svc.thumbnail_store.has_derivatives(digest)
+
+    webp = await client.get(f"/api/v1/library/thumbnails/{digest}?size=64",
+                            headers={'Accept': 'image/webp,*/*'})
+    assert webp.status_code == 200
+    assert webp.headers['content-type'] == 'image/webp'
+    assert webp.headers['vary'] == 'Accept'
+    assert webp.headers['etag'] == f'"{digest}-64.webp"'
+    assert svc.thumbnail_store.has_derivatives(digest)
+
+    png = await client.get(f"/api/v1/library/thumbnails/{digest}?size=64",
+                           headers={'Accept': 'image/png'})
+    assert png.headers['content-type'] == 'image/png'
+    with Image.open(io.BytesIO(png.content)) as image:
+        assert max(image.size) == 64
@@ -0,0 +1,142 @@
+"""
+Tests for mesh decimation and the preview level-of-detail cache.
+"""
+import asyncio
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from src.utils.mesh_decimation import cluster_vertices, decimate, face_budget
+
+trimesh = pytest.importorskip("trimesh")
+
+
+def test_face_budget_is_shared_by_nearby_sizes():
+    assert face_budget((200, 200)) == face_budget((256, 256)) == 65536
+    assert face_budget((512, 512)) == 262144
+    assert face_budget((8, 8)) == 4096
+
+
+def test_decimation_meets_budget_and_keeps_shape():
+    sphere = trimesh.creation.icosphere(subdivisions=6)
+
+    vertices, faces = decimate(sphere.vertices, sphere.faces, 5000)
+
+    assert 2000 < len(faces) <= 5000
+    assert vertices.dtype == np.float32 and faces.dtype == np.int32
+    assert faces.max() == len(vertices) - 1                   # no unused vertices
+    lod = trimesh.Trimesh(vertices, faces, process=False)
+    assert lod.volume == pytest.approx(sphere.volume, rel=0.02)
+    np.testing.assert_allclose(lod.bounds, sphere.bounds, atol=0.05)
+
+
+def test_mesh_within_budget_is_unchanged():
+    box = trimesh.creation.box()
+
+    vertices, faces = decimate(box.vertices, box.faces, 100)
+
+    np.testing.assert_array_equal(faces, box.faces)
+    np.testing.assert_allclose(vertices, box.vertices)
+
+
+def test_clustering_drops_collapsed_and_duplicate_faces():
+    # Two nearly coincident triangles and one sliver that collapses entirely
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0],
+                         [0.01, 0, 0], [1, 0.01, 0], [0, 1.01, 0],
+                         [0.3, 0.3, 0], [0.31, 0.3, 0], [0.3, 0.31, 0]], dtype=float)
+    faces = np.array([[0, 1, 2], [3, 4, 5], [6, 7, 8]])
+
+    out_vertices, out_faces = cluster_vertices(vertices, faces, resolution=4)
+
+    assert len(out_faces) == 1
+    assert len(out_vertices) == 3
+
+
+@pytest.fixture
+def service(tmp_path):
+    from src.services.preview_render_service import PreviewRenderService
+    return PreviewRenderService(cache_dir=str(tmp_path / "cache"))
+
+
+class InThreadExecutor:
+    """Renders preview frames in threads instead of worker processes."""
+
+    async def render_preview_frame(self, mesh_path, size, render, timeout=None):
+        from src.services.analysis_executor import AnalysisKind, AnalysisRequest, run_analysis
+        result = await asyncio.to_thread(run_analysis, AnalysisRequest(
+            AnalysisKind.PREVIEW_FRAME, str(mesh_path), {'size': size, 'render': render}
+        ))
+        return result.data['frame'] if result.ok else None
+
+
+async def test_lod_is_cached_by_content_and_shared_by_previews(service, tmp_path, monkeypatch):
+    from src.services.preview_render_service import PreviewRenderService
+
+    sphere = trimesh.creation.icosphere(subdivisions=6)
+    first, copy = tmp_path / "a.stl", tmp_path / "b.stl"
+    sphere.export(first)
+    copy.write_bytes(first.read_bytes())
+    loads = Mock(wraps=service._load_mesh)
+    monkeypatch.setattr(service, '_load_mesh', loads)
+
+    assert service._render_file(str(first), 'stl', (64, 64))
+    service.analysis_executor = InThreadExecutor()
+    assert await service._generate_animation(str(copy), 'stl', (64, 64))
+
+    assert loads.call_count == 1
+    assert service.stats['lod_misses'] == 1 and service.stats['lod_hits'] == 1
+    assert service.get_statistics()['lod_count'] == 1
+
+    # A new service instance reads the level of detail back from disk
+    restarted = PreviewRenderService(cache_dir=str(service.cache_dir))
+    mesh = restarted._preview_mesh(str(first), 'stl', face_budget((64, 64)))
+    assert len(mesh.faces) <= face_budget((64, 64)) < len(sphere.faces)
+    assert restarted.stats['lod_hits'] == 1
+
+
+async def test_mesh_lod_payload(service, tmp_path):
+    path = tmp_path / "part.stl"
+    trimesh.creation.icosphere(subdivisions=6).export(path)
+
+    payload = await service.get_mesh_lod(str(path), '.stl', max_faces=2048)
+
+    lod = trimesh.load(trimesh.util.wrap_as_stream(payload), file_type='stl')
+    assert 0 < len(lod.faces) <= 2048
+    assert await service.get_mesh_lod(str(path), 'gcode') is None
+    assert await service.clear_cache() == 1
+    assert not list(service.lod_dir.glob("*.npz"))
+
+
+async def test_mesh_endpoint_serves_lod(service, tmp_path):
+    from fastapi import FastAPI
+    from httpx import ASGITransport, AsyncClient
+
+    from src.api.routers import library as library_router
+    from src.utils.errors import PrinternizerError, printernizer_exception_handler
+
+    trimesh.creation.icosphere(subdivisions=5).export(tmp_path / "part.stl")
+    records = {
+        'part': {'library_path': 'part.stl', 'file_type': '.stl', 'filename': 'part.stl'},
+        'code': {'library_path': 'part.gcode', 'file_type': '.gcode', 'filename': 'part.gcode'},
+    }
+
+    async def get_file_by_checksum(checksum):
+        return records.get(checksum)
+
+    library = Mock(library_path=tmp_path, preview_service=service,
+                   get_file_by_checksum=get_file_by_checksum)
+    app = FastAPI()
+    app.add_exception_handler(PrinternizerError, printernizer_exception_handler)
+    app.include_router(library_router.router, prefix="/api/v1")
+    app.dependency_overrides[library_router.get_library_service] = lambda: library
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/v1/library/files/part/mesh", params={'max_faces': 4096})
+        assert response.status_code == 200
+        assert response.headers['content-type'] == 'model/stl'
+        # Binary STL: 80-byte header, face count, 50 bytes per face
+        assert 0 < int.from_bytes(response.content[80:84], 'little') <= 4096
+
+        assert (await client.get("/api/v1/library/files/code/mesh")).status_code == 400
+        assert (await client.get("/api/v1/library/files/none/mesh")).status_code == 404
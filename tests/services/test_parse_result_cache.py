@@ -0,0 +1,171 @@
+"""
+Tests for the checksum- and version-keyed parse-result cache.
+"""
+from unittest.mock import AsyncMock, Mock
+
+import numpy as np
+import pytest
+
+from src.database.database import Database
+from src.services.analysis_executor import AnalysisExecutor
+from src.services.bambu_parser import BambuParser
+from src.services.event_service import EventService
+from src.services.library_service import LibraryService
+from src.services.parse_result_cache import (
+    BAMBU_PARSER, GCODE_LAYERS, STL_ANALYZER, ParseResultCache, parser_version,
+)
+from src.services.stl_analyzer import STLAnalyzer
+
+
+@pytest.fixture
+async def database(temp_database):
+    db = Database(temp_database)
+    await db.initialize()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+def _parser(result):
+    return AsyncMock(return_value=result)
+
+
+async def test_second_parse_is_served_from_cache(database):
+    cache = ParseResultCache(database)
+    parse = _parser({'success': True, 'metadata': {'layer_height': np.float32(0.2)},
+                     'thumbnails': [{'width': 64}]})
+
+    first = await cache.get_or_parse('abc', BAMBU_PARSER, 'a.gcode', parse)
+    second = await cache.get_or_parse('abc', BAMBU_PARSER, 'b.gcode', parse)
+
+    assert parse.await_count == 1
+    assert second == first
+    assert second['metadata']['layer_height'] == pytest.approx(0.2)
+    stats = await cache.get_stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+    assert stats['entries'][0]['parser_version'] == 'gcode-1'
+
+
+async def test_failed_results_are_not_cached(database):
+    cache = ParseResultCache(database)
+    parse = _parser({'success': False, 'error': 'corrupt'})
+
+    await cache.get_or_parse('abc', STL_ANALYZER, 'part.stl', parse)
+    await cache.get_or_parse('abc', STL_ANALYZER, 'part.stl', parse)
+
+    assert parse.await_count == 2
+
+
+async def test_version_bump_invalidates_only_that_file_type(database, monkeypatch):
+    cache = ParseResultCache(database)
+    gcode, threemf = _parser({'success': True}), _parser({'success': True})
+    await cache.get_or_parse('g', BAMBU_PARSER, 'part.gcode', gcode)
+    await cache.get_or_parse('t', BAMBU_PARSER, 'part.3mf', threemf)
+
+    monkeypatch.setitem(BambuParser.PARSER_VERSIONS, '.gcode', 2)
+    assert parser_version(BAMBU_PARSER, 'part.gcode') == 'gcode-2'
+    assert await cache.stale_checksums([('g', 'part.gcode'), ('t', 'part.3mf'),
+                                        ('new', 'new.3mf')]) == {'g', 'new'}
+
+    await cache.get_or_parse('g', BAMBU_PARSER, 'part.gcode', gcode)
+    await cache.get_or_parse('t', BAMBU_PARSER, 'part.3mf', threemf)
+
+    assert gcode.await_count == 2
+    assert threemf.await_count == 1
+    # The old version was replaced, not kept alongside
+    versions = [row['parser_version'] for row in (await cache.get_stats())['entries']]
+    assert sorted(versions) == ['3mf-2', 'gcode-2']
+
+
+async def test_stale_versions_are_pruned_at_startup(database):
+    cache = ParseResultCache(database)
+    for checksum, version in (('g', 'gcode-1'), ('old', 'gcode-0'), ('t', '3mf-1')):
+        await cache.put(checksum, BAMBU_PARSER, version, {'success': True})
+    await cache.put('s', STL_ANALYZER, '0', {'success': True})
+
+    await cache.prune_stale_versions()
+
+    entries = (await cache.get_stats())['entries']
+    assert [(row['parser_name'], row['parser_version']) for row in entries] == [(BAMBU_PARSER, 'gcode-1')]
+
+
+async def test_layer_tables_round_trip_as_bytes(database):
+    executor = AnalysisExecutor(max_workers=1)
+    executor.result_cache = ParseResultCache(database)
+    layers = np.arange(12, dtype='<f4').tobytes()
+    executor.submit = AsyncMock(return_value=Mock(ok=True, data={
+        'success': True, 'layer_count': 2, 'layers': layers,
+    }))
+
+    await executor.analyze_gcode_layers('a.gcode', checksum='abc')
+    cached = await executor.analyze_gcode_layers('a.gcode', checksum='abc')
+
+    assert executor.submit.await_count == 1
+    assert cached['layers'] == layers
+    assert parser_version(GCODE_LAYERS, 'a.gcode') == '2'
+
+
+async def test_parsers_are_versioned_independently(monkeypatch):
+    monkeypatch.setattr(STLAnalyzer, 'PARSER_VERSION', 3)
+    assert parser_version(STL_ANALYZER, 'x.stl') == '3'
+    assert parser_version(BAMBU_PARSER, 'x.STL') == 'stl-1'
+    with pytest.raises(ValueError):
+        parser_version('Unknown', 'x.stl')
+
+
+async def test_executor_uses_cache_only_with_checksum(database):
+    executor = AnalysisExecutor(max_workers=1)
+    executor.result_cache = ParseResultCache(database)
+    executor.submit = AsyncMock(return_value=Mock(ok=True, data={'success': True, 'metadata': {}}))
+
+    await executor.parse_file('a.gcode')
+    await executor.parse_file('a.gcode')
+    await executor.analyze_stl('a.stl', checksum='abc')
+    await executor.analyze_stl('a.stl', checksum='abc')
+
+    assert executor.submit.await_count == 3
+
+
+async def test_library_duplicates_and_stale_filter_share_content_checksum(database, tmp_path):
+    config = Mock()
+    config.settings = Mock()
+    config.settings.library_path = str(tmp_path / "library")
+    config.settings.library_enabled = True
+    config.settings.library_auto_organize = True
+    config.settings.library_auto_extract_metadata = False
+    config.settings.library_checksum_algorithm = "sha256"
+    config.settings.library_preserve_originals = True
+    config.settings.library_processing_workers = 2
+    executor = AnalysisExecutor(max_workers=1)
+    executor.result_cache = ParseResultCache(database)
+    executor.submit = AsyncMock(return_value=Mock(ok=True, data={
+        'success': True, 'thumbnails': [], 'metadata': {'layer_height': 0.2},
+        'needs_generation': False,
+    }))
+    svc = LibraryService(database, config, EventService(), analysis_executor=executor)
+    await svc.initialize()
+    (svc.library_path / "models" / "part.3mf").write_bytes(b"3mf")
+    for checksum, duplicate_of in (('abc', None), ('abc-1', 'abc')):
+        await svc.library_repo.create_file({
+            'id': checksum, 'checksum': checksum, 'filename': 'part.3mf',
+            'library_path': 'models/part.3mf', 'file_size': 3, 'file_type': '.3mf',
+            'sources': '[]', 'added_to_library': '2026-10-19T00:00:00',
+            'duplicate_of_checksum': duplicate_of,
+        })
+    files = [await svc.get_file_by_checksum(c) for c in ('abc', 'abc-1')]
+
+    assert len(await svc.filter_stale_files(files)) == 2
+    await svc._extract_metadata_async(None, 'abc')
+    await svc._extract_metadata_async(None, 'abc-1')
+
+    assert executor.submit.await_count == 1
+    assert (await svc.get_file_by_checksum('abc-1'))['layer_height'] == 0.2
+    assert await svc.filter_stale_files(files) == []
+
+    # Entries go once the last file holding the content is deleted
+    await svc.delete_file('abc', delete_physical=False)
+    assert await executor.result_cache.get('abc', BAMBU_PARSER, '3mf-2') is not None
+    await svc.delete_file('abc-1', delete_physical=False)
+    assert await executor.result_cache.get('abc', BAMBU_PARSER, '3mf-2') is None
+    assert (await svc.get_parse_cache_stats())['entries'] == []
@@ -0,0 +1,141 @@
+"""
+Tests for the size-bounded, content-keyed preview cache.
+"""
+import json
+
+import pytest
+
+from src.services.preview_cache import INDEX_NAME, PreviewCache
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = PreviewCache(tmp_path, max_bytes=300)
+    for name in ('a.png', 'b.png', 'c.png'):
+        assert cache.put(name, b'x' * 100) == 0
+    assert cache.get('a.png') == b'x' * 100          # b is now least recently used
+
+    assert cache.put('d.png', b'x' * 100) == 1
+
+    assert cache.names() == ['c.png', 'a.png', 'd.png']
+    assert not (tmp_path / 'b.png').exists()
+    assert cache.get('b.png') is None
+    assert cache.get_stats() == {'entries': 3, 'bytes': 300, 'max_bytes': 300,
+                                 'hits': 1, 'misses': 1, 'evictions': 1}
+
+
+def test_entry_larger_than_budget_is_kept_alone(tmp_path):
+    cache = PreviewCache(tmp_path, max_bytes=100)
+    cache.put('a.png', b'x' * 50)
+
+    assert cache.put('big.gif', b'x' * 500) == 1
+    assert cache.names() == ['big.gif']
+
+
+def test_pinned_entries_are_not_evicted_or_cleared(tmp_path):
+    cache = PreviewCache(tmp_path, max_bytes=200)
+    cache.put('lod/k.npz', b'x' * 100)
+    cache.put('a.png', b'x' * 100)
+
+    with cache.pinned('lod/k.npz'):
+        assert cache.put('b.png', b'x' * 100) == 1
+        assert cache.names() == ['lod/k.npz', 'b.png']
+        assert cache.clear() == 1
+        assert (tmp_path / 'lod' / 'k.npz').exists()
+
+    assert cache.clear() == 1
+    assert cache.names() == []
+
+
+def test_index_survives_restart(tmp_path):
+    cache = PreviewCache(tmp_path, max_bytes=1000)
+    cache.put('a.png', b'a')
+    cache.put('lod/k.npz', b'mesh')
+    cache.put('b.gif', b'bb')
+    cache.touch('a.png')
+    cache.flush()
+
+    restarted = PreviewCache(tmp_path, max_bytes=1000)
+
+    assert restarted.names() == ['lod/k.npz', 'b.gif', 'a.png']
+    assert restarted.get_stats()['bytes'] == 7
+    entries = json.loads((tmp_path / INDEX_NAME).read_text())['entries']
+    assert [name for name, _, _ in entries] == ['lod/k.npz', 'b.gif', 'a.png']
+
+
+def test_unindexed_files_are_adopted_and_budget_applied_on_load(tmp_path):
+    cache = PreviewCache(tmp_path, max_bytes=1000)
+    cache.put('indexed.png', b'x' * 100)
+    (tmp_path / 'legacy-animated.gif').write_bytes(b'x' * 100)   # older layout
+    (tmp_path / 'notes.txt').write_text('not a preview')
+
+    restarted = PreviewCache(tmp_path, max_bytes=150)
+
+    # Adopted files count as least recently used
+    assert restarted.names() == ['indexed.png']
+    assert not (tmp_path / 'legacy-animated.gif').exists()
+    assert (tmp_path / 'notes.txt').exists()
+
+
+def test_unreadable_index_is_rebuilt(tmp_path):
+    (tmp_path / 'a.png').write_bytes(b'png')
+    (tmp_path / INDEX_NAME).write_text('{not json')
+
+    cache = PreviewCache(tmp_path, max_bytes=1000)
+
+    assert cache.get('a.png') == b'png'
+
+
+trimesh = pytest.importorskip("trimesh")
+
+
+@pytest.fixture
+def service(tmp_path):
+    from src.services.preview_render_service import PreviewRenderService
+    return PreviewRenderService(cache_dir=str(tmp_path / "cache"))
+
+
+async def test_previews_are_keyed_by_content_and_render_parameters(service, tmp_path):
+    from prometheus_client import REGISTRY
+
+    def hits():
+        return REGISTRY.get_sample_value('printernizer_preview_cache_hits_total',
+                                         {'kind': 'static'}) or 0
+
+    library, watched = tmp_path / "library.stl", tmp_path / "watched.stl"
+    trimesh.creation.box().export(library)
+    watched.write_bytes(library.read_bytes())
+    hits_before = hits()
+
+    first = await service.get_or_generate_preview(str(library), 'stl', (64, 64))
+    again = await service.get_or_generate_preview(str(watched), 'stl', (64, 64))
+
+    assert first == again
+    assert service.stats['renders_generated'] == 1
+    assert service.stats['cache_hits'] == 1 and service.stats['cache_misses'] == 1
+    assert hits() == hits_before + 1
+
+    # A different size or render setting is a different entry
+    await service.get_or_generate_preview(str(library), 'stl', (32, 32))
+    service.update_config({'stl_rendering': {'face_color': '#ff0000'}})
+    await service.get_or_generate_preview(str(library), 'stl', (64, 64))
+    assert service.stats['renders_generated'] == 3
+    assert service.get_statistics()['cache_png_count'] == 3
+
+
+async def test_service_evicts_within_budget(service, tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"part{i}.stl"
+        trimesh.creation.box(extents=[1, 1 + i, 1]).export(path)
+        paths.append(path)
+    await service.get_or_generate_preview(str(paths[0]), 'stl', (64, 64))
+    service.cache.max_bytes = service.cache.get_stats()['bytes'] + 100
+
+    for path in paths[1:]:
+        await service.get_or_generate_preview(str(path), 'stl', (64, 64))
+
+    assert service.stats['cache_evictions'] >= 1
+    stats = service.cache.get_stats()
+    assert stats['bytes'] <= stats['max_bytes']
+    assert await service.clear_cache() == stats['entries']
+    assert service.cache.names() == []
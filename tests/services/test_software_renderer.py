@@ -0,0 +1,128 @@
+"""
+Tests for the NumPy software renderer used by preview thumbnails.
+"""
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.utils.software_renderer import (
+    rasterize, render_mesh, render_polyline, view_basis,
+)
+
+trimesh = pytest.importorskip("trimesh")
+
+
+def _square(size=10, depth=0.0):
+    """Two triangles covering [1, size+1]² in screen space."""
+    screen = np.array([[1, 1, depth], [size + 1, 1, depth],
+                       [size + 1, size + 1, depth], [1, size + 1, depth]], dtype=float)
+    return screen, np.array([[0, 1, 2], [0, 2, 3]])
+
+
+def test_view_basis_matches_matplotlib_camera():
+    basis = view_basis(30, 20)
+
+    np.testing.assert_allclose(basis @ basis.T, np.eye(3), atol=1e-12)
+    np.testing.assert_allclose(np.cross(basis[0], basis[1]), basis[2], atol=1e-12)
+    az, el = np.radians(30), np.radians(20)
+    np.testing.assert_allclose(basis[2], [np.cos(el) * np.cos(az), np.cos(el) * np.sin(az),
+                                          np.sin(el)])
+    assert basis[1, 2] > 0                                      # world Z points up
+
+
+def test_shared_edges_leave_no_gaps():
+    screen, faces = _square(size=10)
+
+    light = rasterize(screen, faces, np.ones((2, 3)), 16, 16)
+
+    covered = ~np.isnan(light)
+    assert covered.sum() == 100
+    assert covered[1:11, 1:11].all()
+
+
+def test_coverage_matches_triangle_area():
+    screen = np.array([[3.2, 2.7, 0], [90.1, 10.4, 0], [20.6, 70.9, 0]])
+    area = abs(np.cross(screen[1, :2] - screen[0, :2], screen[2, :2] - screen[0, :2])) / 2
+
+    light = rasterize(screen, np.array([[0, 1, 2]]), np.ones((1, 3)), 100, 100)
+
+    assert (~np.isnan(light)).sum() == pytest.approx(area, rel=0.02)
+
+
+def test_nearest_face_wins_in_any_order():
+    near, near_faces = _square(size=10, depth=1.0)
+    far, far_faces = _square(size=10, depth=-1.0)
+    screen = np.vstack([near, far])
+    faces = np.vstack([near_faces, far_faces + 4])
+    shades = np.array([[0.9] * 3, [0.9] * 3, [0.1] * 3, [0.1] * 3])
+
+    for order in (slice(None), slice(None, None, -1)):
+        light = rasterize(screen, faces[order], shades[order], 16, 16)
+        np.testing.assert_allclose(light[~np.isnan(light)], 0.9, rtol=1e-6)
+
+
+def test_corner_values_are_interpolated():
+    screen = np.array([[0, 0, 0], [64, 0, 0], [0, 64, 0]], dtype=float)
+
+    light = rasterize(screen, np.array([[0, 1, 2]]), np.array([[0.0, 1.0, 0.0]]), 64, 64)
+
+    # Value at pixel centre (c + 0.5, r + 0.5) is the weight of the second corner
+    assert light[10, 40] == pytest.approx(40.5 / 64, rel=1e-5)
+
+
+def test_mesh_render_is_shaded_and_anti_aliased():
+    box = trimesh.creation.box()
+
+    flat = np.asarray(render_mesh(box.vertices, box.faces, (64, 64), supersample=1)).astype(int)
+    smooth = np.asarray(render_mesh(box.vertices, box.faces, (64, 64), supersample=4))
+
+    background = (flat == 255).all(axis=2)
+    assert 0.3 < (~background).mean() < 0.9
+    # Three visible sides, three different flat shades
+    assert len({tuple(c) for c in flat[~background]}) == 3
+    # Supersampling blends edge pixels with the background
+    assert len({tuple(c) for c in smooth.reshape(-1, 3)}) > 10
+    assert flat.shape == (64, 64, 3)
+
+
+def test_smooth_shading_varies_within_faces():
+    sphere = trimesh.creation.icosphere(subdivisions=2)
+
+    flat = np.asarray(render_mesh(sphere.vertices, sphere.faces, (96, 96), supersample=1))
+    smooth = np.asarray(render_mesh(sphere.vertices, sphere.faces, (96, 96), supersample=1,
+                                    shading='smooth'))
+
+    assert len(np.unique(smooth.reshape(-1, 3), axis=0)) > len(np.unique(flat.reshape(-1, 3),
+                                                                           axis=0))
+    with pytest.raises(ValueError):
+        render_mesh(sphere.vertices, sphere.faces, (8, 8), shading='phong')
+
+
+def test_polyline_breaks_at_nan_rows():
+    points = np.array([[0, 0, 0], [10, 0, 0], [np.nan] * 3, [0, 10, 0], [10, 10, 0]])
+
+    image = np.asarray(render_polyline(points, (50, 50), azimuth=-90, elevation=90,
+                                       supersample=1))
+
+    drawn = (image != 255).any(axis=2)
+    assert drawn[2].any() and drawn[-3].any()                  # both runs
+    assert not drawn[10:40].any()                              # nothing joins them
+    assert render_polyline(np.full((3, 3), np.nan), (50, 50)) is None
+
+
+def test_preview_service_renders_without_matplotlib(tmp_path):
+    from src.services import preview_render_service
+    from src.services.preview_render_service import PreviewRenderService
+
+    assert not hasattr(preview_render_service, 'plt')
+    path = tmp_path / "part.stl"
+    trimesh.creation.icosphere(subdivisions=3).export(path)
+    service = PreviewRenderService(cache_dir=str(tmp_path / "cache"))
+
+    png = service._render_file(str(path), 'stl', (120, 80))
+
+    image = Image.open(BytesIO(png))
+    assert image.format == 'PNG' and image.size == (120, 80)
+
@@ -0,0 +1,82 @@
+"""
+Tests for the memory-mapped binary STL analysis fast path.
+"""
+import numpy as np
+import pytest
+
+from src.utils.stl_binary import analyze_binary_stl, binary_triangle_count
+
+trimesh = pytest.importorskip("trimesh")
+
+
+@pytest.fixture
+def part(tmp_path):
+    mesh = trimesh.creation.torus(5, 1.5)
+    mesh.apply_translation([10, -4, 2])
+    binary, ascii_ = tmp_path / "part.stl", tmp_path / "part-ascii.stl"
+    mesh.export(binary)
+    mesh.export(ascii_, file_type='stl_ascii')
+    return binary, ascii_
+
+
+def test_binary_detection(part, tmp_path):
+    binary, ascii_ = part
+
+    assert binary_triangle_count(binary) == len(trimesh.load(binary).faces)
+    assert binary_triangle_count(ascii_) is None
+    (tmp_path / "short.stl").write_bytes(b"solid x")
+    assert binary_triangle_count(tmp_path / "short.stl") is None
+    with pytest.raises(ValueError):
+        analyze_binary_stl(ascii_)
+
+
+def test_statistics_match_trimesh(part):
+    binary, _ = part
+    mesh = trimesh.load_mesh(str(binary))
+
+    # Small chunks exercise the streaming reduction
+    stats = analyze_binary_stl(binary, chunk_triangles=100)
+
+    assert stats.triangle_count == len(mesh.faces)
+    np.testing.assert_allclose(stats.bounds, mesh.bounds, atol=1e-5)
+    assert stats.volume == pytest.approx(mesh.volume, rel=1e-6)
+    assert stats.area == pytest.approx(mesh.area, rel=1e-6)
+    np.testing.assert_allclose(stats.centroid, mesh.centroid, atol=1e-5)
+    assert stats.vertex_count == len(mesh.vertices)
+    assert stats.is_watertight is True and not stats.vertex_count_estimated
+
+
+def test_open_mesh_and_topology_limit(tmp_path):
+    sphere = trimesh.creation.icosphere(subdivisions=2)
+    sphere.faces = sphere.faces[:-1]
+    path = tmp_path / "open.stl"
+    sphere.export(path)
+
+    assert analyze_binary_stl(path).is_watertight is False
+
+    stats = analyze_binary_stl(path, topology_max_triangles=10)
+    assert stats.is_watertight is None and stats.vertex_count_estimated
+    assert stats.vertex_count == stats.triangle_count // 2 + 2
+
+
+def test_analyzer_gives_same_result_for_binary_and_ascii(part):
+    from src.services.stl_analyzer import STLAnalyzer
+    binary, ascii_ = part
+    analyzer = STLAnalyzer()
+
+    fast = analyzer.analyze_file_sync(binary)
+    loaded = analyzer.analyze_file_sync(ascii_)
+
+    assert fast['success'] and loaded['success']
+    for key in ('physical_properties', 'geometry_info', 'quality_metrics'):
+        assert fast[key] == loaded[key]
+
+
+def test_empty_binary_stl(tmp_path):
+    from src.services.stl_analyzer import STLAnalyzer
+    path = tmp_path / "empty.stl"
+    path.write_bytes(bytes(80) + (0).to_bytes(4, 'little'))
+
+    result = STLAnalyzer().analyze_file_sync(path)
+
+    assert not result['success'] and result['error'] == "Empty mesh"
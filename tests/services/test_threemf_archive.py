@@ -0,0 +1,148 @@
+"""
+Tests for the shared 3MF archive reader and its consumers.
+"""
+import io
+import json
+import zipfile
+
+import pytest
+from PIL import Image
+
+from src.services.bambu_parser import BambuParser
+from src.services.file_role_classifier import threemf_has_gcode
+from src.services.threemf_analyzer import ThreeMFAnalyzer
+from src.services.threemf_archive import ThreeMFArchive
+
+MODEL_NS = 'http://schemas.microsoft.com/3dmanufacturing/core/2015/02'
+
+
+def _model_xml(vertices):
+    rows = "".join(f'<vertex x="{x}" y="{y}" z="{z}"/>' for x, y, z in vertices)
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?>'
+        f'<model unit="millimeter" xmlns="{MODEL_NS}">'
+        f'<metadata name="Title">Bracket</metadata>'
+        f'<metadata name="layer_height">0.2</metadata>'
+        f'<resources><object id="1" type="model"><mesh>'
+        f'<vertices>{rows}</vertices>'
+        f'<triangles><triangle v1="0" v2="1" v3="2"/></triangles>'
+        f'</mesh></object></resources>'
+        f'<build><item objectid="1"/></build></model>'
+    )
+
+
+def _write_3mf(path, vertices=((0, 0, 0), (40, 0, 0), (0, 20, 10)), gcode=False):
+    png = io.BytesIO()
+    Image.new('RGB', (4, 4)).save(png, format='PNG')
+    with zipfile.ZipFile(path, 'w') as z:
+        z.writestr('3D/3dmodel.model', _model_xml(vertices))
+        z.writestr('Metadata/plate_1.png', png.getvalue())
+        z.writestr('Metadata/plate_1.json', json.dumps({
+            'bbox_all': [10, 20, 50, 40],
+            'bbox_objects': [{'name': 'bracket', 'area': 120.5}, {'name': 'wipe_tower', 'area': 9}],
+            'filament_colors': ['#FF0000', '#00FF00'],
+            'filament_ids': ['GFA00', 'GFA01'],
+        }))
+        z.writestr('Metadata/process_settings_1.config', json.dumps({
+            'layer_height': '0.16', 'wall_loops': '3', 'nozzle_diameter': ['0.4'],
+            'sparse_infill_density': '15%', 'compatible_printers': ['Bambu Lab X1 Carbon'],
+            'curr_bed_type': 'Textured PEI Plate',
+        }))
+        z.writestr('Metadata/slice_info.config',
+                   '<config><plate><metadata key="weight" value="12.5"/>'
+                   '<metadata key="prediction" value="3600"/></plate></config>')
+        if gcode:
+            z.writestr('Metadata/plate_1.gcode', '; gcode\n')
+    return path
+
+
+@pytest.fixture
+def threemf(tmp_path):
+    return _write_3mf(tmp_path / "bracket.3mf", gcode=True)
+
+
+def test_members_are_read_once(threemf, monkeypatch):
+    archive = ThreeMFArchive(threemf)
+    reads = []
+    original_read = archive._zip.read
+    monkeypatch.setattr(archive._zip, 'read', lambda name: reads.append(name) or original_read(name))
+
+    first = archive.json('Metadata/plate_1.json')
+    assert archive.json('Metadata/plate_1.json') is first
+    assert archive.text('Metadata/plate_1.json').startswith('{')
+    assert archive.json('Metadata/missing.json') is None
+    assert reads == ['Metadata/plate_1.json']
+    with pytest.raises(KeyError):
+        archive.read('Metadata/missing.json')
+    archive.close()
+
+    # Memoized members stay readable after close
+    assert archive.json('Metadata/plate_1.json') is first
+
+
+def test_model_summary_streams_vertices(threemf):
+    with ThreeMFArchive(threemf) as archive:
+        summary = archive.model_summary()
+        assert archive.model_summary() is summary
+
+    assert summary['vertex_count'] == 3
+    assert summary['bounds'] == ((0, 0, 0), (40, 20, 10))
+    assert ('Title', 'Bracket') in summary['metadata']
+
+
+async def test_one_archive_serves_every_consumer(threemf, monkeypatch):
+    opened = []
+    original_init = ThreeMFArchive.__init__
+
+    def counting_init(self, file_path):
+        opened.append(file_path)
+        original_init(self, file_path)
+
+    monkeypatch.setattr(ThreeMFArchive, '__init__', counting_init)
+
+    with ThreeMFArchive(threemf) as archive:
+        parsed = await BambuParser().parse_file(str(threemf), archive=archive)
+        analysis = await ThreeMFAnalyzer().analyze_file(threemf, archive=archive)
+        assert threemf_has_gcode(archive) is True
+
+    assert len(opened) == 1
+    assert parsed['success'] is True
+    assert parsed['has_gcode'] is True
+    assert len(parsed['thumbnails']) == 1
+    assert parsed['metadata']['title'] == 'Bracket'
+    assert parsed['metadata']['model_width'] == 40
+    assert parsed['metadata']['model_height'] == 10
+    assert analysis['success'] is True
+    assert analysis['physical_properties']['object_count'] == 1
+    assert analysis['print_settings']['layer_height'] == 0.16
+    assert analysis['print_settings']['infill_density'] == 15.0
+    assert analysis['material_info']['estimated_weight'] == 12.5
+    assert analysis['material_info']['filament_colors'] == ['#FF0000', '#00FF00']
+    assert analysis['compatibility']['bed_type'] == 'Textured PEI Plate'
+
+
+async def test_streamed_model_matches_tree_parse(tmp_path):
+    vertices = [(i * 0.5, (i % 7) * 1.25, (i % 11) * 0.75) for i in range(500)]
+    path = _write_3mf(tmp_path / "grid.3mf", vertices)
+    parser = BambuParser()
+
+    parsed = await parser.parse_file(str(path))
+
+    expected = parser._extract_3mf_metadata(_model_xml(vertices))
+    for key, value in expected.items():
+        assert parsed['metadata'][key] == value
+
+
+async def test_consumers_open_their_own_archive(tmp_path):
+    path = _write_3mf(tmp_path / "model.3mf")
+
+    assert (await ThreeMFAnalyzer().analyze_file(path))['success'] is True
+    parsed = await BambuParser().parse_file(str(path))
+    assert parsed['success'] is True
+    assert parsed['has_gcode'] is False
+
+    bad = tmp_path / "broken.3mf"
+    bad.write_bytes(b'not a zip')
+    result = await ThreeMFAnalyzer().analyze_file(bad)
+    assert result['success'] is False
+    assert result['error'] == "Invalid 3MF file format"
@@ -0,0 +1,233 @@
+"""
+Tests for per-plate analysis of multi-plate 3MF projects and the plate table.
+"""
+import io
+import json
+import zipfile
+from unittest.mock import Mock
+
+import pytest
+from PIL import Image
+
+from src.database.database import Database
+from src.services.bambu_parser import BambuParser
+from src.services.event_service import EventService
+from src.services.library_service import LibraryService
+from src.services.threemf_analyzer import ThreeMFAnalyzer
+from src.services.threemf_archive import ThreeMFArchive
+
+MODEL = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<model unit="millimeter" xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">'
+    '<resources><object id="1" type="model"><mesh><vertices>'
+    '<vertex x="0" y="0" z="0"/><vertex x="10" y="0" z="0"/><vertex x="0" y="10" z="5"/>'
+    '</vertices><triangles><triangle v1="0" v2="1" v3="2"/></triangles></mesh></object>'
+    '</resources><build><item objectid="1"/></build></model>'
+)
+
+# (prediction seconds, weight g, objects, filaments [(type, color, used_g, used_m)])
+PLATES = {
+    1: (3600, 12.5, 2, [('PLA', '#FF0000', 12.5, 4.1)]),
+    2: (900, 3.0, 1, [('PETG', '#00FF00', 2.0, 0.7), ('PLA', '#0000FF', 1.0, 0.3)]),
+    3: (7200, 40.0, 5, [('PLA', '#FF0000', 40.0, 13.2)]),
+}
+
+
+def _png(color):
+    png = io.BytesIO()
+    Image.new('RGB', (4, 4), color).save(png, format='PNG')
+    return png.getvalue()
+
+
+def _slice_info(plates):
+    rows = []
+    for index, (prediction, weight, objects, filaments) in plates.items():
+        rows.append('<plate>')
+        rows.append(f'<metadata key="index" value="{index}"/>')
+        rows.append(f'<metadata key="prediction" value="{prediction}"/>')
+        rows.append(f'<metadata key="weight" value="{weight}"/>')
+        rows.append(f'<metadata key="support_used" value="{"true" if index == 3 else "false"}"/>')
+        rows += [f'<object identify_id="{index}{i}" name="part{i}" skipped="false"/>'
+                 for i in range(objects)]
+        rows += [f'<filament id="{i + 1}" type="{t}" color="{c}" used_m="{m}" used_g="{g}"/>'
+                 for i, (t, c, g, m) in enumerate(filaments)]
+        rows.append('</plate>')
+    return '<config>' + ''.join(rows) + '</config>'
+
+
+def _write_project(path, plates=PLATES):
+    with zipfile.ZipFile(path, 'w') as z:
+        z.writestr('3D/3dmodel.model', MODEL)
+        z.writestr('Metadata/slice_info.config', _slice_info(plates))
+        z.writestr('Metadata/model_settings.config',
+                   '<config><plate><metadata key="plater_id" value="2"/>'
+                   '<metadata key="plater_name" value="Small parts"/></plate></config>')
+        for index, (_, _, objects, _) in plates.items():
+            z.writestr(f'Metadata/plate_{index}.png', _png((index * 60, 0, 0)))
+            z.writestr(f'Metadata/plate_{index}.json', json.dumps({
+                'bbox_objects': [{'name': f'part{i}'} for i in range(objects)]
+                                + [{'name': 'wipe_tower'}],
+            }))
+            z.writestr(f'Metadata/process_settings_{index}.config',
+                       json.dumps({'layer_height': f'0.{index + 1}'}))
+            if index != 3:
+                z.writestr(f'Metadata/plate_{index}.gcode', '; gcode\n')
+    return path
+
+
+@pytest.fixture
+def project(tmp_path):
+    return _write_project(tmp_path / "project.3mf")
+
+
+def test_every_plate_is_analyzed(project):
+    with ThreeMFArchive(project) as archive:
+        plates = ThreeMFAnalyzer().analyze_plates(archive)
+
+    assert [p['plate_index'] for p in plates] == [1, 2, 3]
+    first, second, third = plates
+    assert first['estimated_time'] == 3600 and first['filament_weight'] == 12.5
+    assert first['object_count'] == 2
+    assert first['layer_height'] == 0.2
+    assert first['thumbnail_file'] == 'Metadata/plate_1.png'
+    assert second['name'] == 'Small parts'
+    assert second['filament_length'] == 1.0
+    assert second['filament_colors'] == ['#00FF00', '#0000FF']
+    assert [f['type'] for f in second['filaments']] == ['PETG', 'PLA']
+    assert third['object_count'] == 5 and third['support_used'] is True
+    assert third['has_gcode'] is False and first['has_gcode'] is True
+
+
+def test_plate_thumbnails_are_not_inflated(project, monkeypatch):
+    read = []
+    original = ThreeMFArchive.read
+
+    def recording_read(self, name):
+        read.append(name)
+        return original(self, name)
+
+    monkeypatch.setattr(ThreeMFArchive, 'read', recording_read)
+
+    with ThreeMFArchive(project) as archive:
+        plates = ThreeMFAnalyzer().analyze_plates(archive)
+
+    assert [p['thumbnail_file'] for p in plates] == [f'Metadata/plate_{i}.png' for i in (1, 2, 3)]
+    assert not [name for name in read if name.endswith('.png')]
+
+
+async def test_parser_and_analyzer_report_plates(project):
+    parsed = await BambuParser().parse_file(str(project))
+    analysis = await ThreeMFAnalyzer().analyze_file(project)
+
+    assert parsed['metadata']['plate_count'] == 3
+    assert [p['plate_index'] for p in parsed['plates']] == [1, 2, 3]
+    assert {t['source_file'] for t in parsed['thumbnails']} == {
+        'Metadata/plate_1.png', 'Metadata/plate_2.png', 'Metadata/plate_3.png'}
+    assert analysis['material_info']['plate_count'] == 3
+    assert analysis['material_info']['total_estimated_time'] == 11700
+    assert analysis['material_info']['total_filament_weight'] == 55.5
+
+
+async def test_single_model_package_has_no_plates(tmp_path):
+    path = tmp_path / "plain.3mf"
+    with zipfile.ZipFile(path, 'w') as z:
+        z.writestr('3D/3dmodel.model', MODEL)
+
+    parsed = await BambuParser().parse_file(str(path))
+
+    assert parsed['plates'] == []
+    assert 'plate_count' not in parsed['metadata']
+
+
+@pytest.fixture
+async def library(temp_database, tmp_path):
+    db = Database(temp_database)
+    await db.initialize()
+    config = Mock()
+    config.settings = Mock()
+    config.settings.library_path = str(tmp_path / "library")
+    config.settings.library_enabled = True
+    config.settings.library_auto_organize = True
+    config.settings.library_auto_extract_metadata = False
+    config.settings.library_checksum_algorithm = "sha256"
+    config.settings.library_preserve_originals = True
+    config.settings.library_processing_workers = 2
+    svc = LibraryService(db, config, EventService())
+    await svc.initialize()
+    try:
+        yield svc
+    finally:
+        await db.close()
+
+
+async def _add_file(svc, checksum):
+    await svc.library_repo.create_file({
+        'id': checksum, 'checksum': checksum, 'filename': f'{checksum}.3mf',
+        'library_path': f'models/{checksum}.3mf', 'file_size': 1, 'file_type': '.3mf',
+        'sources': '[]', 'added_to_library': '2026-10-19T00:00:00',
+    })
+
+
+async def test_plates_are_stored_queried_and_released(library, project):
+    svc = library
+    parsed = await BambuParser().parse_file(str(project))
+    await _add_file(svc, 'multi')
+    await _add_file(svc, 'single')
+    await svc.library_repo.update_file('multi', {'plate_count': 3})
+
+    await svc._store_plates('multi', parsed['plates'], parsed['thumbnails'])
+
+    plates = await svc.get_plates('multi', sort_by='estimated_time', sort_order='desc')
+    assert [p['plate_index'] for p in plates] == [3, 1, 2]
+    assert plates[2]['filaments'][0]['type'] == 'PETG'
+    assert plates[2]['has_gcode'] is True and plates[0]['support_used'] is True
+    hashes = {p['thumbnail_hash'] for p in plates}
+    assert len(hashes) == 3 and all(svc.thumbnail_store.find(h) for h in hashes)
+
+    files, _ = await svc.library_repo.list_files({'min_plates': 2})
+    assert [f['checksum'] for f in files] == ['multi']
+    files, _ = await svc.library_repo.list_files({'max_plate_time': 1000})
+    assert [f['checksum'] for f in files] == ['multi']
+    files, _ = await svc.library_repo.list_files({'max_plate_time': 600})
+    assert files == []
+    files, _ = await svc.library_repo.list_files({'sort_by': 'plate_count', 'sort_order': 'desc'})
+    assert files[0]['plate_count'] == 3
+
+    # Re-analysis with one plate fewer drops the superseded thumbnail
+    dropped = plates[0]['thumbnail_hash']
+    await svc._store_plates('multi', parsed['plates'][:2], parsed['thumbnails'])
+    assert len(await svc.get_plates('multi')) == 2
+    assert svc.thumbnail_store.find(dropped) is None
+
+    assert await svc.delete_file('multi', delete_physical=False) is True
+    assert await svc.get_plates('multi') == []
+    assert not any(svc.thumbnail_store.find(h) for h in hashes)
+
+
+async def test_plates_endpoint(library, project):
+    from fastapi import FastAPI
+    from httpx import ASGITransport, AsyncClient
+
+    from src.api.routers import library as library_router
+    from src.utils.errors import PrinternizerError, printernizer_exception_handler
+
+    svc = library
+    parsed = await BambuParser().parse_file(str(project))
+    await _add_file(svc, 'multi')
+    await svc._store_plates('multi', parsed['plates'], parsed['thumbnails'])
+
+    app = FastAPI()
+    app.add_exception_handler(PrinternizerError, printernizer_exception_handler)
+    app.include_router(library_router.router, prefix="/api/v1")
+    app.dependency_overrides[library_router.get_library_service] = lambda: svc
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/v1/library/files/multi/plates",
+                                    params={'sort_by': 'filament_weight'})
+        assert response.status_code == 200
+        body = response.json()
+        assert body['count'] == 3
+        assert [p['plate_index'] for p in body['plates']] == [2, 1, 3]
+        assert body['plates'][0]['name'] == 'Small parts'
+
+        response = await client.get("/api/v1/library/files/unknown/plates")
+        assert response.status_code == 404
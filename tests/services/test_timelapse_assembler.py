@@ -0,0 +1,219 @@
+"""
+Tests for the built-in streaming timelapse assembler.
+"""
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.database.database import Database
+from src.models.timelapse import TimelapseStatus
+from src.services.timelapse_assembler import (
+    AssemblyError, Deflicker, TimelapseAssembler, frame_luminance
+)
+from src.services.timelapse_service import TimelapseService
+from src.utils.config import validate_settings_on_startup
+
+# Stands in for ffmpeg: records the frame size and number of bytes read from stdin
+FAKE_FFMPEG = '''#!{python}
+import sys
+args = sys.argv[1:]
+if 'fail' in sys.argv[0]:
+    with open(args[-1], 'w') as output:
+        output.write("truncated")
+    sys.stderr.write("Unknown encoder 'libx264'\\n")
+    sys.exit(1)
+size = args[args.index('-s') + 1]
+received = 0
+while True:
+    chunk = sys.stdin.buffer.read(65536)
+    if not chunk:
+        break
+    received += len(chunk)
+with open(args[-1], 'w') as output:
+    output.write(f"{{size}} {{received}}")
+'''
+
+
+def gray(level, size=(4, 3)):
+    return np.full((size[1], size[0], 3), level, dtype=np.uint8)
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path):
+    def make(name='ffmpeg'):
+        script = tmp_path / name
+        script.write_text(FAKE_FFMPEG.format(python=sys.executable))
+        script.chmod(0o755)
+        return str(script)
+    return make
+
+
+@pytest.fixture
+def frames_folder(tmp_path):
+    folder = tmp_path / "print_a"
+    folder.mkdir()
+    for i in range(5):
+        Image.new('RGB', (9, 7), (100 + i, 100, 100)).save(folder / f"frame_{i:04d}.jpg")
+    # The last image of a print may still be half written
+    (folder / "frame_0005.jpg").write_bytes(b'\xff\xd8\xff\xe0 truncated')
+    (folder / "notes.txt").write_text("not a frame")
+    return folder
+
+
+class TestDeflicker:
+    """Test sliding-window luminance normalisation."""
+
+    def test_alternating_exposure_is_evened_out(self):
+        deflicker = Deflicker(window=5)
+        levels = [100, 140] * 10
+
+        output = [f for f in (deflicker.push(gray(level)) for level in levels) if f is not None]
+        output += list(deflicker.flush())
+
+        assert len(output) == len(levels)
+        lumas = [frame_luminance(frame) for frame in output]
+        # Away from the ends every window averages 112-128
+        assert all(108 <= luma <= 132 for luma in lumas[2:-2])
+        assert max(lumas) - min(lumas) < 40
+
+    def test_slow_changes_are_kept_and_memory_is_bounded(self):
+        deflicker = Deflicker(window=9)
+        output = []
+        for level in range(40, 240):
+            corrected = deflicker.push(gray(level))
+            assert len(deflicker._pending) <= 5
+            assert len(deflicker._lumas) <= 9
+            if corrected is not None:
+                output.append(corrected)
+        output += list(deflicker.flush())
+
+        lumas = [frame_luminance(frame) for frame in output]
+        assert len(lumas) == 200
+        assert lumas == sorted(lumas)
+        assert abs(lumas[100] - 140) <= 1
+
+    def test_frames_are_returned_in_order(self):
+        deflicker = Deflicker(window=3)
+        frames = [gray(level) for level in (10, 20, 30, 40)]
+
+        assert deflicker.push(frames[0]) is None
+        assert deflicker.push(frames[1]) is not None
+        rest = [deflicker.push(frames[2]), deflicker.push(frames[3]), *deflicker.flush()]
+
+        assert [round(frame_luminance(f)) for f in rest] == [20, 30, 35]
+
+
+class TestTimelapseAssembler:
+    """Test streaming frames into ffmpeg."""
+
+    def test_frames_are_streamed_to_ffmpeg(self, fake_ffmpeg, frames_folder, tmp_path):
+        assembler = TimelapseAssembler(ffmpeg_path=fake_ffmpeg(), fps=10, deflicker_window=3, decode_workers=2)
+        output = tmp_path / "out.mp4"
+
+        result = assembler.assemble(frames_folder, output)
+
+        assert (result.frames, result.skipped_frames) == (5, 1)
+        assert (result.width, result.height, result.duration) == (9, 7, 0.5)
+        assert output.read_text() == f"9x7 {5 * 9 * 7 * 3}"
+
+    def test_command(self, tmp_path):
+        assembler = TimelapseAssembler(ffmpeg_path='ffmpeg', fps=24, command_prefix=['nice', '-n', '5'])
+
+        command = assembler.command((640, 480), tmp_path / "out.mp4")
+
+        assert command[:4] == ['nice', '-n', '5', 'ffmpeg']
+        assert command[command.index('-s') + 1] == '640x480'
+        assert command[command.index('-r') + 1] == '24'
+        assert command[command.index('-i') + 1] == '-'
+        assert command[-1] == str(tmp_path / "out.mp4")
+
+    def test_ffmpeg_failure_is_reported(self, fake_ffmpeg, frames_folder, tmp_path):
+        assembler = TimelapseAssembler(ffmpeg_path=fake_ffmpeg('ffmpeg-fail'))
+
+        with pytest.raises(AssemblyError, match="code 1: Unknown encoder 'libx264'"):
+            assembler.assemble(frames_folder, tmp_path / "out.mp4")
+
+        # The truncated video is not left behind
+        assert not list(tmp_path.glob("out*.mp4"))
+
+    def test_output_is_renamed_into_place_when_complete(self, fake_ffmpeg, frames_folder, tmp_path):
+        assembler = TimelapseAssembler(ffmpeg_path=fake_ffmpeg())
+
+        assembler.assemble(frames_folder, tmp_path / "out.mp4")
+
+        assert [path.name for path in tmp_path.glob("out*.mp4")] == ["out.mp4"]
+
+    def test_missing_ffmpeg_and_empty_folder(self, frames_folder, tmp_path):
+        with pytest.raises(AssemblyError, match="Could not start ffmpeg"):
+            TimelapseAssembler(ffmpeg_path=str(tmp_path / "missing")).assemble(frames_folder, tmp_path / "o.mp4")
+
+        empty = tmp_path / "empty"
+        empty.mkdir()
+        with pytest.raises(AssemblyError, match="No readable images"):
+            TimelapseAssembler().assemble(empty, tmp_path / "o.mp4")
+
+
+@pytest.fixture
+async def database(tmp_path):
+    db = Database(str(tmp_path / "timelapse.db"))
+    await db.initialize()
+    yield db
+    await db.close()
+
+
+def make_service(database, **settings):
+    event_service = MagicMock()
+    event_service.emit = AsyncMock()
+    service = TimelapseService(database, event_service)
+    service.settings = service.settings.model_copy(update=settings)
+    return service
+
+
+async def test_service_renders_with_builtin_assembler(database, fake_ffmpeg, frames_folder, tmp_path):
+    service = make_service(database, timelapse_ffmpeg_path=fake_ffmpeg(), timelapse_fps=5,
+                           timelapse_output_folder=str(tmp_path / "videos"), timelapse_process_nice=0)
+    await service._create_timelapse(str(frames_folder), frames_folder.name, 6)
+    timelapse = await service.get_timelapse_by_source_folder(str(frames_folder))
+
+    await service._process_timelapse(timelapse['id'])
+
+    timelapse = await service.get_timelapse(timelapse['id'])
+    assert timelapse['status'] == TimelapseStatus.COMPLETED.value
+    assert timelapse['video_duration'] == 1.0
+    assert timelapse['output_video_path'] == str(tmp_path / "videos" / "print_a.mp4")
+
+
+def test_flickerfree_is_used_when_configured_or_ffmpeg_is_missing(database, tmp_path):
+    script = tmp_path / "do_timelapse.sh"
+    script.write_text("#!/bin/sh\n")
+
+    service = make_service(database, timelapse_renderer='flickerfree', timelapse_flickerfree_path=str(script))
+    assert service._select_renderer() == 'flickerfree'
+
+    service = make_service(database, timelapse_ffmpeg_path=str(tmp_path / "missing"),
+                           timelapse_flickerfree_path=str(script))
+    assert service._select_renderer() == 'flickerfree'
+
+    service = make_service(database, timelapse_ffmpeg_path=sys.executable,
+                           timelapse_flickerfree_path=str(script))
+    assert service._select_renderer() == 'builtin'
+
+
+def test_startup_validation_follows_renderer_fallback(database, tmp_path):
+    script = tmp_path / "do_timelapse.sh"
+    script.write_text("#!/bin/sh\n")
+
+    service = make_service(database, timelapse_enabled=True, timelapse_flickerfree_path=str(script),
+                           timelapse_ffmpeg_path=str(tmp_path / "missing"))
+    result = validate_settings_on_startup(service.settings)
+    assert not [warning for warning in result['warnings'] if 'ffmpeg' in warning]
+    assert any('rendered with FlickerFree' in message for message in result['info'])
+
+    service = make_service(database, timelapse_enabled=True,
+                           timelapse_flickerfree_path=str(tmp_path / "missing.sh"),
+                           timelapse_ffmpeg_path=str(tmp_path / "missing"))
+    result = validate_settings_on_startup(service.settings)
+    assert any('ffmpeg not found' in warning for warning in result['warnings'])
@@ -0,0 +1,194 @@
+"""
+Tests for incremental scanning of the timelapse source folder.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from watchdog.events import DirCreatedEvent, FileCreatedEvent
+
+from src.database.database import Database
+from src.models.timelapse import TimelapseStatus
+from src.services.timelapse_service import SourceFolderHandler, TimelapseService
+
+
+@pytest.fixture
+async def database(tmp_path):
+    db = Database(str(tmp_path / "timelapse.db"))
+    await db.initialize()
+    yield db
+    await db.close()
+
+
+@pytest.fixture
+def source(tmp_path):
+    folder = tmp_path / "timelapse-images"
+    folder.mkdir()
+    return folder
+
+
+def make_service(database, source):
+    event_service = MagicMock()
+    event_service.emit = AsyncMock()
+    service = TimelapseService(database, event_service)
+    service.settings = service.settings.model_copy(update={'timelapse_source_folder': str(source)})
+    return service
+
+
+def add_images(folder, count, start=0):
+    folder.mkdir(exist_ok=True)
+    for i in range(start, start + count):
+        (folder / f"frame_{i:04d}.jpg").write_bytes(b'jpeg')
+
+
+def age(*paths):
+    """Backdate mtimes so the folders count as settled."""
+    old = time.time() - 60
+    for path in paths:
+        os.utime(path, (old, old))
+
+
+async def test_unchanged_folders_are_skipped(database, source):
+    add_images(source / "print_a", 3)
+    add_images(source / "print_b", 5)
+    (source / "empty").mkdir()
+    age(source / "print_a", source / "print_b", source / "empty", source)
+    service = make_service(database, source)
+
+    await service._scan_source_folders()
+
+    timelapses = await database._fetch_all("SELECT folder_name, image_count FROM timelapses ORDER BY folder_name")
+    assert [(t['folder_name'], t['image_count']) for t in timelapses] == [('print_a', 3), ('print_b', 5)]
+
+    with patch.object(service, '_count_images', wraps=service._count_images) as count, \
+            patch.object(service, 'get_timelapse_by_source_folder',
+                         wraps=service.get_timelapse_by_source_folder) as lookup:
+        await service._scan_source_folders()
+
+        count.assert_not_called()
+        lookup.assert_not_called()
+
+        # Only the folder with new images is recounted
+        add_images(source / "print_b", 2, start=5)
+        await service._scan_source_folders()
+
+        assert count.call_count == 1
+        assert lookup.call_count == 1
+    updated = await service.get_timelapse_by_source_folder(str(source / "print_b"))
+    assert updated['image_count'] == 7
+
+
+async def test_folder_state_survives_restart(database, source):
+    add_images(source / "print_a", 3)
+    age(source / "print_a", source)
+    await make_service(database, source)._scan_source_folders()
+
+    service = make_service(database, source)
+    with patch.object(service, '_count_images', wraps=service._count_images) as count:
+        await service._scan_source_folders()
+
+    count.assert_not_called()
+    state = await database._fetch_one("SELECT * FROM timelapse_folder_state WHERE source_folder = ?",
+                                      [str(source / "print_a")])
+    assert state['image_count'] == 3
+    assert state['dir_mtime_ns'] == os.stat(source / "print_a").st_mtime_ns
+
+
+async def test_recently_modified_folder_is_recounted(database, source):
+    add_images(source / "print_a", 3)
+    age(source)
+    service = make_service(database, source)
+    await service._scan_source_folders()
+
+    # A same-tick addition may not change a coarse mtime, so the folder is not trusted yet
+    with patch.object(service, '_count_images', wraps=service._count_images) as count:
+        await service._scan_source_folders()
+    count.assert_called_once()
+
+
+async def test_watcher_reports_new_folder_without_listing(database, source):
+    add_images(source / "print_a", 3)
+    age(source / "print_a", source)
+    service = make_service(database, source)
+    await service._scan_source_folders()
+    listed = os.stat(source)
+
+    add_images(source / "print_b", 4)
+    age(source / "print_b")
+    # Source folder looks unchanged, as with a coarse mtime
+    os.utime(source, ns=(listed.st_atime_ns, listed.st_mtime_ns))
+    service._queue_new_folder(str(source / "print_b"))
+    assert service._scan_wakeup.is_set()
+
+    with patch.object(service, '_list_subfolders') as listing:
+        await service._scan_source_folders()
+    listing.assert_not_called()
+
+    discovered = await service.get_timelapse_by_source_folder(str(source / "print_b"))
+    assert discovered['image_count'] == 4
+
+
+async def test_observer_picks_up_new_folder(database, source):
+    service = make_service(database, source)
+    service._loop = asyncio.get_running_loop()
+    service._start_folder_watcher()
+    try:
+        (source / "print_new").mkdir()
+        await asyncio.wait_for(service._scan_wakeup.wait(), 5)
+        assert service._new_folders == {str(source / "print_new")}
+    finally:
+        await service._stop_folder_watcher()
+
+
+def test_handler_ignores_files():
+    service = MagicMock()
+    handler = SourceFolderHandler(service)
+
+    handler.on_created(FileCreatedEvent('/images/frame.jpg'))
+    service._folder_appeared.assert_not_called()
+
+    handler.on_created(DirCreatedEvent('/images/print_a'))
+    service._folder_appeared.assert_called_once_with('/images/print_a')
+
+
+async def test_removed_and_deleted_folders(database, source):
+    add_images(source / "print_a", 3)
+    add_images(source / "print_b", 2)
+    age(source / "print_a", source / "print_b", source)
+    service = make_service(database, source)
+    await service._scan_source_folders()
+
+    # Deleting the timelapse of an existing folder lets the next scan discover it again
+    timelapse = await service.get_timelapse_by_source_folder(str(source / "print_a"))
+    await service.delete_timelapse(timelapse['id'])
+    await service._scan_source_folders()
+    assert await service.get_timelapse_by_source_folder(str(source / "print_a")) is not None
+
+    # Removed folders are forgotten
+    for image in (source / "print_b").iterdir():
+        image.unlink()
+    (source / "print_b").rmdir()
+    await service._scan_source_folders()
+    assert str(source / "print_b") not in service._folder_state
+    assert await database._fetch_one("SELECT * FROM timelapse_folder_state WHERE source_folder = ?",
+                                     [str(source / "print_b")]) is None
+
+
+async def test_eligible_timelapses_become_pending_without_folder_changes(database, source):
+    add_images(source / "print_a", 3)
+    age(source / "print_a", source)
+    service = make_service(database, source)
+    await service._scan_source_folders()
+    timelapse = await service.get_timelapse_by_source_folder(str(source / "print_a"))
+    assert timelapse['status'] == TimelapseStatus.DISCOVERED.value
+
+    await database.execute("UPDATE timelapses SET auto_process_eligible_at = ? WHERE id = ?",
+                           ((datetime.now() - timedelta(seconds=1)).isoformat(), timelapse['id']))
+    await service._scan_source_folders()
+
+    timelapse = await service.get_timelapse(timelapse['id'])
+    assert timelapse['status'] == TimelapseStatus.PENDING.value
+    assert service._queue_wakeup.is_set()
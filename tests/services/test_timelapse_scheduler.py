@@ -0,0 +1,161 @@
+"""
+Tests for the timelapse render scheduler: concurrency, wakeups and queue estimates.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.database.database import Database
+from src.models.timelapse import TimelapseStatus
+from src.services.timelapse_service import TimelapseService
+
+
+@pytest.fixture
+async def database(tmp_path):
+    db = Database(str(tmp_path / "timelapse.db"))
+    await db.initialize()
+    yield db
+    await db.close()
+
+
+@pytest.fixture
+def service(database):
+    event_service = MagicMock()
+    event_service.emit = AsyncMock()
+    service = TimelapseService(database, event_service)
+    service._max_concurrent = 2
+    return service
+
+
+async def add_timelapse(database, name, status, image_count=100, eligible_minutes_ago=0,
+                        started=None, completed=None):
+    now = datetime.now()
+    await database.execute(
+        """
+        INSERT INTO timelapses (
+            id, source_folder, folder_name, status, image_count, auto_process_eligible_at,
+            processing_started_at, processing_completed_at, retry_count, pinned, created_at, updated_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, 0, ?, ?)
+        """,
+        (
+            name, f"/data/timelapse-images/{name}", name, status.value, image_count,
+            (now - timedelta(minutes=eligible_minutes_ago)).isoformat(),
+            started.isoformat() if started else None,
+            completed.isoformat() if completed else None,
+            now.isoformat(), now.isoformat()
+        )
+    )
+
+
+async def settle(condition=lambda: False, timeout=2.0):
+    """Let the scheduler run until condition holds or the timeout passes."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition() and loop.time() < deadline:
+        await asyncio.sleep(0.01)
+
+
+async def test_renders_run_concurrently_and_next_starts_when_one_finishes(service, database):
+    for i, name in enumerate(['first', 'second', 'third']):
+        await add_timelapse(database, name, TimelapseStatus.PENDING, eligible_minutes_ago=10 - i)
+
+    started, finish = [], {}
+
+    async def fake_render(timelapse_id):
+        started.append(timelapse_id)
+        finish[timelapse_id] = asyncio.Event()
+        await finish[timelapse_id].wait()
+        await database.execute("UPDATE timelapses SET status = ? WHERE id = ?",
+                               (TimelapseStatus.COMPLETED.value, timelapse_id))
+
+    service._process_timelapse = fake_render
+    loop_task = asyncio.create_task(service._process_queue_loop())
+    try:
+        await settle(lambda: len(started) == 2)
+        await asyncio.sleep(0.1)
+        assert started == ['first', 'second']
+
+        finish['second'].set()
+        await settle(lambda: len(started) == 3)
+        assert started == ['first', 'second', 'third']
+        assert set(service._running_jobs) == {'first', 'third'}
+    finally:
+        service._shutdown = True
+        loop_task.cancel()
+        for event in finish.values():
+            event.set()
+        await settle(lambda: not service._running_jobs)
+
+
+async def test_trigger_processing_wakes_scheduler(service, database):
+    await add_timelapse(database, 'manual', TimelapseStatus.DISCOVERED)
+    rendered = []
+
+    async def fake_render(timelapse_id):
+        rendered.append(timelapse_id)
+        await database.execute("UPDATE timelapses SET status = ? WHERE id = ?",
+                               (TimelapseStatus.COMPLETED.value, timelapse_id))
+
+    service._process_timelapse = fake_render
+    loop_task = asyncio.create_task(service._process_queue_loop())
+    try:
+        await asyncio.sleep(0.1)
+        assert rendered == []
+
+        await service.trigger_processing('manual')
+        await settle(lambda: rendered)
+        await asyncio.sleep(0.1)
+
+        assert rendered == ['manual']
+    finally:
+        service._shutdown = True
+        loop_task.cancel()
+
+
+async def test_queue_positions_and_eta(service, database):
+    now = datetime.now()
+    # Past renders took 1, 3 and 3 s per image; the median is used
+    for name, seconds in [('done1', 100), ('done2', 300), ('done3', 300)]:
+        await add_timelapse(database, name, TimelapseStatus.COMPLETED, image_count=100,
+                            started=now - timedelta(hours=1),
+                            completed=now - timedelta(hours=1) + timedelta(seconds=seconds))
+    await add_timelapse(database, 'rendering', TimelapseStatus.PROCESSING, image_count=100,
+                        eligible_minutes_ago=20, started=now - timedelta(seconds=60))
+    for i, name in enumerate(['next', 'later', 'last']):
+        await add_timelapse(database, name, TimelapseStatus.PENDING, image_count=100,
+                            eligible_minutes_ago=10 - i)
+
+    queue = await service.get_queue()
+
+    assert queue['seconds_per_image'] == 3.0
+    assert queue['processing_count'] == 1 and queue['pending_count'] == 3
+    assert [(item['id'], item['queue_position']) for item in queue['items']] == [
+        ('rendering', None), ('next', 1), ('later', 2), ('last', 3)
+    ]
+    # Two slots: 'rendering' frees its slot after ~240 s, the idle slot takes 'next'
+    etas = [item['eta_seconds'] for item in queue['items']]
+    assert etas[1:] == [300, pytest.approx(540, abs=2), 600]
+    assert etas[0] == pytest.approx(240, abs=2)
+
+    timelapse = await service.get_timelapse('later')
+    assert timelapse['queue_position'] == 2
+    assert 'queue_position' not in await service.get_timelapse('done1')
+
+
+def test_render_priority_prefix(service):
+    service.settings = service.settings.model_copy(update={'timelapse_process_nice': 0})
+    assert service._priority_prefix() == []
+
+    service.settings = service.settings.model_copy(update={'timelapse_process_nice': 15})
+    prefix = service._priority_prefix()
+    assert prefix == [] or prefix[1:] == ['-n', '15']
+
+
+def test_worker_count_follows_settings(service):
+    service.settings = service.settings.model_copy(update={'timelapse_max_concurrent': 3})
+    assert service._resolve_max_concurrent() == 3
+
+    service.settings = service.settings.model_copy(update={'timelapse_max_concurrent': 0})
+    assert service._resolve_max_concurrent() >= 1